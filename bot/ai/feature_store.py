@@ -0,0 +1,172 @@
+# bot/ai/feature_store.py
+"""
+Хранилище признаков NeuralTrader
+
+Рыночные признаки считаются один раз на закрытие бара и хранятся строками
+float32 фиксированной ширины с ключом (timestamp, symbol). Одна и та же строка
+используется и для предсказания, и для воспроизведения опыта при обучении,
+поэтому сеть обучается ровно на тех входах, которые видела при ставке.
+
+Строки лежат в кольцевом буфере заранее выделенных NumPy массивов; при
+заполнении вытесняется самая старая строка. Вместе со строкой хранится
+отпечаток исходных данных: если формирующийся бар изменился, строка с тем же
+ключом пересчитывается. Буфер сохраняется в .npz и читается при запуске.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Емкость по умолчанию: ~3.5 суток минутных баров одного инструмента
+FEATURE_STORE_CAPACITY = 5000
+
+# Фиксированная ширина колонки символа в файле
+SYMBOL_DTYPE = '<U32'
+
+FeatureKey = Tuple[int, str]
+
+
+class FeatureStore:
+    """Кольцевой буфер строк признаков float32 с ключом (timestamp_ms, symbol)"""
+
+    def __init__(self, width: int, capacity: int = FEATURE_STORE_CAPACITY, path: Optional[str] = None):
+        self.width = width
+        self.capacity = capacity
+        self.path = path
+        self._lock = threading.Lock()
+        self._timestamps = np.zeros(capacity, dtype=np.int64)
+        self._symbols = np.zeros(capacity, dtype=SYMBOL_DTYPE)
+        self._fingerprints = np.zeros(capacity, dtype=np.int64)
+        self._rows = np.zeros((capacity, width), dtype=np.float32)
+        self._index: Dict[FeatureKey, int] = {}
+        self._cursor = 0
+        self._dirty = False
+        self._stats = {'hits': 0, 'misses': 0, 'refreshed': 0, 'evicted': 0}
+
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, timestamp: int, symbol: str) -> Optional[np.ndarray]:
+        """Строка признаков по ключу (только для чтения) или None"""
+        with self._lock:
+            slot = self._index.get((int(timestamp), symbol))
+            return None if slot is None else self._readonly(slot)
+
+    def put(self, timestamp: int, symbol: str, row: Sequence[float], fingerprint: int = 0) -> np.ndarray:
+        """Запись строки; существующая строка с тем же ключом перезаписывается"""
+        row = np.asarray(row, dtype=np.float32)
+        if row.shape != (self.width,):
+            raise ValueError(f"Ожидалась строка ширины {self.width}, получено {row.shape}")
+
+        key = (int(timestamp), symbol)
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._cursor
+                self._cursor = (self._cursor + 1) % self.capacity
+                evicted = (int(self._timestamps[slot]), str(self._symbols[slot]))
+                if self._index.get(evicted) == slot:
+                    del self._index[evicted]
+                    self._stats['evicted'] += 1
+                self._index[key] = slot
+
+            self._timestamps[slot] = key[0]
+            self._symbols[slot] = symbol
+            self._fingerprints[slot] = fingerprint
+            self._rows[slot] = row
+            self._dirty = True
+            return self._readonly(slot)
+
+    def get_or_compute(self, timestamp: int, symbol: str, fingerprint: int,
+                       compute: Callable[[], Sequence[float]]) -> np.ndarray:
+        """
+        Строка из хранилища, а при промахе - вычисленная и сохраненная
+
+        Отпечаток отличает закрытый бар от формирующегося: если данные бара с
+        тем же ключом изменились, строка пересчитывается.
+        """
+        with self._lock:
+            slot = self._index.get((int(timestamp), symbol))
+            if slot is not None and self._fingerprints[slot] == fingerprint:
+                self._stats['hits'] += 1
+                return self._readonly(slot)
+            self._stats['refreshed' if slot is not None else 'misses'] += 1
+
+        # Расчет вне блокировки: признаки считаются дольше, чем чтение строки
+        return self.put(timestamp, symbol, compute(), fingerprint)
+
+    def _readonly(self, slot: int) -> np.ndarray:
+        row = self._rows[slot].copy()
+        row.flags.writeable = False
+        return row
+
+    # ==================== ФАЙЛ ====================
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Атомарное сохранение буфера, если он менялся после последнего сохранения"""
+        path = path or self.path
+        if not path:
+            return False
+
+        with self._lock:
+            if not self._dirty:
+                return False
+            # Строки в порядке записи: от самой старой к самой новой
+            order = [slot for slot in np.roll(np.arange(self.capacity), -self._cursor)
+                     if self._index.get((int(self._timestamps[slot]), str(self._symbols[slot]))) == slot]
+            arrays = {
+                'timestamps': self._timestamps[order], 'symbols': self._symbols[order],
+                'fingerprints': self._fingerprints[order], 'rows': self._rows[order],
+            }
+            self._dirty = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        return True
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Загрузка буфера из файла; строки другой ширины игнорируются"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+
+        try:
+            with np.load(path) as data:
+                rows = data['rows']
+                if rows.ndim != 2 or rows.shape[1] != self.width:
+                    logger.warning(f"⚠️ Хранилище признаков {path}: ширина {rows.shape} не совпадает с {self.width}")
+                    return 0
+                keep = slice(max(0, len(rows) - self.capacity), None)
+                timestamps, symbols = data['timestamps'][keep], data['symbols'][keep]
+                fingerprints, rows = data['fingerprints'][keep], rows[keep]
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения хранилища признаков {path}: {e}")
+            return 0
+
+        with self._lock:
+            count = len(rows)
+            self._timestamps[:count] = timestamps
+            self._symbols[:count] = symbols
+            self._fingerprints[:count] = fingerprints
+            self._rows[:count] = rows
+            self._index = {(int(ts), str(symbol)): slot for slot, (ts, symbol) in enumerate(zip(timestamps, symbols))}
+            self._cursor = count % self.capacity
+            self._dirty = False
+        return count
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'rows': len(self._index)}
@@ -270,12 +270,17 @@ class NeuralIntegration:
                 if cached_ts and (current_time - cached_ts).total_seconds() < self.cache_ttl_minutes * 60:
                     return cached_entry['data']
             
-            # Проверяем существование файла
-            if not os.path.exists(trade_journal_path):
-                self.logger.warning(f"Файл журнала сделок не найден: {trade_journal_path}")
-                return {}
-            
-            df = pd.read_csv(trade_journal_path)
+            from bot.core.trade_journal import TRADE_JOURNAL_PATH, load_trade_journal, read_journal_csv
+
+            if os.path.normpath(trade_journal_path) == os.path.normpath(TRADE_JOURNAL_PATH):
+                # Основной журнал читается из колоночного хранилища
+                df = load_trade_journal()
+            else:
+                # Проверяем существование файла
+                if not os.path.exists(trade_journal_path):
+                    self.logger.warning(f"Файл журнала сделок не найден: {trade_journal_path}")
+                    return {}
+                df = read_journal_csv(trade_journal_path)
             if df.empty:
                 self.logger.info("Журнал сделок пуст")
                 return {}
@@ -693,7 +698,8 @@ class NeuralIntegration:
         except:
             return "medium"
     
-    def make_neural_recommendation(self, market_data: Dict, strategy_signals: Dict) -> Optional[Dict]:
+    def make_neural_recommendation(self, market_data: Dict, strategy_signals: Dict,
+                                   symbol: Optional[str] = None) -> Optional[Dict]:
         """Улучшенное получение рекомендации с интеграцией риск-менеджмента"""
         try:
             # Проверяем интеграцию с риск-менеджером
@@ -732,7 +738,7 @@ class NeuralIntegration:
             adapted_signals = self.adapt_strategy_signals_for_neural(strategy_signals)
             
             # Получаем предсказания от нейронной сети
-            predictions = self.neural_trader.predict_strategy_performance(market_data, adapted_signals)
+            predictions = self.neural_trader.predict_strategy_performance(market_data, adapted_signals, symbol)
             
             if not predictions:
                 return None
@@ -952,16 +958,17 @@ class NeuralIntegration:
         except Exception as e:
             self.logger.error(f"Ошибка обновления истории точности: {e}")
     
-    def place_neural_bet(self, market_data: Dict, strategy_signals: Dict) -> Optional[Dict]:
+    def place_neural_bet(self, market_data: Dict, strategy_signals: Dict,
+                         symbol: Optional[str] = None) -> Optional[Dict]:
         """Размещение нейронной ставки с улучшенным контролем"""
         try:
             # Получаем рекомендацию
-            recommendation = self.make_neural_recommendation(market_data, strategy_signals)
+            recommendation = self.make_neural_recommendation(market_data, strategy_signals, symbol)
             if not recommendation:
                 return None
             
             # Создаем ставку через нейронную сеть
-            bet = self.neural_trader.make_bet(market_data, strategy_signals)
+            bet = self.neural_trader.make_bet(market_data, strategy_signals, symbol)
             
             if bet:
                 bet_id = f"neural_bet_{self._now().strftime('%Y%m%d_%H%M%S_%f')[:20]}"
@@ -1134,8 +1141,8 @@ class NeuralIntegration:
                 
                 # Обучаем нейронную сеть если производительность снижается
                 if success_rate < 0.5:
-                    self.neural_trader.train_with_validation()
-                    self.logger.info(f"Автоматическое обучение завершено. "
+                    self.neural_trader.train_async()
+                    self.logger.info(f"Автоматическое обучение запущено в фоне. "
                                    f"Текущая производительность: {success_rate:.1%}")
                 
                 self.last_performance_check = current_time
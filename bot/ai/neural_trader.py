@@ -4,12 +4,27 @@
 
 import numpy as np
 import pandas as pd
+import hashlib
 import json
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 import logging
 
+from .feature_store import FeatureStore
+
+# Таймфреймы рыночной части входа (по 8 признаков на каждый)
+FEATURE_TIMEFRAMES = ['1m', '5m', '15m', '1h']
+# Рыночная строка хранилища: таймфреймы, индикаторы и время бара
+MARKET_FEATURE_WIDTH = len(FEATURE_TIMEFRAMES) * 8 + 16
+# Сигналы стратегий: по 8 признаков на каждую из 10 стратегий
+SIGNAL_FEATURE_WIDTH = 10 * 8
+# Символ для ключа хранилища, если вызывающий код его не передал
+DEFAULT_FEATURE_SYMBOL = 'default'
+FEATURE_STORE_PATH = 'data/ai/feature_store.npz'
+
 class NeuralTrader:
     """
     Улучшенная нейронная сеть для торгового анализа
@@ -69,6 +84,23 @@ class NeuralTrader:
         self.memory = []
         self.performance_history = []
         
+        # Рыночные признаки по барам: общие для предсказаний и воспроизведения опыта
+        self.feature_store = FeatureStore(MARKET_FEATURE_WIDTH, path=FEATURE_STORE_PATH)
+        
+        # Кэш признаков опыта: строка i соответствует одному элементу memory (кольцевой буфер)
+        self.batch_size = 32
+        self._memory_lock = threading.Lock()
+        self._reset_feature_cache()
+        
+        # Фоновое обучение: веса публикуются целиком под _model_lock
+        self._model_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._training_lock = threading.Lock()
+        self._training_thread: Optional[threading.Thread] = None
+        self._training_pending = False
+        self._model_generation = 0
+        self._training_stats = {'runs': 0, 'coalesced': 0, 'last_duration': 0.0, 'last_samples': 0}
+        
         # Логирование
         self.logger = logging.getLogger('neural_trader')
         
@@ -139,185 +171,264 @@ class NeuralTrader:
             return x * mask, mask
         return x, np.ones_like(x)
     
-    def prepare_input_safe(self, market_data: Dict, strategy_signals: Dict) -> np.ndarray:
-        """Безопасная подготовка входных данных с расширенной валидацией"""
-        features = []
+    def prepare_input_safe(self, market_data: Dict, strategy_signals: Dict,
+                           symbol: Optional[str] = None) -> np.ndarray:
+        """Безопасная подготовка входных данных с расширенной валидацией
         
+        Рыночная часть входа берется из хранилища признаков по ключу последнего
+        бара (timestamp, symbol) и считается только на новом баре; сигналы
+        стратегий кодируются на каждом вызове.
+        """
         try:
-            # Рыночные данные с улучшенной обработкой
-            timeframes = ['1m', '5m', '15m', '1h']
-            for tf in timeframes:
-                if tf in market_data and market_data[tf] is not None:
-                    # Преобразуем данные в DataFrame если нужно
-                    tf_data = market_data[tf]
-                    if isinstance(tf_data, dict):
-                        # Конвертируем dict в DataFrame
-                        try:
-                            tf_data = pd.DataFrame(tf_data)
-                        except Exception as e:
-                            self.logger.warning(f"Не удалось конвертировать данные {tf} в DataFrame: {e}")
-                            features.extend([0] * 8)
-                            continue
+            market_row = self._market_feature_row(market_data, symbol)
+            signal_row = self._signal_features(market_data, strategy_signals)
+            return self._assemble_input(market_row, signal_row)
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка подготовки входных данных: {e}")
+            # Возвращаем нулевой вектор с новым размером
+            return np.zeros((1, self.input_size), dtype=np.float32)
+    
+    def _market_feature_row(self, market_data: Dict, symbol: Optional[str] = None) -> np.ndarray:
+        """Строка рыночных признаков из хранилища (при промахе - расчет и запись)"""
+        key = self._feature_key(market_data, symbol)
+        if key is None:
+            # Без меток времени бар не идентифицировать - считаем без кэша
+            return self._market_features(market_data)
+        
+        timestamp, feature_symbol, fingerprint = key
+        moment = datetime.fromtimestamp(timestamp / 1000)
+        return self.feature_store.get_or_compute(
+            timestamp, feature_symbol, fingerprint, lambda: self._market_features(market_data, moment))
+    
+    def _feature_key(self, market_data: Dict, symbol: Optional[str] = None) -> Optional[Tuple[int, str, int]]:
+        """Ключ (timestamp последнего бара в мс, symbol) и отпечаток последних баров"""
+        latest = None
+        # Строка на таймфрейм: timestamp, число баров, OHLCV последнего бара; -1 - таймфрейма нет
+        fingerprint = np.full((len(FEATURE_TIMEFRAMES), 7), -1.0, dtype='<f8')
+        for row, tf in enumerate(FEATURE_TIMEFRAMES):
+            df = market_data.get(tf)
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                continue
+            
+            timestamp = self._bar_timestamp_ms(df)
+            if timestamp is None:
+                return None
+            latest = timestamp if latest is None else max(latest, timestamp)
+            last = df.iloc[-1]
+            fingerprint[row] = (timestamp, len(df), *(float(last.get(col, 0.0)) for col in ('open', 'high', 'low', 'close', 'volume')))
+        
+        if latest is None:
+            return None
+        # blake2b по упакованным числам одинаков между запусками и версиями Python
+        # (встроенный hash зависит от PYTHONHASHSEED и адресов объектов); 8 байт - int64 хранилища
+        digest = hashlib.blake2b(fingerprint.tobytes(), digest_size=8).digest()
+        return latest, symbol or DEFAULT_FEATURE_SYMBOL, int.from_bytes(digest, 'little', signed=True)
+    
+    @staticmethod
+    def _bar_timestamp_ms(df: pd.DataFrame) -> Optional[int]:
+        """Метка времени последнего бара в мс (колонка timestamp или DatetimeIndex)"""
+        if 'timestamp' in df.columns:
+            value = df['timestamp'].iloc[-1]
+        elif isinstance(df.index, pd.DatetimeIndex):
+            value = df.index[-1]
+        else:
+            return None
+        
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return None if np.isnan(value) else int(value)
+        value = pd.Timestamp(value)
+        if value is pd.NaT:
+            return None
+        if value.tzinfo is not None:
+            value = value.tz_convert('UTC').tz_localize(None)
+        return int(value.value // 1_000_000)
+    
+    def _market_features(self, market_data: Dict, moment: Optional[datetime] = None) -> np.ndarray:
+        """Рыночные признаки: таймфреймы (32), индикаторы (8), время бара (8)"""
+        features = []
+        
+        # Рыночные данные с улучшенной обработкой
+        for tf in FEATURE_TIMEFRAMES:
+            if tf in market_data and market_data[tf] is not None:
+                # Преобразуем данные в DataFrame если нужно
+                tf_data = market_data[tf]
+                if isinstance(tf_data, dict):
+                    # Конвертируем dict в DataFrame
+                    try:
+                        tf_data = pd.DataFrame(tf_data)
+                    except Exception as e:
+                        self.logger.warning(f"Не удалось конвертировать данные {tf} в DataFrame: {e}")
+                        features.extend([0] * 8)
+                        continue
 
-                    if isinstance(tf_data, pd.DataFrame) and not tf_data.empty:
-                        df = tf_data.tail(20).copy()  # Увеличиваем окно
+                if isinstance(tf_data, pd.DataFrame) and not tf_data.empty:
+                    df = tf_data.tail(20).copy()  # Увеличиваем окно
 
-                        # Конвертируем в числовой формат
-                        for col in ['open', 'high', 'low', 'close', 'volume']:
-                            if col in df.columns:
-                                df[col] = pd.to_numeric(df[col], errors='coerce')
+                    # Конвертируем в числовой формат
+                    for col in ['open', 'high', 'low', 'close', 'volume']:
+                        if col in df.columns:
+                            df[col] = pd.to_numeric(df[col], errors='coerce')
 
-                        # Убираем NaN
-                        df = df.dropna()
+                    # Убираем NaN
+                    df = df.dropna()
 
-                        if len(df) > 5:  # Минимум 5 свечей для расчета
-                            # Расширенные технические индикаторы
-                            close_prices = df['close'].values
-                            volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
+                    if len(df) > 5:  # Минимум 5 свечей для расчета
+                        # Расширенные технические индикаторы
+                        close_prices = df['close'].values
+                        volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
 
-                            # Ценовые характеристики
-                            price_change = self._safe_divide(close_prices[-1] - close_prices[0], close_prices[0])
-                            high_values = df['high'].values if 'high' in df.columns else close_prices
-                            low_values = df['low'].values if 'low' in df.columns else close_prices
-                            volatility = self._safe_divide(high_values.max() - low_values.min(), close_prices[-1])
+                        # Ценовые характеристики
+                        price_change = self._safe_divide(close_prices[-1] - close_prices[0], close_prices[0])
+                        high_values = df['high'].values if 'high' in df.columns else close_prices
+                        low_values = df['low'].values if 'low' in df.columns else close_prices
+                        volatility = self._safe_divide(high_values.max() - low_values.min(), close_prices[-1])
 
-                            # Объемные характеристики
-                            volume_trend = self._safe_divide(volumes[-1], np.mean(volumes[:-1])) if len(volumes) > 1 else 1
-                            volume_std = np.std(volumes) / (np.mean(volumes) + 1e-8)
+                        # Объемные характеристики
+                        volume_trend = self._safe_divide(volumes[-1], np.mean(volumes[:-1])) if len(volumes) > 1 else 1
+                        volume_std = np.std(volumes) / (np.mean(volumes) + 1e-8)
 
-                            # Трендовые характеристики
-                            sma_5 = np.mean(close_prices[-5:])
-                            sma_10 = np.mean(close_prices[-10:]) if len(close_prices) >= 10 else sma_5
-                            trend_strength = self._safe_divide(sma_5 - sma_10, sma_10)
+                        # Трендовые характеристики
+                        sma_5 = np.mean(close_prices[-5:])
+                        sma_10 = np.mean(close_prices[-10:]) if len(close_prices) >= 10 else sma_5
+                        trend_strength = self._safe_divide(sma_5 - sma_10, sma_10)
 
-                            # Волатильность и моментум
-                            returns = np.diff(close_prices) / close_prices[:-1]
-                            volatility_std = np.std(returns) if len(returns) > 0 else 0
-                            momentum = self._safe_divide(close_prices[-1] - close_prices[-3], close_prices[-3]) if len(close_prices) >= 3 else 0
+                        # Волатильность и моментум
+                        returns = np.diff(close_prices) / close_prices[:-1]
+                        volatility_std = np.std(returns) if len(returns) > 0 else 0
+                        momentum = self._safe_divide(close_prices[-1] - close_prices[-3], close_prices[-3]) if len(close_prices) >= 3 else 0
 
-                            # Нормализация и клиппинг
-                            features.extend([
-                                np.clip(price_change, -0.2, 0.2),      # ±20%
-                                np.clip(volatility, 0, 0.3),           # До 30%
-                                np.clip(volume_trend, 0.1, 5.0),       # 0.1x - 5x
-                                np.clip(volume_std, 0, 2.0),           # До 200%
-                                np.clip(trend_strength, -0.1, 0.1),    # ±10%
-                                np.clip(volatility_std, 0, 0.1),       # До 10%
-                                np.clip(momentum, -0.1, 0.1),          # ±10%
-                                1 if close_prices[-1] > close_prices[0] else 0  # Направление
-                            ])
-                        else:
-                            features.extend([0] * 8)
+                        # Нормализация и клиппинг
+                        features.extend([
+                            np.clip(price_change, -0.2, 0.2),      # ±20%
+                            np.clip(volatility, 0, 0.3),           # До 30%
+                            np.clip(volume_trend, 0.1, 5.0),       # 0.1x - 5x
+                            np.clip(volume_std, 0, 2.0),           # До 200%
+                            np.clip(trend_strength, -0.1, 0.1),    # ±10%
+                            np.clip(volatility_std, 0, 0.1),       # До 10%
+                            np.clip(momentum, -0.1, 0.1),          # ±10%
+                            1 if close_prices[-1] > close_prices[0] else 0  # Направление
+                        ])
                     else:
                         features.extend([0] * 8)
                 else:
                     features.extend([0] * 8)
-            
-            # 📈 РАСШИРЕННЫЕ сигналы стратегий (увеличено с 4 до 8 features)
-            strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
-            for strategy_name in strategy_names:
-                if strategy_name in strategy_signals:
-                    signal = strategy_signals[strategy_name]
-                    if signal and isinstance(signal, dict):
-                        # Кодируем тип сигнала
-                        signal_type = signal.get('signal', '')
-                        if signal_type == 'BUY':
-                            signal_value = 1.0
-                        elif signal_type == 'SELL':
-                            signal_value = -1.0
-                        else:
-                            signal_value = 0.0
-                        
-                        # Анализ цены входа
-                        entry_price = float(signal.get('entry_price', 0))
-                        current_price = self._get_current_price(market_data)
-                        
-                        price_deviation = 0
-                        if current_price > 0 and entry_price > 0:
-                            price_deviation = self._safe_divide(entry_price - current_price, current_price)
-                            price_deviation = np.clip(price_deviation, -0.1, 0.1)  # ±10%
-                        
-                        # Качество сигнала
-                        signal_strength = float(signal.get('signal_strength', 0.5))
-                        signal_strength = np.clip(signal_strength, 0, 1)
-                        
-                        # Risk/Reward ratio
-                        rr_ratio = float(signal.get('risk_reward_ratio', 1.0))
-                        rr_ratio = np.clip(rr_ratio, 0.5, 5.0)  # От 0.5 до 5.0
-                        rr_ratio_norm = (rr_ratio - 1.0) / 4.0  # Нормализуем к [-0.125, 1.0]
-                        
-                        # 📈 РАСШИРЕННЫЕ features стратегии (4 → 8)
-                        stop_loss = float(signal.get('stop_loss', entry_price * 0.95))
-                        take_profit = float(signal.get('take_profit', entry_price * 1.05))
-                        time_decay = float(signal.get('time_in_position', 0)) / 3600  # часы
-                        confidence_decay = signal_strength * np.exp(-time_decay * 0.1)  # экспоненциальное затухание
-                        
-                        features.extend([
-                            signal_value, price_deviation, signal_strength, rr_ratio_norm,
-                            np.clip(time_decay, 0, 24),  # макс 24 часа
-                            np.clip(confidence_decay, 0, 1),  # затухающая уверенность
-                            1 if signal_type == 'BUY' else (0.5 if signal_type == 'SELL' else 0),  # категориальный сигнал  
-                            np.clip(abs(price_deviation), 0, 0.1)  # абсолютное отклонение
-                        ])
+            else:
+                features.extend([0] * 8)
+        
+        # 🔭 РАСШИРЕННЫЕ рыночные индикаторы (2 → 16)
+        market_sentiment = self._calculate_market_sentiment(market_data)
+        volatility_index = self._calculate_volatility_index(market_data)
+        trend_strength = self._calculate_trend_strength(market_data)
+        momentum_divergence = self._calculate_momentum_divergence(market_data)
+        volume_profile = self._calculate_volume_profile(market_data)
+        correlation_matrix = self._calculate_timeframe_correlation(market_data)
+        
+        # Микроструктурные характеристики
+        spread_dynamics = self._calculate_spread_dynamics(market_data)
+        order_flow_imbalance = self._calculate_order_flow_imbalance(market_data)
+        
+        # Временные факторы
+        time_features = self._extract_temporal_features(moment)
+        
+        features.extend([
+            # Основные рыночные индикаторы (6)
+            np.clip(market_sentiment, -1, 1),
+            np.clip(volatility_index, 0, 2),
+            np.clip(trend_strength, -1, 1),
+            np.clip(momentum_divergence, -1, 1),
+            np.clip(volume_profile, 0, 2),
+            np.clip(correlation_matrix, -1, 1),
+            
+            # Микроструктура (2)
+            np.clip(spread_dynamics, 0, 1),
+            np.clip(order_flow_imbalance, -1, 1),
+            
+            # Временные факторы (8)
+            *time_features
+        ])
+        
+        return self._finite(features)
+    
+    def _signal_features(self, market_data: Dict, strategy_signals: Dict) -> np.ndarray:
+        """Признаки сигналов стратегий: по 8 на каждую из 10 стратегий"""
+        features = []
+        
+        # 📈 РАСШИРЕННЫЕ сигналы стратегий (увеличено с 4 до 8 features)
+        strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
+        for strategy_name in strategy_names:
+            if strategy_name in strategy_signals:
+                signal = strategy_signals[strategy_name]
+                if signal and isinstance(signal, dict):
+                    # Кодируем тип сигнала
+                    signal_type = signal.get('signal', '')
+                    if signal_type == 'BUY':
+                        signal_value = 1.0
+                    elif signal_type == 'SELL':
+                        signal_value = -1.0
                     else:
-                        features.extend([0, 0, 0.5, 0, 0, 0.5, 0, 0])  # 8 нейтральных features
+                        signal_value = 0.0
+                    
+                    # Анализ цены входа
+                    entry_price = float(signal.get('entry_price', 0))
+                    current_price = self._get_current_price(market_data)
+                    
+                    price_deviation = 0
+                    if current_price > 0 and entry_price > 0:
+                        price_deviation = self._safe_divide(entry_price - current_price, current_price)
+                        price_deviation = np.clip(price_deviation, -0.1, 0.1)  # ±10%
+                    
+                    # Качество сигнала
+                    signal_strength = float(signal.get('signal_strength', 0.5))
+                    signal_strength = np.clip(signal_strength, 0, 1)
+                    
+                    # Risk/Reward ratio
+                    rr_ratio = float(signal.get('risk_reward_ratio', 1.0))
+                    rr_ratio = np.clip(rr_ratio, 0.5, 5.0)  # От 0.5 до 5.0
+                    rr_ratio_norm = (rr_ratio - 1.0) / 4.0  # Нормализуем к [-0.125, 1.0]
+                    
+                    # 📈 РАСШИРЕННЫЕ features стратегии (4 → 8)
+                    stop_loss = float(signal.get('stop_loss', entry_price * 0.95))
+                    take_profit = float(signal.get('take_profit', entry_price * 1.05))
+                    time_decay = float(signal.get('time_in_position', 0)) / 3600  # часы
+                    confidence_decay = signal_strength * np.exp(-time_decay * 0.1)  # экспоненциальное затухание
+                    
+                    features.extend([
+                        signal_value, price_deviation, signal_strength, rr_ratio_norm,
+                        np.clip(time_decay, 0, 24),  # макс 24 часа
+                        np.clip(confidence_decay, 0, 1),  # затухающая уверенность
+                        1 if signal_type == 'BUY' else (0.5 if signal_type == 'SELL' else 0),  # категориальный сигнал  
+                        np.clip(abs(price_deviation), 0, 0.1)  # абсолютное отклонение
+                    ])
                 else:
                     features.extend([0, 0, 0.5, 0, 0, 0.5, 0, 0])  # 8 нейтральных features
-            
-            # 🔭 РАСШИРЕННЫЕ рыночные индикаторы (2 → 16)
-            market_sentiment = self._calculate_market_sentiment(market_data)
-            volatility_index = self._calculate_volatility_index(market_data)
-            trend_strength = self._calculate_trend_strength(market_data)
-            momentum_divergence = self._calculate_momentum_divergence(market_data)
-            volume_profile = self._calculate_volume_profile(market_data)
-            correlation_matrix = self._calculate_timeframe_correlation(market_data)
-            
-            # Микроструктурные характеристики
-            spread_dynamics = self._calculate_spread_dynamics(market_data)
-            order_flow_imbalance = self._calculate_order_flow_imbalance(market_data)
-            
-            # Временные факторы
-            time_features = self._extract_temporal_features()
-            
-            features.extend([
-                # Основные рыночные индикаторы (6)
-                np.clip(market_sentiment, -1, 1),
-                np.clip(volatility_index, 0, 2),
-                np.clip(trend_strength, -1, 1),
-                np.clip(momentum_divergence, -1, 1),
-                np.clip(volume_profile, 0, 2),
-                np.clip(correlation_matrix, -1, 1),
-                
-                # Микроструктура (2)
-                np.clip(spread_dynamics, 0, 1),
-                np.clip(order_flow_imbalance, -1, 1),
-                
-                # Временные факторы (8)
-                *time_features
-            ])
-            
-            # 🚨 КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: без потерь информации!
-            # Теперь сохраняем ВСЕ features без обрезки
-            if len(features) < self.input_size:
-                # Дополняем нулями только если недостает данных
-                padding_needed = self.input_size - len(features)
-                features.extend([0.0] * padding_needed)
-                self.logger.debug(f"Дополнено {padding_needed} нулевых features")
-            elif len(features) > self.input_size:
-                # ЛОГИРУЕМ ПРОБЛЕМУ - не обрезаем!
-                excess_features = len(features) - self.input_size
-                self.logger.warning(f"ПОТЕРЯ ИНФОРМАЦИИ! {excess_features} features обрезаны")
-                features = features[:self.input_size]
-            
-            # Финальная проверка на NaN и Inf
-            features = [0.0 if (np.isnan(f) or np.isinf(f)) else float(f) for f in features]
-            
-            return np.array(features, dtype=np.float32).reshape(1, -1)
-            
-        except Exception as e:
-            self.logger.error(f"Ошибка подготовки входных данных: {e}")
-            # Возвращаем нулевой вектор с новым размером
-            return np.zeros((1, self.input_size), dtype=np.float32)
+            else:
+                features.extend([0, 0, 0.5, 0, 0, 0.5, 0, 0])  # 8 нейтральных features
+        
+        return self._finite(features)
+    
+    @staticmethod
+    def _finite(features: List[float]) -> np.ndarray:
+        """Финальная проверка на NaN и Inf"""
+        row = np.asarray(features, dtype=np.float64)
+        return np.where(np.isfinite(row), row, 0.0).astype(np.float32)
+    
+    def _assemble_input(self, market_row: np.ndarray, signal_row: np.ndarray) -> np.ndarray:
+        """Входной вектор (1, input_size) в исходном порядке: таймфреймы, сигналы, индикаторы"""
+        split = len(FEATURE_TIMEFRAMES) * 8
+        features = np.concatenate([market_row[:split], signal_row, market_row[split:]])
+        
+        # 🚨 КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: без потерь информации!
+        # Теперь сохраняем ВСЕ features без обрезки
+        x = np.zeros((1, self.input_size), dtype=np.float32)
+        if len(features) > self.input_size:
+            # ЛОГИРУЕМ ПРОБЛЕМУ - не обрезаем!
+            excess_features = len(features) - self.input_size
+            self.logger.warning(f"ПОТЕРЯ ИНФОРМАЦИИ! {excess_features} features обрезаны")
+            features = features[:self.input_size]
+        # Дополняем нулями только если недостает данных
+        x[0, :len(features)] = features
+        return x
     
     def _safe_divide(self, a, b, default=0.0):
         """Безопасное деление с обработкой деления на ноль"""
@@ -381,37 +492,48 @@ class NeuralTrader:
         except:
             return 0.0
     
+    _PARAM_NAMES = ('weights1', 'weights2', 'weights3', 'bias1', 'bias2', 'bias3',
+                    'running_mean1', 'running_var1', 'running_mean2', 'running_var2')
+    
+    def _snapshot_params(self) -> Dict[str, np.ndarray]:
+        """Согласованный набор весов и статистик batch norm (без смешивания старых и новых)"""
+        with self._model_lock:
+            return {name: getattr(self, name) for name in self._PARAM_NAMES}
+    
     def forward_improved(self, x: np.ndarray, training: bool = True) -> Tuple[np.ndarray, Dict]:
         """Улучшенный прямой проход с нормализацией и dropout"""
-        activations = {'input': x}
-        
         try:
-            # Первый слой
-            z1 = np.dot(x, self.weights1) + self.bias1
-            z1_norm = self.batch_normalize(z1, self.running_mean1, self.running_var1, training)
-            a1 = self.leaky_relu(z1_norm)
-            a1_drop, dropout_mask1 = self.dropout(a1, training)
-            activations.update({'z1': z1, 'z1_norm': z1_norm, 'a1': a1, 'a1_drop': a1_drop, 'mask1': dropout_mask1})
-            
-            # Второй слой
-            z2 = np.dot(a1_drop, self.weights2) + self.bias2
-            z2_norm = self.batch_normalize(z2, self.running_mean2, self.running_var2, training)
-            a2 = self.leaky_relu(z2_norm)
-            a2_drop, dropout_mask2 = self.dropout(a2, training)
-            activations.update({'z2': z2, 'z2_norm': z2_norm, 'a2': a2, 'a2_drop': a2_drop, 'mask2': dropout_mask2})
-            
-            # Выходной слой
-            z3 = np.dot(a2_drop, self.weights3) + self.bias3
-            a3 = self.softmax(z3)
-            activations.update({'z3': z3, 'a3': a3})
-            
-            return a3, activations
-            
+            return self._forward(x, self._snapshot_params(), training)
         except Exception as e:
             self.logger.error(f"Ошибка в прямом проходе: {e}")
             # Возвращаем равномерное распределение в случае ошибки
             uniform_output = np.ones((1, self.output_size)) / self.output_size
             return uniform_output, {'input': x}
+    
+    def _forward(self, x: np.ndarray, params: Dict[str, np.ndarray], training: bool) -> Tuple[np.ndarray, Dict]:
+        """Прямой проход по матрице (batch_size, input_size) с заданным набором параметров"""
+        activations = {'input': x}
+        
+        # Первый слой
+        z1 = np.dot(x, params['weights1']) + params['bias1']
+        z1_norm = self.batch_normalize(z1, params['running_mean1'], params['running_var1'], training)
+        a1 = self.leaky_relu(z1_norm)
+        a1_drop, dropout_mask1 = self.dropout(a1, training)
+        activations.update({'z1': z1, 'z1_norm': z1_norm, 'a1': a1, 'a1_drop': a1_drop, 'mask1': dropout_mask1})
+        
+        # Второй слой
+        z2 = np.dot(a1_drop, params['weights2']) + params['bias2']
+        z2_norm = self.batch_normalize(z2, params['running_mean2'], params['running_var2'], training)
+        a2 = self.leaky_relu(z2_norm)
+        a2_drop, dropout_mask2 = self.dropout(a2, training)
+        activations.update({'z2': z2, 'z2_norm': z2_norm, 'a2': a2, 'a2_drop': a2_drop, 'mask2': dropout_mask2})
+        
+        # Выходной слой
+        z3 = np.dot(a2_drop, params['weights3']) + params['bias3']
+        a3 = self.softmax(z3)
+        activations.update({'z3': z3, 'a3': a3})
+        
+        return a3, activations
 
     def predict(self, x: np.ndarray) -> np.ndarray:
         """
@@ -453,10 +575,14 @@ class NeuralTrader:
             # Возвращаем равномерное распределение
             return np.ones((1, self.output_size)) / self.output_size
 
-    def predict_strategy_performance(self, market_data: Dict, strategy_signals: Dict) -> Dict[str, float]:
+    def predict_strategy_performance(self, market_data: Dict, strategy_signals: Dict,
+                                     symbol: Optional[str] = None) -> Dict[str, float]:
         """Предсказание производительности стратегий с улучшенной обработкой"""
+        return self._predict_strategies(self.prepare_input_safe(market_data, strategy_signals, symbol))
+    
+    def _predict_strategies(self, x: np.ndarray) -> Dict[str, float]:
+        """Уверенность по стратегиям для готового входного вектора"""
         try:
-            x = self.prepare_input_safe(market_data, strategy_signals)
             predictions, _ = self.forward_improved(x, training=False)
             
             strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
@@ -480,10 +606,11 @@ class NeuralTrader:
             strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
             return {name: 0.5 for name in strategy_names}
     
-    def make_bet(self, market_data: Dict, strategy_signals: Dict) -> Optional[Dict]:
+    def make_bet(self, market_data: Dict, strategy_signals: Dict, symbol: Optional[str] = None) -> Optional[Dict]:
         """Принятие решения о ставке с динамическим управлением размером"""
         try:
-            predictions = self.predict_strategy_performance(market_data, strategy_signals)
+            x = self.prepare_input_safe(market_data, strategy_signals, symbol)
+            predictions = self._predict_strategies(x)
             
             if not predictions:
                 return None
@@ -509,6 +636,13 @@ class NeuralTrader:
                     'market_data': self._serialize_market_data(market_data)
                 }
                 
+                # Ссылка на строку хранилища признаков: обучение воспроизведет ровно этот вход
+                key = self._feature_key(market_data, symbol)
+                if key is not None:
+                    split = len(FEATURE_TIMEFRAMES) * 8
+                    bet['feature_key'] = {'timestamp': key[0], 'symbol': key[1]}
+                    bet['signal_features'] = x[0, split:split + SIGNAL_FEATURE_WIDTH].tolist()
+                
                 self.total_bets += 1
                 self.logger.info(f"Нейронная ставка: {strategy_name} "
                                f"(уверенность: {confidence:.3f}, размер: ${bet_size:.2f})")
@@ -630,13 +764,11 @@ class NeuralTrader:
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.memory.append(experience)
-            if len(self.memory) > self.memory_size:
-                self.memory.pop(0)
+            self._remember(experience)
             
-            # Обучаем нейронную сеть
+            # Обучаем нейронную сеть в фоне, не задерживая торговый поток
             if len(self.memory) >= 10:
-                self.train_with_validation()
+                self.train_async()
             
             # Сохраняем модель
             self.save_model()
@@ -652,25 +784,140 @@ class NeuralTrader:
         except Exception as e:
             self.logger.error(f"Ошибка обновления производительности: {e}")
     
+    def _reset_feature_cache(self):
+        """Очистка матрицы признаков и целевых значений памяти опыта"""
+        with self._memory_lock:
+            self._feature_matrix = np.zeros((self.memory_size, self.input_size), dtype=np.float32)
+            self._target_matrix = np.full((self.memory_size, self.output_size), 0.1, dtype=np.float32)
+            self._memory_cursor = 0
+    
+    def _remember(self, experience: Dict):
+        """Добавление опыта в память вместе с вектором признаков и целевыми значениями.
+        
+        Признаки считаются один раз при добавлении, а не на каждом цикле обучения:
+        обучение работает только с матрицами (N, input_size) и (N, output_size).
+        """
+        features = self._experience_features(experience['bet'])
+        target = self._experience_target(experience['bet'], experience['reward'])
+        
+        with self._memory_lock:
+            # Ячейка под курсором - самый старый опыт, который вытесняется из memory
+            self._feature_matrix[self._memory_cursor] = features
+            self._target_matrix[self._memory_cursor] = target
+            self._memory_cursor = (self._memory_cursor + 1) % self.memory_size
+            
+            self.memory.append(experience)
+            if len(self.memory) > self.memory_size:
+                self.memory.pop(0)
+    
+    def _experience_features(self, bet: Dict) -> np.ndarray:
+        """Вектор признаков опыта: вход, на котором была сделана ставка
+        
+        Рыночная строка берется из хранилища признаков по ключу ставки. Для ставок
+        без ключа (или вытесненной строки) признаки восстанавливаются по сохраненной
+        в ставке последней свече.
+        """
+        key = bet.get('feature_key')
+        signal_features = bet.get('signal_features')
+        if key and signal_features is not None and len(signal_features) == SIGNAL_FEATURE_WIDTH:
+            market_row = self.feature_store.get(key['timestamp'], key['symbol'])
+            if market_row is not None:
+                return self._assemble_input(market_row, np.asarray(signal_features, dtype=np.float32))[0]
+        
+        # Строки из одной свечи не пишутся в хранилище, чтобы не перезаписать строку бара
+        market_data_df = self._deserialize_market_data(bet.get('market_data', {}))
+        strategy_signals = {bet['strategy']: {'signal': 'BUY'}}
+        return self._assemble_input(self._market_features(market_data_df),
+                                    self._signal_features(market_data_df, strategy_signals))[0]
+    
+    def _experience_target(self, bet: Dict, reward: float) -> np.ndarray:
+        """Целевые значения с soft targets"""
+        target = np.full(self.output_size, 0.1, dtype=np.float32)  # Базовое значение
+        strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
+        
+        if bet['strategy'] in strategy_names:
+            strategy_index = strategy_names.index(bet['strategy'])
+            if strategy_index < self.output_size:
+                # 0.9 - успешная стратегия, 0.1 - неуспешная
+                target[strategy_index] = 0.9 if reward > 0 else 0.1
+        return target
+    
+    def _training_data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Копия кэшированных признаков и целей (порядок не важен - выборка перемешивается)"""
+        with self._memory_lock:
+            count = min(len(self.memory), self.memory_size)
+            return self._feature_matrix[:count].copy(), self._target_matrix[:count].copy()
+    
+    def train_async(self) -> bool:
+        """Запуск обучения в фоновом потоке.
+        
+        Если обучение уже идет, запрос не ставится в очередь повторно: текущий поток
+        выполнит еще один проход по свежей памяти после завершения. Возвращает True,
+        если был запущен новый поток.
+        """
+        with self._training_lock:
+            if self._training_thread is not None and self._training_thread.is_alive():
+                self._training_pending = True
+                self._training_stats['coalesced'] += 1
+                return False
+            
+            self._training_pending = False
+            self._training_thread = threading.Thread(target=self._training_loop, name="neural-training", daemon=True)
+            self._training_thread.start()
+            return True
+    
+    def _training_loop(self):
+        """Тело фонового потока обучения"""
+        while True:
+            self.train_with_validation()
+            self.save_model()
+            # Хранилище признаков пишется только отсюда: торговый поток не ждет файл
+            self.feature_store.save()
+            
+            with self._training_lock:
+                if not self._training_pending:
+                    return
+                self._training_pending = False
+    
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание завершения фонового обучения. Возвращает True, если обучение не идет."""
+        thread = self._training_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
     def train_with_validation(self, train_ratio: float = 0.8):
         """Обучение с валидационной выборкой и early stopping"""
         try:
-            if len(self.memory) < 20:
+            features, targets = self._training_data()
+            if len(features) < 20:
                 return
             
-            # Разделяем данные
-            experiences = self.memory.copy()
-            np.random.shuffle(experiences)
+            started = time.perf_counter()
+            generation = self._model_generation
             
-            split_idx = int(len(experiences) * train_ratio)
-            train_exp = experiences[:split_idx]
-            val_exp = experiences[split_idx:]
+            # Обучаем копию параметров: прогнозы во время обучения используют текущие веса
+            params = {name: value.copy() for name, value in self._snapshot_params().items()}
+            
+            # Разделяем данные
+            order = np.random.permutation(len(features))
+            split_idx = int(len(features) * train_ratio)
+            train_idx, val_idx = order[:split_idx], order[split_idx:]
             
             # Обучаем на train данных
-            train_loss = self._train_batch(train_exp, training=True)
+            train_loss = self._train_batch(features[train_idx], targets[train_idx], params, training=True)
             
             # Валидируем на validation данных
-            val_loss = self._train_batch(val_exp, training=False)
+            val_loss = self._train_batch(features[val_idx], targets[val_idx], params, training=False)
+            
+            with self._model_lock:
+                if generation != self._model_generation:
+                    # Модель была сброшена или загружена заново во время обучения
+                    self.logger.debug("Результат обучения отброшен: модель изменилась")
+                    return
+                for name, value in params.items():
+                    setattr(self, name, value)
             
             # Early stopping и адаптивный learning rate
             if val_loss < self.best_loss:
@@ -684,58 +931,43 @@ class NeuralTrader:
                     self.no_improve_count = 0
                     self.logger.info(f"Learning rate снижен до {self.learning_rate:.6f}")
             
+            self._training_stats['runs'] += 1
+            self._training_stats['last_samples'] = len(features)
+            self._training_stats['last_duration'] = time.perf_counter() - started
             self.logger.debug(f"Train loss: {train_loss:.4f}, Val loss: {val_loss:.4f}")
             
         except Exception as e:
             self.logger.error(f"Ошибка обучения: {e}")
     
-    def _train_batch(self, experiences: List, training: bool = True) -> float:
-        """Обучение на батче данных"""
-        if not experiences:
+    def _train_batch(self, features: np.ndarray, targets: np.ndarray,
+                     params: Dict[str, np.ndarray], training: bool = True) -> float:
+        """Обучение на батче данных.
+        
+        При training=True выборка делится на мини-батчи по batch_size строк, и на каждом
+        выполняется матричный прямой и обратный проход. При training=False считается
+        loss всей выборки одним прямым проходом.
+        """
+        if len(features) == 0:
             return 0.0
         
-        total_loss = 0
-        successful_updates = 0
+        if not training:
+            predictions, _ = self._forward(features, params, training=False)
+            return self._calculate_loss_with_regularization(predictions, targets, params)
         
-        for experience in experiences:
-            try:
-                bet = experience['bet']
-                reward = experience['reward']
-                
-                # Восстанавливаем рыночные данные
-                market_data_df = self._deserialize_market_data(bet.get('market_data', {}))
-                strategy_signals = {bet['strategy']: {'signal': 'BUY'}}
-                
-                x = self.prepare_input_safe(market_data_df, strategy_signals)
-                predictions, activations = self.forward_improved(x, training=training)
-                
-                # Создаем целевые значения с soft targets
-                target = np.full((1, self.output_size), 0.1)  # Базовое значение
-                strategy_names = [f'strategy_{i:02d}' for i in range(1, 11)]
-                
-                if bet['strategy'] in strategy_names:
-                    strategy_index = strategy_names.index(bet['strategy'])
-                    if strategy_index < self.output_size:
-                        if reward > 0:
-                            target[0, strategy_index] = 0.9  # Успешная стратегия
-                        else:
-                            target[0, strategy_index] = 0.1  # Неуспешная стратегия
-                
-                # Вычисляем loss с регуляризацией
-                loss = self._calculate_loss_with_regularization(predictions, target)
-                total_loss += loss
-                
-                # Обратное распространение только для training
-                if training:
-                    self._backpropagate_improved(x, target, activations)
-                
-                successful_updates += 1
-                
-            except Exception as e:
-                self.logger.error(f"Ошибка обучения на опыте: {e}")
-                continue
+        # Мини-батч из одной строки обнуляет batch norm, поэтому размеры выравниваются
+        chunks = max(1, int(np.ceil(len(features) / self.batch_size)))
+        total_loss = 0.0
+        
+        for batch_idx in np.array_split(np.arange(len(features)), chunks):
+            x, target = features[batch_idx], targets[batch_idx]
+            predictions, activations = self._forward(x, params, training=True)
+            
+            # Вычисляем loss с регуляризацией
+            total_loss += self._calculate_loss_with_regularization(predictions, target, params) * len(batch_idx)
+            
+            self._backpropagate_batch(target, activations, params)
         
-        return total_loss / successful_updates if successful_updates > 0 else 0.0
+        return total_loss / len(features)
     
     def _deserialize_market_data(self, serialized_data: Dict) -> Dict:
         """Восстановление рыночных данных из сериализованного формата"""
@@ -750,65 +982,67 @@ class NeuralTrader:
         except:
             return {}
     
-    def _calculate_loss_with_regularization(self, predictions: np.ndarray, targets: np.ndarray) -> float:
+    def _calculate_loss_with_regularization(self, predictions: np.ndarray, targets: np.ndarray,
+                                            params: Optional[Dict[str, np.ndarray]] = None) -> float:
         """Функция потерь с L2 регуляризацией"""
         try:
+            params = params or self._snapshot_params()
+            
             # Cross-entropy loss
             ce_loss = -np.mean(targets * np.log(predictions + 1e-8))
             
             # L2 регуляризация
-            l2_loss = (self.l2_lambda * (np.sum(self.weights1**2) + 
-                                        np.sum(self.weights2**2) + 
-                                        np.sum(self.weights3**2)))
+            l2_loss = (self.l2_lambda * (np.sum(params['weights1']**2) + 
+                                        np.sum(params['weights2']**2) + 
+                                        np.sum(params['weights3']**2)))
             
             return ce_loss + l2_loss
         except:
             return 1.0
     
-    def _backpropagate_improved(self, x: np.ndarray, target: np.ndarray, activations: Dict):
-        """Улучшенное обратное распространение с градиентным клиппингом"""
-        try:
-            a3 = activations.get('a3')
-            a2_drop = activations.get('a2_drop')
-            a1_drop = activations.get('a1_drop')
-            z2_norm = activations.get('z2_norm')
-            z1_norm = activations.get('z1_norm')
-            
-            if any(v is None for v in [a3, a2_drop, a1_drop, z2_norm, z1_norm]):
-                return
-            
-            # Ошибка на выходном слое
-            error3 = a3 - target
-            delta3 = error3
-            
-            # Ошибка на втором слое
-            error2 = np.dot(delta3, self.weights3.T)
-            delta2 = error2 * self.leaky_relu_derivative(z2_norm)
-            
-            # Ошибка на первом слое
-            error1 = np.dot(delta2, self.weights2.T)
-            delta1 = error1 * self.leaky_relu_derivative(z1_norm)
-            
-            # Градиентное клиппинг
-            delta3 = np.clip(delta3, -1, 1)
-            delta2 = np.clip(delta2, -1, 1)
-            delta1 = np.clip(delta1, -1, 1)
-            
-            # Обновление весов с L2 регуляризацией
-            self.weights3 -= self.learning_rate * (np.dot(a2_drop.T, delta3) + 
-                                                  self.l2_lambda * self.weights3)
-            self.bias3 -= self.learning_rate * np.sum(delta3, axis=0, keepdims=True)
-            
-            self.weights2 -= self.learning_rate * (np.dot(a1_drop.T, delta2) + 
-                                                  self.l2_lambda * self.weights2)
-            self.bias2 -= self.learning_rate * np.sum(delta2, axis=0, keepdims=True)
-            
-            self.weights1 -= self.learning_rate * (np.dot(x.T, delta1) + 
-                                                  self.l2_lambda * self.weights1)
-            self.bias1 -= self.learning_rate * np.sum(delta1, axis=0, keepdims=True)
-            
-        except Exception as e:
-            self.logger.error(f"Ошибка в обратном распространении: {e}")
+    @staticmethod
+    def _batch_norm_backward(grad: np.ndarray, x_norm: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Градиент через batch normalization (без обучаемых gamma/beta)"""
+        std = np.sqrt(np.var(z, axis=0, keepdims=True) + 1e-8)
+        return (grad - grad.mean(axis=0, keepdims=True)
+                - x_norm * (grad * x_norm).mean(axis=0, keepdims=True)) / std
+    
+    def _backpropagate_batch(self, target: np.ndarray, activations: Dict, params: Dict[str, np.ndarray]):
+        """Матричное обратное распространение по мини-батчу с градиентным клиппингом.
+        
+        Градиенты усредняются по строкам батча, params обновляются на месте.
+        """
+        x = activations['input']
+        batch = len(x)
+        
+        # Ошибка на выходном слое
+        delta3 = activations['a3'] - target
+        
+        # Ошибка на втором слое (через dropout, leaky ReLU и batch norm)
+        error2 = np.dot(delta3, params['weights3'].T) * activations['mask2']
+        error2 = error2 * self.leaky_relu_derivative(activations['z2_norm'])
+        delta2 = self._batch_norm_backward(error2, activations['z2_norm'], activations['z2'])
+        
+        # Ошибка на первом слое
+        error1 = np.dot(delta2, params['weights2'].T) * activations['mask1']
+        error1 = error1 * self.leaky_relu_derivative(activations['z1_norm'])
+        delta1 = self._batch_norm_backward(error1, activations['z1_norm'], activations['z1'])
+        
+        # Градиентное клиппинг
+        delta3 = np.clip(delta3, -1, 1)
+        delta2 = np.clip(delta2, -1, 1)
+        delta1 = np.clip(delta1, -1, 1)
+        
+        # Обновление весов с L2 регуляризацией
+        lr = self.learning_rate
+        params['weights3'] -= lr * (np.dot(activations['a2_drop'].T, delta3) / batch + self.l2_lambda * params['weights3'])
+        params['bias3'] -= lr * delta3.mean(axis=0, keepdims=True)
+        
+        params['weights2'] -= lr * (np.dot(activations['a1_drop'].T, delta2) / batch + self.l2_lambda * params['weights2'])
+        params['bias2'] -= lr * delta2.mean(axis=0, keepdims=True)
+        
+        params['weights1'] -= lr * (np.dot(x.T, delta1) / batch + self.l2_lambda * params['weights1'])
+        params['bias1'] -= lr * delta1.mean(axis=0, keepdims=True)
     
     def get_advanced_statistics(self) -> Dict:
         """Расширенная статистика производительности"""
@@ -871,7 +1105,10 @@ class NeuralTrader:
                     'prediction_accuracy': prediction_accuracy,
                     'learning_rate': self.learning_rate,
                     'memory_usage': len(self.memory),
-                    'training_cycles': len(self.performance_history)
+                    'training_cycles': len(self.performance_history),
+                    'training_runs': self._training_stats['runs'],
+                    'last_training_seconds': self._training_stats['last_duration'],
+                    'feature_store': self.feature_store.get_stats()
                 }
             }
             
@@ -979,6 +1216,7 @@ class NeuralTrader:
     def save_model(self):
         """Сохранение улучшенной модели"""
         try:
+            params = self._snapshot_params()
             model_data = {
                 'version': '2.0',
                 'timestamp': datetime.now().isoformat(),
@@ -988,18 +1226,18 @@ class NeuralTrader:
                     'output_size': self.output_size
                 },
                 'weights': {
-                    'weights1': self.weights1.tolist(),
-                    'weights2': self.weights2.tolist(),
-                    'weights3': self.weights3.tolist(),
-                    'bias1': self.bias1.tolist(),
-                    'bias2': self.bias2.tolist(),
-                    'bias3': self.bias3.tolist()
+                    'weights1': params['weights1'].tolist(),
+                    'weights2': params['weights2'].tolist(),
+                    'weights3': params['weights3'].tolist(),
+                    'bias1': params['bias1'].tolist(),
+                    'bias2': params['bias2'].tolist(),
+                    'bias3': params['bias3'].tolist()
                 },
                 'batch_norm': {
-                    'running_mean1': self.running_mean1.tolist(),
-                    'running_var1': self.running_var1.tolist(),
-                    'running_mean2': self.running_mean2.tolist(),
-                    'running_var2': self.running_var2.tolist()
+                    'running_mean1': params['running_mean1'].tolist(),
+                    'running_var1': params['running_var1'].tolist(),
+                    'running_mean2': params['running_mean2'].tolist(),
+                    'running_var2': params['running_var2'].tolist()
                 },
                 'hyperparameters': {
                     'learning_rate': self.learning_rate,
@@ -1018,17 +1256,19 @@ class NeuralTrader:
             
             os.makedirs('data/ai', exist_ok=True)
             
-            # Сохраняем основную модель
-            with open('data/ai/neural_trader_model.json', 'w') as f:
-                json.dump(model_data, f, indent=2)
-            
-            # Создаем бэкап с временной меткой
-            backup_filename = f"data/ai/neural_trader_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(backup_filename, 'w') as f:
-                json.dump(model_data, f)
-            
-            # Удаляем старые бэкапы (оставляем только последние 5)
-            self._cleanup_old_backups()
+            # Сохранение вызывается и из торгового потока, и из потока обучения
+            with self._save_lock:
+                # Сохраняем основную модель
+                with open('data/ai/neural_trader_model.json', 'w') as f:
+                    json.dump(model_data, f, indent=2)
+                
+                # Создаем бэкап с временной меткой
+                backup_filename = f"data/ai/neural_trader_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                with open(backup_filename, 'w') as f:
+                    json.dump(model_data, f)
+                
+                # Удаляем старые бэкапы (оставляем только последние 5)
+                self._cleanup_old_backups()
             
             self.logger.debug("Модель сохранена успешно")
             
@@ -1149,27 +1389,32 @@ class NeuralTrader:
         """Сброс модели к начальному состоянию"""
         self.logger.info("Сброс нейронной модели к начальному состоянию")
         
-        # Переинициализируем веса
-        self.weights1 = np.random.randn(self.input_size, self.hidden_size) * np.sqrt(2.0 / self.input_size)
-        self.weights2 = np.random.randn(self.hidden_size, self.hidden_size) * np.sqrt(2.0 / self.hidden_size)
-        self.weights3 = np.random.randn(self.hidden_size, self.output_size) * np.sqrt(2.0 / self.hidden_size)
-        
-        # Сбрасываем смещения
-        self.bias1 = np.zeros((1, self.hidden_size))
-        self.bias2 = np.zeros((1, self.hidden_size))
-        self.bias3 = np.zeros((1, self.output_size))
-        
-        # Сбрасываем batch normalization
-        self.running_mean1 = np.zeros((1, self.hidden_size))
-        self.running_var1 = np.ones((1, self.hidden_size))
-        self.running_mean2 = np.zeros((1, self.hidden_size))
-        self.running_var2 = np.ones((1, self.hidden_size))
+        with self._model_lock:
+            # Незавершенное фоновое обучение не должно перезаписать сброшенные веса
+            self._model_generation += 1
+            
+            # Переинициализируем веса
+            self.weights1 = np.random.randn(self.input_size, self.hidden_size) * np.sqrt(2.0 / self.input_size)
+            self.weights2 = np.random.randn(self.hidden_size, self.hidden_size) * np.sqrt(2.0 / self.hidden_size)
+            self.weights3 = np.random.randn(self.hidden_size, self.output_size) * np.sqrt(2.0 / self.hidden_size)
+            
+            # Сбрасываем смещения
+            self.bias1 = np.zeros((1, self.hidden_size))
+            self.bias2 = np.zeros((1, self.hidden_size))
+            self.bias3 = np.zeros((1, self.output_size))
+            
+            # Сбрасываем batch normalization
+            self.running_mean1 = np.zeros((1, self.hidden_size))
+            self.running_var1 = np.ones((1, self.hidden_size))
+            self.running_mean2 = np.zeros((1, self.hidden_size))
+            self.running_var2 = np.ones((1, self.hidden_size))
         
         # Сбрасываем статистику
         self.total_bets = 0
         self.winning_bets = 0
         self.current_balance = 1000.0
         self.memory = []
+        self._reset_feature_cache()
         self.performance_history = []
         
         # Сбрасываем параметры обучения
@@ -1325,10 +1570,10 @@ class NeuralTrader:
         except:
             return 0.0
     
-    def _extract_temporal_features(self) -> List[float]:
-        """Извлечение временных признаков"""
+    def _extract_temporal_features(self, moment: Optional[datetime] = None) -> List[float]:
+        """Извлечение временных признаков (на момент бара, по умолчанию - текущее время)"""
         try:
-            now = datetime.now()
+            now = moment or datetime.now()
             
             # Циклическая кодировка времени (синус и косинус)
             hour_sin = np.sin(2 * np.pi * now.hour / 24)
@@ -0,0 +1,267 @@
+# bot/core/bar_scheduler.py
+"""
+⏱️ ПЛАНИРОВЩИК ПО ЗАКРЫТИЮ БАРОВ
+Торговый цикл просыпается на закрытии бара, а не по фиксированным паузам
+
+Каждая стратегия объявляет таймфреймы, от которых зависит; на закрытии бара
+выполняются только стратегии, у которых хотя бы один таймфрейм получил новый
+закрытый бар. Остальные пропускают итерацию - их данные не изменились.
+
+Закрытие бара определяется двумя источниками:
+- по часам: граница бара + close_delay (время, за которое биржа отдает
+  закрытый бар через REST);
+- по событию notify_bar_close (например, on_bar_close WebSocket потока),
+  которое будит ожидающий цикл сразу, не дожидаясь close_delay.
+Один и тот же бар не срабатывает дважды.
+
+Источник времени и ожидание подменяются, поэтому планировщик проверяется на
+симулированных часах (SimulatedClock).
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# Длительность таймфреймов market_data в секундах
+TIMEFRAME_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200,
+    '1d': 86400, '1w': 604800,
+}
+
+# Интервалы Bybit -> таймфреймы market_data
+BYBIT_INTERVAL_TIMEFRAMES = {
+    "1": '1m', "3": '3m', "5": '5m', "15": '15m', "30": '30m',
+    "60": '1h', "120": '2h', "240": '4h', "360": '6h', "720": '12h',
+    "D": '1d', "W": '1w',
+}
+
+# wait(event, timeout) -> bool: ожидание события не дольше timeout секунд
+Waiter = Callable[[threading.Event, float], bool]
+
+
+def _event_wait(event: threading.Event, timeout: float) -> bool:
+    return event.wait(timeout)
+
+
+class SimulatedClock:
+    """
+    Симулированные часы для тестов и бэктестов
+
+    Ожидание не блокирует поток, а сдвигает время на timeout
+    (или не сдвигает, если событие уже установлено).
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if event.is_set():
+            return True
+        self.now += max(timeout, 0.0)
+        return event.is_set()
+
+
+def get_strategy_timeframes(strategy: Any) -> Optional[List[str]]:
+    """
+    Таймфреймы, от которых зависит стратегия
+
+    Поддерживаются экземпляры и классы стратегий (get_required_timeframes или
+    атрибут required_timeframes) и словари конфигурации (ключ 'timeframes').
+
+    Returns:
+        Список таймфреймов или None, если стратегия их не объявила
+        (такая стратегия выполняется на закрытии любого бара)
+    """
+    if isinstance(strategy, dict):
+        timeframes = strategy.get('timeframes')
+    elif callable(getattr(strategy, 'get_required_timeframes', None)) and not isinstance(strategy, type):
+        timeframes = strategy.get_required_timeframes()
+    else:
+        timeframes = getattr(strategy, 'required_timeframes', None)
+
+    if not timeframes:
+        return None
+    return [getattr(tf, 'value', tf) for tf in timeframes]
+
+
+class BarCloseScheduler:
+    """Событийный планировщик выполнения стратегий по закрытию баров"""
+
+    def __init__(self, timeframes: Iterable[str], close_delay: float = 2.0,
+                 clock: Callable[[], float] = time.time, waiter: Waiter = _event_wait):
+        """
+        Args:
+            timeframes: Отслеживаемые таймфреймы ('1m', '5m', ...)
+            close_delay: Задержка после границы бара до срабатывания по часам (сек)
+            clock: Источник unix времени
+            waiter: Функция ожидания события с таймаутом
+        """
+        self.timeframes = [tf for tf in timeframes if tf in TIMEFRAME_SECONDS]
+        self.close_delay = close_delay
+        self._clock = clock
+        self._waiter = waiter
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # Таймфрейм -> номер последнего обработанного закрытия (граница бара / длительность)
+        self._last_close: Dict[str, int] = {}
+        # Закрытия, сообщенные событием и еще не выданные циклу
+        self._pending: Set[str] = set()
+        # Стратегия -> ее таймфреймы (None - все)
+        self._subscriptions: Dict[str, Optional[Set[str]]] = {}
+
+        now = self._clock()
+        for tf in self.timeframes:
+            # Первый опрос сразу выдает все таймфреймы: стратегии выполняются при запуске
+            self._last_close[tf] = self._close_index(tf, now) - 1
+
+        self.stats = {
+            'wakeups': 0,
+            'clock_closes': 0,
+            'event_closes': 0,
+            'evaluations': 0,
+            'skipped': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Подписки стратегий
+    # ------------------------------------------------------------------
+
+    def register(self, name: str, timeframes: Optional[Iterable[str]] = None) -> None:
+        """Регистрация стратегии и ее таймфреймов (None - выполнять на любом закрытии)"""
+        with self._lock:
+            self._subscriptions[name] = set(timeframes) if timeframes else None
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._subscriptions.pop(name, None)
+
+    def due_strategies(self, closed_timeframes: Iterable[str],
+                       strategies: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Стратегии, которые нужно выполнить для набора закрывшихся таймфреймов
+
+        Args:
+            closed_timeframes: Таймфреймы с новым закрытым баром
+            strategies: Кандидаты (по умолчанию - все зарегистрированные);
+                незарегистрированные кандидаты считаются зависящими от всех таймфреймов
+        """
+        closed = set(closed_timeframes)
+        with self._lock:
+            candidates = list(self._subscriptions) if strategies is None else list(strategies)
+            due = []
+            for name in candidates:
+                subscribed = self._subscriptions.get(name)
+                if closed and (subscribed is None or subscribed & closed):
+                    due.append(name)
+            self.stats['evaluations'] += len(due)
+            self.stats['skipped'] += len(candidates) - len(due)
+        return due
+
+    # ------------------------------------------------------------------
+    # Закрытие баров
+    # ------------------------------------------------------------------
+
+    def notify_bar_close(self, timeframe: str, bar_start_ms: Optional[int] = None) -> None:
+        """
+        Сообщение о закрытии бара из внешнего источника (потокобезопасно)
+
+        Args:
+            timeframe: Таймфрейм market_data или интервал Bybit
+            bar_start_ms: Начало закрывшегося бара (по умолчанию - последний бар по часам)
+        """
+        timeframe = BYBIT_INTERVAL_TIMEFRAMES.get(timeframe, timeframe)
+        if timeframe not in self._last_close:
+            return
+
+        if bar_start_ms is not None:
+            index = int(bar_start_ms // 1000 // TIMEFRAME_SECONDS[timeframe]) + 1
+        else:
+            index = int(self._clock() // TIMEFRAME_SECONDS[timeframe])
+
+        with self._lock:
+            if index <= self._last_close[timeframe]:
+                return
+            self._last_close[timeframe] = index
+            self._pending.add(timeframe)
+            self.stats['event_closes'] += 1
+        self._wake.set()
+
+    def on_stream_bar_close(self, symbol: str, interval: str, bar_start_ms: int) -> None:
+        """Обработчик on_bar_close для MarketDataStream"""
+        self.notify_bar_close(interval, bar_start_ms)
+
+    def poll(self) -> Set[str]:
+        """Таймфреймы с новыми закрытыми барами с прошлого опроса"""
+        now = self._clock()
+        with self._lock:
+            closed = set(self._pending)
+            self._pending.clear()
+            for tf in self.timeframes:
+                index = self._close_index(tf, now)
+                if index > self._last_close[tf]:
+                    self._last_close[tf] = index
+                    closed.add(tf)
+                    self.stats['clock_closes'] += 1
+            self._wake.clear()
+        return closed
+
+    def seconds_until_next_close(self) -> float:
+        """Время до ближайшего срабатывания по часам"""
+        now = self._clock()
+        with self._lock:
+            deadlines = [
+                (self._last_close[tf] + 1) * TIMEFRAME_SECONDS[tf] + self.close_delay
+                for tf in self.timeframes
+            ]
+        if not deadlines:
+            return math.inf
+        return max(min(deadlines) - now, 0.0)
+
+    def wait_for_bars(self, shutdown_event: Optional[threading.Event] = None,
+                      max_wait: Optional[float] = None, poll_interval: float = 1.0) -> Set[str]:
+        """
+        Ожидание закрытия баров
+
+        Args:
+            shutdown_event: Событие остановки бота (проверяется не реже poll_interval)
+            max_wait: Максимальное ожидание (сек); по его истечении возвращается
+                пустое множество, чтобы цикл выполнил служебные задачи
+            poll_interval: Период проверки shutdown_event (сек)
+
+        Returns:
+            Таймфреймы с новыми закрытыми барами (пустое множество - по таймауту или остановке)
+        """
+        deadline = None if max_wait is None else self._clock() + max_wait
+
+        while True:
+            closed = self.poll()
+            if closed:
+                self.stats['wakeups'] += 1
+                return closed
+            if shutdown_event is not None and shutdown_event.is_set():
+                return set()
+
+            timeout = min(self.seconds_until_next_close(), poll_interval)
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return set()
+                timeout = min(timeout, remaining)
+            self._waiter(self._wake, timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, strategies=len(self._subscriptions))
+
+    def _close_index(self, timeframe: str, now: float) -> int:
+        """Номер последней границы бара, по которой уже можно срабатывать"""
+        return int((now - self.close_delay) // TIMEFRAME_SECONDS[timeframe])
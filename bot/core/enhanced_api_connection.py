@@ -1,17 +1,32 @@
 """
 🔄 УЛУЧШЕННОЕ УПРАВЛЕНИЕ ПОДКЛЮЧЕНИЕМ К API
 Heartbeat проверки, backup endpoints, fallback механизмы
+
+На каждый базовый URL создается один менеджер: клиенты API (разные ключи,
+стратегии) регистрируются в нем через setup_enhanced_connection_manager,
+получают общий heartbeat и переключение endpoints, а состояние и кэш
+ведутся отдельно по client_id.
+
+Кэш ответов работает по схеме stale-while-revalidate с политикой на операцию
+(CachePolicy): свежий ответ отдается без запроса, устаревший - сразу, с
+обновлением в фоне, а в пределах fallback_for - только при ошибке запроса.
+Сроки записей хранятся в куче, поэтому очистка разбирает только истекшие.
 """
 
 import asyncio
+import heapq
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 import threading
 import logging
 from dataclasses import dataclass
 from enum import Enum
 import re
+import weakref
+
+from bot.core.retry_scheduler import is_transient_error, retries_scheduled
 
 class ConnectionState(Enum):
     """Состояния подключения"""
@@ -31,11 +46,90 @@ class APIEndpoint:
     avg_response_time: float = 0.0
     is_available: bool = True
 
+@dataclass
+class ClientHealth:
+    """Состояние подключения одного клиента API"""
+    total_requests: int = 0
+    failed_requests: int = 0
+    consecutive_failures: int = 0
+    avg_response_time: float = 0.0
+    last_success: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Политика кэша ответов операции (секунды от сохранения ответа)
+
+    fresh_for - ответ отдается без обращения к бирже;
+    stale_for - после свежести ответ отдается сразу, а запрос выполняется в фоне;
+    fallback_for - после этого ответ отдается только при ошибке запроса;
+    fresh_until(now) - вместо fresh_for: unix-время окончания свежести
+    (например, закрытие текущего бара).
+    """
+    fresh_for: float = 0.0
+    stale_for: float = 0.0
+    fallback_for: float = 300.0
+    fresh_until: Optional[Callable[[float], float]] = None
+
+    def fresh_seconds(self, now: float) -> float:
+        if self.fresh_until is not None:
+            return max(0.0, self.fresh_until(now) - now)
+        return self.fresh_for
+
+def bar_close_policy(interval_seconds: float, close_delay: float = 1.0,
+                     offset_seconds: float = 0.0) -> CachePolicy:
+    """
+    Политика для свечей: ответ свежий до закрытия текущего бара
+
+    close_delay - запас на формирование бара на бирже; offset_seconds - сдвиг
+    границ баров от эпохи (недельные бары Bybit начинаются в понедельник).
+    """
+    def next_close(now: float) -> float:
+        elapsed = (now - offset_seconds) % interval_seconds
+        return now - elapsed + interval_seconds + close_delay
+
+    return CachePolicy(fresh_until=next_close, fallback_for=max(300.0, interval_seconds))
+
+# Свежесть формирующегося бара (сек): его цена меняется до закрытия
+FORMING_BAR_FRESH = 2.0
+
+def forming_bar_policy(interval_seconds: float) -> CachePolicy:
+    """Политика для формирующегося бара: короткая свежесть вместо ожидания закрытия"""
+    return CachePolicy(fresh_for=min(FORMING_BAR_FRESH, interval_seconds),
+                       fallback_for=max(300.0, interval_seconds))
+
+# Политики кэша по operation_name; остальные операции - только fallback при ошибке
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    'get_instruments_info': CachePolicy(fresh_for=3600.0, stale_for=86400.0, fallback_for=86400.0),
+    'get_positions': CachePolicy(fresh_for=2.0, stale_for=3.0),
+    'get_open_orders': CachePolicy(fresh_for=2.0, stale_for=3.0),
+    'get_wallet_balance': CachePolicy(fresh_for=2.0, stale_for=8.0),
+}
+
+# Потоки фонового обновления устаревших ответов
+REVALIDATE_WORKERS = 2
+
+def _resolve_base_url(session, base_url: Optional[str]) -> str:
+    return base_url or getattr(session, 'BASE_URL', None) or getattr(session, 'endpoint', None) or "https://api.bybit.com"
+
+def unwrap_response(result: Any) -> Tuple[Any, Any]:
+    """
+    Разделение ответа pybit на json и заголовки
+
+    pybit возвращает (json, elapsed) при record_request_time и
+    (json, elapsed, headers) при return_response_headers.
+    """
+    if isinstance(result, tuple) and result and isinstance(result[0], dict):
+        return result[0], result[2] if len(result) > 2 else None
+    return result, None
+
 class EnhancedAPIConnectionManager:
     """Менеджер улучшенного подключения к API"""
 
     def __init__(self, primary_session, base_url: Optional[str] = None, backup_endpoints: List[str] = None,
-                 healthy_threshold: float = 1.0, degraded_threshold: float = 3.0):
+                 healthy_threshold: float = 1.0, degraded_threshold: float = 3.0,
+                 client_id: Optional[str] = None):
         self.primary_session = primary_session
         self.logger = logging.getLogger('api_connection')
         self._lock = threading.RLock()
@@ -45,7 +139,7 @@ class EnhancedAPIConnectionManager:
         self.degraded_threshold = degraded_threshold  # По умолчанию 3.0с вместо 2.0с
 
         # Настройка endpoints
-        primary_url = base_url or getattr(primary_session, 'BASE_URL', None) or getattr(primary_session, 'endpoint', None) or "https://api.bybit.com"
+        primary_url = _resolve_base_url(primary_session, base_url)
         self.endpoints = [APIEndpoint(primary_url, 1)]
 
         if backup_endpoints:
@@ -61,9 +155,23 @@ class EnhancedAPIConnectionManager:
         self.heartbeat_thread = None
         self.heartbeat_running = False
 
-        # Кэш для fallback данных
+        # Зарегистрированные сессии клиентов (для переключения endpoint) и их состояние
+        self._sessions = weakref.WeakValueDictionary()
+        self.clients: Dict[str, ClientHealth] = {}
+        self.register_client(primary_session, client_id)
+
+        # Кэш ответов (ключи клиентов с префиксом client_id) и куча сроков записей
         self.cached_data = {}
         self.cache_ttl = timedelta(minutes=5)
+        self.cache_policies: Dict[str, CachePolicy] = dict(CACHE_POLICIES)
+        self._cache_lock = threading.Lock()
+        self._cache_expiry: List[Tuple[float, int, str]] = []
+        self._cache_version = 0
+        self._revalidating = set()
+        # Поколение ключа: растет при invalidate_cache, ответ запроса, начатого
+        # в прошлом поколении, в кэш не записывается
+        self._cache_generations: Dict[str, int] = {}
+        self._revalidate_executor: Optional[ThreadPoolExecutor] = None
 
         # Статистика
         self.connection_stats = {
@@ -71,7 +179,13 @@ class EnhancedAPIConnectionManager:
             'failed_requests': 0,
             'endpoint_switches': 0,
             'cache_hits': 0,
-            'heartbeat_failures': 0
+            'cache_fresh_hits': 0,
+            'cache_stale_hits': 0,
+            'cache_revalidations': 0,
+            'cache_stale_writes_dropped': 0,
+            'heartbeat_failures': 0,
+            'backoff_seconds': 0.0,
+            'wire_seconds': 0.0
         }
 
         self._apply_current_endpoint()
@@ -88,13 +202,32 @@ class EnhancedAPIConnectionManager:
             self.heartbeat_thread.start()
             self.logger.info("💓 Heartbeat мониторинг запущен")
 
+    def register_client(self, session, client_id: Optional[str] = None) -> None:
+        """Регистрация сессии клиента: общий endpoint и heartbeat, отдельное состояние"""
+        with self._lock:
+            try:
+                self._sessions[id(session)] = session
+            except TypeError:
+                # Объект без поддержки weakref - endpoint применяется только к primary_session
+                pass
+            if client_id is not None:
+                self.clients.setdefault(client_id, ClientHealth())
+        self._apply_endpoint_to(session)
+
     def _apply_current_endpoint(self) -> None:
-        """Применяет текущий endpoint к сессии pybit."""
+        """Применяет текущий endpoint ко всем сессиям pybit."""
+        sessions = list(self._sessions.values()) or [self.primary_session]
+        for session in sessions:
+            self._apply_endpoint_to(session)
+
+    def _apply_endpoint_to(self, session) -> None:
         endpoint = self.endpoints[self.current_endpoint_index]
+        if getattr(session, 'endpoint', None) == endpoint.url:
+            return
         try:
-            self.primary_session.endpoint = endpoint.url
-            if hasattr(self.primary_session, 'BASE_URL'):
-                self.primary_session.BASE_URL = endpoint.url
+            session.endpoint = endpoint.url
+            if hasattr(session, 'BASE_URL'):
+                session.BASE_URL = endpoint.url
             self.logger.debug(f"🌐 Активный endpoint: {endpoint.url}")
         except Exception as exc:
             self.logger.warning(f"⚠️ Не удалось применить endpoint {endpoint.url}: {exc}")
@@ -115,7 +248,7 @@ class EnhancedAPIConnectionManager:
             start_time = time.time()
 
             # Простая проверка - получение времени сервера
-            response = self.primary_session.get_server_time()
+            response, _ = unwrap_response(self.primary_session.get_server_time())
 
             response_time = time.time() - start_time
 
@@ -186,7 +319,16 @@ class EnhancedAPIConnectionManager:
         else:
             self._update_connection_state(ConnectionState.FAILED)
 
-    def _register_success(self, response_time: Optional[float] = None) -> None:
+    def _register_success(self, response_time: Optional[float] = None, client_id: Optional[str] = None) -> None:
+        client = self.clients.get(client_id) if client_id is not None else None
+        if client is not None:
+            client.last_success = datetime.now()
+            client.consecutive_failures = 0
+            if response_time is not None:
+                client.avg_response_time = (
+                    client.avg_response_time * 0.7 + response_time * 0.3
+                ) if client.avg_response_time else response_time
+
         endpoint = self.endpoints[self.current_endpoint_index]
         endpoint.last_success = datetime.now()
         endpoint.consecutive_failures = 0
@@ -197,7 +339,13 @@ class EnhancedAPIConnectionManager:
         if self.connection_state != ConnectionState.HEALTHY:
             self._update_connection_state(ConnectionState.HEALTHY)
 
-    def _register_failure(self, error: Any) -> None:
+    def _register_failure(self, error: Any, client_id: Optional[str] = None) -> None:
+        client = self.clients.get(client_id) if client_id is not None else None
+        if client is not None:
+            client.failed_requests += 1
+            client.consecutive_failures += 1
+            client.last_error = (error.get('retMsg') if isinstance(error, dict) else str(error))[:200]
+
         endpoint = self.endpoints[self.current_endpoint_index]
         endpoint.consecutive_failures += 1
         self.connection_stats['failed_requests'] += 1
@@ -262,11 +410,68 @@ class EnhancedAPIConnectionManager:
     def execute_with_fallback(self, operation: Callable, operation_name: str,
                               cache_key: str = None, *, max_attempts: int = 4,
                               backoff_base: float = 0.5, backoff_cap: float = 5.0,
-                              use_cache: bool = True, **kwargs) -> Any:
-        """Выполнение операции с устойчивостью и fallback на кэш."""
+                              use_cache: bool = True,
+                              on_response_headers: Optional[Callable[[Any], None]] = None,
+                              client_id: Optional[str] = None,
+                              cache_policy: Optional[CachePolicy] = None,
+                              acquire_permit: Optional[Callable[[], bool]] = None, **kwargs) -> Any:
+        """
+        Выполнение операции с устойчивостью и кэшем ответов
+
+        Ответ pybit с return_response_headers=True (кортеж json, elapsed, headers)
+        разворачивается в json, а заголовки передаются в on_response_headers -
+        в том числе заголовки ответа с ошибкой из исключения pybit.
+        client_id - клиент зарегистрированный через register_client: его
+        состояние учитывается отдельно, а ключ кэша получает префикс клиента.
+        cache_policy - политика кэша (по умолчанию - по operation_name).
+        acquire_permit - разрешение rate limiter; запрашивается только перед
+        обращением к бирже, отказ возвращается как retCode -1001.
+        Внутри retry_scheduler.scheduled_retries() выполняется одна попытка:
+        повторы планирует вызывающий код, а поток не спит на backoff.
+        """
+        if retries_scheduled():
+            max_attempts = 1
 
         self.connection_stats['total_requests'] += 1
+        if client_id is not None:
+            self.clients.setdefault(client_id, ClientHealth()).total_requests += 1
+            if cache_key:
+                cache_key = f"{client_id}:{cache_key}"
         self.cleanup_expired_cache()
+        policy = cache_policy or self.get_cache_policy(operation_name)
+        generation = self._cache_generation(cache_key)
+
+        def fetch(fallback: bool) -> Any:
+            return self._execute(
+                operation, operation_name, cache_key, policy,
+                max_attempts=max_attempts, backoff_base=backoff_base, backoff_cap=backoff_cap,
+                use_cache=fallback, on_response_headers=on_response_headers,
+                client_id=client_id, acquire_permit=acquire_permit, generation=generation, kwargs=kwargs
+            )
+
+        if cache_key and use_cache:
+            item = self.cached_data.get(cache_key)
+            now = time.monotonic()
+            if item is not None and now < item['fresh_until']:
+                self.connection_stats['cache_fresh_hits'] += 1
+                return item['value']
+            if item is not None and now < item['stale_until']:
+                self.connection_stats['cache_stale_hits'] += 1
+                self._revalidate(cache_key, operation_name, lambda: fetch(False))
+                return item['value']
+
+        return fetch(use_cache)
+
+    def _execute(self, operation: Callable, operation_name: str, cache_key: Optional[str],
+                 policy: CachePolicy, *, max_attempts: int, backoff_base: float, backoff_cap: float,
+                 use_cache: bool, on_response_headers: Optional[Callable[[Any], None]],
+                 client_id: Optional[str], acquire_permit: Optional[Callable[[], bool]],
+                 generation: Optional[int], kwargs: Dict[str, Any]) -> Any:
+        """Запрос к бирже с повторами; при неудаче - fallback на кэш"""
+        if acquire_permit is not None and not acquire_permit():
+            if cache_key and use_cache and self._has_valid_cache(cache_key):
+                return self._cache_fallback(cache_key, operation_name)
+            return {"retCode": -1001, "retMsg": f"Rate limit exceeded for {operation_name}"}
 
         last_exception: Optional[Exception] = None
 
@@ -276,11 +481,14 @@ class EnhancedAPIConnectionManager:
             try:
                 result = operation(**kwargs)
                 duration = time.time() - start_time
+                self.connection_stats['wire_seconds'] += duration
+                result, headers = unwrap_response(result)
+                self._report_headers(on_response_headers, headers, operation_name)
 
                 if self._is_success_response(result):
-                    self._register_success(response_time=duration)
+                    self._register_success(response_time=duration, client_id=client_id)
                     if cache_key and result:
-                        self._store_cache(cache_key, result)
+                        self._store_cache(cache_key, result, policy, generation=generation)
                     return result
 
                 if self._should_retry_response(result) and attempt < max_attempts:
@@ -288,72 +496,163 @@ class EnhancedAPIConnectionManager:
                         f"⚠️ {operation_name}: временная ошибка ({result.get('retMsg', 'unknown')}). "
                         f"Попытка {attempt}/{max_attempts}"
                     )
-                    self._register_failure(result)
-                    delay = min(backoff_base * (2 ** (attempt - 1)), backoff_cap)
-                    time.sleep(delay)
+                    self._register_failure(result, client_id)
+                    self._backoff(min(backoff_base * (2 ** (attempt - 1)), backoff_cap))
                     continue
 
-                if cache_key and result:
-                    self._store_cache(cache_key, result)
+                # Ответ с ошибкой не кэшируется: он вытеснил бы рабочий ответ
                 return result
 
             except Exception as exc:
                 last_exception = exc
+                self.connection_stats['wire_seconds'] += time.time() - start_time
+                self._report_headers(on_response_headers, getattr(exc, 'resp_headers', None), operation_name)
                 is_transient = self._is_transient_exception(exc)
                 self.logger.warning(
                     f"⚠️ {operation_name}: исключение {exc} (попытка {attempt}/{max_attempts})"
                 )
-                self._register_failure(exc)
+                self._register_failure(exc, client_id)
 
                 if not is_transient or attempt == max_attempts:
                     break
 
-                delay = min(backoff_base * (2 ** (attempt - 1)), backoff_cap)
-                time.sleep(delay)
+                self._backoff(min(backoff_base * (2 ** (attempt - 1)), backoff_cap))
                 continue
 
         if cache_key and use_cache and self._has_valid_cache(cache_key):
-            self.connection_stats['cache_hits'] += 1
-            cached_value = self.cached_data[cache_key]['value']
-            self.logger.warning(
-                f"🗂️ {operation_name}: используем кэшированные данные из-за проблем соединения"
-            )
-            return cached_value
+            return self._cache_fallback(cache_key, operation_name)
 
         if last_exception:
             raise last_exception
         raise RuntimeError(f"{operation_name} failed without exception but no response returned")
 
-    def cleanup_expired_cache(self):
-        """Очистка устаревшего кэша"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, item in self.cached_data.items()
-            if now - item['timestamp'] > self.cache_ttl
-        ]
+    def _backoff(self, delay: float) -> None:
+        """
+        Пауза перед повтором в потоке вызывающего (ему нужен результат)
+
+        Поток спит, если вызов сделан вне retry_scheduler.scheduled_retries();
+        внутри него попытка одна и пауз нет - повтор планирует вызывающий код.
+        """
+        self.connection_stats['backoff_seconds'] += delay
+        time.sleep(delay)
 
-        for key in expired_keys:
-            del self.cached_data[key]
+    def _cache_fallback(self, cache_key: str, operation_name: str) -> Any:
+        self.connection_stats['cache_hits'] += 1
+        self.logger.warning(
+            f"🗂️ {operation_name}: используем кэшированные данные из-за проблем соединения"
+        )
+        return self.cached_data[cache_key]['value']
+
+    def _revalidate(self, cache_key: str, operation_name: str, fetch: Callable[[], Any]) -> None:
+        """Фоновое обновление устаревшей записи (не больше одного на ключ)"""
+        with self._cache_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+            if self._revalidate_executor is None:
+                self._revalidate_executor = ThreadPoolExecutor(
+                    max_workers=REVALIDATE_WORKERS, thread_name_prefix='api-revalidate'
+                )
+            executor = self._revalidate_executor
+        self.connection_stats['cache_revalidations'] += 1
+
+        def run() -> None:
+            try:
+                fetch()
+            except Exception as exc:
+                self.logger.debug(f"🔄 {operation_name}: фоновое обновление кэша не удалось: {exc}")
+            finally:
+                with self._cache_lock:
+                    self._revalidating.discard(cache_key)
 
-        if expired_keys:
-            self.logger.debug(f"🧹 Очищено {len(expired_keys)} устаревших кэш записей")
+        executor.submit(run)
+
+    def _report_headers(self, callback: Optional[Callable[[Any], None]], headers: Any,
+                        operation_name: str) -> None:
+        if callback is None or not headers:
+            return
+        try:
+            callback(headers)
+        except Exception as exc:
+            self.logger.debug(f"{operation_name}: ошибка обработки заголовков ответа: {exc}")
+
+    def get_cache_policy(self, operation_name: str) -> CachePolicy:
+        """Политика кэша операции; без политики ответ хранится cache_ttl только для fallback"""
+        policy = self.cache_policies.get(operation_name)
+        if policy is None:
+            policy = CachePolicy(fallback_for=self.cache_ttl.total_seconds())
+        return policy
+
+    def cleanup_expired_cache(self):
+        """Очистка истекших записей кэша: из кучи сроков извлекаются только они"""
+        now = time.monotonic()
+        removed = 0
+        with self._cache_lock:
+            while self._cache_expiry and self._cache_expiry[0][0] <= now:
+                _, version, key = heapq.heappop(self._cache_expiry)
+                item = self.cached_data.get(key)
+                # Запись перезаписана позже - в куче остался ее старый срок
+                if item is not None and item['version'] == version:
+                    del self.cached_data[key]
+                    removed += 1
+
+        if removed:
+            self.logger.debug(f"🧹 Очищено {removed} устаревших кэш записей")
+
+    def invalidate_cache(self, prefix: str = "") -> int:
+        """
+        Удаление записей кэша, ключ которых начинается с prefix
+
+        Клиент сбрасывает свои ответы (prefix "<client_id>:") после изменения
+        позиций и ордеров. Старые сроки в куче пропускаются при очистке.
+
+        Returns:
+            Количество удаленных записей
+        """
+        with self._cache_lock:
+            keys = [key for key in self.cached_data if key.startswith(prefix)]
+            for key in keys:
+                del self.cached_data[key]
+            # Запросы в полете (в том числе фоновые обновления) начаты до изменения:
+            # их ответы не должны вернуть в кэш сброшенное состояние
+            for key in set(keys).union(key for key in self._revalidating if key.startswith(prefix)):
+                self._cache_generations[key] = self._cache_generations.get(key, 0) + 1
+        return len(keys)
+
+    def _cache_generation(self, cache_key: Optional[str]) -> Optional[int]:
+        if not cache_key:
+            return None
+        with self._cache_lock:
+            return self._cache_generations.get(cache_key, 0)
 
     def _has_valid_cache(self, cache_key: str) -> bool:
         item = self.cached_data.get(cache_key)
-        if not item:
-            return False
-        if datetime.now() - item['timestamp'] > self.cache_ttl:
-            del self.cached_data[cache_key]
-            return False
-        return True
-
-    def _store_cache(self, cache_key: Optional[str], value: Any) -> None:
+        return item is not None and time.monotonic() < item['expires_at']
+
+    def _store_cache(self, cache_key: Optional[str], value: Any,
+                     policy: Optional[CachePolicy] = None, generation: Optional[int] = None) -> None:
+        """generation - поколение ключа на начало запроса (None - записать без проверки)"""
         if not cache_key or value is None:
             return
-        self.cached_data[cache_key] = {
-            'timestamp': datetime.now(),
-            'value': value
-        }
+        policy = policy or CachePolicy(fallback_for=self.cache_ttl.total_seconds())
+        now = time.monotonic()
+        fresh_until = now + policy.fresh_seconds(time.time())
+        stale_until = fresh_until + policy.stale_for
+        expires_at = max(stale_until, now + policy.fallback_for)
+        with self._cache_lock:
+            if generation is not None and self._cache_generations.get(cache_key, 0) != generation:
+                self.connection_stats['cache_stale_writes_dropped'] += 1
+                return
+            self._cache_version += 1
+            self.cached_data[cache_key] = {
+                'timestamp': datetime.now(),
+                'value': value,
+                'fresh_until': fresh_until,
+                'stale_until': stale_until,
+                'expires_at': expires_at,
+                'version': self._cache_version,
+            }
+            heapq.heappush(self._cache_expiry, (expires_at, self._cache_version, cache_key))
 
     @staticmethod
     def _is_success_response(response: Any) -> bool:
@@ -367,29 +666,14 @@ class EnhancedAPIConnectionManager:
         if ret_code in {-1001, -1002, -1020, -1022, -20001}:
             return True
         if ret_code == -1 and 'retMsg' in response:
-            msg = response['retMsg']
-            transient_markers = (
-                'Max retries exceeded',
-                'NameResolutionError',
-                'Connection aborted',
-                'Connection refused',
-                'Connection timed out',
-            )
-            return any(marker in msg for marker in transient_markers)
+            return is_transient_error(response['retMsg'])
         return False
 
     @staticmethod
     def _is_transient_exception(exc: Exception) -> bool:
-        transient_patterns = (
-            'NameResolutionError',
-            'Max retries exceeded',
-            'Connection aborted',
-            'Failed to resolve',
-            'Temporary failure in name resolution',
-            'Timeout',
-        )
+        # Таймаут чтения (ReadTimeout) повторяется только для исключений
         message = str(exc)
-        return any(pattern in message for pattern in transient_patterns)
+        return is_transient_error(message) or 'Timeout' in message
 
     def get_connection_health(self) -> Dict[str, Any]:
         """Получить информацию о здоровье подключения"""
@@ -403,7 +687,18 @@ class EnhancedAPIConnectionManager:
                 'consecutive_failures': current_endpoint.consecutive_failures,
                 'last_success': current_endpoint.last_success.isoformat() if current_endpoint.last_success else None,
                 'cached_items': len(self.cached_data),
-                'stats': self.connection_stats.copy()
+                'stats': self.connection_stats.copy(),
+                'clients': {
+                    client_id: {
+                        'total_requests': client.total_requests,
+                        'failed_requests': client.failed_requests,
+                        'consecutive_failures': client.consecutive_failures,
+                        'avg_response_time': client.avg_response_time,
+                        'last_success': client.last_success.isoformat() if client.last_success else None,
+                        'last_error': client.last_error,
+                    }
+                    for client_id, client in self.clients.items()
+                }
             }
 
     def stop(self):
@@ -411,10 +706,15 @@ class EnhancedAPIConnectionManager:
         self.heartbeat_running = False
         if self.heartbeat_thread and self.heartbeat_thread.is_alive():
             self.heartbeat_thread.join(timeout=5)
+        if self._revalidate_executor is not None:
+            self._revalidate_executor.shutdown(wait=False)
         self.logger.info("🛑 API connection manager остановлен")
 
-# Глобальный экземпляр менеджера подключений
+# Глобальный экземпляр менеджера подключений (последний настроенный)
 _connection_manager = None
+# Менеджеры по базовому URL: один на endpoint, общий для всех клиентов
+_connection_managers: Dict[str, EnhancedAPIConnectionManager] = {}
+_managers_lock = threading.Lock()
 
 def get_enhanced_connection_manager() -> Optional[EnhancedAPIConnectionManager]:
     """Получить глобальный менеджер подключений"""
@@ -422,14 +722,29 @@ def get_enhanced_connection_manager() -> Optional[EnhancedAPIConnectionManager]:
     return _connection_manager
 
 def setup_enhanced_connection_manager(primary_session, base_url: Optional[str] = None, backup_endpoints=None,
-                                     healthy_threshold: float = 1.0, degraded_threshold: float = 3.0):
-    """Настройка менеджера подключений с настраиваемыми порогами производительности"""
+                                     healthy_threshold: float = 1.0, degraded_threshold: float = 3.0,
+                                     client_id: Optional[str] = None):
+    """
+    Настройка менеджера подключений с настраиваемыми порогами производительности
+
+    Если менеджер для base_url уже создан, сессия регистрируется в нем как
+    клиент client_id (пороги и backup endpoints берутся от первого вызова).
+    """
     global _connection_manager
-    _connection_manager = EnhancedAPIConnectionManager(
-        primary_session,
-        base_url=base_url,
-        backup_endpoints=backup_endpoints,
-        healthy_threshold=healthy_threshold,
-        degraded_threshold=degraded_threshold
-    )
-    return _connection_manager
+    url = _resolve_base_url(primary_session, base_url)
+    with _managers_lock:
+        manager = _connection_managers.get(url)
+        if manager is None:
+            manager = EnhancedAPIConnectionManager(
+                primary_session,
+                base_url=url,
+                backup_endpoints=backup_endpoints,
+                healthy_threshold=healthy_threshold,
+                degraded_threshold=degraded_threshold,
+                client_id=client_id
+            )
+            _connection_managers[url] = manager
+        else:
+            manager.register_client(primary_session, client_id)
+        _connection_manager = manager
+    return manager
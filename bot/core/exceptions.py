@@ -21,10 +21,16 @@ class OrderRejectionError(TradingBotException):
 
 class RateLimitError(TradingBotException):
     """Исключение при превышении лимита частоты запросов"""
-    def __init__(self, message: str, symbol: str = None):
+    def __init__(self, message: str, symbol: str = None, retry_after: float = None):
         super().__init__(message)
         self.symbol = symbol
         self.message = message
+        self.retry_after = retry_after
+
+
+class ClientBannedError(RateLimitError):
+    """Исключение при блокировке клиента за нарушения лимитов"""
+    pass
 
 
 class PositionConflictError(TradingBotException):
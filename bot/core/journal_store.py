@@ -0,0 +1,406 @@
+# bot/core/journal_store.py
+"""
+Колоночное хранилище журнала (append-only сегменты по дням)
+
+Строки журнала записываются в сегменты - файлы .npz, где каждая колонка
+хранится отдельным NumPy массивом (время - datetime64[ns] UTC, числа -
+float64, строки - unicode). Сегменты разбиты по дням (UTC) и ограничены
+segment_rows строками. Каждая дозапись пишет новый небольшой сегмент и не
+читает существующие, поэтому ее стоимость зависит только от числа новых
+строк. Небольшие сегменты дня сливаются позже: compact_fanout сегментов
+одного уровня объединяются в сегмент следующего уровня (каждая строка
+переписывается O(log) раз), а когда начинается следующий день, все
+небольшие сегменты прошедшего дня сливаются в сегменты по segment_rows
+строк. Заполненный сегмент больше не меняется.
+
+Манифест (manifest.json) хранит для каждого сегмента минимальное и
+максимальное время, набор стратегий и число строк. Запросы (по стратегии,
+интервалу времени, последние N) выбирают сегменты по манифесту и читают из
+них только нужные колонки, поэтому аналитика за месяцы не требует полного
+разбора CSV.
+
+Parquet/Arrow не используется: pyarrow не входит в зависимости бота, а
+.npz читается NumPy без дополнительных пакетов.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Типы колонок схемы
+TIME = 'time'
+FLOAT = 'float'
+STR = 'str'
+
+# Строк в одном сегменте
+SEGMENT_ROWS = 5000
+# Сколько небольших сегментов одного уровня сливается в один
+COMPACT_FANOUT = 8
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+TimeBound = Union[None, str, pd.Timestamp, np.datetime64, Any]
+
+
+def to_utc(value: TimeBound) -> pd.Timestamp:
+    """Время с часовым поясом UTC (наивное время считается UTC)"""
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp.tz_convert('UTC')
+
+
+def _to_ns(value: TimeBound) -> Optional[int]:
+    return None if value is None else int(to_utc(value).as_unit('ns').value)
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class JournalStore:
+    """Колоночное append-only хранилище одной таблицы журнала"""
+
+    def __init__(self, root: str, schema: Mapping[str, str],
+                 time_column: str = 'timestamp', strategy_column: str = 'strategy',
+                 segment_rows: int = SEGMENT_ROWS, compact_fanout: int = COMPACT_FANOUT):
+        """
+        Args:
+            root: Каталог таблицы (сегменты и манифест)
+            schema: Колонки таблицы и их типы (TIME, FLOAT, STR) в порядке вывода
+            time_column: Колонка времени (разбиение по дням и фильтр по интервалу)
+            strategy_column: Колонка стратегии (индекс манифеста)
+            segment_rows: Максимум строк в сегменте
+            compact_fanout: Число небольших сегментов одного уровня для слияния
+        """
+        if schema.get(time_column) != TIME:
+            raise ValueError(f"Колонка {time_column} должна иметь тип {TIME}")
+        self.root = root
+        self.schema = dict(schema)
+        self.columns = list(schema)
+        self.time_column = time_column
+        self.strategy_column = strategy_column if strategy_column in schema else None
+        self.segment_rows = max(1, segment_rows)
+        self.compact_fanout = max(2, compact_fanout)
+        self.logger = logging.getLogger('journal_store')
+
+        self._write_lock = threading.Lock()
+        self._manifest_path = os.path.join(root, MANIFEST_NAME)
+        # Список сегментов заменяется целиком (читатели берут ссылку без блокировки)
+        self._segments: List[Dict[str, Any]] = []
+        self._manifest_mtime: Optional[float] = None
+        self._load_manifest()
+
+    # ==================== МАНИФЕСТ ====================
+
+    def _load_manifest(self) -> None:
+        try:
+            mtime = os.path.getmtime(self._manifest_path)
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        try:
+            with open(self._manifest_path, encoding='utf-8') as handle:
+                manifest = json.load(handle)
+            self._segments = list(manifest.get('segments', []))
+            self._manifest_mtime = mtime
+        except Exception as exc:
+            self.logger.error(f"❌ Не удалось прочитать манифест {self._manifest_path}: {exc}")
+
+    def _save_manifest(self, segments: List[Dict[str, Any]]) -> None:
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump({'version': MANIFEST_VERSION, 'columns': self.schema, 'segments': segments},
+                      handle, separators=(',', ':'))
+        os.replace(tmp_path, self._manifest_path)
+        self._segments = segments
+        self._manifest_mtime = os.path.getmtime(self._manifest_path)
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Описание сегментов из манифеста (время в нс UTC)"""
+        self._load_manifest()
+        return list(self._segments)
+
+    def row_count(self) -> int:
+        return sum(segment['rows'] for segment in self.segments())
+
+    # ==================== ЗАПИСЬ ====================
+
+    def append(self, rows: Sequence[Mapping[str, Any]]) -> int:
+        """
+        Дозапись строк (словари колонок; отсутствующие значения - пустые)
+
+        Returns:
+            Количество записанных строк (строки без корректного времени пропускаются)
+        """
+        if not rows:
+            return 0
+        columns = self._columns_from_rows(rows)
+        return self.append_columns(columns)
+
+    def append_frame(self, frame: pd.DataFrame) -> int:
+        """Дозапись DataFrame (например, импорт существующего CSV)"""
+        if frame is None or frame.empty:
+            return 0
+        columns = {}
+        for name, kind in self.schema.items():
+            series = frame[name] if name in frame.columns else pd.Series([None] * len(frame))
+            columns[name] = self._convert(series.tolist(), kind)
+        return self.append_columns(columns)
+
+    def append_columns(self, columns: Dict[str, np.ndarray]) -> int:
+        times = columns[self.time_column]
+        valid = ~np.isnat(times)
+        if not valid.all():
+            columns = {name: values[valid] for name, values in columns.items()}
+            times = columns[self.time_column]
+        if len(times) == 0:
+            return 0
+
+        days = times.astype('datetime64[D]')
+        with self._write_lock:
+            self._load_manifest()
+            segments = list(self._segments)
+            # Порядок строк сохраняется внутри каждого дня
+            for day in np.unique(days):
+                mask = days == day
+                part = {name: values[mask] for name, values in columns.items()}
+                self._append_partition(segments, str(day), part)
+            obsolete = self._compact(segments)
+            self._save_manifest(segments)
+        # Файлы слитых сегментов удаляются только после записи нового манифеста
+        for name in obsolete:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError as exc:
+                self.logger.warning(f"⚠️ Не удалось удалить сегмент {name}: {exc}")
+        return int(len(times))
+
+    def _append_partition(self, segments: List[Dict[str, Any]], partition: str,
+                          columns: Dict[str, np.ndarray]) -> None:
+        """Новые строки - новые сегменты дня (существующие не читаются)"""
+        total = len(columns[self.time_column])
+        for offset in range(0, total, self.segment_rows):
+            chunk = {name: values[offset:offset + self.segment_rows] for name, values in columns.items()}
+            segment = self._write_segment(self._next_name(segments, partition), partition, chunk)
+            segment['level'] = 0
+            segments.append(segment)
+
+    @staticmethod
+    def _next_name(segments: List[Dict[str, Any]], partition: str) -> str:
+        sequence = 0
+        for segment in segments:
+            if segment['partition'] == partition:
+                sequence = max(sequence, int(segment['file'].rsplit('seg-', 1)[1].split('.')[0]) + 1)
+        return f"{partition}/seg-{sequence:06d}.npz"
+
+    def _compact(self, segments: List[Dict[str, Any]]) -> List[str]:
+        """
+        Слияние небольших сегментов (список segments меняется на месте)
+
+        Returns:
+            Файлы слитых сегментов
+        """
+        obsolete: List[str] = []
+        if not segments:
+            return obsolete
+        newest = max(segment['partition'] for segment in segments)
+        for partition in dict.fromkeys(segment['partition'] for segment in segments):
+            if partition < newest:
+                # День закрыт: все небольшие сегменты сливаются один раз
+                small = self._small_indexes(segments, partition)
+                if len(small) > 1:
+                    obsolete += self._merge(segments, partition, small, level=None)
+                continue
+            level = 0
+            while True:
+                group = self._small_indexes(segments, partition, level)
+                if len(group) < self.compact_fanout:
+                    break
+                obsolete += self._merge(segments, partition, group, level=level + 1)
+                level += 1
+        return obsolete
+
+    def _small_indexes(self, segments: List[Dict[str, Any]], partition: str,
+                       level: Optional[int] = None) -> List[int]:
+        return [
+            index for index, segment in enumerate(segments)
+            if segment['partition'] == partition and segment['rows'] < self.segment_rows
+            and (level is None or segment.get('level', 0) == level)
+        ]
+
+    def _merge(self, segments: List[Dict[str, Any]], partition: str,
+               indexes: List[int], level: Optional[int]) -> List[str]:
+        parts = [self._read_segment(segments[index]['file'], self.columns) for index in indexes]
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in self.schema}
+        written = []
+        total = len(merged[self.time_column])
+        for offset in range(0, total, self.segment_rows):
+            chunk = {name: values[offset:offset + self.segment_rows] for name, values in merged.items()}
+            # Номер выбирается, пока исходные сегменты в списке: он больше их номеров,
+            # поэтому имя удаляемого файла не достанется новому сегменту
+            segment = self._write_segment(self._next_name(segments + written, partition), partition, chunk)
+            if level is not None:
+                segment['level'] = level
+            written.append(segment)
+
+        obsolete = [segments[index]['file'] for index in indexes]
+        for index in reversed(indexes):
+            del segments[index]
+        # Слитые сегменты встают на место первого исходного (порядок строк дня сохраняется)
+        segments[indexes[0]:indexes[0]] = written
+        return obsolete
+
+    def _write_segment(self, name: str, partition: str, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            np.savez(handle, **columns)
+        os.replace(tmp_path, path)
+
+        times = columns[self.time_column].view(np.int64)
+        segment = {
+            'file': name,
+            'partition': partition,
+            'rows': int(len(times)),
+            'min_ts': int(times.min()),
+            'max_ts': int(times.max()),
+        }
+        if self.strategy_column:
+            segment['strategies'] = sorted(set(columns[self.strategy_column].tolist()))
+        return segment
+
+    def _columns_from_rows(self, rows: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+        return {
+            name: self._convert([row.get(name) for row in rows], kind)
+            for name, kind in self.schema.items()
+        }
+
+    @staticmethod
+    def _dtype(kind: str):
+        if kind == TIME:
+            return 'datetime64[ns]'
+        if kind == FLOAT:
+            return np.float64
+        return np.str_
+
+    @staticmethod
+    def _convert(values: List[Any], kind: str) -> np.ndarray:
+        if kind == TIME:
+            stamps = pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors='coerce', format='mixed')
+            return stamps.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+        if kind == FLOAT:
+            return np.array([_float(value) for value in values], dtype=np.float64)
+        return np.array(['' if value is None or (isinstance(value, float) and value != value) else str(value)
+                         for value in values], dtype=np.str_)
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def _read_segment(self, name: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        # np.load у .npz ленивый: распаковываются только запрошенные колонки
+        with np.load(os.path.join(self.root, name), allow_pickle=False) as data:
+            return {column: data[column] for column in columns}
+
+    def query(self, strategy: Union[None, str, Iterable[str]] = None,
+              start: TimeBound = None, end: TimeBound = None,
+              columns: Optional[Sequence[str]] = None,
+              last: Optional[int] = None) -> pd.DataFrame:
+        """
+        Выборка строк журнала
+
+        Args:
+            strategy: Стратегия или набор стратегий (None - все)
+            start: Начало интервала времени включительно
+            end: Конец интервала времени включительно
+            columns: Нужные колонки (None - все колонки схемы)
+            last: Только последние N строк (после фильтров)
+
+        Returns:
+            DataFrame, отсортированный по времени; время - datetime64[ns, UTC]
+        """
+        wanted = list(columns) if columns else list(self.columns)
+        unknown = [name for name in wanted if name not in self.schema]
+        if unknown:
+            raise KeyError(f"Неизвестные колонки журнала: {unknown}")
+
+        strategies = None
+        if strategy is not None:
+            strategies = {strategy} if isinstance(strategy, str) else set(strategy)
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+
+        selected = []
+        for segment in self.segments():
+            if start_ns is not None and segment['max_ts'] < start_ns:
+                continue
+            if end_ns is not None and segment['min_ts'] > end_ns:
+                continue
+            if strategies is not None and self.strategy_column and \
+                    not strategies.intersection(segment.get('strategies', ())):
+                continue
+            selected.append(segment)
+
+        load = list(dict.fromkeys(wanted + [self.time_column] +
+                                  ([self.strategy_column] if strategies is not None else [])))
+        if last is not None:
+            # Последние N: сегменты читаются с конца до набора N строк
+            selected.sort(key=lambda segment: segment['max_ts'])
+            parts, found = [], 0
+            for segment in reversed(selected):
+                part = self._filter(self._read_segment(segment['file'], load), strategies, start_ns, end_ns)
+                parts.append(part)
+                found += len(part[self.time_column])
+                if found >= last:
+                    break
+            parts.reverse()
+        else:
+            parts = [
+                self._filter(self._read_segment(segment['file'], load), strategies, start_ns, end_ns)
+                for segment in selected
+            ]
+
+        if parts:
+            merged = {name: np.concatenate([part[name] for part in parts]) for name in load}
+        else:
+            merged = {name: np.empty(0, dtype=self._dtype(self.schema[name])) for name in load}
+
+        order = np.argsort(merged[self.time_column], kind='stable')
+        if last is not None:
+            order = order[max(0, len(order) - last):]
+        frame = pd.DataFrame({name: merged[name][order] for name in wanted})
+        if self.time_column in frame.columns:
+            frame[self.time_column] = frame[self.time_column].dt.tz_localize('UTC')
+        return frame
+
+    def _filter(self, part: Dict[str, np.ndarray], strategies: Optional[set],
+                start_ns: Optional[int], end_ns: Optional[int]) -> Dict[str, np.ndarray]:
+        mask = None
+        times = part[self.time_column].view(np.int64)
+        if start_ns is not None:
+            mask = times >= start_ns
+        if end_ns is not None:
+            upper = times <= end_ns
+            mask = upper if mask is None else mask & upper
+        if strategies is not None and self.strategy_column:
+            chosen = np.isin(part[self.strategy_column], list(strategies))
+            mask = chosen if mask is None else mask & chosen
+        if mask is None:
+            return part
+        return {name: values[mask] for name, values in part.items()}
+
+    def by_strategy(self, strategy: Union[str, Iterable[str]], **kwargs) -> pd.DataFrame:
+        return self.query(strategy=strategy, **kwargs)
+
+    def by_time_range(self, start: TimeBound = None, end: TimeBound = None, **kwargs) -> pd.DataFrame:
+        return self.query(start=start, end=end, **kwargs)
+
+    def last_rows(self, count: int, **kwargs) -> pd.DataFrame:
+        return self.query(last=count, **kwargs)
@@ -9,13 +9,18 @@ import threading
 import time
 import queue
 import logging
-from typing import Dict, Optional, Tuple, Any, List
+from typing import Dict, Optional, Tuple, Any, List, Union
 from datetime import datetime, timedelta
 from collections import defaultdict
 from dataclasses import dataclass
 from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from bot.core.exceptions import OrderRejectionError, RateLimitError, PositionConflictError
+from bot.core.retry_scheduler import RetryScheduler, is_transient_error, scheduled_retries
+
+# Окно сбора ордеров в пакет (сек) и максимум ордеров в пакете (/v5/order/create-batch)
+ORDER_BATCH_WINDOW = 0.02
+MAX_ORDER_BATCH = 10
 
 
 @dataclass
@@ -32,6 +37,8 @@ class OrderRequest:
     position_idx: Optional[int] = None
     strategy_name: str = "unknown"
     timestamp: datetime = None
+    # Срок отправки в секундах от постановки в очередь (по умолчанию - order_deadline_seconds)
+    deadline_seconds: Optional[float] = None
     
     def __post_init__(self):
         if self.timestamp is None:
@@ -45,6 +52,8 @@ class _OrderJob:
     order_key: str
     future: Future
     submitted_at: datetime
+    deadline: float = float('inf')
+    attempt: int = 0
 
 
 class ThreadSafeOrderManager:
@@ -57,11 +66,17 @@ class ThreadSafeOrderManager:
     - Контроль состояния позиций
     - Аварийная остановка
     - Полная thread-safety
+    - Пакетная отправка: ордера одного аккаунта, пришедшие в окне
+      batch_window_seconds, уходят одним запросом create_batch_orders вместе
+      со стопами; ордера цикла из create_orders_safe - сразу, без окна
     """
     
     def __init__(self, max_orders_per_minute: int = 10, *, worker_count: int = 2,
                  queue_capacity: int = 128, order_timeout_seconds: float = 10.0,
-                 max_worker_retries: int = 3):
+                 max_worker_retries: int = 3, order_deadline_seconds: Optional[float] = None,
+                 retry_scheduler: Optional[RetryScheduler] = None,
+                 batch_window_seconds: float = ORDER_BATCH_WINDOW,
+                 max_batch_size: int = MAX_ORDER_BATCH):
         # 🔒 ОСНОВНЫЕ БЛОКИРОВКИ
         self._global_lock = threading.RLock()
         self._symbol_locks: Dict[str, threading.RLock] = {}
@@ -88,7 +103,12 @@ class ThreadSafeOrderManager:
             'total_orders': 0,
             'rejected_orders': 0,
             'duplicate_blocks': 0,
-            'rate_limit_blocks': 0
+            'rate_limit_blocks': 0,
+            'retries_scheduled': 0,
+            'expired_orders': 0,
+            'wire_seconds': 0.0,
+            'batches_sent': 0,
+            'batched_orders': 0
         }
 
         self.logger.info("🛡️ ThreadSafeOrderManager инициализирован с максимальной защитой")
@@ -98,6 +118,15 @@ class ThreadSafeOrderManager:
         self._max_worker_retries = max(1, max_worker_retries)
         self._worker_retry_base_delay = 0.5
         self._worker_retry_backoff_cap = 5.0
+        # Ордер не отправляется позже срока: по умолчанию - пока его ждет create_order_safe
+        self._order_deadline_seconds = (
+            order_deadline_seconds if order_deadline_seconds is not None else order_timeout_seconds
+        )
+        # Повторы ждут в очереди задержек, а не в воркере
+        self._retry_scheduler = retry_scheduler or RetryScheduler(name="order-retry")
+        # Пакетная отправка (0 - каждый ордер отдельным запросом)
+        self._batch_window_seconds = max(0.0, batch_window_seconds)
+        self._max_batch_size = max(1, max_batch_size)
 
         self._order_queue: "queue.Queue[_OrderJob]" = queue.Queue(maxsize=queue_capacity)
         self._worker_stop_event = threading.Event()
@@ -120,6 +149,7 @@ class ThreadSafeOrderManager:
             return
 
         self._worker_stop_event.set()
+        self._retry_scheduler.stop(timeout=timeout)
         # Разблокируем воркеры
         for _ in self._workers:
             try:
@@ -150,8 +180,8 @@ class ThreadSafeOrderManager:
             else:
                 self.logger.info("✅ Аварийная остановка отключена")
     
-    def _check_rate_limit(self, symbol: str) -> Tuple[bool, str]:
-        """Проверка лимита частоты ордеров"""
+    def _check_rate_limit(self, symbol: str, queued: int = 0) -> Tuple[bool, str]:
+        """Проверка лимита частоты ордеров (queued - ордера символа, уже поставленные в этом цикле)"""
         now = datetime.now()
         minute_ago = now - timedelta(minutes=1)
         
@@ -161,7 +191,7 @@ class ThreadSafeOrderManager:
             if ts > minute_ago
         ]
         
-        if len(self._order_timestamps[symbol]) >= self._max_orders_per_minute:
+        if len(self._order_timestamps[symbol]) + queued >= self._max_orders_per_minute:
             self._stats['rate_limit_blocks'] += 1
             return False, f"Rate limit exceeded: {len(self._order_timestamps[symbol])}/{self._max_orders_per_minute} orders per minute"
         
@@ -238,7 +268,61 @@ class ThreadSafeOrderManager:
     
     def create_order_safe(self, api, request: OrderRequest) -> Optional[Dict[str, Any]]:
         """🛡️ Безопасное создание ордера с вынесенным сетевым вызовом."""
+        order_key = self._prepare_order(api, request)
+        try:
+            future = self._submit_order_jobs([self._new_order_job(api, request, order_key)])[0]
+        except Exception:
+            # Очистка pending при ошибке постановки в очередь
+            self._remove_pending_order(request.symbol, order_key)
+            raise
+        return self._await_order(future, request, order_key)
+
+    def create_orders_safe(self, orders: List[Tuple[Any, OrderRequest]]
+                           ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        🛡️ Ордера одного торгового цикла: все ставятся в очередь до ожидания первого
+
+        Ордера уходят одной задачей без окна сбора: ордера одного аккаунта -
+        одним запросом create_batch_orders, одиночный ордер - сразу. Ордера
+        цикла проверяются как одна отправка: интервал между ордерами символа
+        отсчитывается между циклами, лимит в минуту учитывает весь цикл.
+
+        Returns:
+            Результат для каждого ордера в порядке orders: ответ API или
+            исключение (OrderRejectionError, RateLimitError, PositionConflictError)
+        """
+        results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(orders)
+        prepared: List[Tuple[int, _OrderJob]] = []
+        queued: Dict[str, int] = defaultdict(int)
+
+        for index, (api, request) in enumerate(orders):
+            try:
+                order_key = self._prepare_order(api, request, queued[request.symbol])
+            except (OrderRejectionError, RateLimitError, PositionConflictError) as e:
+                results[index] = e
+                continue
+            queued[request.symbol] += 1
+            prepared.append((index, self._new_order_job(api, request, order_key)))
+
+        if prepared:
+            try:
+                self._submit_order_jobs([job for _, job in prepared], cycle=True)
+            except OrderRejectionError as e:
+                for index, job in prepared:
+                    self._remove_pending_order(job.request.symbol, job.order_key)
+                    results[index] = e
+                return results
+
+        # ⏱️ Все ордера цикла уже в очереди - ждем результаты
+        for index, job in prepared:
+            try:
+                results[index] = self._await_order(job.future, job.request, job.order_key)
+            except (OrderRejectionError, RateLimitError, PositionConflictError) as e:
+                results[index] = e
+        return results
 
+    def _prepare_order(self, api, request: OrderRequest, queued: int = 0) -> str:
+        """Проверки ордера и регистрация pending под блокировкой символа"""
         symbol = request.symbol
         order_key = f"{request.side}_{request.order_type}_{request.qty}_{request.price}_{request.strategy_name}"
 
@@ -251,7 +335,7 @@ class ThreadSafeOrderManager:
             if self._emergency_stop:
                 raise OrderRejectionError("🚨 АВАРИЙНАЯ ОСТАНОВКА: Все ордера заблокированы")
 
-            rate_ok, rate_msg = self._check_rate_limit(symbol)
+            rate_ok, rate_msg = self._check_rate_limit(symbol, queued)
             if not rate_ok:
                 raise RateLimitError(f"Rate limit для {symbol}: {rate_msg}")
 
@@ -267,18 +351,16 @@ class ThreadSafeOrderManager:
                 'request': request,
                 'created_at': datetime.now()
             }
+        return order_key
 
-            try:
-                future = self._submit_order_job(api, request, order_key)
-            except Exception:
-                # Очистка pending при ошибке постановки в очередь
-                self._remove_pending_order(symbol, order_key)
-                raise
-
-        # ⏱️ Ждём результат от воркера вне блокировки символа
+    def _await_order(self, future: Future, request: OrderRequest, order_key: str) -> Dict[str, Any]:
+        """Ожидание результата воркера вне блокировки символа"""
+        symbol = request.symbol
         try:
             order_response = future.result(timeout=self._order_timeout_seconds)
         except FutureTimeoutError:
+            # Задача в очереди или в ожидании повтора больше не отправляется
+            future.cancel()
             self._stats['rejected_orders'] += 1
             self._remove_pending_order(symbol, order_key)
             self.logger.error(
@@ -324,27 +406,41 @@ class ThreadSafeOrderManager:
         with self.get_symbol_lock(symbol):
             return self._active_positions.get(symbol, None)
 
-    def _submit_order_job(self, api, request: OrderRequest, order_key: str) -> Future:
-        future: Future = Future()
-        job = _OrderJob(
+    def _new_order_job(self, api, request: OrderRequest, order_key: str) -> _OrderJob:
+        return _OrderJob(
             api=api,
             request=request,
             order_key=order_key,
-            future=future,
-            submitted_at=datetime.now()
+            future=Future(),
+            submitted_at=datetime.now(),
+            deadline=time.monotonic() + (
+                request.deadline_seconds if request.deadline_seconds is not None
+                else self._order_deadline_seconds
+            )
         )
 
+    def _submit_order_jobs(self, jobs: List[_OrderJob], cycle: bool = False) -> List[Future]:
+        """
+        Постановка задач в очередь
+
+        Отдельный ордер попадает в окно сбора пакета; ордера цикла (cycle)
+        ставятся одним элементом очереди и отправляются без ожидания окна.
+        """
+        item: Union[_OrderJob, List[_OrderJob]] = list(jobs) if cycle else jobs[0]
         try:
-            self._order_queue.put(job, timeout=1.0)
-            self.logger.debug(
-                f"🧵 Ордер отправлен в очередь: {request.strategy_name} {request.side} {request.qty} {request.symbol}"
-            )
+            self._order_queue.put(item, timeout=1.0)
+            for job in jobs:
+                request = job.request
+                self.logger.debug(
+                    f"🧵 Ордер отправлен в очередь: {request.strategy_name} {request.side} {request.qty} {request.symbol}"
+                )
         except queue.Full:
-            future.set_exception(OrderRejectionError("Очередь ордеров переполнена"))
+            for job in jobs:
+                job.future.set_exception(OrderRejectionError("Очередь ордеров переполнена"))
             self.logger.error("🚫 Очередь ордеров переполнена — новый ордер отклонён")
             raise OrderRejectionError("Очередь ордеров переполнена")
 
-        return future
+        return [job.future for job in jobs]
 
     def _remove_pending_order(self, symbol: str, order_key: str) -> None:
         with self._global_lock:
@@ -364,17 +460,153 @@ class ThreadSafeOrderManager:
                 self._order_queue.task_done()
                 break
 
+            if isinstance(job, list):
+                # Ордера цикла: все уже собраны, окно не нужно
+                jobs, taken, stop_requested = job, 1, False
+            else:
+                jobs, taken, stop_requested = self._collect_batch(job)
             try:
-                self._process_order_job(job)
+                self._process_order_jobs(jobs)
             finally:
+                for _ in range(taken):
+                    self._order_queue.task_done()
+            if stop_requested:
                 self._order_queue.task_done()
+                break
+
+    def _collect_batch(self, first: _OrderJob) -> Tuple[List[_OrderJob], int, bool]:
+        """Сбор ордеров, пришедших в окне пакета после first (задачи, число элементов очереди, стоп)"""
+        jobs = [first]
+        taken = 1
+        if not self._batch_window_seconds or not self._supports_batch(first.api):
+            return jobs, taken, False
+
+        collect_until = time.monotonic() + self._batch_window_seconds
+        while len(jobs) < self._max_batch_size:
+            remaining = collect_until - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._order_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:  # type: ignore[truthy-function]
+                return jobs, taken, True
+            taken += 1
+            jobs.extend(job if isinstance(job, list) else [job])
+        return jobs, taken, False
+
+    @staticmethod
+    def _supports_batch(api) -> bool:
+        return callable(getattr(api, 'create_batch_orders', None))
+
+    @staticmethod
+    def _account_key(api) -> Any:
+        """
+        Ключ аккаунта для группировки ордеров в пакет
+
+        У каждой стратегии свой адаптер, поэтому группируем не по объекту API,
+        а по клиенту rate limiter (отпечаток ключа) и endpoint.
+        """
+        target = api if isinstance(getattr(api, '_rate_limit_client', None), str) else getattr(api, 'api', None)
+        client = getattr(target, '_rate_limit_client', None)
+        if not isinstance(client, str):
+            return id(api)
+        return f"{client}@{getattr(target, 'base_url', '')}"
+
+    def _process_order_jobs(self, jobs: List[_OrderJob]) -> None:
+        """Отправка собранных ордеров: пакетом на каждый аккаунт или по одному"""
+        groups: Dict[Any, List[_OrderJob]] = {}
+        for job in jobs:
+            groups.setdefault(self._account_key(job.api), []).append(job)
+
+        for group in groups.values():
+            if self._batch_window_seconds and self._supports_batch(group[0].api):
+                for start in range(0, len(group), self._max_batch_size):
+                    self._process_order_batch(group[start:start + self._max_batch_size])
+            else:
+                for job in group:
+                    self._process_order_job(job)
+
+    def _process_order_batch(self, jobs: List[_OrderJob]) -> None:
+        """
+        Отправка ордеров одного API одним запросом create_batch_orders
+
+        Стопы передаются вместе с ордерами; результат каждого ордера
+        разрешает его собственный future (ошибки повторяются по отдельности).
+        """
+        ready = []
+        for job in jobs:
+            if job.future.done():
+                continue
+            if time.monotonic() >= job.deadline:
+                self._expire_order_job(job)
+                continue
+            ready.append(job)
+        if not ready:
+            return
+
+        orders = [
+            {
+                'symbol': job.request.symbol,
+                'side': job.request.side,
+                'order_type': job.request.order_type,
+                'qty': job.request.qty,
+                'price': job.request.price,
+                'stop_loss': job.request.stop_loss,
+                'take_profit': job.request.take_profit,
+                'reduce_only': job.request.reduce_only,
+                'position_idx': job.request.position_idx,
+            }
+            for job in ready
+        ]
+
+        error: Optional[Exception] = None
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(ready)
+        started = time.monotonic()
+        try:
+            with scheduled_retries():
+                responses = list(ready[0].api.create_batch_orders(orders))
+        except Exception as exc:
+            error = exc
+        finally:
+            with self._global_lock:
+                self._stats['wire_seconds'] += time.monotonic() - started
+                self._stats['batches_sent'] += 1
+                self._stats['batched_orders'] += len(ready)
+        self.logger.debug(f"📦 Пакет из {len(ready)} ордеров отправлен")
+
+        responses += [None] * (len(ready) - len(responses))
+        for job, response in zip(ready, responses):
+            if error is None and response and response.get('retCode') == 0:
+                # Стопы ушли в том же запросе; set_trading_stop пропускается, только если
+                # биржа подтвердила их значения в ответе
+                response['stops_attached'] = stops_confirmed(response, job.request.stop_loss,
+                                                             job.request.take_profit)
+            self._complete_order_job(job, response, error)
 
     def _process_order_job(self, job: _OrderJob) -> None:
+        """
+        Одна попытка отправки ордера
+
+        При временной ошибке задача возвращается в очередь через RetryScheduler
+        после backoff - воркер не спит и сразу берет следующую задачу.
+        """
         request = job.request
-        symbol = request.symbol
 
-        for attempt in range(self._max_worker_retries):
-            try:
+        if job.future.done():
+            # create_order_safe перестал ждать ордер (таймаут)
+            return
+        if time.monotonic() >= job.deadline:
+            self._expire_order_job(job)
+            return
+
+        error: Optional[Exception] = None
+        response: Optional[Dict[str, Any]] = None
+        started = time.monotonic()
+        try:
+            # Клиент API не повторяет запрос сам: повторы - через планировщик
+            with scheduled_retries():
                 response = job.api.create_order(
                     symbol=request.symbol,
                     side=request.side,
@@ -386,48 +618,75 @@ class ThreadSafeOrderManager:
                     reduce_only=request.reduce_only,
                     position_idx=request.position_idx
                 )
+        except Exception as exc:
+            error = exc
+        finally:
+            with self._global_lock:
+                self._stats['wire_seconds'] += time.monotonic() - started
+
+        self._complete_order_job(job, response, error)
+
+    def _complete_order_job(self, job: _OrderJob, response: Optional[Dict[str, Any]],
+                            error: Optional[Exception]) -> None:
+        """Результат попытки: успех, повтор через планировщик или отказ"""
+        symbol = job.request.symbol
+
+        if error is None and response and response.get('retCode') == 0:
+            if not job.future.done():
+                job.future.set_result(response)
+            return
 
-                if response and response.get('retCode') == 0:
-                    if not job.future.done():
-                        job.future.set_result(response)
-                    return
-
-                error_msg = response.get('retMsg', 'Unknown error') if response else 'No response'
-                self.logger.warning(
-                    f"⚠️ API вернул ошибку при создании ордера {symbol}: {error_msg} (попытка {attempt + 1})"
-                )
+        if error is not None:
+            self.logger.warning(
+                f"⚠️ Ошибка сети/воркера при создании ордера {symbol}: {error} (попытка {job.attempt + 1})"
+            )
+            should_retry = True
+        else:
+            error_msg = response.get('retMsg', 'Unknown error') if response else 'No response'
+            self.logger.warning(
+                f"⚠️ API вернул ошибку при создании ордера {symbol}: {error_msg} (попытка {job.attempt + 1})"
+            )
+            should_retry = self._should_retry_response(response)
+
+        if should_retry and job.attempt < self._max_worker_retries - 1:
+            delay = self._compute_retry_delay(job.attempt)
+            job.attempt += 1
+            if self._retry_scheduler.schedule(
+                delay, lambda: self._requeue_order_job(job),
+                deadline=job.deadline, on_expired=lambda: self._expire_order_job(job)
+            ):
+                with self._global_lock:
+                    self._stats['retries_scheduled'] += 1
+                self.logger.debug(f"🔁 Повторная попытка ордера {symbol} через {delay:.2f}s")
+            return
 
-                should_retry = self._should_retry_response(response)
-                if should_retry and attempt < self._max_worker_retries - 1:
-                    delay = self._compute_retry_delay(attempt)
-                    self.logger.debug(
-                        f"🔁 Повторная попытка ордера {symbol} через {delay:.2f}s"
-                    )
-                    time.sleep(delay)
-                    continue
-
-                if not job.future.done():
-                    job.future.set_exception(OrderRejectionError(f"API отклонил ордер: {error_msg}"))
-                return
-
-            except Exception as exc:
-                self.logger.warning(
-                    f"⚠️ Ошибка сети/воркера при создании ордера {symbol}: {exc} (попытка {attempt + 1})"
-                )
-                if attempt < self._max_worker_retries - 1:
-                    delay = self._compute_retry_delay(attempt)
-                    self.logger.debug(
-                        f"🔁 Повторная попытка после ошибки для {symbol} через {delay:.2f}s"
-                    )
-                    time.sleep(delay)
-                    continue
-
-                if not job.future.done():
-                    job.future.set_exception(exc)
-                return
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_exception(OrderRejectionError(f"API отклонил ордер: {error_msg}"))
+
+    def _requeue_order_job(self, job: _OrderJob) -> None:
+        """Возврат задачи в очередь после backoff (поток планировщика)"""
+        if job.future.done():
+            return
+        try:
+            self._order_queue.put_nowait(job)
+        except queue.Full:
+            job.future.set_exception(OrderRejectionError("Очередь ордеров переполнена"))
+            self.logger.error(f"🚫 Очередь ордеров переполнена — повтор {job.request.symbol} отклонён")
 
+    def _expire_order_job(self, job: _OrderJob) -> None:
+        """Ордер не отправлен до срока - отбрасывается, а не отправляется с опозданием"""
+        with self._global_lock:
+            self._stats['expired_orders'] += 1
+        self.logger.warning(
+            f"⌛ Ордер {job.request.symbol} {job.request.side} {job.request.qty} отброшен: "
+            f"истек срок отправки (попытка {job.attempt + 1})"
+        )
         if not job.future.done():
-            job.future.set_exception(OrderRejectionError("Не удалось создать ордер: исчерпаны попытки"))
+            job.future.set_exception(OrderRejectionError(f"Истек срок отправки ордера {job.request.symbol}"))
 
     def _compute_retry_delay(self, attempt: int) -> float:
         delay = self._worker_retry_base_delay * (2 ** attempt)
@@ -439,7 +698,10 @@ class ThreadSafeOrderManager:
             return True
         ret_code = response.get('retCode')
         # Повторяем при временных ошибках (rate limit, network)
-        return ret_code in {-1001, -1002, -1020}
+        if ret_code in {-1001, -1002, -1020}:
+            return True
+        # Сетевая ошибка, которую клиент API вернул ответом после единственной попытки
+        return ret_code == -1 and is_transient_error(response.get('retMsg', ''))
     
     def get_stats(self) -> Dict[str, Any]:
         """Получение статистики работы менеджера"""
@@ -449,7 +711,9 @@ class ThreadSafeOrderManager:
                 'emergency_stop': self._emergency_stop,
                 'active_positions': len(self._active_positions),
                 'pending_orders': sum(len(orders) for orders in self._pending_orders.values()),
-                'symbol_locks': len(self._symbol_locks)
+                'symbol_locks': len(self._symbol_locks),
+                'backoff_seconds': self._retry_scheduler.get_stats()['backoff_seconds'],
+                'retries_pending': self._retry_scheduler.pending()
             }
     
     def cleanup_old_pending(self, max_age_seconds: int = 60):
@@ -501,6 +765,29 @@ def reset_order_manager():
         _order_manager_instance = None
 
 
+def stops_confirmed(response: Dict[str, Any], stop_loss: Optional[float],
+                    take_profit: Optional[float]) -> bool:
+    """
+    Подтверждены ли SL/TP ордера ответом биржи
+
+    Ответ create-batch Bybit v5 не содержит stopLoss/takeProfit, поэтому такой
+    ордер считается незащищенным и стопы ставятся через set_trading_stop, как
+    для одиночных ордеров.
+    """
+    if not (stop_loss or take_profit):
+        return False
+    result = response.get('result') or {}
+    for key, expected in (('stopLoss', stop_loss), ('takeProfit', take_profit)):
+        if not expected:
+            continue
+        try:
+            if abs(float(result.get(key)) - float(expected)) > 1e-9 * max(1.0, abs(float(expected))):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
 def validate_order_parameters(symbol: str, side: str, order_type: str, qty: float, 
                              price: Optional[float] = None, 
                              stop_loss: Optional[float] = None,
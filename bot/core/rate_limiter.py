@@ -3,17 +3,32 @@
 💀 КРИТИЧЕСКИЙ КОМПОНЕНТ: Жесточайший Rate Limiter
 ПОЛНАЯ ЗАЩИТА ОТ ПРЕВЫШЕНИЯ ЛИМИТОВ БИРЖИ
 EMERGENCY SHUTDOWN ПРИ МАЛЕЙШЕЙ УГРОЗЕ!
+
+Лимиты считаются корзинными счетчиками скользящего окна (SlidingWindowCounter):
+проверка и регистрация запроса стоят O(1) и не зависят от объема трафика.
+Глобальные счетчики защищены отдельной короткой блокировкой, счетчики
+клиентов - полосами блокировок (lock striping) по ключу клиента.
+
+acquire(..., timeout=) вместо исключения ждет разрешения: время до освобождения
+лимита вычисляется точно по корзинам счетчиков, ожидающие обслуживаются по
+очереди FIFO внутри приоритетных полос (ордера раньше рыночных данных).
+
+Квоты биржи (заголовки X-Bapi-Limit, X-Bapi-Limit-Status,
+X-Bapi-Limit-Reset-Timestamp) принимаются через update_from_headers: пока
+квота эндпоинта актуальна, она заменяет статические лимиты в секунду и burst,
+и запросы останавливаются за SERVER_QUOTA_RESERVE запросов до ошибки 10006.
 """
 
+import itertools
 import time
 import threading
-from typing import Dict, List, Optional, Tuple, Any
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
-from collections import deque, defaultdict
 from dataclasses import dataclass
 import logging
 
-from bot.core.exceptions import RateLimitError, EmergencyStopError
+from bot.core.exceptions import ClientBannedError, RateLimitError, EmergencyStopError
 
 
 @dataclass
@@ -26,9 +41,58 @@ class RateLimitConfig:
     emergency_threshold: float = 0.8  # При достижении 80% лимита - предупреждение
 
 
+# Окно burst лимита (сек)
+BURST_WINDOW_SECONDS = 10
+
+# Количество полос блокировок счетчиков клиентов
+LOCK_STRIPES = 64
+
+# Приоритетные полосы ожидания разрешений: меньше - обслуживается раньше
+PRIORITY_PROTECTIVE = -1
+PRIORITY_ORDERS = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET_DATA = 2
+
+REQUEST_PRIORITIES = {
+    'trading_stop': PRIORITY_PROTECTIVE,
+    'order_create': PRIORITY_ORDERS,
+    'order_cancel': PRIORITY_ORDERS,
+    'position_query': PRIORITY_ACCOUNT,
+    'balance_query': PRIORITY_ACCOUNT,
+    'market_data': PRIORITY_MARKET_DATA,
+}
+
+# Типы запросов защитных стопов: не отклоняются по таймауту ожидания разрешения
+PROTECTIVE_REQUEST_TYPES = frozenset({'trading_stop'})
+
+# Шаг ожидания разрешения для защитных стопов (сек) между записями в лог
+PROTECTIVE_WAIT_STEP = 5.0
+
+# Запас квоты биржи, который не расходуем (защита от 10006 при параллельных запросах)
+SERVER_QUOTA_RESERVE = 1
+
+# Окно квоты биржи, если метка сброса не в будущем (лимиты UID Bybit - в секунду)
+SERVER_QUOTA_WINDOW = 1.0
+
+# Квота без обновлений дольше этого срока (сек) не используется - действуют статические лимиты
+SERVER_QUOTA_TTL = 60.0
+
+# Заголовки лимитов Bybit v5
+HEADER_LIMIT = 'X-Bapi-Limit'
+HEADER_LIMIT_STATUS = 'X-Bapi-Limit-Status'
+HEADER_LIMIT_RESET = 'X-Bapi-Limit-Reset-Timestamp'
+
+PRIORITY_NAMES = {
+    PRIORITY_PROTECTIVE: 'protective',
+    PRIORITY_ORDERS: 'orders',
+    PRIORITY_ACCOUNT: 'account',
+    PRIORITY_MARKET_DATA: 'market_data',
+}
+
+
 class RateLimitViolation:
     """Информация о нарушении лимита"""
-    def __init__(self, limit_type: str, current_count: int, limit_value: int, 
+    def __init__(self, limit_type: str, current_count: int, limit_value: int,
                  timestamp: datetime, client_id: str = "default"):
         self.limit_type = limit_type
         self.current_count = current_count
@@ -36,7 +100,7 @@ class RateLimitViolation:
         self.timestamp = timestamp
         self.client_id = client_id
         self.severity = self._calculate_severity()
-    
+
     def _calculate_severity(self) -> str:
         """Расчёт серьёзности нарушения"""
         ratio = self.current_count / self.limit_value
@@ -50,27 +114,189 @@ class RateLimitViolation:
             return "LOW"
 
 
+class SlidingWindowCounter:
+    """
+    Счетчик событий в скользящем окне из фиксированного числа корзин
+
+    Кольцо хранит slots + 1 корзин, поэтому событие учитывается не меньше
+    window секунд (и не больше window + ширина корзины): счетчик может
+    немного завысить нагрузку, но никогда не занижает ее.
+    Не потокобезопасен - синхронизация на стороне владельца.
+    """
+
+    __slots__ = ('window', 'slot_width', '_slots_per_second', '_counts', '_total', '_current')
+
+    def __init__(self, window: float, slots: int):
+        self.window = window
+        self.slot_width = window / slots
+        self._slots_per_second = slots / window
+        self._counts = [0] * (slots + 1)
+        self._total = 0
+        self._current: Optional[int] = None
+
+    def _advance(self, now: float) -> None:
+        slot = int(now * self._slots_per_second)
+        if self._current is None:
+            self._current = slot
+            return
+
+        steps = slot - self._current
+        if steps <= 0:
+            return
+        size = len(self._counts)
+        if steps >= size:
+            self._counts = [0] * size
+            self._total = 0
+        else:
+            for absolute in range(self._current + 1, slot + 1):
+                index = absolute % size
+                self._total -= self._counts[index]
+                self._counts[index] = 0
+        self._current = slot
+
+    def count(self, now: float) -> int:
+        """Количество событий в окне"""
+        self._advance(now)
+        return self._total
+
+    def add(self, now: float, amount: int = 1) -> int:
+        """Регистрация событий; возвращает количество событий в окне"""
+        self._advance(now)
+        self._counts[self._current % len(self._counts)] += amount
+        self._total += amount
+        return self._total
+
+    def time_until_below(self, limit: int, now: float) -> float:
+        """Через сколько секунд в окне станет меньше limit событий (0 - уже меньше)"""
+        self._advance(now)
+        excess = self._total - limit + 1
+        if excess <= 0:
+            return 0.0
+
+        size = len(self._counts)
+        for absolute in range(self._current - size + 1, self._current + 1):
+            excess -= self._counts[absolute % size]
+            if excess <= 0:
+                # Корзина очищается, когда текущей становится корзина absolute + size
+                return max((absolute + size) / self._slots_per_second - now, 0.0)
+        return self.window
+
+
+class _RequestCounters:
+    """Счетчики одного ключа (клиент[:символ], тип запроса)"""
+
+    __slots__ = ('minute', 'second', 'burst', 'last_used')
+
+    def __init__(self):
+        self.minute = SlidingWindowCounter(60.0, 60)
+        self.second = SlidingWindowCounter(1.0, 10)
+        self.burst = SlidingWindowCounter(BURST_WINDOW_SECONDS, 10)
+        self.last_used = 0.0
+
+    def add(self, now: float) -> None:
+        self.minute.add(now)
+        self.second.add(now)
+        self.burst.add(now)
+        self.last_used = now
+
+
+class _ServerQuota:
+    """
+    Квота эндпоинта по данным биржи
+
+    limit - лимит биржи в окне, remaining - остаток до reset_at (уменьшается
+    локально при каждом допуске, пока не придет следующий ответ), sent -
+    собственные запросы к эндпоинту за последнюю секунду.
+    """
+
+    __slots__ = ('limit', 'remaining', 'reset_at', 'updated_at', 'sent')
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining = 0
+        self.reset_at = 0.0
+        self.updated_at = 0.0
+        self.sent = SlidingWindowCounter(SERVER_QUOTA_WINDOW, 10)
+
+    def delay(self, now: float) -> float:
+        """Секунд до разрешения следующего запроса с учетом запаса"""
+        delay = 0.0
+        if now < self.reset_at and self.remaining <= SERVER_QUOTA_RESERVE:
+            delay = self.reset_at - now
+        if self.limit is not None:
+            delay = max(delay, self.sent.time_until_below(max(self.limit - SERVER_QUOTA_RESERVE, 1), now))
+        return delay
+
+    def consume(self, now: float) -> None:
+        if now < self.reset_at:
+            self.remaining -= 1
+        self.sent.add(now)
+
+
+class _PermitWaiter:
+    """Вызов acquire, ожидающий разрешения"""
+
+    __slots__ = ('priority', 'seq', 'key', 'blocked_on', 'enqueued_at')
+
+    def __init__(self, priority: int, seq: int, key: Tuple[str, str], enqueued_at: float):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        # None - еще не пытался, 'key' - ждет лимит своего ключа, 'global' - глобальный лимит
+        self.blocked_on: Optional[str] = None
+        self.enqueued_at = enqueued_at
+
+
+def _header_int(headers: Any, name: str) -> Optional[int]:
+    """Целое значение заголовка без учета регистра имени (None - нет или не число)"""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        value = next((v for k, v in headers.items() if str(k).lower() == lowered), None)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
 class AggressiveRateLimiter:
     """
     💀 АГРЕССИВНЫЙ RATE LIMITER С EMERGENCY SHUTDOWN
-    
+
     Особенности:
     - Жесточайшие лимиты для каждого типа запроса
     - Автоматический emergency shutdown при угрозе
     - Полное логирование всех попыток
     - Блокировка клиентов-нарушителей
     - Глобальные и пер-символьные лимиты
+    - Проверка лимитов за O(1) независимо от объема трафика
+    - Ожидание разрешения с FIFO очередью и приоритетными полосами
+    - Адаптация к остатку квоты из заголовков ответов биржи
     """
-    
-    def __init__(self):
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Args:
+            clock: Монотонный источник времени для счетчиков окон
+            wall_clock: Источник времени эпохи для меток сброса квоты биржи
+        """
+        self._clock = clock
+        self._wall_clock = wall_clock
+
         # 🔒 ОСНОВНЫЕ БЛОКИРОВКИ
+        # _lock - нарушения, блокировки клиентов и emergency stop (редкий путь)
         self._lock = threading.RLock()
-        self._client_locks = defaultdict(lambda: threading.RLock())
-        
+        # _global_lock - глобальные счетчики и статистика (короткие O(1) секции)
+        self._global_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
         # 📊 ОТСЛЕЖИВАНИЕ ЗАПРОСОВ
-        self._request_timestamps: Dict[str, Dict[str, deque]] = defaultdict(lambda: defaultdict(deque))
+        self._counters: Dict[Tuple[str, str], _RequestCounters] = {}
         self._violation_history: List[RateLimitViolation] = []
-        
+
         # ⚙️ КОНФИГУРАЦИЯ ЛИМИТОВ
         self._limits: Dict[str, RateLimitConfig] = {
             'order_create': RateLimitConfig(
@@ -80,6 +306,15 @@ class AggressiveRateLimiter:
                 cooldown_seconds=30,
                 emergency_threshold=0.7
             ),
+            # Защитные стопы (/v5/position/trading-stop): свой бюджет по лимиту
+            # биржи 10 запросов/сек на UID, не делится с открытием ордеров
+            'trading_stop': RateLimitConfig(
+                requests_per_minute=600,
+                requests_per_second=10,
+                burst_limit=100,
+                cooldown_seconds=5,
+                emergency_threshold=0.9
+            ),
             'order_cancel': RateLimitConfig(
                 requests_per_minute=30,
                 requests_per_second=2,
@@ -109,19 +344,47 @@ class AggressiveRateLimiter:
                 emergency_threshold=0.95
             )
         }
-        
+        # Для неизвестных типов используем самые жесткие лимиты
+        self._default_limit = RateLimitConfig(
+            requests_per_minute=10,
+            requests_per_second=1,
+            burst_limit=2,
+            cooldown_seconds=60,
+            emergency_threshold=0.5
+        )
+
         # 🚨 СИСТЕМА EMERGENCY SHUTDOWN
         self._emergency_stop = False
         self._emergency_reason = ""
         self._emergency_timestamp = None
-        
+
         # 🔴 ЗАБЛОКИРОВАННЫЕ КЛИЕНТЫ
         self._banned_clients: Dict[str, datetime] = {}
-        self._client_violation_counts = defaultdict(int)
-        
+        self._client_violation_counts: Dict[str, int] = {}
+
         # 📊 ГЛОБАЛЬНЫЕ ЛИМИТЫ
         self._global_requests_per_minute = 200
         self._global_requests_per_second = 20
+        self._global_minute = SlidingWindowCounter(60.0, 60)
+        self._global_second = SlidingWindowCounter(1.0, 10)
+
+        # 🏦 КВОТЫ БИРЖИ ПО ЭНДПОИНТАМ: (клиент, эндпоинт) -> квота
+        # Порядок блокировок: полоса ключа -> _quota_lock -> _global_lock
+        self._quota_lock = threading.Lock()
+        self._server_quotas: Dict[Tuple[str, str], _ServerQuota] = {}
+
+        # ⏳ ОЧЕРЕДЬ ОЖИДАНИЯ РАЗРЕШЕНИЙ
+        self._queue_cond = threading.Condition(threading.Lock())
+        self._lanes: Dict[int, Deque[_PermitWaiter]] = {}
+        self._waiter_seq = itertools.count()
+        self._queue_stats = {
+            'waited': 0,
+            'timeouts': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'max_depth': 0,
+        }
+        self._recent_waits: Deque[float] = deque(maxlen=1000)
 
         # 🔄 АДАПТИВНЫЕ НАСТРОЙКИ
         self.adaptive_delays = {}
@@ -134,111 +397,388 @@ class AggressiveRateLimiter:
             'blocked_requests': 0,
             'violations': 0,
             'emergency_activations': 0,
-            'banned_clients': 0
+            'banned_clients': 0,
+            'quota_updates': 0,
+            'quota_throttled': 0
         }
-        
+
         # 📝 ЛОГИРОВАНИЕ
         self.logger = logging.getLogger('rate_limiter')
         self.logger.setLevel(logging.INFO)
-        
+
         # 🧹 ФОНОВЫЙ ПОТОК ДЛЯ ОЧИСТКИ
         self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self._cleanup_thread.start()
-        
+
         self.logger.info("💀 AggressiveRateLimiter активирован с ЖЕСТОЧАЙШИМИ лимитами")
-    
-    def acquire(self, request_type: str, client_id: str = "default", 
-               symbol: str = None, metadata: Dict[str, Any] = None) -> bool:
+
+    def acquire(self, request_type: str, client_id: str = "default",
+               symbol: str = None, metadata: Dict[str, Any] = None,
+               timeout: Optional[float] = None, priority: Optional[int] = None,
+               endpoint: Optional[str] = None) -> bool:
         """
         🛡️ ПОЛУЧЕНИЕ РАЗРЕШЕНИЯ НА ЗАПРОС
-        
+
         Args:
             request_type: Тип запроса (order_create, position_query, etc.)
             client_id: Идентификатор клиента
             symbol: Торговый символ (опционально)
             metadata: Дополнительная информация
-            
+            timeout: Максимальное ожидание разрешения в секундах; None - без
+                ожидания (исключение сразу). При ожидании превышение лимита
+                не считается нарушением
+            priority: Приоритетная полоса ожидания (по умолчанию по типу запроса)
+            endpoint: Эндпоинт биржи; при известной квоте эндпоинта (см.
+                update_from_headers) она заменяет лимиты в секунду и burst
+
         Returns:
             True если запрос разрешён, иначе RateLimitError
-            
+
         Raises:
-            RateLimitError: При превышении лимитов
+            RateLimitError: При превышении лимитов или истечении timeout
             EmergencyStopError: При активированном emergency stop
         """
-        with self._lock:
+        with self._global_lock:
+            self._stats['total_requests'] += 1
+
+        try:
+            # 1. 🚨 ПРОВЕРКА EMERGENCY STOP
+            if self._emergency_stop:
+                raise EmergencyStopError(
+                    f"🚨 EMERGENCY STOP АКТИВЕН: {self._emergency_reason} "
+                    f"(с {self._emergency_timestamp})"
+                )
+
+            # 2. 🔴 ПРОВЕРКА ЗАБЛОКИРОВАННЫХ КЛИЕНТОВ
+            self._check_ban(client_id)
+
+            config = self._limits.get(request_type, self._default_limit)
+            key = self._counter_key(request_type, client_id, symbol)
+            quota_key = (client_id, endpoint) if endpoint else None
+
+            if timeout is not None:
+                if priority is None:
+                    priority = REQUEST_PRIORITIES.get(request_type, PRIORITY_MARKET_DATA)
+                minute_requests = self._acquire_waiting(request_type, config, key, quota_key,
+                                                        timeout, priority)
+                self._check_approaching_limits(request_type, client_id, config, minute_requests)
+                return True
+
+            with self._stripe(key), self._quota_lock:
+                counters = self._get_counters(key)
+                now = self._clock()
+                quota = self._active_quota(quota_key, now)
+
+                # 3. 🎯 ПРОВЕРКА СПЕЦИФИЧНЫХ ЛИМИТОВ (и квоты биржи, если известна)
+                self._check_specific_limits(request_type, client_id, config, counters, now,
+                                            per_second=quota is None)
+                if quota is not None:
+                    self._check_server_quota(endpoint, client_id, quota, now)
+
+                # 4. 📊 ПРОВЕРКА И РЕГИСТРАЦИЯ В ГЛОБАЛЬНЫХ ЛИМИТАХ
+                with self._global_lock:
+                    self._check_global_limits(now)
+                    self._global_minute.add(now)
+                    self._global_second.add(now)
+
+                # 5. ✅ РЕГИСТРАЦИЯ УСПЕШНОГО ЗАПРОСА
+                counters.add(now)
+                minute_requests = counters.minute.count(now)
+                if quota is not None:
+                    quota.consume(now)
+
+            # 6. ⚠️ ПРОВЕРКА ПРИБЛИЖЕНИЯ К ЛИМИТАМ
+            self._check_approaching_limits(request_type, client_id, config, minute_requests)
+
+            self.logger.debug(
+                f"✅ Запрос разрешён: {request_type} для {client_id}"
+                + (f" ({symbol})" if symbol else "")
+            )
+
+            return True
+
+        except (RateLimitError, EmergencyStopError):
+            with self._global_lock:
+                self._stats['blocked_requests'] += 1
+            raise
+
+        except Exception as e:
+            # Неожиданная ошибка - активируем emergency stop
+            self._activate_emergency_stop(f"Неожиданная ошибка в rate limiter: {str(e)}")
+            raise EmergencyStopError(f"🚨 КРИТИЧЕСКАЯ ОШИБКА: {str(e)}")
+
+    # =========================================================================
+    # ОЖИДАНИЕ РАЗРЕШЕНИЯ
+    # =========================================================================
+
+    def _acquire_waiting(self, request_type: str, config: RateLimitConfig, key: Tuple[str, str],
+                         quota_key: Optional[Tuple[str, str]], timeout: float, priority: int) -> int:
+        """
+        Ожидание разрешения в очереди
+
+        Returns:
+            Количество запросов ключа за минуту после регистрации
+        """
+        started = self._clock()
+        deadline = started + timeout
+        waiter = _PermitWaiter(priority, next(self._waiter_seq), key, started)
+
+        with self._queue_cond:
+            self._enqueue(waiter)
             try:
-                self._stats['total_requests'] += 1
-                
-                # 1. 🚨 ПРОВЕРКА EMERGENCY STOP
-                if self._emergency_stop:
-                    raise EmergencyStopError(
-                        f"🚨 EMERGENCY STOP АКТИВЕН: {self._emergency_reason} "
-                        f"(с {self._emergency_timestamp})"
-                    )
-                
-                # 2. 🔴 ПРОВЕРКА ЗАБЛОКИРОВАННЫХ КЛИЕНТОВ
-                if client_id in self._banned_clients:
-                    ban_time = self._banned_clients[client_id]
-                    if datetime.now() < ban_time:
-                        remaining = (ban_time - datetime.now()).total_seconds()
+                while True:
+                    delay = None
+                    if self._is_turn(waiter):
+                        delay, blocked_on, minute_requests = self._try_admit(config, key, quota_key)
+                        if blocked_on is None:
+                            self._record_wait(self._clock() - started)
+                            return minute_requests
+                        if waiter.blocked_on != blocked_on:
+                            # Ожидающие за нами могут пройти, если мы ждем лимит своего ключа
+                            waiter.blocked_on = blocked_on
+                            self._queue_cond.notify_all()
+
+                    remaining = deadline - self._clock()
+                    if remaining <= 0 or (delay is not None and delay > remaining):
+                        self._queue_stats['timeouts'] += 1
                         raise RateLimitError(
-                            f"🚫 Клиент {client_id} заблокирован на {remaining:.0f} секунд "
-                            f"за нарушение лимитов"
+                            f"⏳ Нет разрешения на {request_type} за {timeout:.1f} сек "
+                            f"(ожидание {delay if delay is not None else remaining:.2f} сек)",
+                            retry_after=delay
                         )
-                    else:
-                        # Разблокируем клиента
-                        del self._banned_clients[client_id]
-                        self._client_violation_counts[client_id] = 0
-                        self.logger.info(f"✅ Клиент {client_id} разблокирован")
-                
-                # 3. 📊 ПРОВЕРКА ГЛОБАЛЬНЫХ ЛИМИТОВ
-                self._check_global_limits()
-                
-                # 4. 🎯 ПРОВЕРКА СПЕЦИФИЧНЫХ ЛИМИТОВ
-                self._check_specific_limits(request_type, client_id, symbol)
-                
-                # 5. ✅ РЕГИСТРАЦИЯ УСПЕШНОГО ЗАПРОСА
-                now = datetime.now()
-                self._register_request(request_type, client_id, symbol, now)
-                
-                # 6. ⚠️ ПРОВЕРКА ПРИБЛИЖЕНИЯ К ЛИМИТАМ
-                self._check_approaching_limits(request_type, client_id)
-                
-                self.logger.debug(
-                    f"✅ Запрос разрешён: {request_type} для {client_id}"
-                    + (f" ({symbol})" if symbol else "")
+                    self._queue_cond.wait(remaining if delay is None else delay)
+            finally:
+                self._dequeue(waiter)
+                self._queue_cond.notify_all()
+
+    def _enqueue(self, waiter: _PermitWaiter) -> None:
+        self._lanes.setdefault(waiter.priority, deque()).append(waiter)
+        depth = sum(len(lane) for lane in self._lanes.values())
+        self._queue_stats['max_depth'] = max(self._queue_stats['max_depth'], depth)
+
+    def _dequeue(self, waiter: _PermitWaiter) -> None:
+        lane = self._lanes.get(waiter.priority)
+        if lane is not None:
+            lane.remove(waiter)
+
+    def _is_turn(self, waiter: _PermitWaiter) -> bool:
+        """
+        Может ли ожидающий пытаться получить разрешение
+
+        Впереди стоящие (более приоритетные полосы и ранее пришедшие в своей)
+        пропускают его, только если сами ждут лимит другого ключа.
+        """
+        for priority in sorted(self._lanes):
+            for other in self._lanes[priority]:
+                if other is waiter:
+                    return True
+                if other.blocked_on != 'key' or other.key == waiter.key:
+                    return False
+        return True
+
+    def _try_admit(self, config: RateLimitConfig, key: Tuple[str, str],
+                   quota_key: Optional[Tuple[str, str]]) -> Tuple[float, Optional[str], int]:
+        """
+        Попытка регистрации запроса без исключений
+
+        Returns:
+            (секунд до разрешения, что блокирует: None/'key'/'global', запросов ключа за минуту)
+        """
+        with self._stripe(key), self._quota_lock:
+            counters = self._get_counters(key)
+            now = self._clock()
+            quota = self._active_quota(quota_key, now)
+            delay = counters.minute.time_until_below(config.requests_per_minute, now)
+            if quota is None:
+                delay = max(
+                    delay,
+                    counters.second.time_until_below(config.requests_per_second, now),
+                    counters.burst.time_until_below(config.burst_limit, now),
                 )
-                
-                return True
-                
-            except (RateLimitError, EmergencyStopError):
-                self._stats['blocked_requests'] += 1
-                raise
-                
-            except Exception as e:
-                # Неожиданная ошибка - активируем emergency stop
-                self._activate_emergency_stop(f"Неожиданная ошибка в rate limiter: {str(e)}")
-                raise EmergencyStopError(f"🚨 КРИТИЧЕСКАЯ ОШИБКА: {str(e)}")
-    
-    def _check_global_limits(self) -> None:
-        """Проверка глобальных лимитов"""
-        now = datetime.now()
-        
-        # Проверяем глобальные лимиты за последнюю минуту
-        minute_ago = now - timedelta(minutes=1)
-        second_ago = now - timedelta(seconds=1)
-        
-        total_minute_requests = 0
-        total_second_requests = 0
-        
-        for client_data in self._request_timestamps.values():
-            for symbol_data in client_data.values():
-                for request_time in symbol_data:
-                    if request_time > minute_ago:
-                        total_minute_requests += 1
-                    if request_time > second_ago:
-                        total_second_requests += 1
-        
+            else:
+                quota_delay = quota.delay(now)
+                if quota_delay > 0:
+                    with self._global_lock:
+                        self._stats['quota_throttled'] += 1
+                delay = max(delay, quota_delay)
+            if delay > 0:
+                return delay, 'key', 0
+
+            with self._global_lock:
+                delay = max(
+                    self._global_minute.time_until_below(self._global_requests_per_minute, now),
+                    self._global_second.time_until_below(self._global_requests_per_second, now),
+                )
+                if delay > 0:
+                    return delay, 'global', 0
+                self._global_minute.add(now)
+                self._global_second.add(now)
+
+            counters.add(now)
+            if quota is not None:
+                quota.consume(now)
+            return 0.0, None, counters.minute.count(now)
+
+    def _record_wait(self, waited: float) -> None:
+        """Учет времени ожидания (вызывается под _queue_cond)"""
+        stats = self._queue_stats
+        stats['waited'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+        self._recent_waits.append(waited)
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Метрики очереди ожидания: глубина по полосам и время ожидания"""
+        with self._queue_cond:
+            depth = {
+                PRIORITY_NAMES.get(priority, str(priority)): len(lane)
+                for priority, lane in sorted(self._lanes.items())
+            }
+            stats = dict(self._queue_stats)
+            recent = sorted(self._recent_waits)
+
+        stats['depth'] = depth
+        stats['queued'] = sum(depth.values())
+        stats['avg_wait'] = stats['total_wait'] / stats['waited'] if stats['waited'] else 0.0
+        stats['p95_wait'] = recent[int(len(recent) * 0.95)] if recent else 0.0
+        return stats
+
+    # =========================================================================
+    # КВОТЫ БИРЖИ ИЗ ЗАГОЛОВКОВ ОТВЕТОВ
+    # =========================================================================
+
+    def update_from_headers(self, endpoint: str, headers: Any,
+                            client_id: str = "default") -> Optional[Dict[str, Any]]:
+        """
+        Учет квоты эндпоинта из заголовков ответа биржи
+
+        Args:
+            endpoint: Эндпоинт (тот же, что передается в acquire)
+            headers: Заголовки ответа (dict или CaseInsensitiveDict requests)
+            client_id: Идентификатор клиента
+
+        Returns:
+            Текущая квота эндпоинта или None, если заголовков лимита нет
+        """
+        remaining = _header_int(headers, HEADER_LIMIT_STATUS)
+        if remaining is None:
+            return None
+        limit = _header_int(headers, HEADER_LIMIT)
+        reset_ms = _header_int(headers, HEADER_LIMIT_RESET)
+
+        now = self._clock()
+        # Метка сброса в будущем - лимит исчерпан до этого момента, иначе остаток
+        # действует в пределах текущего окна
+        reset_in = (reset_ms / 1000.0 - self._wall_clock()) if reset_ms else 0.0
+        with self._quota_lock:
+            quota = self._server_quotas.get((client_id, endpoint))
+            if quota is None:
+                quota = self._server_quotas.setdefault((client_id, endpoint), _ServerQuota())
+            if reset_in > 0:
+                quota.remaining = remaining
+                quota.reset_at = now + reset_in
+            elif now < quota.reset_at:
+                # Ответы приходят с опозданием: допущенные после них запросы биржа еще не учла
+                quota.remaining = min(quota.remaining, remaining)
+            else:
+                quota.remaining = remaining
+                quota.reset_at = now + SERVER_QUOTA_WINDOW
+            if limit:
+                quota.limit = limit
+            quota.updated_at = now
+            snapshot = self._quota_snapshot(quota, now)
+
+        with self._global_lock:
+            self._stats['quota_updates'] += 1
+
+        if remaining <= SERVER_QUOTA_RESERVE:
+            self.logger.warning(
+                f"⚠️ Квота биржи {endpoint} для {client_id} почти исчерпана: осталось {remaining}"
+                + (f"/{limit}" if limit else "")
+                + f", сброс через {max(reset_in, 0.0):.2f} сек"
+            )
+        return snapshot
+
+    def get_server_quota(self, endpoint: str, client_id: str = "default") -> Optional[Dict[str, Any]]:
+        """Квота эндпоинта по последним заголовкам биржи (None - неизвестна или устарела)"""
+        with self._quota_lock:
+            now = self._clock()
+            quota = self._active_quota((client_id, endpoint), now)
+            return self._quota_snapshot(quota, now) if quota is not None else None
+
+    def _active_quota(self, quota_key: Optional[Tuple[str, str]], now: float) -> Optional[_ServerQuota]:
+        """Актуальная квота эндпоинта (вызывается под _quota_lock)"""
+        if quota_key is None:
+            return None
+        quota = self._server_quotas.get(quota_key)
+        if quota is None or now - quota.updated_at > SERVER_QUOTA_TTL:
+            return None
+        return quota
+
+    @staticmethod
+    def _quota_snapshot(quota: _ServerQuota, now: float) -> Dict[str, Any]:
+        return {
+            'limit': quota.limit,
+            'remaining': quota.remaining if now < quota.reset_at else quota.limit,
+            'reset_in': max(quota.reset_at - now, 0.0),
+            'sent_last_second': quota.sent.count(now),
+            'delay': quota.delay(now),
+        }
+
+    def _check_server_quota(self, endpoint: str, client_id: str,
+                            quota: _ServerQuota, now: float) -> None:
+        """Проверка квоты биржи без ожидания (превышение запаса - не нарушение)"""
+        delay = quota.delay(now)
+        if delay > 0:
+            with self._global_lock:
+                self._stats['quota_throttled'] += 1
+            raise RateLimitError(
+                f"🏦 Квота биржи {endpoint} для {client_id}: осталось {max(quota.remaining, 0)}"
+                + (f"/{quota.limit}" if quota.limit else "")
+                + f", следующий запрос через {delay:.2f} сек"
+            )
+
+    @staticmethod
+    def _counter_key(request_type: str, client_id: str, symbol: Optional[str]) -> Tuple[str, str]:
+        """Ключ счетчиков: (клиент[:символ], тип запроса)"""
+        return (f"{client_id}:{symbol}" if symbol else client_id, request_type)
+
+    def _stripe(self, key: Tuple[str, str]) -> threading.Lock:
+        return self._stripes[hash(key) % LOCK_STRIPES]
+
+    def _get_counters(self, key: Tuple[str, str]) -> _RequestCounters:
+        """Счетчики ключа (вызывается под блокировкой полосы ключа)"""
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters.setdefault(key, _RequestCounters())
+        return counters
+
+    def _check_ban(self, client_id: str) -> None:
+        """Проверка блокировки клиента"""
+        if client_id not in self._banned_clients:
+            return
+
+        with self._lock:
+            ban_time = self._banned_clients.get(client_id)
+            if ban_time is None:
+                return
+            if datetime.now() < ban_time:
+                remaining = (ban_time - datetime.now()).total_seconds()
+                raise ClientBannedError(
+                    f"🚫 Клиент {client_id} заблокирован на {remaining:.0f} секунд "
+                    f"за нарушение лимитов",
+                    retry_after=remaining
+                )
+            # Разблокируем клиента
+            del self._banned_clients[client_id]
+            self._client_violation_counts[client_id] = 0
+            self.logger.info(f"✅ Клиент {client_id} разблокирован")
+
+    def _check_global_limits(self, now: float) -> None:
+        """Проверка глобальных лимитов (вызывается под _global_lock)"""
+        total_minute_requests = self._global_minute.count(now)
+        total_second_requests = self._global_second.count(now)
+
         # Проверяем лимиты
         if total_minute_requests >= self._global_requests_per_minute:
             self._activate_emergency_stop(
@@ -247,160 +787,122 @@ class AggressiveRateLimiter:
             raise RateLimitError(
                 f"🚨 Глобальный лимит превышен: {total_minute_requests}/{self._global_requests_per_minute} запросов/мин"
             )
-        
+
         if total_second_requests >= self._global_requests_per_second:
             raise RateLimitError(
                 f"🚨 Глобальный лимит превышен: {total_second_requests}/{self._global_requests_per_second} запросов/сек"
             )
-    
-    def _check_specific_limits(self, request_type: str, client_id: str, symbol: str = None) -> None:
-        """Проверка специфичных лимитов для типа запроса"""
-        if request_type not in self._limits:
-            # Для неизвестных типов используем самые жесткие лимиты
-            config = RateLimitConfig(
-                requests_per_minute=10,
-                requests_per_second=1,
-                burst_limit=2,
-                cooldown_seconds=60,
-                emergency_threshold=0.5
-            )
-        else:
-            config = self._limits[request_type]
-        
-        # Создаем ключ для клиента и символа
-        cache_key = f"{client_id}:{symbol}" if symbol else client_id
-        
-        if cache_key not in self._request_timestamps:
-            self._request_timestamps[cache_key] = defaultdict(deque)
-        
-        timestamps = self._request_timestamps[cache_key][request_type]
-        now = datetime.now()
-        
-        # Очищаем старые временные метки
-        minute_ago = now - timedelta(minutes=1)
-        second_ago = now - timedelta(seconds=1)
-        
-        while timestamps and timestamps[0] < minute_ago:
-            timestamps.popleft()
-        
-        # Подсчитываем запросы
-        minute_requests = len(timestamps)
-        second_requests = sum(1 for ts in timestamps if ts > second_ago)
-        
+
+    def _check_specific_limits(self, request_type: str, client_id: str, config: RateLimitConfig,
+                               counters: _RequestCounters, now: float, per_second: bool = True) -> None:
+        """
+        Проверка специфичных лимитов для типа запроса
+
+        per_second=False - лимиты в секунду и burst не проверяются (их заменяет квота биржи)
+        """
+        minute_requests = counters.minute.count(now)
+        second_requests = counters.second.count(now)
+
         # Проверяем лимиты
         if minute_requests >= config.requests_per_minute:
             violation = RateLimitViolation(
-                f"{request_type}_per_minute", 
-                minute_requests, 
+                f"{request_type}_per_minute",
+                minute_requests,
                 config.requests_per_minute,
-                now, 
+                datetime.now(),
                 client_id
             )
             self._handle_violation(violation)
-            
+
             raise RateLimitError(
                 f"🚫 Лимит {request_type}: {minute_requests}/{config.requests_per_minute} запросов/мин "
                 f"для клиента {client_id}"
             )
-        
+
+        if not per_second:
+            return
+
         if second_requests >= config.requests_per_second:
             raise RateLimitError(
                 f"🚫 Лимит {request_type}: {second_requests}/{config.requests_per_second} запросов/сек "
                 f"для клиента {client_id}"
             )
-        
+
         # Проверяем burst лимит (последние 10 секунд)
-        burst_ago = now - timedelta(seconds=10)
-        burst_requests = sum(1 for ts in timestamps if ts > burst_ago)
-        
+        burst_requests = counters.burst.count(now)
+
         if burst_requests >= config.burst_limit:
             raise RateLimitError(
                 f"🚫 Burst лимит {request_type}: {burst_requests}/{config.burst_limit} запросов за 10 сек "
                 f"для клиента {client_id}"
             )
-    
-    def _register_request(self, request_type: str, client_id: str, symbol: str, timestamp: datetime) -> None:
-        """Регистрация выполненного запроса"""
-        cache_key = f"{client_id}:{symbol}" if symbol else client_id
-        self._request_timestamps[cache_key][request_type].append(timestamp)
-        
-        # Ограничиваем размер deque
-        if len(self._request_timestamps[cache_key][request_type]) > 1000:
-            self._request_timestamps[cache_key][request_type].popleft()
-    
-    def _check_approaching_limits(self, request_type: str, client_id: str) -> None:
+
+    def _check_approaching_limits(self, request_type: str, client_id: str,
+                                  config: RateLimitConfig, minute_requests: int) -> None:
         """Проверка приближения к лимитам"""
         if request_type not in self._limits:
             return
-        
-        config = self._limits[request_type]
-        cache_key = client_id
-        
-        if cache_key in self._request_timestamps:
-            timestamps = self._request_timestamps[cache_key][request_type]
-            now = datetime.now()
-            minute_ago = now - timedelta(minutes=1)
-            
-            minute_requests = sum(1 for ts in timestamps if ts > minute_ago)
-            threshold = int(config.requests_per_minute * config.emergency_threshold)
-            
-            if minute_requests >= threshold:
-                self.logger.warning(
-                    f"⚠️ ПРИБЛИЖЕНИЕ К ЛИМИТУ: {request_type} для {client_id}: "
-                    f"{minute_requests}/{config.requests_per_minute} "
-                    f"(порог {config.emergency_threshold:.0%})"
-                )
-    
+
+        threshold = int(config.requests_per_minute * config.emergency_threshold)
+
+        if minute_requests >= threshold:
+            self.logger.warning(
+                f"⚠️ ПРИБЛИЖЕНИЕ К ЛИМИТУ: {request_type} для {client_id}: "
+                f"{minute_requests}/{config.requests_per_minute} "
+                f"(порог {config.emergency_threshold:.0%})"
+            )
+
     def _handle_violation(self, violation: RateLimitViolation) -> None:
         """Обработка нарушения лимитов"""
-        self._violation_history.append(violation)
-        self._stats['violations'] += 1
-        self._client_violation_counts[violation.client_id] += 1
-        
-        client_violations = self._client_violation_counts[violation.client_id]
-        
-        self.logger.error(
-            f"🚫 НАРУШЕНИЕ ЛИМИТА: {violation.limit_type} "
-            f"({violation.current_count}/{violation.limit_value}) "
-            f"клиент {violation.client_id} (нарушений: {client_violations})"
-        )
-        
-        # Блокируем клиента при множественных нарушениях
-        if client_violations >= 3:
-            ban_duration = min(300, 60 * client_violations)  # До 5 минут
-            ban_until = datetime.now() + timedelta(seconds=ban_duration)
-            
-            self._banned_clients[violation.client_id] = ban_until
-            self._stats['banned_clients'] += 1
-            
-            self.logger.critical(
-                f"🚫 КЛИЕНТ ЗАБЛОКИРОВАН: {violation.client_id} на {ban_duration} секунд "
-                f"за {client_violations} нарушений"
-            )
-        
-        # Активируем emergency stop при критических нарушениях
-        if violation.severity == "CRITICAL" or client_violations >= 5:
-            self._activate_emergency_stop(
-                f"Критическое нарушение лимитов: {violation.limit_type} "
-                f"клиентом {violation.client_id}"
+        with self._lock:
+            self._violation_history.append(violation)
+            self._stats['violations'] += 1
+            client_violations = self._client_violation_counts.get(violation.client_id, 0) + 1
+            self._client_violation_counts[violation.client_id] = client_violations
+
+            self.logger.error(
+                f"🚫 НАРУШЕНИЕ ЛИМИТА: {violation.limit_type} "
+                f"({violation.current_count}/{violation.limit_value}) "
+                f"клиент {violation.client_id} (нарушений: {client_violations})"
             )
-    
+
+            # Блокируем клиента при множественных нарушениях
+            if client_violations >= 3:
+                ban_duration = min(300, 60 * client_violations)  # До 5 минут
+                ban_until = datetime.now() + timedelta(seconds=ban_duration)
+
+                self._banned_clients[violation.client_id] = ban_until
+                self._stats['banned_clients'] += 1
+
+                self.logger.critical(
+                    f"🚫 КЛИЕНТ ЗАБЛОКИРОВАН: {violation.client_id} на {ban_duration} секунд "
+                    f"за {client_violations} нарушений"
+                )
+
+            # Активируем emergency stop при критических нарушениях
+            if violation.severity == "CRITICAL" or client_violations >= 5:
+                self._activate_emergency_stop(
+                    f"Критическое нарушение лимитов: {violation.limit_type} "
+                    f"клиентом {violation.client_id}"
+                )
+
     def _activate_emergency_stop(self, reason: str) -> None:
         """Активация emergency stop"""
-        if not self._emergency_stop:
-            self._emergency_stop = True
-            self._emergency_reason = reason
-            self._emergency_timestamp = datetime.now()
-            self._stats['emergency_activations'] += 1
-            
-            self.logger.critical(
-                f"🚨 EMERGENCY STOP АКТИВИРОВАН: {reason}"
-            )
-            
-            # Можно добавить уведомления (Telegram, email, etc.)
-    
+        with self._lock:
+            if not self._emergency_stop:
+                self._emergency_stop = True
+                self._emergency_reason = reason
+                self._emergency_timestamp = datetime.now()
+                self._stats['emergency_activations'] += 1
+
+                self.logger.critical(
+                    f"🚨 EMERGENCY STOP АКТИВИРОВАН: {reason}"
+                )
+
+                # Можно добавить уведомления (Telegram, email, etc.)
+
     def can_make_request(self, request_type: str, client_id: str = "default",
-                        symbol: str = None) -> bool:
+                        symbol: str = None, endpoint: Optional[str] = None) -> bool:
         """
         🔍 ПРОВЕРКА ВОЗМОЖНОСТИ ВЫПОЛНЕНИЯ ЗАПРОСА с адаптивными задержками
         Безопасная проверка без исключений
@@ -409,67 +911,59 @@ class AggressiveRateLimiter:
             request_type: Тип запроса
             client_id: ID клиента
             symbol: Символ (опционально)
+            endpoint: Эндпоинт биржи для учета ее квоты (опционально)
 
         Returns:
             bool: True если запрос можно выполнить
         """
         try:
-            # Используем acquire для проверки, но не регистрируем запрос
-            with self._lock:
-                # Проверяем emergency stop
-                if self._emergency_stop:
-                    return False
+            # Проверяем emergency stop
+            if self._emergency_stop:
+                return False
 
-                # Проверяем заблокированных клиентов
-                if client_id in self._banned_clients:
-                    ban_time = self._banned_clients[client_id]
-                    if datetime.now() < ban_time:
-                        return False
+            # Проверяем заблокированных клиентов
+            ban_time = self._banned_clients.get(client_id)
+            if ban_time is not None and datetime.now() < ban_time:
+                return False
 
-                # 🔄 АДАПТИВНЫЕ ЗАДЕРЖКИ на основе состояния API
-                self._apply_adaptive_delays(request_type)
+            # 🔄 АДАПТИВНЫЕ ЗАДЕРЖКИ на основе состояния API
+            self._apply_adaptive_delays(request_type)
 
-                # Проверяем лимиты без их нарушения
-                return self._can_make_request_internal(request_type, client_id, symbol)
+            # Проверяем лимиты без их нарушения
+            return self._can_make_request_internal(request_type, client_id, symbol, endpoint)
 
         except Exception:
             # В случае любой ошибки возвращаем False (безопасная позиция)
             return False
-    
-    def _can_make_request_internal(self, request_type: str, client_id: str, symbol: str) -> bool:
+
+    def _can_make_request_internal(self, request_type: str, client_id: str, symbol: str,
+                                   endpoint: Optional[str] = None) -> bool:
         """Внутренняя проверка лимитов без побочных эффектов"""
         try:
             # Получаем конфигурацию лимитов
             config = self._limits.get(request_type, self._limits['market_data'])
-            now = datetime.now()
-            
-            # Создаем ключ для отслеживания
-            key = f"{client_id}:{request_type}"
-            if symbol:
-                key += f":{symbol}"
-            
-            # Получаем временные метки запросов
-            timestamps = self._request_timestamps[key][request_type]
-            
-            # Очищаем старые записи
-            minute_ago = now - timedelta(minutes=1)
-            second_ago = now - timedelta(seconds=1)
-            
-            while timestamps and timestamps[0] < minute_ago:
-                timestamps.popleft()
-            
-            # Проверяем лимиты
-            recent_requests_minute = len(timestamps)
-            recent_requests_second = sum(1 for ts in timestamps if ts > second_ago)
-            
-            # Проверяем все лимиты
-            if recent_requests_minute >= config.requests_per_minute:
-                return False
-            if recent_requests_second >= config.requests_per_second:
-                return False
-            
+            key = self._counter_key(request_type, client_id, symbol)
+
+            with self._stripe(key), self._quota_lock:
+                now = self._clock()
+                quota = self._active_quota((client_id, endpoint) if endpoint else None, now)
+                if quota is not None and quota.delay(now) > 0:
+                    return False
+                counters = self._counters.get(key)
+                if counters is not None:
+                    if counters.minute.count(now) >= config.requests_per_minute:
+                        return False
+                    if quota is None and counters.second.count(now) >= config.requests_per_second:
+                        return False
+
+            with self._global_lock:
+                if self._global_minute.count(now) >= self._global_requests_per_minute:
+                    return False
+                if self._global_second.count(now) >= self._global_requests_per_second:
+                    return False
+
             return True
-            
+
         except Exception:
             return False
 
@@ -519,43 +1013,52 @@ class AggressiveRateLimiter:
         """Деактивация emergency stop (только администратором)"""
         if not admin_override:
             return False
-        
+
         with self._lock:
             if self._emergency_stop:
                 self._emergency_stop = False
                 self._emergency_reason = ""
                 self._emergency_timestamp = None
-                
+
                 self.logger.info("✅ EMERGENCY STOP ДЕАКТИВИРОВАН администратором")
                 return True
-            
+
             return False
-    
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Получение статистики rate limiter
-        
+
         Returns:
             Dict: Статистика запросов и лимитов
         """
+        # Метрики очереди - до захвата остальных блокировок (порядок: очередь -> счетчики)
+        queue_stats = self.get_queue_stats()
+        with self._quota_lock:
+            server_quotas = len(self._server_quotas)
+        # _global_lock и _lock не вкладываются: под _global_lock может активироваться emergency stop
+        with self._global_lock:
+            stats = self._stats.copy()
         with self._lock:
             return {
-                'total_requests': self._stats['total_requests'],
-                'blocked_requests': self._stats['blocked_requests'],
-                'violations': self._stats['violations'],
-                'emergency_activations': self._stats['emergency_activations'],
-                'banned_clients': self._stats['banned_clients'],
+                'total_requests': stats['total_requests'],
+                'blocked_requests': stats['blocked_requests'],
+                'violations': stats['violations'],
+                'emergency_activations': stats['emergency_activations'],
+                'banned_clients': stats['banned_clients'],
                 'emergency_stop_active': self._emergency_stop,
                 'emergency_reason': self._emergency_reason,
                 'active_bans': len(self._banned_clients),
-                'total_violations': len(self._violation_history)
+                'total_violations': len(self._violation_history),
+                'queue': queue_stats,
+                'server_quotas': server_quotas,
+                'quota_updates': stats['quota_updates'],
+                'quota_throttled': stats['quota_throttled']
             }
-    
+
     def get_client_status(self, client_id: str) -> Dict[str, Any]:
         """Получение статуса клиента"""
         with self._lock:
-            now = datetime.now()
-            
             status = {
                 'client_id': client_id,
                 'is_banned': client_id in self._banned_clients,
@@ -563,29 +1066,29 @@ class AggressiveRateLimiter:
                 'violation_count': self._client_violation_counts.get(client_id, 0),
                 'current_requests': {}
             }
-            
+
             if status['is_banned']:
                 status['ban_expires'] = self._banned_clients[client_id].isoformat()
-            
-            # Подсчитываем текущие запросы
-            cache_key = client_id
-            if cache_key in self._request_timestamps:
-                minute_ago = now - timedelta(minutes=1)
-                
-                for request_type, timestamps in self._request_timestamps[cache_key].items():
-                    minute_requests = sum(1 for ts in timestamps if ts > minute_ago)
-                    limit = self._limits.get(request_type, RateLimitConfig()).requests_per_minute
-                    
-                    status['current_requests'][request_type] = {
-                        'current': minute_requests,
-                        'limit': limit,
-                        'percentage': (minute_requests / limit) * 100 if limit > 0 else 0
-                    }
-            
-            return status
-    
+
+        # Подсчитываем текущие запросы
+        for key in [key for key in list(self._counters) if key[0] == client_id]:
+            request_type = key[1]
+            with self._stripe(key):
+                minute_requests = self._counters[key].minute.count(self._clock())
+            limit = self._limits.get(request_type, RateLimitConfig()).requests_per_minute
+
+            status['current_requests'][request_type] = {
+                'current': minute_requests,
+                'limit': limit,
+                'percentage': (minute_requests / limit) * 100 if limit > 0 else 0
+            }
+
+        return status
+
     def get_global_status(self) -> Dict[str, Any]:
         """Получение глобального статуса rate limiter'а"""
+        with self._global_lock:
+            stats = self._stats.copy()
         with self._lock:
             return {
                 'emergency_stop_active': self._emergency_stop,
@@ -593,7 +1096,7 @@ class AggressiveRateLimiter:
                 'emergency_since': self._emergency_timestamp.isoformat() if self._emergency_timestamp else None,
                 'banned_clients_count': len(self._banned_clients),
                 'total_violations': len(self._violation_history),
-                'stats': self._stats.copy(),
+                'stats': stats,
                 'recent_violations': [
                     {
                         'type': v.limit_type,
@@ -606,41 +1109,47 @@ class AggressiveRateLimiter:
                     for v in self._violation_history[-10:]  # Последние 10
                 ]
             }
-    
+
     def _cleanup_loop(self) -> None:
         """Фоновая очистка старых данных"""
         while True:
             try:
                 time.sleep(300)  # Каждые 5 минут
-                
+
+                # Удаляем счетчики ключей без запросов за последний час
+                idle_before = self._clock() - 3600
+                for key in list(self._counters):
+                    with self._stripe(key):
+                        counters = self._counters.get(key)
+                        if counters is not None and counters.last_used < idle_before:
+                            del self._counters[key]
+
+                # Удаляем квоты биржи без обновлений за последний час
+                with self._quota_lock:
+                    for quota_key in [k for k, q in self._server_quotas.items() if q.updated_at < idle_before]:
+                        del self._server_quotas[quota_key]
+
                 with self._lock:
                     now = datetime.now()
-                    hour_ago = now - timedelta(hours=1)
-                    
-                    # Очищаем старые временные метки
-                    for client_data in self._request_timestamps.values():
-                        for request_type, timestamps in client_data.items():
-                            while timestamps and timestamps[0] < hour_ago:
-                                timestamps.popleft()
-                    
+
                     # Очищаем старые нарушения (старше 24 часов)
                     day_ago = now - timedelta(days=1)
                     self._violation_history = [
-                        v for v in self._violation_history 
+                        v for v in self._violation_history
                         if v.timestamp > day_ago
                     ]
-                    
+
                     # Очищаем истёкшие блокировки
                     expired_bans = [
                         client_id for client_id, ban_time in self._banned_clients.items()
                         if now >= ban_time
                     ]
-                    
+
                     for client_id in expired_bans:
                         del self._banned_clients[client_id]
                         self._client_violation_counts[client_id] = 0
                         self.logger.info(f"✅ Автоматически разблокирован клиент: {client_id}")
-                
+
             except Exception as e:
                 self.logger.error(f"❌ Ошибка в cleanup loop: {e}")
                 time.sleep(60)  # При ошибке ждём минуту
@@ -651,6 +1160,52 @@ _rate_limiter_instance = None
 _rate_limiter_lock = threading.RLock()
 
 
+def acquire_protective(limiter: Any, request_type: str, client_id: str = "default",
+                       endpoint: Optional[str] = None, step: float = PROTECTIVE_WAIT_STEP,
+                       log: Optional[logging.Logger] = None,
+                       clock: Callable[[], float] = time.monotonic,
+                       sleep: Callable[[float], None] = time.sleep) -> bool:
+    """
+    Разрешение на защитный стоп без отказа по локальным лимитам
+
+    Позиция без SL/TP опаснее лишнего запроса: вызов ждет разрешения столько,
+    сколько нужно (таймаут очереди лишь повторяется), а при локальном emergency
+    stop уходит без разрешения - лимиты биржи при этом продолжают действовать.
+    Если очередь отказала сразу (ожидание дольше step), между попытками
+    выдерживается пауза до min(retry_after, step); блокировка клиента
+    пережидается целиком.
+
+    Returns:
+        Всегда True
+    """
+    log = log or logging.getLogger(__name__)
+    started = clock()
+    while True:
+        attempt_started = clock()
+        try:
+            limiter.acquire(request_type, client_id=client_id, timeout=step, endpoint=endpoint)
+            return True
+        except EmergencyStopError as e:
+            log.warning(f"🛡️ {request_type}: emergency stop rate limiter не блокирует защитный стоп ({e})")
+            return True
+        except ClientBannedError as e:
+            pause = e.retry_after if e.retry_after is not None else step
+            log.critical(
+                f"🚨 {request_type}: клиент {client_id} заблокирован rate limiter, "
+                f"защитный стоп ждет {pause:.0f} сек до разблокировки ({e})"
+            )
+            sleep(pause)
+        except RateLimitError as e:
+            pause = min(e.retry_after if e.retry_after is not None else step, step)
+            pause -= clock() - attempt_started
+            if pause > 0:
+                sleep(pause)
+            log.warning(
+                f"⏳ {request_type}: ждем разрешения {clock() - started:.0f} сек, "
+                f"стоп не отменяется ({e})"
+            )
+
+
 def get_rate_limiter() -> AggressiveRateLimiter:
     """Получение синглтона rate limiter"""
     global _rate_limiter_instance
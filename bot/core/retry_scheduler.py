@@ -0,0 +1,222 @@
+# bot/core/retry_scheduler.py
+"""
+Отложенные повторы без блокировки рабочих потоков
+
+Рабочий поток, получивший временную ошибку, не спит на backoff: повтор
+ставится в очередь задержек и в назначенное время снова попадает в очередь
+задач (callback планировщика). Все ожидания обслуживает один поток таймера.
+
+У повтора может быть срок (deadline): если к моменту повтора он истек,
+задача не выполняется - устаревший ордер отбрасывается, а не отправляется
+с опозданием.
+
+Внутри scheduled_retries() клиенты API делают одну попытку: повторы
+выполняет вызывающий код через планировщик.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Признаки сетевых ошибок в retMsg ответов с retCode -1 и в тексте исключений
+# (общие для планировщика и EnhancedAPIConnectionManager)
+TRANSIENT_ERROR_MARKERS = (
+    'Max retries exceeded',
+    'NameResolutionError',
+    'Failed to resolve',
+    'Temporary failure in name resolution',
+    'Connection aborted',
+    'Connection refused',
+    'Connection reset',
+    'Connection timed out',
+)
+
+_context = threading.local()
+
+
+@contextmanager
+def scheduled_retries() -> Iterator[None]:
+    """Повторы в текущем потоке выполняет планировщик: клиенты API делают одну попытку"""
+    previous = getattr(_context, 'active', False)
+    _context.active = True
+    try:
+        yield
+    finally:
+        _context.active = previous
+
+
+def retries_scheduled() -> bool:
+    """Выполняется ли текущий поток внутри scheduled_retries()"""
+    return getattr(_context, 'active', False)
+
+
+def is_transient_error(message: str) -> bool:
+    """Сетевая (временная) ошибка по тексту исключения или retMsg"""
+    return any(marker in (message or '') for marker in TRANSIENT_ERROR_MARKERS)
+
+
+class _RetryTask:
+    __slots__ = ('callback', 'deadline', 'on_expired', 'scheduled_at')
+
+    def __init__(self, callback: Callable[[], None], deadline: Optional[float],
+                 on_expired: Optional[Callable[[], None]], scheduled_at: float):
+        self.callback = callback
+        self.deadline = deadline
+        self.on_expired = on_expired
+        self.scheduled_at = scheduled_at
+
+
+class RetryScheduler:
+    """Очередь задержек повторов с одним потоком таймера"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, *,
+                 name: str = "retry-scheduler", autostart: bool = True):
+        """
+        Args:
+            clock: Монотонный источник времени (deadline задается в его шкале)
+            name: Имя потока таймера
+            autostart: Запускать поток таймера; без него повторы выполняет run_pending()
+        """
+        self._clock = clock
+        self._name = name
+        self._autostart = autostart
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, _RetryTask]] = []
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.logger = logging.getLogger('retry_scheduler')
+        self._stats = {
+            'scheduled': 0,
+            'fired': 0,
+            'expired': 0,
+            'errors': 0,
+            'backoff_seconds': 0.0,
+        }
+
+    def schedule(self, delay: float, callback: Callable[[], None], *,
+                 deadline: Optional[float] = None,
+                 on_expired: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Выполнение callback через delay секунд в потоке таймера
+
+        callback должен быть быстрым (например, вернуть задачу в очередь).
+
+        Args:
+            delay: Задержка backoff в секундах
+            callback: Повтор задачи
+            deadline: Время clock(), после которого повтор не выполняется
+            on_expired: Вызывается вместо callback, если срок истек
+
+        Returns:
+            False, если повтор не запланирован: срок истечет раньше повтора
+            или планировщик остановлен
+        """
+        now = self._clock()
+        due = now + max(0.0, delay)
+        task = _RetryTask(callback, deadline, on_expired, now)
+
+        if deadline is not None and due >= deadline:
+            with self._cond:
+                self._stats['expired'] += 1
+            self._expire(task)
+            return False
+
+        with self._cond:
+            if self._stopped:
+                return False
+            heapq.heappush(self._heap, (due, next(self._sequence), task))
+            self._stats['scheduled'] += 1
+            if self._autostart and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def run_pending(self) -> int:
+        """
+        Выполнение наступивших повторов в текущем потоке
+
+        Returns:
+            Количество обработанных повторов (выполненных и истекших)
+        """
+        with self._cond:
+            due = self._pop_due(self._clock())
+        self._fire(due)
+        return len(due)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def next_due_in(self) -> Optional[float]:
+        """Секунды до ближайшего повтора (None - очередь пуста)"""
+        with self._cond:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Остановка потока таймера; незапущенные повторы отбрасываются"""
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self._stats, 'pending': len(self._heap)}
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = self._clock()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                if self._stopped:
+                    return
+                due = self._pop_due(self._clock())
+            self._fire(due)
+
+    def _pop_due(self, now: float) -> List[Tuple[float, _RetryTask]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, task = heapq.heappop(self._heap)
+            due.append((now, task))
+        return due
+
+    def _fire(self, due: List[Tuple[float, _RetryTask]]) -> None:
+        for now, task in due:
+            if task.deadline is not None and now >= task.deadline:
+                with self._cond:
+                    self._stats['expired'] += 1
+                    self._stats['backoff_seconds'] += now - task.scheduled_at
+                self._expire(task)
+                continue
+
+            with self._cond:
+                self._stats['fired'] += 1
+                self._stats['backoff_seconds'] += now - task.scheduled_at
+            try:
+                task.callback()
+            except Exception as exc:
+                with self._cond:
+                    self._stats['errors'] += 1
+                self.logger.error(f"❌ Ошибка повтора задачи: {exc}")
+
+    def _expire(self, task: _RetryTask) -> None:
+        if task.on_expired is None:
+            return
+        try:
+            task.on_expired()
+        except Exception as exc:
+            self.logger.error(f"❌ Ошибка обработки истекшего повтора: {exc}")
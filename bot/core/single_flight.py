@@ -0,0 +1,164 @@
+# bot/core/single_flight.py
+"""
+Объединение одинаковых одновременных вызовов (single-flight)
+
+Первый вызов с ключом (лидер) выполняет операцию, вызовы с тем же ключом,
+пришедшие до ее завершения, ждут и получают тот же результат или то же
+исключение. Успешный результат остается свежим еще ttl секунд: вызовы в этом
+окне не выполняют операцию повторно. Каждый вызывающий получает собственную
+копию результата, поэтому изменения ответа одним потоком не видны другим.
+"""
+
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """Выполняющийся или завершенный вызов"""
+
+    __slots__ = ('done', 'result', 'error', 'expires_at', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.expires_at = 0.0
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Группа объединяемых вызовов с окном свежести результата"""
+
+    def __init__(self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic,
+                 copy_result: Callable[[Any], Any] = copy.deepcopy):
+        """
+        Args:
+            ttl: Окно свежести успешного результата в секундах (0 - только одновременные вызовы)
+            clock: Монотонный источник времени
+            copy_result: Копирование результата для каждого вызывающего
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._copy = copy_result
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats = {
+            'calls': 0,
+            'executed': 0,
+            'coalesced': 0,
+            'fresh_hits': 0,
+            'errors': 0,
+        }
+
+    def do(self, key: Hashable, func: Callable[[], Any], ttl: Optional[float] = None,
+           cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Выполнение func не более одного раза для одновременных вызовов с key
+
+        Args:
+            key: Ключ вызова (операция и параметры)
+            func: Операция
+            ttl: Окно свежести для этого вызова (по умолчанию self.ttl)
+            cacheable: Можно ли сохранить результат на окно свежести (по умолчанию - любой)
+
+        Returns:
+            Копия результата операции
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            flight = self._flights.get(key)
+            if flight is not None and flight.done.is_set():
+                if self._clock() < flight.expires_at:
+                    self._stats['fresh_hits'] += 1
+                    return self._copy(flight.result)
+                del self._flights[key]
+                flight = None
+
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats['executed'] += 1
+            else:
+                flight.waiters += 1
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._copy(flight.result)
+
+        try:
+            result = func()
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                self._stats['errors'] += 1
+                self._discard(key, flight)
+            flight.done.set()
+            raise
+
+        window = self.ttl if ttl is None else ttl
+        keep = window > 0 and (cacheable is None or cacheable(result))
+        with self._lock:
+            if keep:
+                flight.result = self._copy(result)
+                flight.expires_at = self._clock() + window
+            else:
+                flight.result = result if not flight.waiters else self._copy(result)
+                self._discard(key, flight)
+        flight.done.set()
+        return result
+
+    def _discard(self, key: Hashable, flight: _Flight) -> None:
+        """Удаление вызова (под self._lock), если его не заменил более новый"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Сброс свежих результатов (например, после изменения состояния на бирже)
+
+        Выполняющиеся вызовы отсоединяются: их текущие участники получат
+        результат, а новые вызовы с тем же ключом выполнят операцию заново.
+
+        Returns:
+            Количество сброшенных вызовов
+        """
+        with self._lock:
+            stale = [key for key in self._flights if predicate is None or predicate(key)]
+            for key in stale:
+                del self._flights[key]
+            return len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики вызовов: выполнено, объединено с выполняющимся, из окна свежести"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = sum(1 for flight in self._flights.values() if not flight.done.is_set())
+        saved = stats['coalesced'] + stats['fresh_hits']
+        stats['saved_ratio'] = saved / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+
+# Группы по имени (например, по аккаунту биржи): общие для всех экземпляров клиента
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str, ttl: float = 0.0) -> SingleFlight:
+    """Получение общей группы объединяемых вызовов"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(ttl=ttl)
+        return group
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Статистика всех групп"""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.get_stats() for name, group in groups.items()}
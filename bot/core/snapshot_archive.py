@@ -0,0 +1,432 @@
+# bot/core/snapshot_archive.py
+"""
+Архив снимков рыночных данных с дедупликацией по барам
+
+Раньше каждый сигнал сохранял полную копию кадра каждого таймфрейма в CSV,
+и при нескольких стратегиях на одном баре одни и те же свечи записывались
+многократно. Архив хранит каждый бар один раз на (symbol, tf, время бара)
+в сжатых .npz чанках, а сигнал получает только ссылку: таймфрейм, время
+первого и последнего бара, точные времена баров (шаги между ними) и
+раскладку колонок. Строковые колонки хранятся кодами словаря серии, колонки
+других нечисловых типов не поддерживаются (store_frame выдает ValueError).
+
+Если значения бара отличаются от сохраненных (формирующийся бар, колонки,
+добавленные стратегией), бар сохраняется новой версией, и ссылка запоминает
+номер версии для этого времени. По ссылке восстанавливается ровно тот кадр,
+который видела стратегия; совпадение проверяется по контрольной сумме.
+
+Структура каталога: <root>/<symbol>/<tf>/chunk-NNNNNN.npz. Последний чанк
+серии дописывается перезаписью, заполненный больше не меняется.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Строк в одном чанке серии (незакрытый чанк перезаписывается при новых барах)
+CHUNK_ROWS = 256
+
+_TIME_NAMES = ('timestamp', 'datetime', 'time', 'open_time')
+
+
+def _safe_name(value: Any) -> str:
+    return str(value).replace('/', '_').replace(os.sep, '_')
+
+
+def _encode_bars(timestamps: np.ndarray) -> List[List[int]]:
+    """Времена баров -> шаги между ними сериями [шаг, количество]"""
+    runs: List[List[int]] = []
+    for step in np.diff(timestamps).tolist():
+        if runs and runs[-1][0] == step:
+            runs[-1][1] += 1
+        else:
+            runs.append([step, 1])
+    return runs
+
+
+def _decode_bars(start: int, runs: List[List[int]]) -> np.ndarray:
+    steps = np.repeat(np.array([step for step, _ in runs], dtype=np.int64),
+                      [count for _, count in runs]) if runs else np.empty(0, dtype=np.int64)
+    return np.concatenate([[start], start + np.cumsum(steps)]).astype(np.int64)
+
+
+def _is_text(series: pd.Series) -> bool:
+    return all(isinstance(value, str) for value in series.dropna().tolist())
+
+
+def _same(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Поэлементное равенство с NaN == NaN"""
+    return (left == right) | (np.isnan(left) & np.isnan(right))
+
+
+class _Series:
+    """Бары одной пары (symbol, tf): версия 0 в массивах, остальные - в словаре"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: List[str] = []
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, 0), dtype=np.float64)
+        # время -> векторы версий 1, 2, ... (по колонкам self.columns)
+        self.versions: Dict[int, List[np.ndarray]] = {}
+        self.chunks = 0
+        # Словарь строковых значений: код - позиция в списке
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+        # Незакрытый чанк: строки (время, версия, {колонка: значение})
+        self.open_rows: List[Tuple[int, int, Dict[str, float]]] = []
+
+    def column_index(self, names: List[str]) -> np.ndarray:
+        missing = [name for name in names if name not in self.columns]
+        if missing:
+            self.columns.extend(missing)
+            self.values = np.hstack([self.values, np.full((len(self.values), len(missing)), np.nan)])
+            for vectors in self.versions.values():
+                for position, vector in enumerate(vectors):
+                    vectors[position] = np.concatenate([vector, np.full(len(missing), np.nan)])
+        lookup = {name: position for position, name in enumerate(self.columns)}
+        return np.array([lookup[name] for name in names], dtype=np.intp)
+
+    def set_labels(self, labels: List[str]) -> None:
+        self.labels = list(labels)
+        self._codes = {label: code for code, label in enumerate(self.labels)}
+
+    def encode(self, values: List[Any]) -> np.ndarray:
+        """Строки -> коды словаря (пропуск - NaN)"""
+        codes = np.full(len(values), np.nan)
+        for position, value in enumerate(values):
+            if not isinstance(value, str):
+                continue
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.labels)
+                self.labels.append(value)
+            codes[position] = code
+        return codes
+
+    def add_base(self, timestamps: np.ndarray, rows: np.ndarray) -> None:
+        merged_ts = np.concatenate([self.timestamps, timestamps])
+        merged = np.vstack([self.values, rows])
+        order = np.argsort(merged_ts, kind='stable')
+        self.timestamps, self.values = merged_ts[order], merged[order]
+
+
+class SnapshotArchive:
+    """Дедуплицированный архив баров и восстановление кадров по ссылкам"""
+
+    def __init__(self, root: str, chunk_rows: int = CHUNK_ROWS):
+        """
+        Args:
+            root: Каталог архива
+            chunk_rows: Максимум строк в чанке
+        """
+        self.root = root
+        self.chunk_rows = max(1, chunk_rows)
+        self.logger = logging.getLogger('snapshot_archive')
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._stats = {
+            'frames': 0,
+            'bars_seen': 0,
+            'bars_written': 0,
+            'versions_written': 0,
+        }
+
+    # ==================== ЗАПИСЬ ====================
+
+    def store_frame(self, symbol: str, tf: str, frame: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        Сохранение новых баров кадра и построение ссылки на него
+
+        Returns:
+            Ссылка для load_frame или None, если у кадра нет времени баров
+
+        Raises:
+            ValueError: В кадре есть колонки, которые архив не может сохранить
+                (не числа и не строки)
+        """
+        decomposed = self._decompose(frame)
+        if decomposed is None:
+            return None
+        timestamps, values, names, layout, text = decomposed
+
+        with self._lock:
+            series = self._get_series(symbol, tf)
+            for name, column in text.items():
+                values[:, names.index(name)] = series.encode(column)
+            index = series.column_index(names)
+            versions = np.zeros(len(timestamps), dtype=np.int64)
+
+            position = np.searchsorted(series.timestamps, timestamps)
+            position = np.minimum(position, max(len(series.timestamps) - 1, 0))
+            known = (series.timestamps[position] == timestamps) if len(series.timestamps) else \
+                np.zeros(len(timestamps), dtype=bool)
+            matches = np.zeros(len(timestamps), dtype=bool)
+            if known.any():
+                stored = series.values[position[known]][:, index]
+                matches[known] = _same(stored, values[known]).all(axis=1)
+
+            new_rows = ~known
+            if new_rows.any():
+                rows = np.full((int(new_rows.sum()), len(series.columns)), np.nan)
+                rows[:, index] = values[new_rows]
+                series.add_base(timestamps[new_rows], rows)
+                for ts, row in zip(timestamps[new_rows].tolist(), values[new_rows]):
+                    series.open_rows.append((ts, 0, dict(zip(names, row.tolist()))))
+
+            # Бары с другим содержимым: существующая или новая версия
+            new_versions = 0
+            for row_number in np.flatnonzero(known & ~matches).tolist():
+                ts = int(timestamps[row_number])
+                row = values[row_number]
+                vectors = series.versions.setdefault(ts, [])
+                for number, vector in enumerate(vectors, start=1):
+                    if _same(vector[index], row).all():
+                        versions[row_number] = number
+                        break
+                else:
+                    vector = np.full(len(series.columns), np.nan)
+                    vector[index] = row
+                    vectors.append(vector)
+                    versions[row_number] = len(vectors)
+                    series.open_rows.append((ts, len(vectors), dict(zip(names, row.tolist()))))
+                    new_versions += 1
+
+            written = int(new_rows.sum())
+            self._stats['frames'] += 1
+            self._stats['bars_seen'] += len(timestamps)
+            self._stats['bars_written'] += written
+            self._stats['versions_written'] += new_versions
+            if written or new_versions:
+                self._flush_series(series)
+
+        overrides = {str(int(ts)): int(v) for ts, v in zip(timestamps, versions) if v}
+        return {
+            'symbol': symbol,
+            'tf': str(tf),
+            'start': int(timestamps[0]) if len(timestamps) else 0,
+            'end': int(timestamps[-1]) if len(timestamps) else 0,
+            'rows': int(len(timestamps)),
+            'versions': overrides,
+            'layout': layout,
+            'digest': self._digest(timestamps, values),
+        }
+
+    def _flush_series(self, series: _Series) -> None:
+        """Перезапись незакрытого чанка; заполненный чанк закрывается"""
+        while series.open_rows:
+            rows = series.open_rows[:self.chunk_rows]
+            columns = sorted({name for _, _, row in rows for name in row})
+            matrix = np.full((len(rows), len(columns)), np.nan)
+            lookup = {name: position for position, name in enumerate(columns)}
+            for number, (_, _, row) in enumerate(rows):
+                for name, value in row.items():
+                    matrix[number, lookup[name]] = value
+
+            os.makedirs(series.path, exist_ok=True)
+            path = os.path.join(series.path, f"chunk-{series.chunks:06d}.npz")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                np.savez_compressed(
+                    handle,
+                    timestamp=np.array([ts for ts, _, _ in rows], dtype=np.int64),
+                    version=np.array([version for _, version, _ in rows], dtype=np.int32),
+                    columns=np.array(columns, dtype=np.str_),
+                    values=matrix,
+                    # Словарь целиком: он только растет, последний чанк содержит все коды
+                    labels=np.array(series.labels, dtype=np.str_),
+                )
+            os.replace(tmp_path, path)
+
+            if len(rows) < self.chunk_rows:
+                return
+            series.open_rows = series.open_rows[self.chunk_rows:]
+            series.chunks += 1
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def load_frame(self, reference: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Восстановление кадра по ссылке store_frame
+
+        Raises:
+            ValueError: Бары архива не совпадают с сохраненной контрольной суммой
+        """
+        layout = reference['layout']
+        names = [name for name, _ in layout['columns']]
+        with self._lock:
+            series = self._get_series(reference['symbol'], reference['tf'])
+            index = series.column_index(names)
+            if 'bars' in layout:
+                # Ровно те бары, что были в кадре: бары, сохраненные позже
+                # в промежутках между ними, в кадр не попадают
+                timestamps = _decode_bars(int(reference['start']), layout['bars'])
+                position = np.minimum(np.searchsorted(series.timestamps, timestamps),
+                                      max(len(series.timestamps) - 1, 0))
+                found = series.timestamps[position] == timestamps if len(series.timestamps) else \
+                    np.zeros(len(timestamps), dtype=bool)
+                timestamps = timestamps[found]
+                values = series.values[position[found]][:, index]
+            else:
+                # Ссылки без времен баров (старый формат): интервал start..end
+                lo = np.searchsorted(series.timestamps, reference['start'], side='left')
+                hi = np.searchsorted(series.timestamps, reference['end'], side='right')
+                timestamps = series.timestamps[lo:hi].copy()
+                values = series.values[lo:hi][:, index]
+            for ts, version in reference.get('versions', {}).items():
+                row = int(np.searchsorted(timestamps, int(ts)))
+                if row < len(timestamps) and timestamps[row] == int(ts):
+                    values[row] = series.versions[int(ts)][version - 1][index]
+            labels = list(series.labels)
+
+        if len(timestamps) != reference['rows'] or self._digest(timestamps, values) != reference['digest']:
+            raise ValueError(
+                f"Снимок {reference['symbol']} {reference['tf']} не совпадает с архивом "
+                f"({len(timestamps)} из {reference['rows']} баров)"
+            )
+        return self._compose(timestamps, values, layout, labels)
+
+    # ==================== КАДРЫ ====================
+
+    @staticmethod
+    def _decompose(frame: pd.DataFrame) -> Optional[Tuple[np.ndarray, np.ndarray, List[str],
+                                                           Dict[str, Any], Dict[str, List[Any]]]]:
+        """
+        Кадр -> (время баров в мс, значения float64, колонки, раскладка, строковые колонки)
+
+        Значения строковых колонок - NaN, коды подставляет store_frame по словарю серии.
+        """
+        time_name = next((name for name in _TIME_NAMES if name in frame.columns), None)
+        if time_name is not None:
+            times = pd.to_datetime(frame[time_name])
+            layout = {'time': 'column', 'time_name': time_name,
+                      'time_position': frame.columns.get_loc(time_name)}
+        elif isinstance(frame.index, pd.DatetimeIndex):
+            times = pd.Series(frame.index)
+            layout = {'time': 'index', 'time_name': frame.index.name}
+        else:
+            return None
+        if times.isna().any():
+            return None
+
+        tz = times.dt.tz
+        layout['time_unit'] = times.dt.unit
+        layout['time_tz'] = str(tz) if tz is not None else None
+        if tz is not None:
+            times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+        timestamps = times.to_numpy(dtype='datetime64[ms]').view(np.int64)
+
+        columns, text, rejected = [], {}, []
+        for name, dtype in frame.dtypes.items():
+            if name == time_name:
+                continue
+            if dtype.kind in 'fiub':
+                columns.append((str(name), str(dtype)))
+            elif dtype.kind == 'O' and not isinstance(dtype, pd.CategoricalDtype) and _is_text(frame[name]):
+                columns.append((str(name), str(dtype)))
+                text[str(name)] = frame[name].tolist()
+            else:
+                rejected.append(f"{name} ({dtype})")
+        if rejected:
+            raise ValueError(f"Колонки не сохраняются архивом снимков: {', '.join(rejected)}")
+
+        numeric = [name for name, _ in columns if name not in text]
+        values = np.full((len(frame), len(columns)), np.nan)
+        if numeric:
+            positions = [position for position, (name, _) in enumerate(columns) if name not in text]
+            values[:, positions] = frame[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+        layout['columns'] = columns
+        layout['text'] = list(text)
+        layout['bars'] = _encode_bars(timestamps)
+        return timestamps, values, [name for name, _ in columns], layout, text
+
+    @staticmethod
+    def _compose(timestamps: np.ndarray, values: np.ndarray, layout: Dict[str, Any],
+                 labels: List[str]) -> pd.DataFrame:
+        text = set(layout.get('text', ()))
+        decoded = np.array(labels + [None], dtype=object)
+        frame = pd.DataFrame({
+            name: pd.Series(decoded[np.where(np.isnan(values[:, position]), len(labels),
+                                             values[:, position]).astype(np.intp)], dtype=dtype)
+            if name in text else values[:, position].astype(dtype)
+            for position, (name, dtype) in enumerate(layout['columns'])
+        })
+        times = pd.Series(timestamps.astype('datetime64[ms]')).dt.as_unit(layout['time_unit'])
+        if layout['time_tz']:
+            times = times.dt.tz_localize('UTC').dt.tz_convert(layout['time_tz'])
+        if layout['time'] == 'column':
+            frame.insert(layout['time_position'], layout['time_name'], times)
+        else:
+            frame.index = pd.DatetimeIndex(times, name=layout['time_name'])
+        return frame
+
+    @staticmethod
+    def _digest(timestamps: np.ndarray, values: np.ndarray) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(np.ascontiguousarray(timestamps, dtype=np.int64))
+        # NaN приводится к одному битовому представлению
+        hasher.update(np.ascontiguousarray(np.where(np.isnan(values), np.nan, values), dtype=np.float64))
+        return hasher.hexdigest()
+
+    # ==================== СЕРИИ ====================
+
+    def _get_series(self, symbol: str, tf: str) -> _Series:
+        key = (str(symbol), str(tf))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = self._load_series(
+                os.path.join(self.root, _safe_name(symbol), _safe_name(tf))
+            )
+        return series
+
+    def _load_series(self, path: str) -> _Series:
+        series = _Series(path)
+        if not os.path.isdir(path):
+            return series
+
+        names = sorted(name for name in os.listdir(path) if name.startswith('chunk-') and name.endswith('.npz'))
+        for number, name in enumerate(names):
+            with np.load(os.path.join(path, name), allow_pickle=False) as data:
+                timestamps, versions = data['timestamp'], data['version']
+                columns, values = data['columns'].tolist(), data['values']
+                labels = data['labels'].tolist() if 'labels' in data.files else []
+            if len(labels) > len(series.labels):
+                series.set_labels(labels)
+
+            index = series.column_index(columns)
+            base = versions == 0
+            rows = np.full((int(base.sum()), len(series.columns)), np.nan)
+            rows[:, index] = values[base]
+            series.add_base(timestamps[base], rows)
+            for ts, version, row in zip(timestamps[~base].tolist(), versions[~base].tolist(), values[~base]):
+                # Версии бара записываются по порядку номеров
+                vector = np.full(len(series.columns), np.nan)
+                vector[index] = row
+                series.versions.setdefault(ts, []).append(vector)
+
+            if number == len(names) - 1 and len(timestamps) < self.chunk_rows:
+                # Незакрытый чанк продолжает дописываться
+                series.open_rows = [
+                    (ts, version, dict(zip(columns, row.tolist())))
+                    for ts, version, row in zip(timestamps.tolist(), versions.tolist(), values)
+                ]
+                series.chunks = number
+            else:
+                series.chunks = number + 1
+        return series
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'series': len(self._series)}
+
+
+def dumps_reference(reference: Dict[str, Any]) -> Tuple[str, str]:
+    """Ссылка -> (versions, layout) в JSON для хранения в таблице журнала"""
+    return (json.dumps(reference['versions'], separators=(',', ':')),
+            json.dumps(reference['layout'], separators=(',', ':')))
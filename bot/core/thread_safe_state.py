@@ -3,13 +3,20 @@
 💀 КРИТИЧЕСКИЙ КОМПОНЕНТ: Thread-Safe State Management
 ПОЛНАЯ СИНХРОНИЗАЦИЯ ВСЕХ СОСТОЯНИЙ БОТА
 ZERO TOLERANCE К RACE CONDITIONS!
+
+Состояние публикуется как неизменяемый снимок (StateSnapshot, copy-on-write):
+читатели (Telegram, метрики, торговый цикл) берут текущий снимок без
+блокировок и видят согласованные позиции, флаги и статистику. Писатели
+одного символа упорядочены блокировкой его полосы (lock striping), а общая
+блокировка публикации держится только на время подмены снимка.
 """
 
 import threading
 import time
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List, Tuple
-from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Tuple, Callable, Mapping
+from dataclasses import dataclass, field, replace
 import logging
 from enum import Enum
 
@@ -22,9 +29,9 @@ class PositionSide(Enum):
     SELL = "Sell"
 
 
-@dataclass
+@dataclass(frozen=True)
 class PositionInfo:
-    """Информация о позиции"""
+    """Информация о позиции (неизменяемая: обновление публикует новый объект)"""
     symbol: str
     side: Optional[PositionSide] = None
     size: float = 0.0
@@ -53,6 +60,26 @@ class PositionInfo:
         return self.side == PositionSide.SELL
 
 
+def _empty_mapping() -> Mapping:
+    return MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Согласованный неизменяемый снимок состояния бота"""
+    version: int = 0
+    positions: Mapping[str, PositionInfo] = field(default_factory=_empty_mapping)
+    global_stats: Mapping[str, Any] = field(default_factory=_empty_mapping)
+    strategy_stats: Mapping[str, Mapping[str, Any]] = field(default_factory=_empty_mapping)
+    emergency_stop: bool = False
+    trading_enabled: bool = True
+    risk_limits_exceeded: bool = False
+
+
+# Количество полос блокировок позиций
+STATE_LOCK_STRIPES = 16
+
+
 class ThreadSafeBotState:
     """
     🛡️ THREAD-SAFE СОСТОЯНИЕ ТОРГОВОГО БОТА
@@ -62,104 +89,131 @@ class ThreadSafeBotState:
     - P&L статистика
     - Глобальные флаги (emergency_stop, etc.)
     - Статистика стратегий
+
+    Чтение не блокируется: геттеры работают с текущим снимком (get_snapshot).
     """
     
-    def __init__(self):
-        # 🔒 ОСНОВНАЯ БЛОКИРОВКА
-        self._lock = threading.RLock()
+    def __init__(self, lock_stripes: int = STATE_LOCK_STRIPES):
+        # 🔒 БЛОКИРОВКИ: полосы для изменений позиций, публикация снимка
+        self._stripes = [threading.RLock() for _ in range(max(1, lock_stripes))]
+        self._publish_lock = threading.Lock()
+        self._strategy_lock = threading.Lock()
         
-        # 📊 СОСТОЯНИЕ ПОЗИЦИЙ
-        self._positions: Dict[str, PositionInfo] = {}
+        # 📊 ОПУБЛИКОВАННЫЙ СНИМОК (позиции, статистика, флаги)
+        self._snapshot = StateSnapshot(
+            global_stats=MappingProxyType({
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'total_pnl': 0.0,
+                'daily_pnl': 0.0,
+                'max_drawdown': 0.0,
+                'start_time': datetime.now(),
+                'last_trade_time': None
+            })
+        )
         
-        # 📈 ГЛОБАЛЬНАЯ СТАТИСТИКА
-        self._global_stats = {
-            'total_trades': 0,
-            'winning_trades': 0,
-            'losing_trades': 0,
-            'total_pnl': 0.0,
-            'daily_pnl': 0.0,
-            'max_drawdown': 0.0,
-            'start_time': datetime.now(),
-            'last_trade_time': None
-        }
-        
-        # 🚨 КРИТИЧЕСКИЕ ФЛАГИ
-        self._emergency_stop = False
-        self._trading_enabled = True
-        self._risk_limits_exceeded = False
-        
-        # 📝 СТАТИСТИКА ПО СТРАТЕГИЯМ
-        self._strategy_stats: Dict[str, Dict[str, Any]] = {}
-        
-        # ⚡ ПРОИЗВОДИТЕЛЬНОСТЬ
+        # ⚡ ПРОИЗВОДИТЕЛЬНОСТЬ (под блокировкой полосы символа)
         self._last_sync_time = {}
         self._sync_counts = {}
         
         # 📝 ЛОГИРОВАНИЕ
         self.logger = logging.getLogger('bot_state')
         self.logger.info("🛡️ ThreadSafeBotState инициализирован с полной защитой")
+
+    # ==================== СНИМОК ====================
+
+    def get_snapshot(self) -> StateSnapshot:
+        """Текущий согласованный снимок состояния (без блокировок)"""
+        return self._snapshot
+
+    def _symbol_lock(self, symbol: str) -> threading.RLock:
+        return self._stripes[hash(symbol) % len(self._stripes)]
+
+    def _publish(self, update: Callable[[StateSnapshot], Dict[str, Any]]) -> StateSnapshot:
+        """
+        Публикация нового снимка
+
+        update(текущий снимок) -> изменяемые поля; должен быть быстрым и без
+        побочных эффектов - он выполняется под блокировкой публикации.
+        """
+        with self._publish_lock:
+            current = self._snapshot
+            # Прямой вызов конструктора: dataclasses.replace в несколько раз медленнее
+            fields = {
+                'positions': current.positions,
+                'global_stats': current.global_stats,
+                'strategy_stats': current.strategy_stats,
+                'emergency_stop': current.emergency_stop,
+                'trading_enabled': current.trading_enabled,
+                'risk_limits_exceeded': current.risk_limits_exceeded,
+            }
+            fields.update(update(current))
+            snapshot = StateSnapshot(version=current.version + 1, **fields)
+            self._snapshot = snapshot
+            return snapshot
+
+    def _publish_position(self, position: PositionInfo, **changes) -> StateSnapshot:
+        """Публикация позиции одного символа (вызывается под блокировкой его полосы)"""
+        def update(current: StateSnapshot) -> Dict[str, Any]:
+            positions = dict(current.positions)
+            positions[position.symbol] = position
+            return {'positions': MappingProxyType(positions), **{
+                key: value(current) if callable(value) else value for key, value in changes.items()
+            }}
+        return self._publish(update)
     
     # ==================== УПРАВЛЕНИЕ ПОЗИЦИЯМИ ====================
     
     def get_position(self, symbol: str) -> Optional[PositionInfo]:
         """Получение информации о позиции"""
-        with self._lock:
-            return self._positions.get(symbol)
+        return self._snapshot.positions.get(symbol)
     
     def set_position(self, symbol: str, side: Optional[str], size: float,
                     entry_price: float = 0.0, avg_price: float = 0.0,
                     unrealized_pnl: float = 0.0, leverage: float = 1.0,
                     strategy_name: Optional[str] = None) -> None:
         """Установка информации о позиции"""
-        with self._lock:
-            if symbol not in self._positions:
-                self._positions[symbol] = PositionInfo(symbol=symbol)
-
-            pos = self._positions[symbol]
-            pos.side = PositionSide(side) if side else None
-            pos.size = size
-            pos.entry_price = entry_price
-            pos.avg_price = avg_price or entry_price
-            pos.unrealized_pnl = unrealized_pnl
-            pos.leverage = leverage
-            pos.strategy_name = strategy_name
-            pos.last_update = datetime.now()
-            
-            # Если позиция закрыта
-            if size == 0.0:
-                pos.side = None
-                pos.entry_price = 0.0
-                pos.avg_price = 0.0
-                pos.unrealized_pnl = 0.0
-            
-            self.logger.debug(f"📊 Позиция обновлена {symbol}: {side} {size} @ {entry_price}")
+        closed = size == 0.0
+        with self._symbol_lock(symbol):
+            previous = self._snapshot.positions.get(symbol)
+            # Если позиция закрыта - сторона, цены и P&L сбрасываются
+            self._publish_position(PositionInfo(
+                symbol=symbol,
+                side=PositionSide(side) if side and not closed else None,
+                size=size,
+                entry_price=0.0 if closed else entry_price,
+                unrealized_pnl=0.0 if closed else unrealized_pnl,
+                realized_pnl=previous.realized_pnl if previous else 0.0,
+                last_update=datetime.now(),
+                avg_price=0.0 if closed else (avg_price or entry_price),
+                leverage=leverage,
+                margin=previous.margin if previous else 0.0,
+                strategy_name=strategy_name
+            ))
+        self.logger.debug(f"📊 Позиция обновлена {symbol}: {side} {size} @ {entry_price}")
     
     def update_position_pnl(self, symbol: str, current_price: float) -> None:
         """Обновление P&L позиции по текущей цене"""
-        with self._lock:
-            if symbol not in self._positions:
-                return
-                
-            pos = self._positions[symbol]
-            if not pos.is_active or pos.entry_price == 0:
+        with self._symbol_lock(symbol):
+            pos = self._snapshot.positions.get(symbol)
+            if pos is None or not pos.is_active or pos.entry_price == 0:
                 return
             
             # Рассчитываем unrealized P&L
+            unrealized_pnl = pos.unrealized_pnl
             if pos.is_long:
-                pos.unrealized_pnl = (current_price - pos.entry_price) * pos.size
+                unrealized_pnl = (current_price - pos.entry_price) * pos.size
             elif pos.is_short:
-                pos.unrealized_pnl = (pos.entry_price - current_price) * pos.size
+                unrealized_pnl = (pos.entry_price - current_price) * pos.size
             
-            pos.last_update = datetime.now()
+            self._publish_position(replace(pos, unrealized_pnl=unrealized_pnl, last_update=datetime.now()))
     
     def close_position(self, symbol: str, exit_price: float, realized_pnl: float = None) -> Optional[PositionInfo]:
         """Закрытие позиции с расчетом realized P&L"""
-        with self._lock:
-            if symbol not in self._positions:
-                return None
-            
-            pos = self._positions[symbol]
-            if not pos.is_active:
+        with self._symbol_lock(symbol):
+            pos = self._snapshot.positions.get(symbol)
+            if pos is None or not pos.is_active:
                 return None
             
             # Рассчитываем realized P&L если не передан
@@ -169,18 +223,8 @@ class ThreadSafeBotState:
                 elif pos.is_short:
                     realized_pnl = (pos.entry_price - exit_price) * pos.size
             
-            # Обновляем статистику
-            self._global_stats['total_trades'] += 1
-            self._global_stats['total_pnl'] += realized_pnl
-            self._global_stats['daily_pnl'] += realized_pnl
-            self._global_stats['last_trade_time'] = datetime.now()
-            
-            if realized_pnl > 0:
-                self._global_stats['winning_trades'] += 1
-            else:
-                self._global_stats['losing_trades'] += 1
-            
             # Закрываем позицию
+            now = datetime.now()
             closed_position = PositionInfo(
                 symbol=pos.symbol,
                 side=pos.side,
@@ -188,20 +232,35 @@ class ThreadSafeBotState:
                 entry_price=pos.entry_price,
                 unrealized_pnl=pos.unrealized_pnl,
                 realized_pnl=realized_pnl,
-                last_update=datetime.now()
+                last_update=now
             )
             
-            # Очищаем позицию
-            pos.size = 0.0
-            pos.side = None
-            pos.entry_price = 0.0
-            pos.avg_price = 0.0
-            pos.unrealized_pnl = 0.0
-            pos.realized_pnl = realized_pnl
-            pos.strategy_name = None  # Очищаем владельца
+            # Обновляем статистику вместе с очисткой позиции - в одном снимке
+            def stats(current: StateSnapshot) -> Mapping[str, Any]:
+                updated = dict(current.global_stats)
+                updated['total_trades'] += 1
+                updated['total_pnl'] += realized_pnl
+                updated['daily_pnl'] += realized_pnl
+                updated['last_trade_time'] = now
+                if realized_pnl > 0:
+                    updated['winning_trades'] += 1
+                else:
+                    updated['losing_trades'] += 1
+                return MappingProxyType(updated)
+
+            self._publish_position(replace(
+                pos,
+                size=0.0,
+                side=None,
+                entry_price=0.0,
+                avg_price=0.0,
+                unrealized_pnl=0.0,
+                realized_pnl=realized_pnl,
+                strategy_name=None  # Очищаем владельца
+            ), global_stats=stats)
             
-            self.logger.info(f"📊 Позиция закрыта {symbol}: P&L={realized_pnl:.2f}")
-            return closed_position
+        self.logger.info(f"📊 Позиция закрыта {symbol}: P&L={realized_pnl:.2f}")
+        return closed_position
     
     def clear_position(self, symbol: str) -> bool:
         """
@@ -214,130 +273,129 @@ class ThreadSafeBotState:
         Returns:
             bool: True если позиция была очищена
         """
-        with self._lock:
-            if symbol not in self._positions:
-                return False
-            
-            pos = self._positions[symbol]
-            if not pos.is_active:
+        with self._symbol_lock(symbol):
+            pos = self._snapshot.positions.get(symbol)
+            if pos is None or not pos.is_active:
                 return False
             
             # Просто очищаем позицию без статистики
-            pos.size = 0.0
-            pos.side = None
-            pos.entry_price = 0.0
-            pos.avg_price = 0.0
-            pos.unrealized_pnl = 0.0
-            pos.realized_pnl = 0.0
-            pos.strategy_name = None  # Очищаем владельца
-            pos.last_update = datetime.now()
+            self._publish_position(replace(
+                pos,
+                size=0.0,
+                side=None,
+                entry_price=0.0,
+                avg_price=0.0,
+                unrealized_pnl=0.0,
+                realized_pnl=0.0,
+                strategy_name=None,  # Очищаем владельца
+                last_update=datetime.now()
+            ))
             
-            self.logger.info(f"🧹 Позиция принудительно очищена: {symbol}")
-            return True
+        self.logger.info(f"🧹 Позиция принудительно очищена: {symbol}")
+        return True
     
     def get_all_positions(self) -> Dict[str, PositionInfo]:
         """Получение всех позиций"""
-        with self._lock:
-            return self._positions.copy()
+        return dict(self._snapshot.positions)
     
     def get_active_positions(self) -> Dict[str, PositionInfo]:
         """Получение только активных позиций"""
-        with self._lock:
-            return {
-                symbol: pos for symbol, pos in self._positions.items() 
-                if pos.is_active
-            }
+        return {
+            symbol: pos for symbol, pos in self._snapshot.positions.items()
+            if pos.is_active
+        }
     
     # ==================== ГЛОБАЛЬНЫЕ ФЛАГИ ====================
     
     @property
     def emergency_stop(self) -> bool:
         """Состояние аварийной остановки"""
-        with self._lock:
-            return self._emergency_stop
+        return self._snapshot.emergency_stop
     
     @emergency_stop.setter
     def emergency_stop(self, value: bool) -> None:
         """Установка аварийной остановки"""
-        with self._lock:
-            if value != self._emergency_stop:
-                self._emergency_stop = value
-                if value:
-                    self.logger.critical("🚨 АВАРИЙНАЯ ОСТАНОВКА АКТИВИРОВАНА!")
-                else:
-                    self.logger.info("✅ Аварийная остановка отключена")
+        changed = []
+
+        def update(current: StateSnapshot) -> Dict[str, Any]:
+            if current.emergency_stop != value:
+                changed.append(True)
+            return {'emergency_stop': value}
+
+        self._publish(update)
+        if changed:
+            if value:
+                self.logger.critical("🚨 АВАРИЙНАЯ ОСТАНОВКА АКТИВИРОВАНА!")
+            else:
+                self.logger.info("✅ Аварийная остановка отключена")
     
     @property
     def trading_enabled(self) -> bool:
         """Состояние торговли"""
-        with self._lock:
-            return self._trading_enabled and not self._emergency_stop
+        snapshot = self._snapshot
+        return snapshot.trading_enabled and not snapshot.emergency_stop
     
     @trading_enabled.setter
     def trading_enabled(self, value: bool) -> None:
         """Включение/отключение торговли"""
-        with self._lock:
-            self._trading_enabled = value
-            status = "включена" if value else "отключена"
-            self.logger.info(f"📊 Торговля {status}")
+        self._publish(lambda current: {'trading_enabled': value})
+        status = "включена" if value else "отключена"
+        self.logger.info(f"📊 Торговля {status}")
     
     @property
     def risk_limits_exceeded(self) -> bool:
         """Состояние превышения лимитов риска"""
-        with self._lock:
-            return self._risk_limits_exceeded
+        return self._snapshot.risk_limits_exceeded
     
     @risk_limits_exceeded.setter  
     def risk_limits_exceeded(self, value: bool) -> None:
         """Установка флага превышения лимитов"""
-        with self._lock:
-            self._risk_limits_exceeded = value
-            if value:
-                self.logger.warning("⚠️ ПРЕВЫШЕНЫ ЛИМИТЫ РИСКА!")
+        self._publish(lambda current: {'risk_limits_exceeded': value})
+        if value:
+            self.logger.warning("⚠️ ПРЕВЫШЕНЫ ЛИМИТЫ РИСКА!")
     
     # ==================== СТАТИСТИКА ====================
     
     def get_global_stats(self) -> Dict[str, Any]:
         """Получение глобальной статистики"""
-        with self._lock:
-            stats = self._global_stats.copy()
-            
-            # Добавляем рассчитанные метрики
-            total_trades = stats['total_trades']
-            if total_trades > 0:
-                stats['win_rate'] = (stats['winning_trades'] / total_trades) * 100
-                stats['avg_pnl'] = stats['total_pnl'] / total_trades
-            else:
-                stats['win_rate'] = 0.0
-                stats['avg_pnl'] = 0.0
-            
-            # Добавляем текущий unrealized P&L
-            total_unrealized = sum(
-                pos.unrealized_pnl for pos in self._positions.values() 
-                if pos.is_active
-            )
-            stats['unrealized_pnl'] = total_unrealized
-            stats['total_equity'] = stats['total_pnl'] + total_unrealized
-            
-            return stats
+        snapshot = self._snapshot
+        stats = dict(snapshot.global_stats)
+        
+        # Добавляем рассчитанные метрики
+        total_trades = stats['total_trades']
+        if total_trades > 0:
+            stats['win_rate'] = (stats['winning_trades'] / total_trades) * 100
+            stats['avg_pnl'] = stats['total_pnl'] / total_trades
+        else:
+            stats['win_rate'] = 0.0
+            stats['avg_pnl'] = 0.0
+        
+        # Добавляем текущий unrealized P&L (того же снимка)
+        total_unrealized = sum(
+            pos.unrealized_pnl for pos in snapshot.positions.values()
+            if pos.is_active
+        )
+        stats['unrealized_pnl'] = total_unrealized
+        stats['total_equity'] = stats['total_pnl'] + total_unrealized
+        
+        return stats
     
     def update_strategy_stats(self, strategy_name: str, trade_pnl: float, 
                             signal_strength: float = None) -> None:
         """Обновление статистики стратегии"""
-        with self._lock:
-            if strategy_name not in self._strategy_stats:
-                self._strategy_stats[strategy_name] = {
-                    'total_trades': 0,
-                    'winning_trades': 0,
-                    'losing_trades': 0,
-                    'total_pnl': 0.0,
-                    'avg_pnl': 0.0,
-                    'win_rate': 0.0,
-                    'last_trade_time': None,
-                    'signal_strengths': []
-                }
+        with self._strategy_lock:
+            current = self._snapshot.strategy_stats.get(strategy_name)
+            stats = dict(current) if current else {
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'total_pnl': 0.0,
+                'avg_pnl': 0.0,
+                'win_rate': 0.0,
+                'last_trade_time': None,
+                'signal_strengths': ()
+            }
             
-            stats = self._strategy_stats[strategy_name]
             stats['total_trades'] += 1
             stats['total_pnl'] += trade_pnl
             stats['last_trade_time'] = datetime.now()
@@ -351,25 +409,36 @@ class ThreadSafeBotState:
             stats['win_rate'] = (stats['winning_trades'] / stats['total_trades']) * 100
             stats['avg_pnl'] = stats['total_pnl'] / stats['total_trades']
             
-            # Сохраняем силу сигнала
+            # Сохраняем силу сигнала (только последние 100 значений)
             if signal_strength is not None:
-                stats['signal_strengths'].append(signal_strength)
-                # Храним только последние 100 значений
-                if len(stats['signal_strengths']) > 100:
-                    stats['signal_strengths'] = stats['signal_strengths'][-100:]
+                stats['signal_strengths'] = (tuple(stats['signal_strengths']) + (signal_strength,))[-100:]
+
+            def update(snapshot: StateSnapshot) -> Dict[str, Any]:
+                strategies = dict(snapshot.strategy_stats)
+                strategies[strategy_name] = MappingProxyType(stats)
+                return {'strategy_stats': MappingProxyType(strategies)}
+
+            self._publish(update)
     
     def get_strategy_stats(self, strategy_name: str = None) -> Dict[str, Any]:
         """Получение статистики стратегий"""
-        with self._lock:
-            if strategy_name:
-                return self._strategy_stats.get(strategy_name, {})
-            return self._strategy_stats.copy()
+        strategies = self._snapshot.strategy_stats
+        if strategy_name:
+            return self._strategy_stats_dict(strategies.get(strategy_name, {}))
+        return {name: self._strategy_stats_dict(stats) for name, stats in strategies.items()}
+
+    @staticmethod
+    def _strategy_stats_dict(stats: Mapping[str, Any]) -> Dict[str, Any]:
+        result = dict(stats)
+        if 'signal_strengths' in result:
+            result['signal_strengths'] = list(result['signal_strengths'])
+        return result
     
     # ==================== СИНХРОНИЗАЦИЯ ====================
     
     def sync_with_exchange(self, symbol: str, exchange_position: Dict[str, Any]) -> bool:
         """Синхронизация с данными биржи"""
-        with self._lock:
+        with self._symbol_lock(symbol):
             try:
                 # Отслеживаем частоту синхронизации
                 now = datetime.now()
@@ -392,7 +461,7 @@ class ThreadSafeBotState:
                 avg_price = float(exchange_position.get('avgPrice', 0))
                 unrealized_pnl = float(exchange_position.get('unrealisedPnl', 0))
                 
-                # Обновляем позицию
+                # Обновляем позицию (блокировка полосы реентерабельна)
                 self.set_position(
                     symbol=symbol,
                     side=side,
@@ -412,40 +481,41 @@ class ThreadSafeBotState:
     
     def get_diagnostic_info(self) -> Dict[str, Any]:
         """Получение диагностической информации"""
-        with self._lock:
-            return {
-                'positions_count': len(self._positions),
-                'active_positions_count': len(self.get_active_positions()),
-                'strategies_count': len(self._strategy_stats),
-                'emergency_stop': self._emergency_stop,
-                'trading_enabled': self._trading_enabled,
-                'risk_limits_exceeded': self._risk_limits_exceeded,
-                'total_sync_operations': sum(self._sync_counts.values()),
-                'uptime_seconds': (datetime.now() - self._global_stats['start_time']).total_seconds()
-            }
+        snapshot = self._snapshot
+        return {
+            'positions_count': len(snapshot.positions),
+            'active_positions_count': sum(1 for pos in snapshot.positions.values() if pos.is_active),
+            'strategies_count': len(snapshot.strategy_stats),
+            'emergency_stop': snapshot.emergency_stop,
+            'trading_enabled': snapshot.trading_enabled,
+            'risk_limits_exceeded': snapshot.risk_limits_exceeded,
+            'total_sync_operations': sum(list(self._sync_counts.values())),
+            'uptime_seconds': (datetime.now() - snapshot.global_stats['start_time']).total_seconds(),
+            'snapshot_version': snapshot.version
+        }
     
     def validate_state_consistency(self) -> List[str]:
         """Проверка консистентности состояния"""
-        with self._lock:
-            issues = []
-            
-            # Проверяем позиции
-            for symbol, pos in self._positions.items():
-                if pos.size < 0:
-                    issues.append(f"Отрицательный размер позиции {symbol}: {pos.size}")
-                
-                if pos.is_active and pos.entry_price <= 0:
-                    issues.append(f"Активная позиция {symbol} с нулевой ценой входа")
-                
-                if pos.side and not pos.is_active:
-                    issues.append(f"Неактивная позиция {symbol} имеет сторону {pos.side}")
+        snapshot = self._snapshot
+        issues = []
+        
+        # Проверяем позиции
+        for symbol, pos in snapshot.positions.items():
+            if pos.size < 0:
+                issues.append(f"Отрицательный размер позиции {symbol}: {pos.size}")
             
-            # Проверяем статистику
-            stats = self._global_stats
-            if stats['winning_trades'] + stats['losing_trades'] != stats['total_trades']:
-                issues.append("Некорректная статистика трейдов")
+            if pos.is_active and pos.entry_price <= 0:
+                issues.append(f"Активная позиция {symbol} с нулевой ценой входа")
             
-            return issues
+            if pos.side and not pos.is_active:
+                issues.append(f"Неактивная позиция {symbol} имеет сторону {pos.side}")
+        
+        # Проверяем статистику
+        stats = snapshot.global_stats
+        if stats['winning_trades'] + stats['losing_trades'] != stats['total_trades']:
+            issues.append("Некорректная статистика трейдов")
+        
+        return issues
 
 
 # 🌍 ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР СОСТОЯНИЯ БОТА
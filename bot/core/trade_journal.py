@@ -0,0 +1,640 @@
+# bot/core/trade_journal.py
+"""
+Асинхронная запись журнала сделок
+
+Торговый поток только формирует строки сигнала и кладет их в ограниченную
+очередь; фоновый поток пишет их пачками в trade_journal.csv и
+signals_log.csv через постоянно открытые файлы, а также сохраняет снимки
+рыночных данных (SnapshotArchive: бары хранятся один раз, сигнал получает
+ссылки). Схема журнала проверяется (и при необходимости мигрирует)
+один раз при запуске, поэтому задержка сигнала не зависит от размера журнала.
+
+Те же строки дописываются в колоночное хранилище (JournalStore): аналитика
+читает журнал через load_trade_journal/load_signals_log, не разбирая CSV.
+При первом запуске существующие CSV импортируются в хранилище.
+
+При остановке (stop, atexit) очередь дописывается до конца.
+"""
+
+import atexit
+import csv
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from bot.core.journal_store import FLOAT, STR, TIME, JournalStore, TimeBound, to_utc
+from bot.core.snapshot_archive import SnapshotArchive, dumps_reference
+
+TRADE_JOURNAL_PATH = os.path.join('data', 'trade_journal.csv')
+SIGNALS_LOG_PATH = os.path.join('data', 'signals_log.csv')
+SNAPSHOTS_DIR = os.path.join('data', 'snapshots')
+JOURNAL_STORE_DIR = os.path.join('data', 'journal')
+
+TRADE_JOURNAL_FIELDS = [
+    'timestamp', 'signal_id', 'strategy', 'signal', 'entry_price', 'stop_loss', 'take_profit', 'comment',
+    'tf', 'open', 'high', 'low', 'close', 'volume', 'signal_strength', 'risk_reward_ratio'
+]
+
+SIGNAL_LOG_FIELDS = [
+    'timestamp', 'signal_id', 'strategy', 'signal', 'entry_price', 'stop_loss', 'take_profit',
+    'comment', 'signal_strength', 'risk_reward_ratio', 'confluence_factors'
+]
+
+TRADE_JOURNAL_SCHEMA = {
+    name: TIME if name == 'timestamp' else
+    STR if name in ('signal_id', 'strategy', 'signal', 'comment', 'tf') else FLOAT
+    for name in TRADE_JOURNAL_FIELDS
+}
+
+SIGNAL_LOG_SCHEMA = {
+    name: TIME if name == 'timestamp' else
+    STR if name in ('signal_id', 'strategy', 'signal', 'comment', 'confluence_factors') else FLOAT
+    for name in SIGNAL_LOG_FIELDS
+}
+
+# Ссылки сигналов на снимки рыночных данных в архиве (строка на таймфрейм)
+SNAPSHOT_REFS_SCHEMA = {
+    'timestamp': TIME,
+    'signal_id': STR,
+    'strategy': STR,
+    'symbol': STR,
+    'tf': STR,
+    'start': FLOAT,
+    'end': FLOAT,
+    'rows': FLOAT,
+    'versions': STR,
+    'layout': STR,
+    'digest': STR,
+}
+
+# Ограничение очереди: при переполнении записи отбрасываются, торговый поток не ждет
+JOURNAL_QUEUE_SIZE = 10000
+# Максимум сигналов в одной пачке записи
+JOURNAL_BATCH_SIZE = 256
+# Сброс буферов файлов не реже, чем раз в столько секунд
+JOURNAL_FLUSH_INTERVAL = 0.5
+
+_STOP = object()
+
+
+class _SignalRecord:
+    __slots__ = ('signal_row', 'journal_rows', 'snapshots', 'timestamp', 'symbol')
+
+    def __init__(self, signal_row: Dict[str, Any], journal_rows: List[Dict[str, Any]],
+                 snapshots: Dict[str, Any], timestamp: str, symbol: str):
+        self.signal_row = signal_row
+        self.journal_rows = journal_rows
+        self.snapshots = snapshots
+        self.timestamp = timestamp
+        self.symbol = symbol
+
+
+def ensure_csv_header(path: str, fieldnames: List[str]) -> None:
+    """Создаёт CSV с нужным заголовком, если файл отсутствует или пуст."""
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+            writer.writeheader()
+
+
+def ensure_trade_journal_schema(path: str, fieldnames: List[str]) -> None:
+    """Мигрирует существующий trade_journal.csv к новой схеме с signal_id."""
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        ensure_csv_header(path, fieldnames)
+        return
+
+    # Для совпадающей схемы читается только заголовок
+    with open(path, newline='', encoding='utf-8') as infile:
+        existing_header = next(csv.reader(infile), [])
+    if existing_header == fieldnames:
+        return
+
+    with open(path, newline='', encoding='utf-8') as infile:
+        reader = csv.reader(infile)
+        next(reader, None)
+        rows = list(reader)
+
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix='trade_journal_', suffix='.csv',
+                                        dir=os.path.dirname(path) or None)
+    os.close(tmp_fd)
+
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+            writer.writeheader()
+
+            for row in rows:
+                mapping: Dict[str, Any] = {key: '' for key in fieldnames}
+
+                for idx, value in enumerate(row):
+                    if idx < len(existing_header):
+                        key = existing_header[idx]
+                        if key in mapping:
+                            mapping[key] = value
+
+                if 'signal_id' not in existing_header:
+                    mapping['signal_id'] = f"legacy_{uuid.uuid4()}"
+
+                writer.writerow(mapping)
+
+        os.replace(tmp_path, path)
+        logging.info("🔄 trade_journal.csv мигрирован под новую схему (%s)", ','.join(fieldnames))
+    except Exception as exc:
+        logging.error(f"❌ Ошибка миграции trade_journal: {exc}")
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+
+
+class TradeJournalWriter:
+    """Фоновый писатель журнала сделок с ограниченной очередью"""
+
+    def __init__(self, journal_path: str = TRADE_JOURNAL_PATH,
+                 signals_path: str = SIGNALS_LOG_PATH,
+                 snapshots_dir: Optional[str] = SNAPSHOTS_DIR,
+                 store_dir: Optional[str] = JOURNAL_STORE_DIR,
+                 max_queue: int = JOURNAL_QUEUE_SIZE,
+                 batch_size: int = JOURNAL_BATCH_SIZE,
+                 flush_interval: float = JOURNAL_FLUSH_INTERVAL):
+        """
+        Args:
+            journal_path: Журнал сделок (строка на каждый таймфрейм сигнала)
+            signals_path: Лог сигналов (строка на сигнал)
+            snapshots_dir: Каталог архива снимков рыночных данных (None - не сохранять)
+            store_dir: Каталог колоночного хранилища и ссылок на снимки (None - только CSV)
+            max_queue: Емкость очереди сигналов
+            batch_size: Максимум сигналов в одной пачке записи
+            flush_interval: Период сброса буферов файлов в секундах
+        """
+        self.journal_path = journal_path
+        self.signals_path = signals_path
+        self.snapshots_dir = snapshots_dir
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger('trade_journal')
+        self.journal_store = get_journal_store('trade_journal', store_dir) if store_dir else None
+        self.signals_store = get_journal_store('signals', store_dir) if store_dir else None
+        # Снимки без таблицы ссылок не восстановить - архив ведется только вместе с ней
+        self.snapshot_archive = get_snapshot_archive(snapshots_dir) if snapshots_dir and store_dir else None
+        self.snapshot_refs = get_journal_store('snapshot_refs', store_dir) if self.snapshot_archive else None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._lifecycle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._journal_file = None
+        self._signals_file = None
+        self._journal_writer = None
+        self._signals_writer = None
+        self._stats = {
+            'signals_queued': 0,
+            'signals_written': 0,
+            'journal_rows': 0,
+            'snapshots': 0,
+            'store_rows': 0,
+            'imported_rows': 0,
+            'batches': 0,
+            'dropped': 0,
+            'errors': 0,
+        }
+
+    # ==================== ЖИЗНЕННЫЙ ЦИКЛ ====================
+
+    def start(self) -> None:
+        """Проверка схемы, открытие файлов и запуск фонового потока"""
+        with self._lifecycle_lock:
+            if self._thread is not None or self._stopped:
+                return
+            for path in (self.journal_path, self.signals_path):
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+            ensure_trade_journal_schema(self.journal_path, TRADE_JOURNAL_FIELDS)
+            ensure_csv_header(self.signals_path, SIGNAL_LOG_FIELDS)
+
+            self._journal_file = open(self.journal_path, 'a', newline='', encoding='utf-8')
+            self._signals_file = open(self.signals_path, 'a', newline='', encoding='utf-8')
+            self._journal_writer = csv.DictWriter(self._journal_file, fieldnames=TRADE_JOURNAL_FIELDS)
+            self._signals_writer = csv.DictWriter(self._signals_file, fieldnames=SIGNAL_LOG_FIELDS)
+
+            self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+            self._thread.start()
+            self.logger.info(f"📝 Журнал сделок: {self.journal_path} (запись в фоне)")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Остановка с дозаписью всей очереди и закрытием файлов"""
+        with self._lifecycle_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+        if thread is None:
+            return
+        # Маркер остановки встает после всех принятых сигналов
+        self._queue.put(_STOP)
+        thread.join(timeout=timeout)
+        if thread.is_alive():
+            self.logger.error("❌ Журнал сделок не дописан за отведенное время")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Ожидание записи всех сигналов, принятых до вызова"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    # ==================== ЗАПИСЬ ====================
+
+    def record_signal(self, strategy_name: str, signal: Dict[str, Any],
+                      all_market_data: Dict[str, Any], symbol: Optional[str] = None) -> bool:
+        """
+        Постановка сигнала в очередь журнала (без операций с диском)
+
+        Args:
+            strategy_name: Стратегия сигнала
+            signal: Сигнал (получает signal_id, если его нет)
+            all_market_data: Кадры таймфреймов, которые видела стратегия
+            symbol: Инструмент кадров (по умолчанию signal['symbol'])
+
+        Returns:
+            False, если запись отброшена: очередь переполнена или писатель остановлен
+        """
+        if self._stopped:
+            return False
+        self.start()
+
+        timestamp = datetime.now(timezone.utc).isoformat()
+        signal_id = signal.get('signal_id')
+        if not signal_id:
+            signal_id = f"sig_{uuid.uuid4()}"
+            signal['signal_id'] = signal_id
+
+        base = {
+            'timestamp': timestamp,
+            'signal_id': signal_id,
+            'strategy': strategy_name,
+            'signal': signal.get('signal', ''),
+            'entry_price': signal.get('entry_price', ''),
+            'stop_loss': signal.get('stop_loss', ''),
+            'take_profit': signal.get('take_profit', ''),
+            'comment': signal.get('comment', ''),
+            'signal_strength': signal.get('signal_strength', 0),
+            'risk_reward_ratio': signal.get('risk_reward_ratio', 0),
+        }
+        confluence = signal.get('confluence_factors')
+        signal_row = {**base, 'confluence_factors': ','.join(confluence) if confluence else ''}
+
+        journal_rows = []
+        snapshots = {}
+        for tf, df in all_market_data.items():
+            if df is None or len(df) == 0:
+                continue
+            try:
+                last = df.iloc[-1]
+                journal_rows.append({
+                    **base,
+                    'tf': tf,
+                    'open': last['open'],
+                    'high': last['high'],
+                    'low': last['low'],
+                    'close': last['close'],
+                    'volume': last['volume'],
+                })
+                if self.snapshot_archive is not None:
+                    # Копия фиксирует данные на момент сигнала (в pandas 3 она ленивая)
+                    snapshots[tf] = df.copy()
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка записи журнала для {tf}: {e}")
+
+        try:
+            record = _SignalRecord(signal_row, journal_rows, snapshots, timestamp,
+                                   symbol or signal.get('symbol') or 'UNKNOWN')
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['dropped'] += 1
+            self.logger.warning(f"⚠️ Очередь журнала переполнена, сигнал {signal_id} не записан")
+            return False
+
+        with self._stats_lock:
+            self._stats['signals_queued'] += 1
+        return True
+
+    def _run(self) -> None:
+        self._import_csv()
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[_SignalRecord] = []
+            markers: List[threading.Event] = []
+            while True:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.set()
+
+        self._close_files()
+
+    def _write_batch(self, batch: List[_SignalRecord]) -> None:
+        journal_rows = 0
+        snapshots = 0
+        try:
+            for record in batch:
+                self._signals_writer.writerow(record.signal_row)
+                self._journal_writer.writerows(record.journal_rows)
+                journal_rows += len(record.journal_rows)
+            self._signals_file.flush()
+            self._journal_file.flush()
+        except Exception as exc:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            self.logger.error(f"❌ Ошибка записи журнала сделок: {exc}")
+
+        store_rows = self._append_to_stores(
+            [row for record in batch for row in record.journal_rows],
+            [record.signal_row for record in batch]
+        )
+
+        for record in batch:
+            snapshots += self._persist_market_snapshots(record)
+
+        with self._stats_lock:
+            self._stats['signals_written'] += len(batch)
+            self._stats['journal_rows'] += journal_rows
+            self._stats['snapshots'] += snapshots
+            self._stats['store_rows'] += store_rows
+            self._stats['batches'] += 1
+
+    def _append_to_stores(self, journal_rows: List[Dict[str, Any]],
+                          signal_rows: List[Dict[str, Any]]) -> int:
+        if self.journal_store is None:
+            return 0
+        try:
+            return self.journal_store.append(journal_rows) + self.signals_store.append(signal_rows)
+        except Exception as exc:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            self.logger.error(f"❌ Ошибка записи в хранилище журнала: {exc}")
+            return 0
+
+    def _import_csv(self) -> None:
+        """Однократный импорт существующих CSV в пустое хранилище"""
+        if self.journal_store is None:
+            return
+        imported = 0
+        for store, path in ((self.journal_store, self.journal_path), (self.signals_store, self.signals_path)):
+            try:
+                if store.segments():
+                    continue
+                frame = read_journal_csv(path)
+                for offset in range(0, len(frame), store.segment_rows):
+                    imported += store.append_frame(frame.iloc[offset:offset + store.segment_rows])
+            except Exception as exc:
+                self.logger.error(f"❌ Ошибка импорта {path} в хранилище журнала: {exc}")
+        if imported:
+            self.logger.info(f"📦 Импортировано в хранилище журнала: {imported} строк")
+        with self._stats_lock:
+            self._stats['imported_rows'] += imported
+
+    def _persist_market_snapshots(self, record: _SignalRecord) -> int:
+        """Сохраняет новые бары кадров в архив и ссылки сигнала на них."""
+        if not record.snapshots:
+            return 0
+
+        references = []
+        for tf, df in record.snapshots.items():
+            try:
+                reference = self.snapshot_archive.store_frame(record.symbol, tf, df)
+            except Exception as exc:
+                self.logger.error(f"❌ Не удалось сохранить snapshot для {tf}: {exc}")
+                continue
+            if reference is None:
+                self.logger.debug(f"У кадра {tf} нет времени баров - snapshot не сохранен")
+                continue
+            versions, layout = dumps_reference(reference)
+            references.append({
+                'timestamp': record.timestamp,
+                'signal_id': record.signal_row['signal_id'],
+                'strategy': record.signal_row['strategy'],
+                'symbol': record.symbol,
+                'tf': reference['tf'],
+                'start': reference['start'],
+                'end': reference['end'],
+                'rows': reference['rows'],
+                'versions': versions,
+                'layout': layout,
+                'digest': reference['digest'],
+            })
+
+        try:
+            self.snapshot_refs.append(references)
+        except Exception as exc:
+            self.logger.error(f"❌ Ошибка сохранения snapshots: {exc}")
+            return 0
+        return len(references)
+
+    def _close_files(self) -> None:
+        for handle in (self._journal_file, self._signals_file):
+            if handle is None:
+                continue
+            try:
+                handle.close()
+            except Exception as exc:
+                self.logger.error(f"❌ Ошибка закрытия журнала: {exc}")
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {**self._stats, 'pending': self._queue.qsize()}
+
+
+# ==================== ЧТЕНИЕ ЖУРНАЛА ====================
+
+_STORE_SCHEMAS = {
+    'trade_journal': TRADE_JOURNAL_SCHEMA,
+    'signals': SIGNAL_LOG_SCHEMA,
+    'snapshot_refs': SNAPSHOT_REFS_SCHEMA,
+}
+
+_stores: Dict[str, JournalStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_journal_store(table: str = 'trade_journal', store_dir: str = JOURNAL_STORE_DIR) -> JournalStore:
+    """Хранилище таблицы журнала ('trade_journal', 'signals', 'snapshot_refs'), одно на каталог"""
+    root = os.path.abspath(os.path.join(store_dir, table))
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = JournalStore(root, _STORE_SCHEMAS[table])
+        return store
+
+
+_archives: Dict[str, SnapshotArchive] = {}
+
+
+def get_snapshot_archive(snapshots_dir: str = SNAPSHOTS_DIR) -> SnapshotArchive:
+    """Архив снимков рыночных данных, один на каталог"""
+    root = os.path.abspath(snapshots_dir)
+    with _stores_lock:
+        archive = _archives.get(root)
+        if archive is None:
+            archive = _archives[root] = SnapshotArchive(root)
+        return archive
+
+
+def read_journal_csv(path: str) -> pd.DataFrame:
+    """Чтение CSV журнала с пропуском поврежденных строк"""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    try:
+        return pd.read_csv(path)
+    except pd.errors.ParserError:
+        return pd.read_csv(path, on_bad_lines='skip', engine='python')
+
+
+def _load_table(table: str, csv_path: str, store_dir: str, strategy: Union[None, str, Iterable[str]],
+                start: TimeBound, end: TimeBound, columns: Optional[Sequence[str]],
+                last: Optional[int]) -> pd.DataFrame:
+    store = get_journal_store(table, store_dir)
+    if store.segments():
+        return store.query(strategy=strategy, start=start, end=end, columns=columns, last=last)
+
+    # Хранилище еще не заполнено (писатель не запускался) - читаем CSV
+    df = read_journal_csv(csv_path)
+    if df.empty or 'timestamp' not in df.columns:
+        return df
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='mixed')
+    df = df[df['timestamp'].notna()]
+    if strategy is not None and 'strategy' in df.columns:
+        df = df[df['strategy'].isin([strategy] if isinstance(strategy, str) else list(strategy))]
+    if start is not None:
+        df = df[df['timestamp'] >= to_utc(start)]
+    if end is not None:
+        df = df[df['timestamp'] <= to_utc(end)]
+    df = df.sort_values('timestamp', kind='stable')
+    if last is not None:
+        df = df.tail(last)
+    if columns:
+        df = df[[name for name in columns if name in df.columns]]
+    return df.reset_index(drop=True)
+
+
+def load_trade_journal(strategy: Union[None, str, Iterable[str]] = None,
+                       start: TimeBound = None, end: TimeBound = None,
+                       columns: Optional[Sequence[str]] = None, last: Optional[int] = None,
+                       store_dir: str = JOURNAL_STORE_DIR,
+                       csv_path: str = TRADE_JOURNAL_PATH) -> pd.DataFrame:
+    """
+    Журнал сделок (строка на таймфрейм сигнала) из колоночного хранилища
+
+    Args:
+        strategy: Стратегия или набор стратегий (None - все)
+        start: Начало интервала времени включительно
+        end: Конец интервала времени включительно
+        columns: Нужные колонки (None - все)
+        last: Только последние N строк
+
+    Returns:
+        DataFrame, отсортированный по времени (timestamp - datetime64[ns, UTC])
+    """
+    return _load_table('trade_journal', csv_path, store_dir, strategy, start, end, columns, last)
+
+
+def load_signals_log(strategy: Union[None, str, Iterable[str]] = None,
+                     start: TimeBound = None, end: TimeBound = None,
+                     columns: Optional[Sequence[str]] = None, last: Optional[int] = None,
+                     store_dir: str = JOURNAL_STORE_DIR,
+                     csv_path: str = SIGNALS_LOG_PATH) -> pd.DataFrame:
+    """Лог сигналов (строка на сигнал); параметры как у load_trade_journal"""
+    return _load_table('signals', csv_path, store_dir, strategy, start, end, columns, last)
+
+
+def load_signal_snapshots(signal_id: str, start: TimeBound = None, end: TimeBound = None,
+                          store_dir: str = JOURNAL_STORE_DIR,
+                          snapshots_dir: str = SNAPSHOTS_DIR) -> Dict[str, pd.DataFrame]:
+    """
+    Кадры таймфреймов, которые видела стратегия при сигнале
+
+    Args:
+        signal_id: Идентификатор сигнала
+        start: Начало интервала поиска сигнала (ускоряет выборку ссылок)
+        end: Конец интервала поиска сигнала
+
+    Returns:
+        Таймфрейм -> DataFrame, восстановленный из архива
+    """
+    references = get_journal_store('snapshot_refs', store_dir).query(start=start, end=end)
+    references = references[references['signal_id'] == signal_id]
+    archive = get_snapshot_archive(snapshots_dir)
+    return {
+        row.tf: archive.load_frame({
+            'symbol': row.symbol,
+            'tf': row.tf,
+            'start': int(row.start),
+            'end': int(row.end),
+            'rows': int(row.rows),
+            'versions': json.loads(row.versions),
+            'layout': json.loads(row.layout),
+            'digest': row.digest,
+        })
+        for row in references.itertuples(index=False)
+    }
+
+
+def journal_row_count(table: str = 'trade_journal', store_dir: str = JOURNAL_STORE_DIR) -> int:
+    """Число строк таблицы журнала по манифесту (без чтения сегментов)"""
+    return get_journal_store(table, store_dir).row_count()
+
+
+# 🌍 ГЛОБАЛЬНЫЙ ПИСАТЕЛЬ ЖУРНАЛА
+_trade_journal_instance = None
+_trade_journal_lock = threading.Lock()
+
+
+def get_trade_journal() -> TradeJournalWriter:
+    """Получение синглтона писателя журнала (дописывается при выходе процесса)"""
+    global _trade_journal_instance
+
+    if _trade_journal_instance is None:
+        with _trade_journal_lock:
+            if _trade_journal_instance is None:
+                _trade_journal_instance = TradeJournalWriter()
+                atexit.register(_trade_journal_instance.stop)
+
+    return _trade_journal_instance
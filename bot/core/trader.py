@@ -3,16 +3,12 @@
 # Функции: выполнение стратегий, контроль рисков, управление позициями, мониторинг
 
 import time as time_module
-import csv
-import uuid
 import logging
 from datetime import datetime, timezone, timedelta
 import importlib
 import os
-import tempfile
-import pandas as pd
 import threading
-from typing import Optional, Dict, Any
+from typing import Optional, Any
 
 from bot.exchange.api_adapter import create_trading_bot_adapter
 from bot.ai import NeuralIntegration
@@ -33,6 +29,8 @@ from bot.core.enhanced_api_connection import (
     ConnectionState,
 )
 from bot.core.blocking_alerts import report_order_block
+from bot.core.bar_scheduler import BarCloseScheduler, get_strategy_timeframes
+from bot.core.trade_journal import get_trade_journal
 
 # Импорты основных компонентов бота
 from bot.risk import RiskManager
@@ -260,172 +258,26 @@ def setup_strategy_logger(strategy_name):
     return logger
 
 def log_trade_journal(strategy_name, signal, all_market_data):
-    """Расширенное логирование сигналов в журнал сделок"""
-    filename = "data/trade_journal.csv"
-    signals_log_file = "data/signals_log.csv"
-    os.makedirs("data", exist_ok=True)
-
-    fieldnames = [
-        'timestamp', 'signal_id', 'strategy', 'signal', 'entry_price', 'stop_loss', 'take_profit', 'comment',
-        'tf', 'open', 'high', 'low', 'close', 'volume', 'signal_strength', 'risk_reward_ratio'
-    ]
-
-    signal_log_fields = [
-        'timestamp', 'signal_id', 'strategy', 'signal', 'entry_price', 'stop_loss', 'take_profit',
-        'comment', 'signal_strength', 'risk_reward_ratio', 'confluence_factors'
-    ]
-
-    _ensure_trade_journal_schema(filename, fieldnames)
-    _ensure_csv_header(signals_log_file, signal_log_fields)
-
-    current_timestamp = datetime.now(timezone.utc).isoformat()
-    signal_id = signal.get('signal_id')
-    if not signal_id:
-        signal_id = f"sig_{uuid.uuid4()}"
-        signal['signal_id'] = signal_id
-
-    # Логируем агрегированную информацию по сигналу (1 строка на событие)
-    aggregated_row = {
-        'timestamp': current_timestamp,
-        'signal_id': signal_id,
-        'strategy': strategy_name,
-        'signal': signal.get('signal', ''),
-        'entry_price': signal.get('entry_price', ''),
-        'stop_loss': signal.get('stop_loss', ''),
-        'take_profit': signal.get('take_profit', ''),
-        'comment': signal.get('comment', ''),
-        'signal_strength': signal.get('signal_strength', 0),
-        'risk_reward_ratio': signal.get('risk_reward_ratio', 0),
-        'confluence_factors': ','.join(signal.get('confluence_factors', [])) if signal.get('confluence_factors') else ''
-    }
-
-    with open(signals_log_file, 'a', newline='') as sig_file:
-        sig_writer = csv.DictWriter(sig_file, fieldnames=signal_log_fields)
-        if sig_file.tell() == 0:
-            sig_writer.writeheader()
-        sig_writer.writerow(aggregated_row)
-
-    _persist_market_snapshots(all_market_data, signal_id, current_timestamp)
-
-    # Для каждого таймфрейма логируем последнюю свечу
-    for tf, df in all_market_data.items():
-        if df is None or len(df) == 0:
-            continue
-            
-        try:
-            last = df.iloc[-1]
-            
-            # Расчет дополнительных метрик
-            signal_strength = signal.get('signal_strength', 0)
-            risk_reward_ratio = signal.get('risk_reward_ratio', 0)
-            
-            row = {
-                'timestamp': current_timestamp,
-                'signal_id': signal_id,
-                'strategy': strategy_name,
-                'signal': signal.get('signal', ''),
-                'entry_price': signal.get('entry_price', ''),
-                'stop_loss': signal.get('stop_loss', ''),
-                'take_profit': signal.get('take_profit', ''),
-                'comment': signal.get('comment', ''),
-                'tf': tf,
-                'open': last['open'],
-                'high': last['high'],
-                'low': last['low'],
-                'close': last['close'],
-                'volume': last['volume'],
-                'signal_strength': signal_strength,
-                'risk_reward_ratio': risk_reward_ratio
-            }
-            
-            with open(filename, 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                if f.tell() == 0:
-                    writer.writeheader()
-                writer.writerow(row)
-
-        except Exception as e:
-            logging.error(f"❌ Ошибка записи журнала для {tf}: {e}")
-
-
-def _persist_market_snapshots(all_market_data, signal_id: str, timestamp: str) -> None:
-    """Сохраняет снимки рыночных данных по всем таймфреймам на момент сигнала."""
-
-    try:
-        snapshot_root = os.path.join('data', 'snapshots', timestamp[:10])
-        os.makedirs(snapshot_root, exist_ok=True)
-        for tf, df in all_market_data.items():
-            if df is None or df.empty:
-                continue
-
-            tf_safe = str(tf).replace('/', '_')
-            snapshot_path = os.path.join(snapshot_root, f"{signal_id}_{tf_safe}.csv")
-            try:
-                df_to_save = df.copy()
-                df_to_save.to_csv(snapshot_path, index=True, index_label='timestamp')
-            except Exception as inner_exc:
-                logging.error(f"❌ Не удалось сохранить snapshot для {tf}: {inner_exc}")
-    except Exception as exc:
-        logging.error(f"❌ Ошибка сохранения snapshots: {exc}")
-
-
-def _ensure_csv_header(path: str, fieldnames: list[str]) -> None:
-    """Создаёт CSV с нужным заголовком, если файл отсутствует."""
-
-    if not os.path.exists(path):
-        with open(path, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
+    """Расширенное логирование сигналов в журнал сделок (запись в фоновом потоке)"""
+    get_trade_journal().record_signal(strategy_name, signal, all_market_data, symbol=signal.get('symbol') or SYMBOL)
 
 
-def _ensure_trade_journal_schema(path: str, fieldnames: list[str]) -> None:
-    """Мигрирует существующий trade_journal.csv к новой схеме с signal_id."""
-
-    if not os.path.exists(path):
-        _ensure_csv_header(path, fieldnames)
-        return
-
-    with open(path, newline='', encoding='utf-8') as infile:
-        reader = csv.reader(infile)
-        try:
-            existing_header = next(reader)
-        except StopIteration:
-            existing_header = []
-        rows = list(reader)
-
-    if existing_header == fieldnames:
-        return
-
-    tmp_fd, tmp_path = tempfile.mkstemp(prefix='trade_journal_', suffix='.csv')
-    os.close(tmp_fd)
-
-    try:
-        with open(tmp_path, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for row in rows:
-                mapping: Dict[str, Any] = {key: '' for key in fieldnames}
-
-                for idx, value in enumerate(row):
-                    if idx < len(existing_header):
-                        key = existing_header[idx]
-                        if key in mapping:
-                            mapping[key] = value
-
-                if 'signal_id' not in existing_header:
-                    mapping['signal_id'] = f"legacy_{uuid.uuid4()}"
+def submit_cycle_orders(order_manager, cycle_orders, strategy_apis):
+    """
+    Отправка ордеров торгового цикла
 
-                writer.writerow(mapping)
+    Все ордера ставятся в очередь до ожидания первого: ордера стратегий одного
+    аккаунта уходят одним пакетом, одиночный ордер - без окна сбора пакета.
 
-        os.replace(tmp_path, path)
-        logging.info("🔄 trade_journal.csv мигрирован под новую схему (%s)", ','.join(fieldnames))
-    except Exception as exc:
-        logging.error(f"❌ Ошибка миграции trade_journal: {exc}")
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+    Returns:
+        Пары (ордер цикла, ответ API или исключение) в порядке cycle_orders
+    """
+    if not cycle_orders:
+        return []
+    responses = order_manager.create_orders_safe(
+        [(strategy_apis[order['strategy_name']], order['request']) for order in cycle_orders]
+    )
+    return list(zip(cycle_orders, responses))
 
 def get_current_balance(api):
     """Получение текущего баланса с обработкой ошибок"""
@@ -520,6 +372,10 @@ def run_trading_with_risk_management(
 
     # === БЛОК А2: TTL КЭШИРОВАНИЕ ДЛЯ ПРЕДОТВРАЩЕНИЯ MEMORY LEAKS ===
     from bot.strategy.utils.indicators import TTLCache
+    from bot.strategy.utils.market_snapshot import MarketSnapshot, use_snapshot
+    from bot.services.market_data_service import get_market_data_service
+
+    market_data_service = get_market_data_service()
 
     # Кэши с автоматической очисткой для предотвращения утечек памяти
     market_data_cache = TTLCache(maxsize=10, ttl=300)  # 5 минут
@@ -528,6 +384,8 @@ def run_trading_with_risk_management(
     position_cache = TTLCache(maxsize=20, ttl=120)  # 2 минуты
 
     main_logger.info("🗂️ TTL кэширование инициализировано для предотвращения memory leaks")
+
+    market_stream = None
     
     try:
         if telegram_bot:
@@ -631,6 +489,25 @@ def run_trading_with_risk_management(
             return
         
         main_logger.info(f"🚀 Торговый бот запущен с риск-менеджментом и {len(strategy_apis)} стратегиями")
+
+        # ⏱️ Стратегии выполняются на закрытии баров своих таймфреймов
+        bar_scheduler = BarCloseScheduler(market_data_service.timeframes)
+        for strategy_name, strategy in strategy_instances.items():
+            timeframes = get_strategy_timeframes(strategy)
+            bar_scheduler.register(strategy_name, timeframes)
+            main_logger.info(f"⏱️ {strategy_name}: таймфреймы {', '.join(timeframes) if timeframes else 'все'}")
+
+        # Публичные рыночные данные берем через один API клиент
+        market_api = next(iter(strategy_apis.values()))
+        try:
+            # WebSocket поток сообщает о закрытии бара сразу; без него закрытие определяется по часам
+            market_stream = market_api.start_market_stream(
+                SYMBOL,
+                [interval for interval in market_data_service.timeframes.values()],
+                on_bar_close=bar_scheduler.on_stream_bar_close,
+            )
+        except Exception as e:
+            main_logger.warning(f"⚠️ WebSocket поток недоступен, свечи обновляются через REST: {e}")
         
         # Основной торговый цикл
         iteration_count = 0
@@ -640,10 +517,18 @@ def run_trading_with_risk_management(
         
         while not shutdown_event.is_set():
             try:
+                # Ожидание закрытия баров; не реже раза в 30 секунд для обновления позиций
+                closed_timeframes = bar_scheduler.wait_for_bars(shutdown_event, max_wait=30)
+                if shutdown_event.is_set():
+                    break
+
                 iteration_count += 1
                 current_time = datetime.now()
                 
-                main_logger.info(f"🔄 Итерация #{iteration_count} - {current_time.strftime('%H:%M:%S')}")
+                main_logger.info(
+                    f"🔄 Итерация #{iteration_count} - {current_time.strftime('%H:%M:%S')}"
+                    f" (закрытые бары: {', '.join(sorted(closed_timeframes)) or 'нет'})"
+                )
                 
                 # Проверяем состояние API подключения
                 connection_manager = get_enhanced_connection_manager()
@@ -768,39 +653,14 @@ def run_trading_with_risk_management(
                 
                 main_logger.info(f"✅ Активных стратегий: {len(active_strategies)}")
 
-                # Получаем рыночные данные с кэшированием
-                first_api = strategy_apis[active_strategies[0]]
-                market_data_key = f"market_data_{current_time.minute // 2}"  # Кэш на 2 минуты
-
-                all_market_data = market_data_cache.get(market_data_key)
-                if all_market_data is None:
-                    all_market_data = {}
-                    timeframes = {
-                        '1m': "1",
-                        '5m': "5",
-                        '15m': "15",
-                        '1h': "60"
-                    }
-
-                    for tf_name, tf_value in timeframes.items():
-                        try:
-                            df = first_api.get_ohlcv(interval=tf_value, limit=200)
-                            if df is not None and not df.empty:
-                                # Конвертируем строки в числа
-                                for col in ['open', 'high', 'low', 'close', 'volume']:
-                                    if col in df.columns:
-                                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                                all_market_data[tf_name] = df
-                            else:
-                                main_logger.warning(f"⚠️ Пустые данные для {tf_name}")
-                        except Exception as e:
-                            main_logger.error(f"❌ Ошибка получения данных {tf_name}: {e}")
-
-                    # Сохраняем в кэш только если получили данные
+                # Рыночные данные: свечи обновляются инкрементально (или приходят из WebSocket),
+                # поэтому запрос на каждой итерации дешев и не отдает устаревший бар
+                all_market_data = market_data_service.get_all_timeframes_data(market_api, limit=200)
+                if all_market_data:
+                    market_data_cache.put('market_data', all_market_data)
+                else:
+                    all_market_data = market_data_cache.get('market_data')
                     if all_market_data:
-                        market_data_cache.put(market_data_key, all_market_data)
-                        main_logger.debug("📊 Рыночные данные обновлены и закэшированы")
-                    else:
                         main_logger.debug("📊 Используем закэшированные рыночные данные")
                 
                 if not all_market_data:
@@ -823,53 +683,59 @@ def run_trading_with_risk_management(
                         risk_manager, strategy_name, SYMBOL, current_price, current_balance
                     )
 
-                # Собираем сигналы от всех стратегий
+                # Собираем сигналы только от стратегий, чьи таймфреймы получили новый бар
                 strategy_signals = {}
-                main_logger.info(f"🔍 Сбор сигналов от {len(active_strategies)} стратегий")
+                due_strategies = bar_scheduler.due_strategies(closed_timeframes, active_strategies)
+                main_logger.info(f"🔍 Сбор сигналов от {len(due_strategies)} из {len(active_strategies)} стратегий")
                 
-                for strategy_name in active_strategies:
-                    if shutdown_event.is_set():
-                        break
+                # Индикаторы считаются один раз за цикл и разделяются между стратегиями;
+                # SMA/EMA/RSI/ATR/VWAP/Bollinger обновляются инкрементально по новым барам
+                snapshot = MarketSnapshot(all_market_data, symbol=SYMBOL)
+                with use_snapshot(snapshot):
+                    for strategy_name in due_strategies:
+                        if shutdown_event.is_set():
+                            break
 
-                    api = strategy_apis[strategy_name]
-                    state = strategy_states[strategy_name]
-                    logger = strategy_loggers[strategy_name]
+                        api = strategy_apis[strategy_name]
+                        state = strategy_states[strategy_name]
+                        logger = strategy_loggers[strategy_name]
 
-                    try:
-                        # Используем СУЩЕСТВУЮЩИЙ экземпляр стратегии (не создаем новый!)
-                        strategy = strategy_instances.get(strategy_name)
-                        if strategy is None:
-                            logger.error(f"❌ Экземпляр стратегии {strategy_name} не найден")
-                            continue
+                        try:
+                            # Используем СУЩЕСТВУЮЩИЙ экземпляр стратегии (не создаем новый!)
+                            strategy = strategy_instances.get(strategy_name)
+                            if strategy is None:
+                                logger.error(f"❌ Экземпляр стратегии {strategy_name} не найден")
+                                continue
 
-                        # Проверяем, это стратегия v2.0 или старая
-                        if hasattr(strategy, '__class__') and hasattr(strategy.__class__, '__bases__'):
-                            base_classes = [cls.__name__ for cls in strategy.__class__.__bases__]
-                            if 'BaseStrategy' in base_classes:
-                                # Новая стратегия v2.0 - используем новую сигнатуру
-                                signal = strategy.execute(all_market_data)
+                            # Проверяем, это стратегия v2.0 или старая
+                            if hasattr(strategy, '__class__') and hasattr(strategy.__class__, '__bases__'):
+                                base_classes = [cls.__name__ for cls in strategy.__class__.__bases__]
+                                if 'BaseStrategy' in base_classes:
+                                    # Новая стратегия v2.0 - используем новую сигнатуру
+                                    signal = strategy.execute(all_market_data)
+                                else:
+                                    # Старая стратегия - используем старую сигнатуру
+                                    signal = strategy.execute(all_market_data, state, api)
                             else:
-                                # Старая стратегия - используем старую сигнатуру
+                                # Fallback на старую сигнатуру
                                 signal = strategy.execute(all_market_data, state, api)
-                        else:
-                            # Fallback на старую сигнатуру
-                            signal = strategy.execute(all_market_data, state, api)
                         
-                        if signal:
-                            logger.info(f"📊 Сигнал: {signal.get('signal')} по цене {signal.get('entry_price')}")
-                            strategy_signals[strategy_name] = signal
+                            if signal:
+                                logger.info(f"📊 Сигнал: {signal.get('signal')} по цене {signal.get('entry_price')}")
+                                strategy_signals[strategy_name] = signal
                             
-                            # Записываем в журнал
-                            try:
-                                log_trade_journal(strategy_name, signal, all_market_data)
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка записи журнала: {e}")
-                        else:
-                            logger.debug("🔇 Нет сигнала")
+                                # Записываем в журнал
+                                try:
+                                    log_trade_journal(strategy_name, signal, all_market_data)
+                                except Exception as e:
+                                    logger.error(f"❌ Ошибка записи журнала: {e}")
+                            else:
+                                logger.debug("🔇 Нет сигнала")
                         
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка выполнения стратегии {strategy_name}: {e}")
+                        except Exception as e:
+                            logger.error(f"❌ Ошибка выполнения стратегии {strategy_name}: {e}")
                 
+                main_logger.debug(f"📦 Снимок индикаторов: {snapshot.get_stats()}")
                 main_logger.info(f"📈 Получено {len(strategy_signals)} сигналов")
 
                 # 🚨 ПРОВЕРКА EMERGENCY STOP ПЕРЕД ОБРАБОТКОЙ СИГНАЛОВ
@@ -877,17 +743,19 @@ def run_trading_with_risk_management(
                 if not trading_allowed:
                     main_logger.critical(f"🚨 ТОРГОВЛЯ ЗАБЛОКИРОВАНА: {stop_reason}")
                     # Пропускаем обработку сигналов
-                    time_module.sleep(60)  # Ждем минуту перед следующей проверкой
+                    shutdown_event.wait(60)  # Ждем минуту перед следующей проверкой
                     continue
 
                 # 🔌 ПРОВЕРКА CIRCUIT BREAKER
                 circuit_ok, circuit_reason = global_circuit_breaker.can_execute_request()
                 if not circuit_ok:
                     main_logger.warning(f"🔌 CIRCUIT BREAKER: {circuit_reason}")
-                    time_module.sleep(30)  # Ждем 30 секунд перед повтором
+                    shutdown_event.wait(30)  # Ждем 30 секунд перед повтором
                     continue
                 
                 # ВЫПОЛНЕНИЕ ТОРГОВЫХ ОПЕРАЦИЙ С РИСК-МЕНЕДЖМЕНТОМ
+                # Сначала проверки и ордера всех стратегий, затем одна отправка цикла
+                cycle_orders = []
                 for strategy_name, signal in strategy_signals.items():
                     if shutdown_event.is_set():
                         break
@@ -945,8 +813,6 @@ def run_trading_with_risk_management(
                                 logger.info(f"⏸️ Уже в позиции {state.position_side}, пропускаем")
                                 continue
 
-                            # trade_amount_usd уже получен из config выше (строка 918)
-
                             side = signal_type
                             entry_price = signal.get('entry_price', current_price)
                             stop_loss = signal.get('stop_loss')
@@ -975,11 +841,12 @@ def run_trading_with_risk_management(
 
                             logger.info(f"🎯 Создаем {order_type} ордер на {btc_quantity} BTC по цене ${entry_price}")
 
-                            # 🛡️ БЕЗОПАСНОЕ СОЗДАНИЕ ОРДЕРА ЧЕРЕЗ OrderManager
-                            try:
-                                order_manager = get_order_manager()
-
-                                order_request = OrderRequest(
+                            cycle_orders.append({
+                                'strategy_name': strategy_name,
+                                'signal': signal,
+                                'side': side,
+                                'entry_price': entry_price,
+                                'request': OrderRequest(
                                     symbol=SYMBOL,
                                     side=api_side,
                                     order_type=order_type,
@@ -988,24 +855,82 @@ def run_trading_with_risk_management(
                                     stop_loss=stop_loss,
                                     take_profit=take_profit,
                                     strategy_name=strategy_name
-                                )
-                                
-                                order_response = order_manager.create_order_safe(api, order_request)
-                                
-                            except (OrderRejectionError, RateLimitError, EmergencyStopError) as e:
-                                logger.error(f"🚫 Ордер заблокирован системой безопасности: {e}")
+                                ),
+                            })
+                        
+                        # ОБРАБОТКА СИГНАЛОВ ВЫХОДА
+                        elif signal_type in ['EXIT_LONG', 'EXIT_SHORT']:
+                            if not state.in_position:
+                                logger.info("❌ Нет открытой позиции для закрытия")
+                                continue
+                            
+                            # Проверяем соответствие сигнала позиции
+                            if ((signal_type == 'EXIT_LONG' and state.position_side != 'BUY') or
+                                (signal_type == 'EXIT_SHORT' and state.position_side != 'SELL')):
+                                logger.warning(f"⚠️ Неправильный сигнал выхода {signal_type} для позиции {state.position_side}")
+                                continue
+                            
+                            # Определяем сторону закрытия (конвертируем в формат API)
+                            close_side = 'SELL' if state.position_side == 'BUY' else 'BUY'
+                            api_close_side = 'Sell' if close_side == 'SELL' else 'Buy'
+                            
+                            logger.info(f"🔚 Закрываем позицию {state.position_side} сигналом {signal_type}")
+                            
+                            cycle_orders.append({
+                                'strategy_name': strategy_name,
+                                'signal': signal,
+                                'request': OrderRequest(
+                                    symbol=SYMBOL,
+                                    side=api_close_side,
+                                    order_type="Market",
+                                    qty=state.position_size,
+                                    reduce_only=True,
+                                    strategy_name=strategy_name
+                                ),
+                            })
+                        
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка обработки сигнала {signal_type}: {e}")
+
+                # 🛡️ БЕЗОПАСНОЕ СОЗДАНИЕ ОРДЕРОВ ЧЕРЕЗ OrderManager: ордера цикла уходят вместе
+                try:
+                    cycle_results = submit_cycle_orders(get_order_manager(), cycle_orders, strategy_apis)
+                except Exception as e:
+                    main_logger.error(f"❌ Ошибка отправки ордеров цикла: {e}")
+                    cycle_results = []
+
+                for order, response in cycle_results:
+                    strategy_name = order['strategy_name']
+                    signal = order['signal']
+                    signal_type = signal['signal']
+                    request = order['request']
+                    api = strategy_apis[strategy_name]
+                    state = strategy_states[strategy_name]
+                    logger = strategy_loggers[strategy_name]
+
+                    try:
+                        # ОТКРЫТИЕ ПОЗИЦИИ
+                        if signal_type in ['BUY', 'SELL']:
+                            side = order['side']
+                            api_side = request.side
+                            entry_price = order['entry_price']
+                            stop_loss = request.stop_loss
+                            take_profit = request.take_profit
+                            btc_quantity = request.qty
+
+                            if isinstance(response, (OrderRejectionError, RateLimitError, EmergencyStopError)):
+                                logger.error(f"🚫 Ордер заблокирован системой безопасности: {response}")
                                 continue  # Пропускаем эту итерацию стратегии
-                                
-                            except Exception as e:
+                            if isinstance(response, Exception):
                                 # 🛡️ ЦЕНТРАЛИЗОВАННАЯ ОБРАБОТКА ОШИБОК
                                 context = ErrorContext(
                                     strategy_name=strategy_name,
                                     symbol=SYMBOL,
                                     operation="create_order"
                                 )
-                                handle_trading_error(e, context, RecoveryStrategy.SKIP_ITERATION)
+                                handle_trading_error(response, context, RecoveryStrategy.SKIP_ITERATION)
                                 continue
-                            
+                            order_response = response
                             if order_response and order_response.get('retCode') == 0:
                                 # 🛡️ БЕЗОПАСНОЕ ОБНОВЛЕНИЕ СОСТОЯНИЯ через ThreadSafeBotState
                                 bot_state = get_bot_state()
@@ -1027,7 +952,7 @@ def run_trading_with_risk_management(
                                 state.position_size = btc_quantity  # ✅ BTC количество
                                 
                                 # Устанавливаем стопы отдельно, если они не были установлены с ордером
-                                if stop_loss or take_profit:
+                                if (stop_loss or take_profit) and not order_response.get('stops_attached'):
                                     try:
                                         # Ждем немного, чтобы позиция точно открылась
                                         import time
@@ -1091,52 +1016,21 @@ def run_trading_with_risk_management(
                                 logger.error(f"❌ Ошибка создания ордера: {error_msg}")
                                 main_logger.error(f"Стратегия {strategy_name}: ошибка ордера - {error_msg}")
                         
-                        # ОБРАБОТКА СИГНАЛОВ ВЫХОДА
+                        # ЗАКРЫТИЕ ПОЗИЦИИ
                         elif signal_type in ['EXIT_LONG', 'EXIT_SHORT']:
-                            if not state.in_position:
-                                logger.info("❌ Нет открытой позиции для закрытия")
+                            if isinstance(response, (OrderRejectionError, RateLimitError, EmergencyStopError)):
+                                logger.error(f"🚫 Закрытие позиции заблокировано: {response}")
                                 continue
-                            
-                            # Проверяем соответствие сигнала позиции
-                            if ((signal_type == 'EXIT_LONG' and state.position_side != 'BUY') or
-                                (signal_type == 'EXIT_SHORT' and state.position_side != 'SELL')):
-                                logger.warning(f"⚠️ Неправильный сигнал выхода {signal_type} для позиции {state.position_side}")
-                                continue
-                            
-                            # Определяем сторону закрытия (конвертируем в формат API)
-                            close_side = 'SELL' if state.position_side == 'BUY' else 'BUY'
-                            api_close_side = 'Sell' if close_side == 'SELL' else 'Buy'
-                            
-                            logger.info(f"🔚 Закрываем позицию {state.position_side} сигналом {signal_type}")
-                            
-                            # 🛡️ БЕЗОПАСНОЕ ЗАКРЫТИЕ ПОЗИЦИИ ЧЕРЕЗ OrderManager
-                            try:
-                                order_manager = get_order_manager()
-                                
-                                close_request = OrderRequest(
-                                    symbol=SYMBOL,
-                                    side=api_close_side,
-                                    order_type="Market",
-                                    qty=state.position_size,
-                                    reduce_only=True,
-                                    strategy_name=strategy_name
-                                )
-                                
-                                close_response = order_manager.create_order_safe(api, close_request)
-                                
-                            except (OrderRejectionError, RateLimitError, EmergencyStopError) as e:
-                                logger.error(f"🚫 Закрытие позиции заблокировано: {e}")
-                                continue
-                                
-                            except Exception as e:
+                            if isinstance(response, Exception):
                                 # 🛡️ ЦЕНТРАЛИЗОВАННАЯ ОБРАБОТКА ОШИБОК 
                                 context = ErrorContext(
                                     strategy_name=strategy_name,
                                     symbol=SYMBOL, 
                                     operation="close_position"
                                 )
-                                handle_trading_error(e, context, RecoveryStrategy.SKIP_ITERATION)
+                                handle_trading_error(response, context, RecoveryStrategy.SKIP_ITERATION)
                                 continue
+                            close_response = response
                             
                             if close_response and close_response.get('retCode') == 0:
                                 # Вычисляем P&L
@@ -1180,7 +1074,7 @@ def run_trading_with_risk_management(
                     try:
                         # Получаем рекомендацию от нейронки
                         neural_recommendation = neural_integration.make_neural_recommendation(
-                            all_market_data, strategy_signals
+                            all_market_data, strategy_signals, symbol=SYMBOL
                         )
                         
                         if neural_recommendation:
@@ -1188,7 +1082,7 @@ def run_trading_with_risk_management(
                                            f"(уверенность: {neural_recommendation['confidence']:.3f})")
                             
                             # Размещаем ставку
-                            neural_bet = neural_integration.place_neural_bet(all_market_data, strategy_signals)
+                            neural_bet = neural_integration.place_neural_bet(all_market_data, strategy_signals, symbol=SYMBOL)
                             if neural_bet:
                                 main_logger.info(f"🎲 Нейронная ставка: {neural_bet['bet_id']}")
                         
@@ -1210,9 +1104,7 @@ def run_trading_with_risk_management(
                     gc.collect()
                     main_logger.info(f"🗂️ Очистка памяти выполнена (итерация #{iteration_count})")
 
-                # Пауза между итерациями
-                main_logger.debug("⏳ Пауза 30 секунд...")
-                shutdown_event.wait(30)
+                main_logger.debug(f"⏱️ Планировщик: {bar_scheduler.get_stats()}")
                 
             except KeyboardInterrupt:
                 main_logger.info("⏹️ Получен сигнал остановки")
@@ -1225,6 +1117,11 @@ def run_trading_with_risk_management(
         main_logger.error(f"💥 Фатальная ошибка инициализации торгового цикла: {e}", exc_info=True)
     
     finally:
+        if market_stream is not None:
+            market_stream.stop()
+        # Дописываем очередь журнала сделок до выхода из цикла
+        if not get_trade_journal().flush(timeout=10.0):
+            main_logger.warning("⚠️ Журнал сделок дописан не полностью")
         main_logger.info("🛑 Торговый цикл завершен")
 
 # Экспортируем функцию для обратной совместимости
@@ -26,6 +26,7 @@ from bot.services.strategy_execution_service import get_strategy_service
 # Импорты безопасности
 from bot.core.secure_logger import get_secure_logger
 from bot.core.thread_safe_state import get_bot_state
+from bot.core.bar_scheduler import BarCloseScheduler, get_strategy_timeframes
 
 
 class TradingOrchestrator:
@@ -58,6 +59,9 @@ class TradingOrchestrator:
         self.strategy_apis = {}
         self.strategy_states = {}
         self.strategy_loggers = {}
+
+        # Стратегии выполняются на закрытии баров своих таймфреймов
+        self.bar_scheduler = BarCloseScheduler(self.market_service.timeframes)
         
         self.logger.info("🎼 Торговый оркестратор инициализирован")
     
@@ -122,6 +126,7 @@ class TradingOrchestrator:
             
             # Инициализируем состояние
             self.strategy_states[strategy_name] = BotState()
+            self.bar_scheduler.register(strategy_name, get_strategy_timeframes(config))
             
             self.logger.info(f"✅ Стратегия {strategy_name} инициализирована")
             return True
@@ -144,6 +149,11 @@ class TradingOrchestrator:
         
         while not shutdown_event.is_set():
             try:
+                # Ожидание закрытия баров; не реже раза в 10 секунд для служебных задач
+                closed_timeframes = self.bar_scheduler.wait_for_bars(shutdown_event, max_wait=10)
+                if shutdown_event.is_set():
+                    break
+
                 iteration_count += 1
                 current_time = datetime.now()
                 
@@ -159,6 +169,10 @@ class TradingOrchestrator:
                 if self._should_sync_positions(current_time, last_sync_time):
                     self._sync_all_positions()
                     last_sync_time = current_time
+
+                # Новых закрытых баров нет - данные стратегий не изменились
+                if not closed_timeframes:
+                    continue
                 
                 # Получаем активные стратегии
                 active_strategies = self._get_active_strategies()
@@ -166,6 +180,11 @@ class TradingOrchestrator:
                     self.logger.warning("⚠️ Нет активных стратегий")
                     shutdown_event.wait(60)
                     continue
+
+                # Стратегии, чьи таймфреймы не получили новый бар, пропускают итерацию
+                active_strategies = self.bar_scheduler.due_strategies(closed_timeframes, active_strategies)
+                if not active_strategies:
+                    continue
                 
                 # Получаем рыночные данные
                 market_data = self._get_market_data(active_strategies[0])
@@ -184,9 +203,6 @@ class TradingOrchestrator:
                 if self.neural_integration and strategy_signals:
                     self._process_neural_recommendations(market_data, strategy_signals)
                 
-                # Пауза между итерациями
-                shutdown_event.wait(10)
-                
             except Exception as e:
                 self.logger.error(f"❌ Ошибка в торговом цикле: {e}")
                 shutdown_event.wait(30)
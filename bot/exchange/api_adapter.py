@@ -50,6 +50,10 @@ class APIAdapter:
         return self.api.create_order(symbol, side, order_type, qty, price, 
                                    stop_loss, take_profit, reduce_only, position_idx)
     
+    def create_batch_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Создание пакета ордеров со стопами"""
+        return self.api.create_batch_orders(orders)
+    
     def set_trading_stop(self, symbol: str, stop_loss: Optional[float] = None, 
                          take_profit: Optional[float] = None, 
                          sl_trigger_by: str = "MarkPrice", 
@@ -14,6 +14,123 @@ import csv
 from pybit.unified_trading import HTTP
 from config import BYBIT_API_KEY, BYBIT_API_SECRET, BYBIT_API_URL
 
+# Типы запросов rate limiter для методов API (определяют лимиты и приоритет ожидания)
+RATE_LIMIT_REQUEST_TYPES = {
+    "create_order": "order_create",
+    "create_batch_orders": "order_create",
+    "set_trading_stop": "trading_stop",
+    "cancel_all_orders": "order_cancel",
+    "amend_batch_orders": "order_create",
+    "get_positions": "position_query",
+    "get_open_orders": "position_query",
+    "get_wallet_balance": "balance_query",
+    "get_kline": "market_data",
+    "get_instruments_info": "market_data",
+}
+
+# Максимальное ожидание разрешения rate limiter (сек)
+RATE_LIMIT_WAIT_TIMEOUT = 5.0
+
+# Окно свежести объединенных запросов чтения (сек): одинаковые запросы баланса,
+# позиций и ордеров из разных потоков в этом окне используют один ответ биржи
+COALESCE_WINDOW = 1.0
+
+# Максимум ордеров в одном запросе /v5/order/create-batch
+MAX_BATCH_ORDERS = 10
+
+# Ключи кэша connection manager с состоянием аккаунта: сбрасываются после ордеров
+ACCOUNT_CACHE_KEYS = ("wallet_balance", "positions_", "open_orders_")
+
+
+def split_batch_response(response: Optional[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    Ответы отдельных ордеров из ответа пакетного запроса
+
+    Bybit возвращает результаты в result.list, а статусы - в retExtInfo.list
+    (в порядке запроса). Ошибка всего запроса повторяется для каждого ордера.
+    """
+    if not response or response.get('retCode') != 0:
+        failed = response or {"retCode": -1, "retMsg": "No response"}
+        return [dict(failed) for _ in range(count)]
+
+    results = (response.get('result') or {}).get('list') or []
+    statuses = (response.get('retExtInfo') or {}).get('list') or []
+    responses = []
+    for index in range(count):
+        status = statuses[index] if index < len(statuses) else {}
+        code = status.get('code', 0 if index < len(results) else -1)
+        responses.append({
+            "retCode": code,
+            "retMsg": status.get('msg', "OK" if code == 0 else "No result for batch item"),
+            "result": results[index] if index < len(results) else {},
+        })
+    return responses
+
+
+def format_balance_v5(balance_data: Dict[str, Any], logger: Optional[logging.Logger] = None) -> str:
+    """
+    Баланс кошелька (ответ get_wallet_balance_v5) в виде текста
+
+    Общая функция синхронного и асинхронного клиентов.
+    """
+    if not balance_data or balance_data.get('retCode') != 0:
+        return "Ошибка получения баланса"
+
+    try:
+        # Безопасная конвертация значений
+        def safe_float_format(value, decimals=4):
+            try:
+                if value == '' or value is None:
+                    return "0.0000"
+                return f"{float(value):.{decimals}f}"
+            except (ValueError, TypeError):
+                return "0.0000"
+
+        result = balance_data['result']['list'][0]
+        coins = "\n".join(
+            f"{coin['coin']}: {safe_float_format(coin.get('walletBalance', 0))} (${safe_float_format(coin.get('usdValue', 0), 2)})"
+            for coin in result.get('coin', [])
+        )
+
+        total_equity = safe_float_format(result.get('totalEquity', 0), 2)
+        total_available = safe_float_format(result.get('totalAvailableBalance', 0), 2)
+
+        return f"""Общий баланс: ${total_equity}
+Доступно: ${total_available}
+Монеты:
+{coins}"""
+    except Exception as e:
+        (logger or logging.getLogger('bybit_api_v5')).error(f"Ошибка форматирования баланса: {e}")
+        return "Ошибка форматирования баланса"
+
+
+def _next_month_close(now: float) -> float:
+    current = datetime.fromtimestamp(now, tz=timezone.utc)
+    year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+    return datetime(year, month, 1, tzinfo=timezone.utc).timestamp() + 1.0
+
+
+def _kline_cache_policy(interval: str):
+    """Политика кэша истории свечей: закрытые бары не меняются до закрытия текущего"""
+    from bot.core.enhanced_api_connection import CachePolicy, bar_close_policy
+    from bot.exchange.kline_store import INTERVAL_MS
+
+    if interval == "M":
+        return CachePolicy(fresh_until=_next_month_close, fallback_for=86400.0)
+    if interval not in INTERVAL_MS:
+        return CachePolicy()
+    # Недельные бары Bybit начинаются в понедельник, эпоха - четверг
+    return bar_close_policy(INTERVAL_MS[interval] / 1000,
+                            offset_seconds=4 * 86400 if interval == "W" else 0.0)
+
+
+def _forming_bar_cache_policy(interval: str):
+    """Политика кэша формирующегося бара: короткая свежесть, а не до закрытия"""
+    from bot.core.enhanced_api_connection import forming_bar_policy
+    from bot.exchange.kline_store import INTERVAL_MS
+
+    return forming_bar_policy(INTERVAL_MS.get(interval, 86_400_000) / 1000)
+
 
 class BybitAPIV5:
     """
@@ -26,7 +143,8 @@ class BybitAPIV5:
     - Поддержка всех новых функций v5
     """
     
-    def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False):
+    def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False,
+                 coalesce_window: float = COALESCE_WINDOW):
         """
         Инициализация Bybit API v5
 
@@ -34,6 +152,8 @@ class BybitAPIV5:
             api_key: API ключ (если None, используется из config)
             api_secret: API секрет (если None, используется из config)
             testnet: Использовать тестовую сеть
+            coalesce_window: Окно свежести объединенных запросов чтения (0 - объединять
+                только одновременные запросы)
         """
         # Используем переданные ключи или дефолтные из config
         self.api_key = api_key or BYBIT_API_KEY
@@ -59,7 +179,9 @@ class BybitAPIV5:
             self.session = HTTP(
                 api_key=self.api_key,
                 api_secret=self.api_secret,
-                testnet=self.testnet  # Используем централизованную настройку
+                testnet=self.testnet,  # Используем централизованную настройку
+                # Заголовки X-Bapi-Limit-* нужны rate limiter для учета квоты биржи
+                return_response_headers=True
             )
         finally:
             # Восстанавливаем прокси настройки
@@ -72,11 +194,28 @@ class BybitAPIV5:
             # Обязательно устанавливаем правильный базовый URL для demo сервера
             self.session.BASE_URL = self.base_url
 
+        # Общий пул keep-alive соединений для всех клиентов с тем же endpoint:
+        # подпись остается на сессии pybit (свои ключи), соединения - общие
+        from bot.exchange.http_pool import attach_shared_transport
+        attach_shared_transport(self.session, self.base_url, self.testnet)
+
         # Настройка защищённого логирования (ленивая инициализация)
         self._logger = None
 
         # Rate limiter будет инициализирован при первом использовании
         self._rate_limiter = None
+        # Лимиты биржи действуют на аккаунт: клиент rate limiter - отпечаток ключа
+        import hashlib
+        self._rate_limit_client = f"bybit_{hashlib.sha256((self.api_key or '').encode()).hexdigest()[:8]}"
+
+        # Объединение одинаковых запросов чтения: группа общая для всех экземпляров аккаунта
+        from bot.core.single_flight import get_single_flight
+        self.coalesce_window = coalesce_window
+        self._single_flight = get_single_flight(f"{self._rate_limit_client}@{self.base_url}")
+
+        # Хранилище свечей для инкрементальной загрузки OHLCV
+        from bot.exchange.kline_store import KlineStore
+        self.kline_store = KlineStore()
 
         # 🔄 Enhanced Connection Manager с heartbeat мониторингом
         self._connection_manager = None
@@ -86,7 +225,8 @@ class BybitAPIV5:
         self.connection_manager = setup_enhanced_connection_manager(
             self.session,
             base_url=self.base_url,
-            backup_endpoints=None  # Используем только основной endpoint из конфигурации
+            backup_endpoints=None,  # Используем только основной endpoint из конфигурации
+            client_id=self._rate_limit_client
         )
 
         # Логируем инициализацию через стандартный logger
@@ -116,28 +256,111 @@ class BybitAPIV5:
                 # Fallback: создаем заглушку если rate_limiter недоступен
                 class MockRateLimiter:
                     def can_make_request(self, endpoint): return True
+                    def acquire(self, *args, **kwargs): return True
+                    def update_from_headers(self, *args, **kwargs): return None
                 self._rate_limiter = MockRateLimiter()
         return self._rate_limiter
 
+    def _acquire_permit(self, endpoint: str, timeout: float = RATE_LIMIT_WAIT_TIMEOUT) -> bool:
+        """
+        Ожидание разрешения rate limiter на вызов метода API
+
+        Вместо немедленного отказа вызов ждет освобождения лимита (не дольше
+        timeout); ордера обслуживаются раньше запросов рыночных данных.
+        Защитные стопы ждут без ограничения времени (см. acquire_protective).
+
+        Returns:
+            False, если разрешение не получено (лимит, emergency stop, блокировка)
+        """
+        request_type = RATE_LIMIT_REQUEST_TYPES.get(endpoint, "market_data")
+        try:
+            from bot.core.rate_limiter import PROTECTIVE_REQUEST_TYPES, acquire_protective
+            if request_type in PROTECTIVE_REQUEST_TYPES:
+                return acquire_protective(self.rate_limiter, request_type, self._rate_limit_client,
+                                          endpoint=endpoint, log=self.logger)
+        except ImportError:
+            pass
+        try:
+            return bool(self.rate_limiter.acquire(
+                request_type, client_id=self._rate_limit_client, timeout=timeout, endpoint=endpoint
+            ))
+        except Exception as e:
+            self.logger.warning(f"⏳ Rate limit {endpoint}: {e}")
+            return False
+
+    def _rate_limit_observer(self, endpoint: str) -> Callable[[Any], None]:
+        """Передача заголовков квоты из ответа биржи в rate limiter"""
+        def observe(headers: Any) -> None:
+            self.rate_limiter.update_from_headers(endpoint, headers, client_id=self._rate_limit_client)
+        return observe
+
     def _call_api(self, operation_name: str, func: Callable[[], Dict[str, Any]],
-                  *, cache_key: Optional[str] = None) -> Dict[str, Any]:
+                  *, cache_key: Optional[str] = None, rate_limited: bool = False) -> Dict[str, Any]:
+        """
+        Вызов API через connection manager
+
+        rate_limited - разрешение rate limiter запрашивается только если ответ
+        не отдан из кэша (в том числе при фоновом обновлении кэша).
+        """
+        acquire_permit = (lambda: self._acquire_permit(operation_name)) if rate_limited else None
         if self.connection_manager:
             try:
                 return self.connection_manager.execute_with_fallback(
                     operation=func,
                     operation_name=operation_name,
-                    cache_key=cache_key
+                    cache_key=cache_key,
+                    on_response_headers=self._rate_limit_observer(operation_name),
+                    client_id=self._rate_limit_client,
+                    acquire_permit=acquire_permit
                 )
             except Exception as exc:
                 self.logger.error(f"❌ {operation_name}: {exc}")
                 return {"retCode": -1, "retMsg": str(exc)}
 
+        if acquire_permit is not None and not acquire_permit():
+            return {"retCode": -1001, "retMsg": f"Rate limit exceeded for {operation_name}"}
         try:
-            return func()
+            from bot.core.enhanced_api_connection import unwrap_response
+            response, headers = unwrap_response(func())
+            if headers:
+                self._rate_limit_observer(operation_name)(headers)
+            return response
         except Exception as exc:
             self.logger.error(f"❌ {operation_name}: {exc}")
             return {"retCode": -1, "retMsg": str(exc)}
 
+    def _call_read_api(self, operation_name: str, params: Dict[str, Any],
+                       func: Callable[[], Dict[str, Any]], *, cache_key: Optional[str] = None,
+                       rate_limited: bool = True) -> Dict[str, Any]:
+        """
+        Запрос чтения с объединением одинаковых одновременных вызовов
+
+        Вызовы с той же операцией и параметрами, пришедшие во время выполнения
+        запроса или в окне coalesce_window после успешного ответа, получают его
+        копию без обращения к бирже и без расхода лимитов. Дальше ответ отдается
+        из кэша connection manager по политике операции (CACHE_POLICIES).
+        """
+        def fetch() -> Dict[str, Any]:
+            # 🛡️ RATE LIMITING: разрешение только для реально выполняемого запроса
+            return self._call_api(operation_name, func, cache_key=cache_key, rate_limited=rate_limited)
+
+        key = (operation_name, tuple(sorted(params.items())))
+        return self._single_flight.do(
+            key, fetch, ttl=self.coalesce_window,
+            cacheable=lambda response: isinstance(response, dict) and response.get('retCode') == 0
+        )
+
+    def _invalidate_reads(self) -> None:
+        """Сброс свежих ответов чтения после изменения позиций и ордеров"""
+        self._single_flight.invalidate()
+        if self.connection_manager:
+            for key in ACCOUNT_CACHE_KEYS:
+                self.connection_manager.invalidate_cache(f"{self._rate_limit_client}:{key}")
+
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Метрики объединения запросов чтения аккаунта"""
+        return self._single_flight.get_stats()
+
     def get_wallet_balance_v5(self) -> Dict[str, Any]:
         """
         Получение баланса кошелька (v5 API)
@@ -146,13 +369,11 @@ class BybitAPIV5:
             Dict с информацией о балансе
         """
         try:
-            # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("get_wallet_balance"):
-                return {"retCode": -1001, "retMsg": "Rate limit exceeded for get_wallet_balance"}
-            
-            response = self._call_api(
+            params = {"accountType": "UNIFIED"}
+            response = self._call_read_api(
                 "get_wallet_balance",
-                lambda: self.session.get_wallet_balance(accountType="UNIFIED"),
+                params,
+                lambda: self.session.get_wallet_balance(**params),
                 cache_key="wallet_balance"
             )
             self.logger.safe_log_api_response(
@@ -168,43 +389,15 @@ class BybitAPIV5:
     def format_balance_v5(self, balance_data: Dict[str, Any]) -> str:
         """
         Форматирование баланса для отображения
-        
+
         Args:
             balance_data: Данные баланса от API
-            
+
         Returns:
             Отформатированная строка с балансом
         """
-        if not balance_data or balance_data.get('retCode') != 0:
-            return "Ошибка получения баланса"
-        
-        try:
-            # Безопасная конвертация значений
-            def safe_float_format(value, decimals=4):
-                try:
-                    if value == '' or value is None:
-                        return "0.0000"
-                    return f"{float(value):.{decimals}f}"
-                except (ValueError, TypeError):
-                    return "0.0000"
-
-            result = balance_data['result']['list'][0]
-            coins = "\n".join(
-                f"{coin['coin']}: {safe_float_format(coin.get('walletBalance', 0))} (${safe_float_format(coin.get('usdValue', 0), 2)})"
-                for coin in result.get('coin', [])
-            )
+        return format_balance_v5(balance_data, self.logger)
 
-            total_equity = safe_float_format(result.get('totalEquity', 0), 2)
-            total_available = safe_float_format(result.get('totalAvailableBalance', 0), 2)
-
-            return f"""Общий баланс: ${total_equity}
-Доступно: ${total_available}
-Монеты:
-{coins}"""
-        except Exception as e:
-            self.logger.error(f"Ошибка форматирования баланса: {e}")
-            return "Ошибка форматирования баланса"
-    
     def create_order(self, symbol: str, side: str, order_type: str, qty: float, 
                     price: Optional[float] = None, stop_loss: Optional[float] = None, 
                     take_profit: Optional[float] = None, reduce_only: bool = False, 
@@ -228,33 +421,18 @@ class BybitAPIV5:
         """
         try:
             # 🛡️ RATE LIMITING: Проверка перед критическим API вызовом
-            if not self.rate_limiter.can_make_request("create_order"):
+            if not self._acquire_permit("create_order"):
                 return {"retCode": -1001, "retMsg": "Rate limit exceeded for create_order"}
             # Подготавливаем параметры
             params = {
                 "category": "linear",
-                "symbol": symbol,
-                "side": side,
-                "orderType": order_type,
-                "qty": str(qty),
+                **self._order_params(symbol, side, order_type, qty, price, reduce_only, position_idx),
                 "accountType": "UNIFIED"
             }
-            
-            # Добавляем цену для лимитных ордеров
-            if order_type == "Limit" and price:
-                params["price"] = str(price)
-            
-            # Стопы устанавливаются отдельно через set_trading_stop()
-            # Для рыночных ордеров stopLoss и takeProfit в create_order не поддерживаются
-            
-            # Добавляем reduce_only
-            if reduce_only:
-                params["reduceOnly"] = True
-            
-            # Добавляем position_idx
-            if position_idx is not None:
-                params["positionIdx"] = position_idx
-            
+
+            # Стопы устанавливаются отдельно через set_trading_stop() после открытия позиции:
+            # ответ place_order не подтверждает stopLoss/takeProfit (то же для create_batch_orders)
+
             # Безопасное логирование запроса
             self.logger.safe_log_order_request(symbol, side, order_type, qty, price)
             
@@ -262,6 +440,8 @@ class BybitAPIV5:
                 "create_order",
                 lambda: self.session.place_order(**params)
             )
+            # Позиции, ордера и баланс изменились - объединенные ответы больше не свежие
+            self._invalidate_reads()
 
             # Безопасное логирование ответа
             self.logger.safe_log_api_response(
@@ -276,6 +456,128 @@ class BybitAPIV5:
             self.logger.error(f"❌ Ошибка создания ордера: {e}")
             return {"retCode": -1, "retMsg": str(e)}
     
+    @staticmethod
+    def _order_params(symbol: str, side: str, order_type: str, qty: float,
+                      price: Optional[float] = None, reduce_only: bool = False,
+                      position_idx: Optional[int] = None) -> Dict[str, Any]:
+        """Параметры ордера v5 (без category)"""
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "qty": str(qty),
+        }
+        # Добавляем цену для лимитных ордеров
+        if order_type == "Limit" and price:
+            params["price"] = str(price)
+        # Добавляем reduce_only
+        if reduce_only:
+            params["reduceOnly"] = True
+        # Добавляем position_idx
+        if position_idx is not None:
+            params["positionIdx"] = position_idx
+        return params
+
+    def create_batch_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Создание нескольких ордеров одним запросом (/v5/order/create-batch)
+
+        Стоп-лосс и тейк-профит передаются в том же запросе (tpslMode=Full), но
+        ответ Bybit их не подтверждает: позиция защищается так же, как после
+        create_order - через set_trading_stop (см. order_manager.stops_confirmed).
+
+        Args:
+            orders: Не больше MAX_BATCH_ORDERS ордеров с аргументами create_order
+                (symbol, side, order_type, qty, price, stop_loss, take_profit,
+                reduce_only, position_idx)
+
+        Returns:
+            Ответы по ордерам в порядке orders, в формате ответа create_order;
+            ошибка всего запроса повторяется в ответе каждого ордера
+        """
+        if not orders:
+            return []
+        if len(orders) > MAX_BATCH_ORDERS:
+            raise ValueError(f"Не больше {MAX_BATCH_ORDERS} ордеров в пакете, передано {len(orders)}")
+
+        try:
+            # 🛡️ RATE LIMITING: одно разрешение на весь пакет
+            if not self._acquire_permit("create_batch_orders"):
+                return [{"retCode": -1001, "retMsg": "Rate limit exceeded for create_batch_orders"}
+                        for _ in orders]
+
+            request = []
+            for order in orders:
+                params = self._order_params(
+                    order["symbol"], order["side"], order["order_type"], order["qty"],
+                    order.get("price"), order.get("reduce_only", False), order.get("position_idx")
+                )
+                if order.get("stop_loss") or order.get("take_profit"):
+                    params["tpslMode"] = "Full"
+                if order.get("stop_loss"):
+                    params["stopLoss"] = str(order["stop_loss"])
+                    params["slTriggerBy"] = "MarkPrice"
+                if order.get("take_profit"):
+                    params["takeProfit"] = str(order["take_profit"])
+                    params["tpTriggerBy"] = "MarkPrice"
+                request.append(params)
+                self.logger.safe_log_order_request(
+                    order["symbol"], order["side"], order["order_type"], order["qty"], order.get("price")
+                )
+
+            response = self._call_api(
+                "create_batch_orders",
+                lambda: self.session.place_batch_order(category="linear", request=request)
+            )
+            # Позиции, ордера и баланс изменились - объединенные ответы больше не свежие
+            self._invalidate_reads()
+            self.logger.safe_log_api_response(
+                response,
+                f"Пакет из {len(orders)} ордеров отправлен",
+                "Ошибка создания пакета ордеров"
+            )
+            return split_batch_response(response, len(orders))
+
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка создания пакета ордеров: {e}")
+            return [{"retCode": -1, "retMsg": str(e)} for _ in orders]
+
+    def amend_batch_orders(self, amendments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Изменение нескольких ордеров одним запросом (/v5/order/amend-batch)
+
+        Args:
+            amendments: Не больше MAX_BATCH_ORDERS изменений в формате Bybit v5
+                (symbol, orderId или orderLinkId и изменяемые поля: qty, price,
+                takeProfit, stopLoss, ...)
+
+        Returns:
+            Ответы по ордерам в порядке amendments
+        """
+        if not amendments:
+            return []
+        if len(amendments) > MAX_BATCH_ORDERS:
+            raise ValueError(f"Не больше {MAX_BATCH_ORDERS} ордеров в пакете, передано {len(amendments)}")
+
+        try:
+            if not self._acquire_permit("amend_batch_orders"):
+                return [{"retCode": -1001, "retMsg": "Rate limit exceeded for amend_batch_orders"}
+                        for _ in amendments]
+            request = [
+                {key: str(value) if key in ("qty", "price", "takeProfit", "stopLoss", "triggerPrice") else value
+                 for key, value in amendment.items()}
+                for amendment in amendments
+            ]
+            response = self._call_api(
+                "amend_batch_orders",
+                lambda: self.session.amend_batch_order(category="linear", request=request)
+            )
+            self._invalidate_reads()
+            return split_batch_response(response, len(amendments))
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка изменения пакета ордеров: {e}")
+            return [{"retCode": -1, "retMsg": str(e)} for _ in amendments]
+
     def set_trading_stop(self, symbol: str, stop_loss: Optional[float] = None, 
                          take_profit: Optional[float] = None, 
                          sl_trigger_by: str = "MarkPrice", 
@@ -295,7 +597,7 @@ class BybitAPIV5:
         """
         try:
             # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("set_trading_stop"):
+            if not self._acquire_permit("set_trading_stop"):
                 return {"retCode": -1001, "retMsg": "Rate limit exceeded for set_trading_stop"}
             params = {
                 "category": "linear",
@@ -317,6 +619,8 @@ class BybitAPIV5:
                 "set_trading_stop",
                 lambda: self.session.set_trading_stop(**params)
             )
+            # Позиции, ордера и баланс изменились - объединенные ответы больше не свежие
+            self._invalidate_reads()
             
             self.logger.safe_log_api_response(
                 response,
@@ -341,9 +645,6 @@ class BybitAPIV5:
             Информация о позициях
         """
         try:
-            # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("get_positions"):
-                return {"retCode": -1001, "retMsg": "Rate limit exceeded for get_positions"}
             params = {
                 "category": "linear",
                 "accountType": "UNIFIED"
@@ -352,8 +653,9 @@ class BybitAPIV5:
             if symbol:
                 params["symbol"] = symbol
             
-            response = self._call_api(
+            response = self._call_read_api(
                 "get_positions",
+                params,
                 lambda: self.session.get_positions(**params),
                 cache_key=f"positions_{symbol or 'ALL'}"
             )
@@ -383,11 +685,6 @@ class BybitAPIV5:
             DataFrame с OHLCV данными
         """
         try:
-            # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("get_kline"):
-                self.logger.error("Rate limit exceeded for get_kline")
-                return None
-
             # Конвертируем интервал в формат Bybit
             interval_map = {
                 "1": "1", "3": "3", "5": "5", "15": "15", "30": "30",
@@ -397,6 +694,24 @@ class BybitAPIV5:
 
             bybit_interval = interval_map.get(interval, interval)
 
+            if self.kline_store.supports(bybit_interval, limit):
+                # Свечи поддерживаются WebSocket потоком - отдаем из памяти без API вызова
+                df = self.kline_store.live_tail(symbol, bybit_interval, limit)
+                if df is not None:
+                    return df
+
+                # Инкрементальное обновление: запрашиваем только бары с последнего сохраненного
+                # (разрешение rate limiter берется на каждый запрос к бирже)
+                df = self.kline_store.get(
+                    symbol, bybit_interval, limit,
+                    lambda start, request_limit: self._fetch_kline_rows(symbol, bybit_interval, request_limit, start)
+                )
+                if df is not None:
+                    self.logger.debug(f"✅ OHLCV данные обновлены: {symbol} {interval} ({len(df)} свечей)")
+                else:
+                    self.logger.error(f"❌ Ошибка получения OHLCV: {symbol} {interval}")
+                return df
+
             def _fetch_ohlcv():
                 return self.session.get_kline(
                     category="linear",
@@ -405,18 +720,49 @@ class BybitAPIV5:
                     limit=limit
                 )
 
-            # Используем connection manager с fallback
+            def _fetch_forming_bar():
+                return self.session.get_kline(
+                    category="linear",
+                    symbol=symbol,
+                    interval=bybit_interval,
+                    limit=1
+                )
+
+            # Используем connection manager с fallback: история свежа до закрытия бара,
+            # разрешение rate limiter - только если запрос уходит на биржу
             cache_key = f"ohlcv_{symbol}_{interval}_{limit}"
 
             response = self.connection_manager.execute_with_fallback(
                 operation=_fetch_ohlcv,
                 operation_name=f"get_ohlcv_{symbol}",
-                cache_key=cache_key
+                cache_key=cache_key,
+                on_response_headers=self._rate_limit_observer("get_kline"),
+                client_id=self._rate_limit_client,
+                cache_policy=_kline_cache_policy(bybit_interval),
+                acquire_permit=lambda: self._acquire_permit("get_kline")
             )
+            if response and response.get('retCode') == -1001:
+                self.logger.error("Rate limit exceeded for get_kline")
+                return None
 
             if response and response.get('retCode') == 0:
-                # Конвертируем в DataFrame
+                # Формирующийся бар в кэшированной истории застыл на момент запроса -
+                # обновляем его запросом limit=1 с короткой свежестью
+                from bot.exchange.kline_store import merge_forming_bar
                 data = response['result']['list']
+                forming = self.connection_manager.execute_with_fallback(
+                    operation=_fetch_forming_bar,
+                    operation_name=f"get_ohlcv_{symbol}",
+                    cache_key=f"ohlcv_{symbol}_{interval}_forming",
+                    on_response_headers=self._rate_limit_observer("get_kline"),
+                    client_id=self._rate_limit_client,
+                    cache_policy=_forming_bar_cache_policy(bybit_interval),
+                    acquire_permit=lambda: self._acquire_permit("get_kline")
+                )
+                if forming and forming.get('retCode') == 0:
+                    data = merge_forming_bar(data, forming['result']['list'], limit)
+
+                # Конвертируем в DataFrame
                 df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'])
 
                 # Конвертируем типы данных
@@ -439,6 +785,74 @@ class BybitAPIV5:
             self.logger.error(f"❌ Ошибка получения OHLCV: {e}")
             return None
     
+    def start_market_stream(self, symbol: str, intervals: List[str], history_limit: int = 200,
+                            on_bar_close: Optional[Callable[[str, str, int], None]] = None,
+                            url: Optional[str] = None):
+        """
+        Запуск WebSocket потока свечей и тикера
+
+        Пока поток подключен, get_ohlcv отдает свечи этих интервалов из памяти;
+        при разрыве соединения get_ohlcv автоматически возвращается к REST.
+
+        Args:
+            symbol: Торговый инструмент
+            intervals: Интервалы Bybit
+            history_limit: Глубина истории, загружаемой через REST при подключении
+            on_bar_close: Обработчик закрытия бара on_bar_close(symbol, interval, bar_start_ms)
+            url: Адрес публичного WebSocket (по умолчанию - по настройке testnet)
+
+        Returns:
+            Запущенный MarketDataStream
+        """
+        from bot.exchange.market_stream import (
+            MarketDataStream, PUBLIC_LINEAR_TESTNET_URL, PUBLIC_LINEAR_URL
+        )
+
+        stream = MarketDataStream(
+            self.kline_store, symbol, intervals,
+            url=url or (PUBLIC_LINEAR_TESTNET_URL if self.testnet else PUBLIC_LINEAR_URL),
+            seed=lambda s, i: self.get_ohlcv(symbol=s, interval=i, limit=history_limit),
+            on_bar_close=on_bar_close,
+        )
+        stream.start()
+        return stream
+
+    def _fetch_kline_rows(self, symbol: str, interval: str, limit: int,
+                          start: Optional[int] = None) -> Optional[List[List[str]]]:
+        """
+        Загрузка строк свечей для KlineStore
+
+        KlineStore.get может сделать несколько запросов за вызов (догрузка при
+        разрыве истории), поэтому разрешение rate limiter берется на каждый запрос.
+
+        Returns:
+            Список строк [startTime, open, high, low, close, volume, turnover] или None при ошибке
+        """
+        # 🛡️ RATE LIMITING: Проверка перед API вызовом
+        if not self._acquire_permit("get_kline"):
+            self.logger.error("Rate limit exceeded for get_kline")
+            return None
+
+        params = {"category": "linear", "symbol": symbol, "interval": interval, "limit": limit}
+        if start is not None:
+            params["start"] = start
+
+        try:
+            response = self.connection_manager.execute_with_fallback(
+                operation=lambda: self.session.get_kline(**params),
+                operation_name=f"get_ohlcv_{symbol}",
+                use_cache=False,
+                on_response_headers=self._rate_limit_observer("get_kline"),
+                client_id=self._rate_limit_client
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Загрузка свечей не удалась: {e}")
+            return None
+
+        if response and response.get('retCode') == 0:
+            return response['result']['list']
+        return None
+
     def cancel_all_orders(self, symbol: str) -> Dict[str, Any]:
         """
         Отмена всех ордеров (v5 API)
@@ -451,7 +865,7 @@ class BybitAPIV5:
         """
         try:
             # 🛡️ RATE LIMITING: Проверка перед критическим API вызовом
-            if not self.rate_limiter.can_make_request("cancel_all_orders"):
+            if not self._acquire_permit("cancel_all_orders"):
                 return {"retCode": -1001, "retMsg": "Rate limit exceeded for cancel_all_orders"}
             response = self._call_api(
                 "cancel_all_orders",
@@ -460,6 +874,8 @@ class BybitAPIV5:
                     symbol=symbol
                 )
             )
+            # Позиции, ордера и баланс изменились - объединенные ответы больше не свежие
+            self._invalidate_reads()
             
             self.logger.safe_log_api_response(
                 response,
@@ -484,9 +900,6 @@ class BybitAPIV5:
             Информация об открытых ордерах
         """
         try:
-            # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("get_open_orders"):
-                return {"retCode": -1001, "retMsg": "Rate limit exceeded for get_open_orders"}
             params = {
                 "category": "linear",
                 "accountType": "UNIFIED"
@@ -495,8 +908,9 @@ class BybitAPIV5:
             if symbol:
                 params["symbol"] = symbol
             
-            response = self._call_api(
+            response = self._call_read_api(
                 "get_open_orders",
+                params,
                 lambda: self.session.get_open_orders(**params),
                 cache_key=f"open_orders_{symbol or 'ALL'}"
             )
@@ -543,15 +957,13 @@ class BybitAPIV5:
             Информация об инструментах
         """
         try:
-            # 🛡️ RATE LIMITING: Проверка перед API вызовом
-            if not self.rate_limiter.can_make_request("get_instruments_info"):
-                return {"retCode": -1001, "retMsg": "Rate limit exceeded for get_instruments_info"}
             params = {"category": category}
             if symbol:
                 params["symbol"] = symbol
                 
-            response = self._call_api(
+            response = self._call_read_api(
                 "get_instruments_info",
+                params,
                 lambda: self.session.get_instruments_info(**params),
                 cache_key=f"instruments_{category}_{symbol or 'ALL'}"
             )
@@ -0,0 +1,300 @@
+# bot/exchange/bybit_async_api.py
+"""
+Асинхронный клиент Bybit v5 REST на aiohttp
+
+Тот же набор методов, что у BybitAPIV5 (get_ohlcv, get_positions,
+get_wallet_balance_v5, create_order, set_trading_stop, cancel_all_orders),
+но вызовы не блокируют поток: клиент предназначен для обработчиков Telegram
+и асинхронного торгового цикла.
+
+- один aiohttp.ClientSession с пулом keep-alive соединений на клиент;
+- подпись HMAC-SHA256 по схеме v5: timestamp + api_key + recv_window + payload;
+- общий с BybitAPIV5 rate limiter и клиент лимитов (отпечаток ключа), поэтому
+  синхронный и асинхронный клиенты расходуют один бюджет запросов; квота из
+  заголовков X-Bapi-Limit-* передается в limiter после каждого ответа.
+
+Сессия создается при первом запросе в работающем event loop и привязана к
+нему; клиент закрывается через close() или async with.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import pandas as pd
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp нужен только для асинхронного клиента
+    aiohttp = None
+
+from .kline_store import KLINE_COLUMNS, parse_kline_rows
+
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+
+DEFAULT_RECV_WINDOW = 5000
+
+# Пул соединений: всего и keep-alive простоя (сек)
+CONNECTOR_LIMIT = 20
+KEEPALIVE_TIMEOUT = 30.0
+
+# Максимальное ожидание разрешения rate limiter (сек)
+RATE_LIMIT_WAIT_TIMEOUT = 5.0
+
+# Маршруты: метод клиента -> (HTTP метод, путь, нужна подпись, тип запроса rate limiter)
+ENDPOINTS: Dict[str, Tuple[str, str, bool, Optional[str]]] = {
+    "get_server_time": ("GET", "/v5/market/time", False, None),
+    "get_kline": ("GET", "/v5/market/kline", False, "market_data"),
+    "get_wallet_balance": ("GET", "/v5/account/wallet-balance", True, "balance_query"),
+    "get_positions": ("GET", "/v5/position/list", True, "position_query"),
+    "get_open_orders": ("GET", "/v5/order/realtime", True, "position_query"),
+    "create_order": ("POST", "/v5/order/create", True, "order_create"),
+    "set_trading_stop": ("POST", "/v5/position/trading-stop", True, "trading_stop"),
+    "cancel_all_orders": ("POST", "/v5/order/cancel-all", True, "order_cancel"),
+}
+
+
+def sign_request(api_key: str, api_secret: str, timestamp: int, recv_window: int, payload: str) -> str:
+    """Подпись запроса v5: HMAC-SHA256(secret, timestamp + key + recv_window + payload) в hex"""
+    message = f"{timestamp}{api_key}{recv_window}{payload}"
+    return hmac.new(api_secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+class AsyncBybitAPIV5:
+    """Асинхронный клиент Bybit API v5 с пулом keep-alive соединений"""
+
+    def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False,
+                 base_url: Optional[str] = None, recv_window: int = DEFAULT_RECV_WINDOW,
+                 connector_limit: int = CONNECTOR_LIMIT, timeout: float = 10.0,
+                 rate_limiter: Any = None, rate_limit_timeout: float = RATE_LIMIT_WAIT_TIMEOUT):
+        """
+        Args:
+            api_key: API ключ (если None, используется из config)
+            api_secret: API секрет (если None, используется из config)
+            testnet: Использовать тестовую сеть
+            base_url: Адрес REST API (по умолчанию из config или по testnet)
+            recv_window: Окно приема подписанного запроса (мс)
+            connector_limit: Максимум одновременных соединений пула
+            timeout: Таймаут запроса (сек)
+            rate_limiter: Rate limiter (по умолчанию общий get_rate_limiter())
+            rate_limit_timeout: Максимальное ожидание разрешения rate limiter (сек)
+        """
+        if aiohttp is None:
+            raise RuntimeError("Пакет aiohttp не установлен - асинхронный клиент недоступен")
+
+        if api_key is None or api_secret is None or base_url is None:
+            from config import BYBIT_API_KEY, BYBIT_API_SECRET, get_api_config
+            api_key = api_key or BYBIT_API_KEY
+            api_secret = api_secret or BYBIT_API_SECRET
+            if base_url is None:
+                api_config = get_api_config()
+                base_url = api_config['base_url']
+                testnet = api_config['testnet']
+
+        self.api_key = api_key or ""
+        self.api_secret = api_secret or ""
+        self.testnet = testnet
+        self.base_url = (base_url or (TESTNET_URL if testnet else MAINNET_URL)).rstrip('/')
+        self.recv_window = recv_window
+        self.connector_limit = connector_limit
+        self.timeout = timeout
+        self.rate_limit_timeout = rate_limit_timeout
+
+        self._rate_limiter = rate_limiter
+        # Тот же клиент лимитов, что у BybitAPIV5: лимиты биржи действуют на аккаунт
+        self._rate_limit_client = f"bybit_{hashlib.sha256(self.api_key.encode()).hexdigest()[:8]}"
+
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self.logger = logging.getLogger('bybit_async_api')
+
+    @property
+    def rate_limiter(self):
+        """Ленивая инициализация rate_limiter для избежания циркулярного импорта"""
+        if self._rate_limiter is None:
+            from bot.core.rate_limiter import get_rate_limiter
+            self._rate_limiter = get_rate_limiter()
+        return self._rate_limiter
+
+    async def __aenter__(self) -> "AsyncBybitAPIV5":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connector_limit,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json", "Accept": "application/json"},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закрытие сессии и соединений пула"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _acquire_permit(self, endpoint: str, request_type: str) -> bool:
+        """Ожидание разрешения rate limiter в пуле потоков, не блокируя event loop"""
+        from bot.core.rate_limiter import PROTECTIVE_REQUEST_TYPES, acquire_protective
+        if request_type in PROTECTIVE_REQUEST_TYPES:
+            # Защитный стоп не отклоняется по таймауту ожидания
+            return await asyncio.to_thread(
+                acquire_protective, self.rate_limiter, request_type, self._rate_limit_client,
+                endpoint=endpoint, step=self.rate_limit_timeout, log=self.logger
+            )
+        try:
+            return bool(await asyncio.to_thread(
+                self.rate_limiter.acquire, request_type,
+                client_id=self._rate_limit_client, timeout=self.rate_limit_timeout, endpoint=endpoint
+            ))
+        except Exception as e:
+            self.logger.warning(f"⏳ Rate limit {endpoint}: {e}")
+            return False
+
+    def _auth_headers(self, payload: str) -> Dict[str, str]:
+        timestamp = int(time.time() * 1000)
+        return {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-TIMESTAMP": str(timestamp),
+            "X-BAPI-RECV-WINDOW": str(self.recv_window),
+            "X-BAPI-SIGN": sign_request(self.api_key, self.api_secret, timestamp, self.recv_window, payload),
+            "X-BAPI-SIGN-TYPE": "2",
+        }
+
+    async def _request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнение запроса v5; ошибки сети возвращаются как retCode=-1"""
+        method, path, auth, request_type = ENDPOINTS[endpoint]
+
+        if request_type and not await self._acquire_permit(endpoint, request_type):
+            return {"retCode": -1001, "retMsg": f"Rate limit exceeded for {endpoint}"}
+
+        url = f"{self.base_url}{path}"
+        body = None
+        if method == "GET":
+            payload = urlencode(params)
+            if payload:
+                url = f"{url}?{payload}"
+        else:
+            payload = body = json.dumps(params, separators=(',', ':'))
+        headers = self._auth_headers(payload) if auth else None
+
+        try:
+            session = await self._get_session()
+            async with session.request(method, url, data=body, headers=headers) as response:
+                self.rate_limiter.update_from_headers(endpoint, response.headers, client_id=self._rate_limit_client)
+                if response.status != 200:
+                    return {"retCode": -1, "retMsg": f"HTTP {response.status}"}
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.logger.error(f"❌ {endpoint}: {e!r}")
+            return {"retCode": -1, "retMsg": str(e) or type(e).__name__}
+
+    async def get_server_time(self) -> Dict[str, Any]:
+        """Получение времени сервера"""
+        return await self._request("get_server_time", {})
+
+    async def get_wallet_balance_v5(self) -> Dict[str, Any]:
+        """Получение баланса кошелька"""
+        return await self._request("get_wallet_balance", {"accountType": "UNIFIED"})
+
+    def format_balance_v5(self, balance_data: Dict[str, Any]) -> str:
+        """Форматирование баланса для отображения (общее с BybitAPIV5)"""
+        from bot.exchange.bybit_api_v5 import format_balance_v5
+        return format_balance_v5(balance_data, self.logger)
+
+    async def get_positions(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Получение позиций (все позиции USDT, если symbol не указан)"""
+        params = {"category": "linear"}
+        if symbol:
+            params["symbol"] = symbol
+        else:
+            params["settleCoin"] = "USDT"
+        return await self._request("get_positions", params)
+
+    async def get_open_orders(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Получение открытых ордеров"""
+        params = {"category": "linear"}
+        if symbol:
+            params["symbol"] = symbol
+        else:
+            params["settleCoin"] = "USDT"
+        return await self._request("get_open_orders", params)
+
+    async def get_ohlcv(self, symbol: str = "BTCUSDT", interval: str = "1",
+                        limit: int = 100) -> Optional[pd.DataFrame]:
+        """
+        Получение OHLCV данных
+
+        Returns:
+            DataFrame [timestamp, open, high, low, close, volume, turnover] по возрастанию
+            времени или None при ошибке
+        """
+        response = await self._request("get_kline", {
+            "category": "linear", "symbol": symbol, "interval": interval, "limit": limit,
+        })
+        if not response or response.get('retCode') != 0:
+            self.logger.error(f"❌ Ошибка получения OHLCV: {response}")
+            return None
+
+        timestamps, values = parse_kline_rows(response['result']['list'])
+        df = pd.DataFrame(values, columns=list(KLINE_COLUMNS))
+        df.insert(0, 'timestamp', pd.to_datetime(timestamps, unit='ms'))
+        return df
+
+    async def create_order(self, symbol: str, side: str, order_type: str, qty: float,
+                           price: Optional[float] = None, stop_loss: Optional[float] = None,
+                           take_profit: Optional[float] = None, reduce_only: bool = False,
+                           position_idx: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Создание ордера
+
+        Как и в BybitAPIV5, стопы устанавливаются отдельно через set_trading_stop().
+        """
+        params = {
+            "category": "linear",
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "qty": str(qty),
+        }
+        if order_type == "Limit" and price:
+            params["price"] = str(price)
+        if reduce_only:
+            params["reduceOnly"] = True
+        if position_idx is not None:
+            params["positionIdx"] = position_idx
+
+        self.logger.info(f"📝 Ордер {side} {order_type} {qty} {symbol}" + (f" @ {price}" if price else ""))
+        return await self._request("create_order", params)
+
+    async def set_trading_stop(self, symbol: str, stop_loss: Optional[float] = None,
+                               take_profit: Optional[float] = None,
+                               sl_trigger_by: str = "MarkPrice",
+                               tp_trigger_by: str = "MarkPrice") -> Dict[str, Any]:
+        """Установка стоп-лосс и тейк-профит позиции"""
+        params = {"category": "linear", "symbol": symbol, "positionIdx": 0}
+        if stop_loss:
+            params["stopLoss"] = str(stop_loss)
+            params["slTriggerBy"] = sl_trigger_by
+        if take_profit:
+            params["takeProfit"] = str(take_profit)
+            params["tpTriggerBy"] = tp_trigger_by
+        return await self._request("set_trading_stop", params)
+
+    async def cancel_all_orders(self, symbol: str) -> Dict[str, Any]:
+        """Отмена всех ордеров по инструменту"""
+        return await self._request("cancel_all_orders", {"category": "linear", "symbol": symbol})
@@ -0,0 +1,94 @@
+# bot/exchange/http_pool.py
+"""
+Общий HTTP транспорт для клиентов Bybit
+
+pybit создает собственный requests.Session на каждый экземпляр HTTP, поэтому
+N стратегий открывали N пулов TCP/TLS соединений. Здесь на каждую пару
+(endpoint, testnet) создается один requests.Session с пулом keep-alive
+соединений, и он подставляется в pybit HTTP вместо собственного: подпись
+запросов остается на экземпляре HTTP (ключи разные), а соединения общие.
+
+Статистика пула (запросы, новые соединения, доля переиспользования) берется
+из счетчиков пулов urllib3.
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Размер пула соединений к одному хосту
+POOL_MAXSIZE = 32
+
+
+_sessions: Dict[Tuple[str, bool], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _pool_key(endpoint: str, testnet: bool) -> Tuple[str, bool]:
+    return (endpoint or "").rstrip('/'), bool(testnet)
+
+
+def get_shared_http_session(endpoint: str, testnet: bool = False) -> requests.Session:
+    """Общий requests.Session с пулом keep-alive соединений для (endpoint, testnet)"""
+    key = _pool_key(endpoint, testnet)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # Те же заголовки, что выставляет pybit для собственной сессии
+            session.headers.update({"Content-Type": "application/json", "Accept": "application/json"})
+            _sessions[key] = session
+        return session
+
+
+def attach_shared_transport(http_session: Any, endpoint: str, testnet: bool = False) -> requests.Session:
+    """
+    Подключение pybit HTTP к общему пулу соединений
+
+    Returns:
+        Общий requests.Session
+    """
+    shared = get_shared_http_session(endpoint, testnet)
+    own = getattr(http_session, 'client', None)
+    if own is not shared:
+        http_session.client = shared
+        if own is not None:
+            own.close()
+    return shared
+
+
+def get_http_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Статистика общих пулов: запросы, открытые соединения и доля переиспользования
+
+    Returns:
+        {"<endpoint> (testnet|mainnet)": {"requests", "connections", "reuse_ratio"}}
+    """
+    with _sessions_lock:
+        sessions = dict(_sessions)
+
+    stats = {}
+    for (endpoint, testnet), session in sessions.items():
+        requests_count = connections = 0
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = getattr(adapter, 'poolmanager', None)
+            if pools is None:
+                continue
+            for pool_key in list(pools.pools.keys()):
+                pool = pools.pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_count += pool.num_requests
+                connections += pool.num_connections
+        stats[f"{endpoint} ({'testnet' if testnet else 'mainnet'})"] = {
+            'requests': requests_count,
+            'connections': connections,
+            'reuse_ratio': 1.0 - connections / requests_count if requests_count else 0.0,
+        }
+    return stats
@@ -0,0 +1,377 @@
+# bot/exchange/kline_store.py
+"""
+Инкрементальное хранилище свечей для BybitAPIV5.get_ohlcv
+
+Вместо запроса limit=200 свечей на каждом цикле хранилище держит историю
+по каждой паре (symbol, interval) в заранее выделенных NumPy буферах и
+дозапрашивает только бары, начиная с последнего сохраненного (параметр
+start): формирующийся бар обновляется на месте, новые дописываются в конец.
+
+Буфер имеет удвоенную емкость: при заполнении последние capacity баров
+переносятся в начало, поэтому любое окно последних баров непрерывно в памяти
+и читается срезом без сборки из двух частей.
+
+Пары, поддерживаемые WebSocket потоком, отдаются из памяти, только пока поток
+подает признаки жизни (сообщения или pong) не реже live_ttl; замолчавший поток
+не отдает застывшие свечи - get возвращается к REST.
+"""
+
+import logging
+import time
+from threading import Lock
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Колонки ответа Bybit v5 /market/kline (кроме timestamp)
+KLINE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'turnover')
+
+# Длительность интервала в мс; для месячных свечей инкрементальный режим не используется
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000,
+    "720": 43_200_000, "D": 86_400_000, "W": 604_800_000,
+}
+
+# Максимальный limit одного запроса /market/kline
+MAX_KLINE_LIMIT = 1000
+
+# fetch(start_ms, limit) -> список строк Bybit [startTime, open, high, low, close, volume, turnover]
+KlineFetcher = Callable[[Optional[int], int], Optional[Sequence[Sequence]]]
+
+
+class KlineBuffer:
+    """Буфер свечей одной пары (symbol, interval)"""
+
+    def __init__(self, capacity: int = MAX_KLINE_LIMIT):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity * 2, dtype=np.int64)
+        self._values = np.zeros((capacity * 2, len(KLINE_COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        # Глубина истории, загруженной полным запросом (у новых инструментов баров меньше limit)
+        self.covered = 0
+        # Время последнего успешного обновления с биржи
+        self.refreshed_at: Optional[float] = None
+        # Версия растет при каждом изменении данных
+        self.version = 0
+        self._frame: Optional[pd.DataFrame] = None
+        self._frame_key: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._timestamps[self._end - 1]) if len(self) else None
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self._timestamps[self._start]) if len(self) else None
+
+    def load(self, timestamps: np.ndarray, values: np.ndarray, requested: int) -> None:
+        """Полная замена истории отсортированными барами"""
+        count = min(len(timestamps), self.capacity)
+        self._timestamps[:count] = timestamps[len(timestamps) - count:]
+        self._values[:count] = values[len(values) - count:]
+        self._start, self._end = 0, count
+        self.covered = requested
+        self.version += 1
+
+    def can_serve(self, limit: int) -> bool:
+        """Хватает ли истории, чтобы обновлять limit баров инкрементально"""
+        return len(self) > 0 and limit <= max(self.covered, len(self))
+
+    def merge(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """
+        Слияние отсортированных по времени баров с буфером
+
+        Бар с меткой последнего сохраненного перезаписывается (формирующийся бар),
+        более новые дописываются, более старые игнорируются.
+
+        Returns:
+            Количество новых баров
+        """
+        appended = 0
+        changed = False
+        for ts, row in zip(timestamps, values):
+            last = self.last_timestamp
+            if last is not None and ts < last:
+                continue
+            if last is not None and ts == last:
+                if not np.array_equal(self._values[self._end - 1], row, equal_nan=True):
+                    self._values[self._end - 1] = row
+                    changed = True
+            else:
+                self._append(ts, row)
+                appended += 1
+                changed = True
+        if changed:
+            self.version += 1
+        return appended
+
+    def _append(self, ts: int, row: np.ndarray) -> None:
+        if self._end == len(self._timestamps):
+            # Переносим последние capacity - 1 баров в начало буфера
+            keep = self.capacity - 1
+            self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+            self._values[:keep] = self._values[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        elif len(self) == self.capacity:
+            self._start += 1
+
+        self._timestamps[self._end] = ts
+        self._values[self._end] = row
+        self._end += 1
+
+    def tail(self, limit: int) -> pd.DataFrame:
+        """
+        DataFrame последних limit баров
+
+        Кадр собирается только при изменении данных и владеет копией окна:
+        ранее выданные кадры не меняются при последующих обновлениях буфера.
+        """
+        count = min(limit, len(self))
+        key = (self.version, count)
+        if self._frame is not None and self._frame_key == key:
+            return self._frame
+
+        start = self._end - count
+        values = self._values[start:self._end].copy()
+        frame = pd.DataFrame(values, columns=list(KLINE_COLUMNS))
+        frame.insert(0, 'timestamp', pd.to_datetime(self._timestamps[start:self._end], unit='ms'))
+
+        self._frame, self._frame_key = frame, key
+        return frame
+
+
+def parse_kline_rows(rows: Sequence[Sequence]) -> Tuple[np.ndarray, np.ndarray]:
+    """Строки ответа Bybit (новые первыми, строковые значения) -> отсортированные массивы"""
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(KLINE_COLUMNS)))
+
+    raw = np.asarray(rows, dtype=object)
+    timestamps = raw[:, 0].astype(np.float64).astype(np.int64)
+    values = np.full((len(raw), len(KLINE_COLUMNS)), np.nan)
+    width = min(raw.shape[1] - 1, len(KLINE_COLUMNS))
+    try:
+        values[:, :width] = raw[:, 1:width + 1].astype(np.float64)
+    except (TypeError, ValueError):
+        # Некорректные значения превращаем в NaN, как pd.to_numeric(errors='coerce')
+        values[:, :width] = pd.DataFrame(raw[:, 1:width + 1]).apply(pd.to_numeric, errors='coerce').to_numpy()
+
+    order = np.argsort(timestamps, kind='stable')
+    return timestamps[order], values[order]
+
+
+def merge_forming_bar(rows: Sequence[Sequence], forming: Sequence[Sequence], limit: int) -> list:
+    """
+    Строки свечей Bybit (новые первыми) с актуальным формирующимся баром
+
+    Бар с той же меткой заменяется, более новый добавляется в начало с
+    сохранением limit строк, более старый ответ игнорируется.
+    """
+    rows = list(rows)
+    if not forming:
+        return rows
+    bar = forming[0]
+    if rows and int(float(bar[0])) == int(float(rows[0][0])):
+        return [bar] + rows[1:]
+    if not rows or int(float(bar[0])) > int(float(rows[0][0])):
+        return ([bar] + rows)[:limit]
+    return rows
+
+
+class KlineStore:
+    """Хранилище буферов свечей по парам (symbol, interval)"""
+
+    def __init__(self, capacity: int = MAX_KLINE_LIMIT, stale_ttl: float = 300.0,
+                 clock: Callable[[], float] = time.time, live_ttl: float = 30.0):
+        """
+        Args:
+            capacity: Максимальная глубина истории на пару (symbol, interval)
+            stale_ttl: Сколько секунд после последнего успешного обновления можно
+                отдавать сохраненные свечи, если биржа недоступна
+            clock: Источник времени (unix time в секундах)
+            live_ttl: Сколько секунд после последнего сообщения потока свечи пары
+                считаются актуальными без запроса к бирже
+        """
+        self.capacity = capacity
+        self.stale_ttl = stale_ttl
+        self.live_ttl = live_ttl
+        self._clock = clock
+        self._buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        self._locks: Dict[Tuple[str, str], Lock] = {}
+        # Пары, которые поддерживаются WebSocket потоком: время последнего сообщения потока
+        self._live: Dict[Tuple[str, str], float] = {}
+        self._lock = Lock()
+        self.stats = {
+            'full_fetches': 0,
+            'incremental_fetches': 0,
+            'bars_received': 0,
+            'bars_appended': 0,
+            'stale_served': 0,
+            'stream_served': 0,
+            'stream_updates': 0,
+            'stream_stale': 0,
+        }
+
+    def _buffer(self, key: Tuple[str, str]) -> Tuple[KlineBuffer, Lock]:
+        with self._lock:
+            if key not in self._buffers:
+                self._buffers[key] = KlineBuffer(self.capacity)
+                self._locks[key] = Lock()
+            return self._buffers[key], self._locks[key]
+
+    def supports(self, interval: str, limit: int) -> bool:
+        return interval in INTERVAL_MS and 0 < limit <= self.capacity
+
+    def get(self, symbol: str, interval: str, limit: int,
+            fetch: KlineFetcher) -> Optional[pd.DataFrame]:
+        """
+        Последние limit свечей с инкрементальным обновлением
+
+        Args:
+            symbol: Торговый инструмент
+            interval: Интервал Bybit
+            limit: Количество свечей
+            fetch: Загрузка строк свечей fetch(start_ms, limit)
+
+        Returns:
+            DataFrame (timestamp, open, high, low, close, volume, turnover) или None,
+            если биржа недоступна и сохраненные свечи устарели
+        """
+        buffer, lock = self._buffer((symbol, interval))
+        interval_ms = INTERVAL_MS[interval]
+
+        with lock:
+            live = self._live_state(symbol, interval)
+            if live and buffer.can_serve(limit):
+                # Свечи поддерживаются потоком - запрос к бирже не нужен
+                self._count(stream_served=1)
+                return buffer.tail(limit)
+            if live is False:
+                # Поток замолчал - свечи могли застыть, обновляем через REST
+                self._count(stream_stale=1)
+
+            if not buffer.can_serve(limit):
+                return self._full_refresh(buffer, limit, fetch)
+
+            # Формирующийся бар + новые бары с запасом на расхождение часов
+            last_ts = buffer.last_timestamp
+            elapsed_ms = self._clock() * 1000 - last_ts
+            request_limit = max(int(elapsed_ms // interval_ms), 0) + 2
+            if request_limit >= limit:
+                return self._full_refresh(buffer, limit, fetch)
+
+            rows = fetch(last_ts, request_limit)
+            if rows is None:
+                return self._stale_tail(buffer, limit)
+            buffer.refreshed_at = self._clock()
+            timestamps, values = parse_kline_rows(rows)
+            self._count(incremental_fetches=1, bars_received=len(timestamps))
+
+            if len(timestamps) == 0 or timestamps[0] > last_ts:
+                # Разрыв между сохраненной историей и ответом - загружаем заново
+                return self._full_refresh(buffer, limit, fetch)
+
+            self._count(bars_appended=buffer.merge(timestamps, values))
+            return buffer.tail(limit)
+
+    def live_tail(self, symbol: str, interval: str, limit: int) -> Optional[pd.DataFrame]:
+        """
+        Последние limit свечей из памяти без запросов к бирже
+
+        Returns:
+            DataFrame, если пара поддерживается потоком и в буфере достаточно истории,
+            иначе None
+        """
+        buffer, lock = self._buffer((symbol, interval))
+        with lock:
+            if not (self._live_state(symbol, interval) and buffer.can_serve(limit)):
+                return None
+            self._count(stream_served=1)
+            return buffer.tail(limit)
+
+    def apply_bar(self, symbol: str, interval: str, timestamp: int, values: Sequence[float]) -> bool:
+        """
+        Применение бара из WebSocket потока
+
+        Returns:
+            False, если бар не стыкуется с историей (история пуста или пропущены бары);
+            такой бар не применяется
+        """
+        buffer, lock = self._buffer((symbol, interval))
+        with lock:
+            last_ts = buffer.last_timestamp
+            if last_ts is None or timestamp > last_ts + INTERVAL_MS[interval]:
+                return False
+            buffer.merge(np.array([timestamp], dtype=np.int64),
+                         np.asarray(values, dtype=np.float64).reshape(1, -1))
+            buffer.refreshed_at = self._clock()
+        self._count(stream_updates=1)
+        return True
+
+    def set_live(self, symbol: str, interval: str, live: bool) -> None:
+        """Отметка пары как поддерживаемой потоком (get не обращается к бирже)"""
+        with self._lock:
+            if live:
+                self._live[(symbol, interval)] = self._clock()
+            else:
+                self._live.pop((symbol, interval), None)
+
+    def touch_live(self, symbol: str, interval: str) -> None:
+        """Признак жизни потока: пара остается актуальной еще live_ttl секунд"""
+        with self._lock:
+            if (symbol, interval) in self._live:
+                self._live[(symbol, interval)] = self._clock()
+
+    def is_live(self, symbol: str, interval: str) -> bool:
+        """Пара поддерживается потоком, и поток подавал признаки жизни не позже live_ttl"""
+        return bool(self._live_state(symbol, interval))
+
+    def _live_state(self, symbol: str, interval: str) -> Optional[bool]:
+        """True - поток актуален, False - поток замолчал, None - пара не поддерживается потоком"""
+        with self._lock:
+            touched_at = self._live.get((symbol, interval))
+        if touched_at is None:
+            return None
+        return self._clock() - touched_at <= self.live_ttl
+
+    def bar_count(self, symbol: str, interval: str) -> int:
+        """Количество сохраненных баров пары"""
+        with self._lock:
+            buffer = self._buffers.get((symbol, interval))
+        return len(buffer) if buffer is not None else 0
+
+    def _full_refresh(self, buffer: KlineBuffer, limit: int,
+                      fetch: KlineFetcher) -> Optional[pd.DataFrame]:
+        rows = fetch(None, limit)
+        if rows is None:
+            return self._stale_tail(buffer, limit)
+        buffer.refreshed_at = self._clock()
+        timestamps, values = parse_kline_rows(rows)
+        self._count(full_fetches=1, bars_received=len(timestamps))
+
+        buffer.load(timestamps, values, requested=limit)
+        return buffer.tail(limit)
+
+    def _stale_tail(self, buffer: KlineBuffer, limit: int) -> Optional[pd.DataFrame]:
+        """Сохраненные свечи при недоступности биржи (как fallback-кэш connection manager)"""
+        if buffer.refreshed_at is None or self._clock() - buffer.refreshed_at > self.stale_ttl:
+            return None
+        logger.warning(f"🗂️ Биржа недоступна, используем сохраненные свечи ({len(buffer)} баров)")
+        self._count(stale_served=1)
+        return buffer.tail(limit)
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats, buffers=len(self._buffers), live=len(self._live))
@@ -0,0 +1,317 @@
+# bot/exchange/market_stream.py
+"""
+Прием рыночных данных через публичный WebSocket Bybit v5
+
+Поток подписывается на kline.<interval>.<symbol> и tickers.<symbol> и
+поддерживает KlineStore в актуальном состоянии: пока соединение живо,
+BybitAPIV5.get_ohlcv отдает свечи из памяти без REST запросов. При разрыве
+пары снимаются с потоковой поддержки, и get_ohlcv автоматически возвращается
+к REST опросу; после переподключения история досинхронизируется через REST.
+
+Закрытие бара (confirm=true) передается в on_bar_close сразу по приходу
+сообщения, поэтому стратегии могут реагировать без ожидания цикла опроса.
+
+Ping отправляется каждые ping_interval секунд независимо от трафика; если за
+liveness_timeout не пришло ни одного сообщения (включая pong), соединение
+считается зависшим и переоткрывается.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import websockets
+except ImportError:  # websockets нужен только для потокового режима
+    websockets = None
+
+from .kline_store import INTERVAL_MS, KLINE_COLUMNS, KlineStore
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_LINEAR_URL = "wss://stream.bybit.com/v5/public/linear"
+PUBLIC_LINEAR_TESTNET_URL = "wss://stream-testnet.bybit.com/v5/public/linear"
+
+# Bybit закрывает соединение без ping в течение 30 секунд
+PING_INTERVAL = 20.0
+
+# Без сообщений и pong дольше этого срока соединение переоткрывается (сек)
+LIVENESS_TIMEOUT = 30.0
+
+# on_bar_close(symbol, interval, bar_start_ms)
+BarCloseCallback = Callable[[str, str, int], None]
+
+
+class MarketDataStream:
+    """Фоновый WebSocket клиент свечей и тикеров одного инструмента"""
+
+    def __init__(self, kline_store: KlineStore, symbol: str, intervals: Iterable[str],
+                 url: str = PUBLIC_LINEAR_URL,
+                 seed: Optional[Callable[[str, str], Any]] = None,
+                 on_bar_close: Optional[BarCloseCallback] = None,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0,
+                 ping_interval: float = PING_INTERVAL, liveness_timeout: float = LIVENESS_TIMEOUT):
+        """
+        Args:
+            kline_store: Хранилище свечей, которое поддерживает поток
+            symbol: Торговый инструмент
+            intervals: Интервалы Bybit ("1", "5", "15", "60", ...)
+            url: Адрес публичного WebSocket
+            seed: Загрузка истории через REST seed(symbol, interval), обычно
+                lambda s, i: api.get_ohlcv(symbol=s, interval=i, limit=200)
+            on_bar_close: Вызывается при закрытии бара
+            reconnect_delay: Начальная задержка переподключения (сек)
+            max_reconnect_delay: Максимальная задержка переподключения (сек)
+            ping_interval: Период отправки ping (сек)
+            liveness_timeout: Срок без сообщений и pong до переподключения (сек)
+        """
+        self.kline_store = kline_store
+        self.symbol = symbol
+        self.intervals = [interval for interval in intervals if interval in INTERVAL_MS]
+        self.url = url
+        self.seed = seed
+        self.on_bar_close = on_bar_close
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ping_interval = ping_interval
+        self.liveness_timeout = liveness_timeout
+
+        self._ticker: Dict[str, Any] = {}
+        self._ticker_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._connected = threading.Event()
+
+        self.stats = {
+            'connects': 0,
+            'disconnects': 0,
+            'messages': 0,
+            'bars_closed': 0,
+            'gaps': 0,
+            'pings': 0,
+            'pongs': 0,
+            'liveness_timeouts': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Управление
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Запуск потока в фоновом потоке"""
+        if websockets is None:
+            raise RuntimeError("Пакет websockets не установлен - потоковые данные недоступны")
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._thread_main, name=f"market_stream_{self.symbol}",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Остановка потока; свечи снова обновляются через REST"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._set_live(False)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def get_ticker(self) -> Dict[str, Any]:
+        """Последнее состояние тикера (snapshot + примененные delta)"""
+        with self._ticker_lock:
+            return dict(self._ticker)
+
+    def get_last_price(self) -> Optional[float]:
+        with self._ticker_lock:
+            price = self._ticker.get('lastPrice')
+        return float(price) if price not in (None, '') else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, connected=self.is_connected)
+
+    # ------------------------------------------------------------------
+    # Цикл соединения
+    # ------------------------------------------------------------------
+
+    def _thread_main(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self) -> None:
+        self._stop = asyncio.Event()
+        delay = self.reconnect_delay
+
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=None, close_timeout=1) as ws:
+                    await self._subscribe(ws)
+                    self.stats['connects'] += 1
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    logger.info(f"📡 WebSocket подключен: {self.url} ({self.symbol}: {', '.join(self.intervals)})")
+
+                    await self._resync()
+                    await self._consume(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ WebSocket соединение потеряно: {e}")
+            finally:
+                if self._connected.is_set():
+                    self.stats['disconnects'] += 1
+                self._connected.clear()
+                # Пока соединения нет, свечи обновляются через REST
+                self._set_live(False)
+
+            if self._stop.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self, ws) -> None:
+        topics = [f"kline.{interval}.{self.symbol}" for interval in self.intervals]
+        topics.append(f"tickers.{self.symbol}")
+        await ws.send(json.dumps({"op": "subscribe", "args": topics}))
+
+    async def _consume(self, ws) -> None:
+        loop = asyncio.get_running_loop()
+        stop_task = asyncio.ensure_future(self._stop.wait())
+        recv_task: Optional[asyncio.Future] = None
+        last_received = loop.time()
+        next_ping = last_received + self.ping_interval
+        try:
+            while not self._stop.is_set():
+                now = loop.time()
+                if now - last_received >= self.liveness_timeout:
+                    self.stats['liveness_timeouts'] += 1
+                    raise ConnectionError(f"нет сообщений и pong {self.liveness_timeout:.0f}s")
+                if now >= next_ping:
+                    # Ping по расписанию, а не только в тишине: pong подтверждает живое соединение
+                    await ws.send(json.dumps({"op": "ping"}))
+                    self.stats['pings'] += 1
+                    next_ping = now + self.ping_interval
+
+                if recv_task is None:
+                    recv_task = asyncio.ensure_future(ws.recv())
+                timeout = min(next_ping, last_received + self.liveness_timeout) - loop.time()
+                done, _ = await asyncio.wait({recv_task, stop_task}, timeout=max(timeout, 0.0),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if stop_task in done:
+                    return
+                if recv_task not in done:
+                    continue
+
+                message = recv_task.result()
+                recv_task = None
+                last_received = loop.time()
+                self.stats['messages'] += 1
+                self._touch_live()
+                gaps = self._handle_message(message)
+                if gaps:
+                    await self._resync(gaps)
+        finally:
+            stop_task.cancel()
+            if recv_task is not None:
+                recv_task.cancel()
+
+    async def _resync(self, intervals: Optional[List[str]] = None) -> None:
+        """Досинхронизация истории через REST и включение потоковой поддержки"""
+        for interval in intervals or self.intervals:
+            if self.seed is not None:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.seed, self.symbol, interval)
+                except Exception as e:
+                    logger.warning(f"⚠️ Не удалось загрузить историю {self.symbol} {interval}: {e}")
+                    continue
+            if self.kline_store.bar_count(self.symbol, interval):
+                self.kline_store.set_live(self.symbol, interval, True)
+
+    # ------------------------------------------------------------------
+    # Сообщения
+    # ------------------------------------------------------------------
+
+    def _handle_message(self, message: str) -> List[str]:
+        """
+        Обработка сообщения потока
+
+        Returns:
+            Интервалы, в истории которых обнаружен разрыв
+        """
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            logger.debug(f"Некорректное сообщение WebSocket: {message!r}")
+            return []
+
+        topic = payload.get('topic', '')
+        if topic.startswith('kline.'):
+            return self._handle_kline(topic, payload.get('data') or [])
+        if topic.startswith('tickers.'):
+            self._handle_ticker(payload)
+        elif payload.get('op') in ('ping', 'pong') or payload.get('ret_msg') == 'pong':
+            self.stats['pongs'] += 1
+        elif payload.get('op') == 'subscribe' and not payload.get('success', True):
+            logger.error(f"❌ Ошибка подписки WebSocket: {payload.get('ret_msg')}")
+        return []
+
+    def _handle_kline(self, topic: str, bars: List[Dict[str, Any]]) -> List[str]:
+        _, interval, symbol = topic.split('.', 2)
+        gaps = []
+
+        for bar in bars:
+            timestamp = int(bar['start'])
+            values = [float(bar.get(column, 'nan')) for column in KLINE_COLUMNS]
+
+            if not self.kline_store.apply_bar(symbol, interval, timestamp, values):
+                # Пропущены бары - до досинхронизации свечи отдаются через REST
+                self.kline_store.set_live(symbol, interval, False)
+                self.stats['gaps'] += 1
+                if interval not in gaps:
+                    gaps.append(interval)
+                continue
+
+            if bar.get('confirm'):
+                self.stats['bars_closed'] += 1
+                if self.on_bar_close is not None:
+                    try:
+                        self.on_bar_close(symbol, interval, timestamp)
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка обработчика закрытия бара: {e}")
+
+        return gaps
+
+    def _handle_ticker(self, payload: Dict[str, Any]) -> None:
+        data = payload.get('data') or {}
+        with self._ticker_lock:
+            if payload.get('type') == 'snapshot':
+                self._ticker = dict(data)
+            else:
+                self._ticker.update(data)
+            self._ticker['_received_at'] = time.time()
+
+    def _set_live(self, live: bool) -> None:
+        for interval in self.intervals:
+            self.kline_store.set_live(self.symbol, interval, live)
+
+    def _touch_live(self) -> None:
+        """Любое сообщение подтверждает, что свечи потока актуальны"""
+        for interval in self.intervals:
+            self.kline_store.touch_live(self.symbol, interval)
@@ -199,14 +199,21 @@ class MarketContextEngine:
         time_remaining = session.time_until_end(dt)
         is_overlap = self.session_manager.is_session_overlap(dt)
 
+        # Within a trading cycle the analysis is shared across strategies
+        from bot.strategy.utils.market_snapshot import snapshot_memoize
+
         # 2. Liquidity analysis
-        liquidity = self.liquidity_analyzer.analyze(df, current_price)
+        liquidity = snapshot_memoize(
+            df,
+            ('market_context.liquidity', _component_key(self.liquidity_analyzer), current_price),
+            lambda: self.liquidity_analyzer.analyze(df, current_price)
+        )
 
         # 3. Risk parameters
-        risk_params = self.risk_calculator.calculate(
+        risk_params = snapshot_memoize(
             df,
-            current_price,
-            signal_direction
+            ('market_context.risk', _component_key(self.risk_calculator), current_price, signal_direction),
+            lambda: self.risk_calculator.calculate(df, current_price, signal_direction)
         )
 
         # Build context
@@ -290,6 +297,15 @@ class MarketContextEngine:
         }
 
 
+def _component_key(component: Any) -> tuple:
+    """Cache key of an analyzer: its type and scalar settings"""
+    settings = tuple(sorted(
+        (name, value) for name, value in vars(component).items()
+        if isinstance(value, (int, float, str, bool))
+    ))
+    return (type(component).__name__,) + settings
+
+
 # Singleton for convenience
 _engine_instance: Optional[MarketContextEngine] = None
 
@@ -174,9 +174,42 @@ class MetricsExporter:
                     trading_metrics['api_response_time'] = (
                         health.get('endpoint_response_time') or 0.0
                     )
+                    stats = health.get('stats', {})
+                    trading_metrics['api_cache_fresh_hits'] = stats.get('cache_fresh_hits', 0)
+                    trading_metrics['api_cache_stale_hits'] = stats.get('cache_stale_hits', 0)
+                    trading_metrics['api_backoff_seconds'] = stats.get('backoff_seconds', 0.0)
+                    trading_metrics['api_wire_seconds'] = stats.get('wire_seconds', 0.0)
             except Exception as api_metrics_error:
                 self.logger.error(f"Ошибка получения метрик API: {api_metrics_error}")
 
+            # Объединение одинаковых запросов чтения к бирже
+            try:
+                from bot.core.single_flight import get_single_flight_stats
+
+                groups = list(get_single_flight_stats().values())
+                trading_metrics['api_read_calls'] = sum(group['calls'] for group in groups)
+                trading_metrics['api_read_executed'] = sum(group['executed'] for group in groups)
+                trading_metrics['api_read_coalesced'] = sum(
+                    group['coalesced'] + group['fresh_hits'] for group in groups
+                )
+            except Exception as coalescing_error:
+                self.logger.error(f"Ошибка получения метрик объединения запросов: {coalescing_error}")
+
+            # Общий пул HTTP соединений клиентов Bybit
+            try:
+                from bot.exchange.http_pool import get_http_pool_stats
+
+                pools = list(get_http_pool_stats().values())
+                http_requests = sum(pool['requests'] for pool in pools)
+                http_connections = sum(pool['connections'] for pool in pools)
+                trading_metrics['api_http_requests'] = http_requests
+                trading_metrics['api_http_connections'] = http_connections
+                trading_metrics['api_http_reuse_ratio'] = (
+                    1.0 - http_connections / http_requests if http_requests else 0.0
+                )
+            except Exception as pool_error:
+                self.logger.error(f"Ошибка получения метрик пула соединений: {pool_error}")
+
             self.metrics['trading_metrics'] = trading_metrics
         except Exception as e:
             self.logger.error(f"Ошибка обновления торговых метрик: {e}")
@@ -337,6 +370,38 @@ class MetricsExporter:
         metrics_lines.append(f"# HELP trading_total_signals Total number of trading signals")
         metrics_lines.append(f"# TYPE trading_total_signals counter")
         metrics_lines.append(f"trading_total_signals {trading.get('total_signals', 0)}")
+
+        metrics_lines.append(f"# HELP api_read_calls_total Exchange read requests issued by the bot")
+        metrics_lines.append(f"# TYPE api_read_calls_total counter")
+        metrics_lines.append(f"api_read_calls_total {trading.get('api_read_calls', 0)}")
+
+        metrics_lines.append(f"# HELP api_read_coalesced_total Read requests served by an in-flight or fresh identical call")
+        metrics_lines.append(f"# TYPE api_read_coalesced_total counter")
+        metrics_lines.append(f"api_read_coalesced_total {trading.get('api_read_coalesced', 0)}")
+
+        metrics_lines.append(f"# HELP api_http_connections_total Connections opened by the shared exchange HTTP pool")
+        metrics_lines.append(f"# TYPE api_http_connections_total counter")
+        metrics_lines.append(f"api_http_connections_total {trading.get('api_http_connections', 0)}")
+
+        metrics_lines.append(f"# HELP api_http_reuse_ratio Share of exchange HTTP requests served on a reused connection")
+        metrics_lines.append(f"# TYPE api_http_reuse_ratio gauge")
+        metrics_lines.append(f"api_http_reuse_ratio {trading.get('api_http_reuse_ratio', 0.0)}")
+
+        metrics_lines.append(f"# HELP api_cache_fresh_hits_total Exchange reads served from a fresh cached response")
+        metrics_lines.append(f"# TYPE api_cache_fresh_hits_total counter")
+        metrics_lines.append(f"api_cache_fresh_hits_total {trading.get('api_cache_fresh_hits', 0)}")
+
+        metrics_lines.append(f"# HELP api_cache_stale_hits_total Exchange reads served stale while refreshing in background")
+        metrics_lines.append(f"# TYPE api_cache_stale_hits_total counter")
+        metrics_lines.append(f"api_cache_stale_hits_total {trading.get('api_cache_stale_hits', 0)}")
+
+        metrics_lines.append(f"# HELP api_backoff_seconds_total Time exchange requests spent waiting in retry backoff")
+        metrics_lines.append(f"# TYPE api_backoff_seconds_total counter")
+        metrics_lines.append(f"api_backoff_seconds_total {trading.get('api_backoff_seconds', 0.0)}")
+
+        metrics_lines.append(f"# HELP api_wire_seconds_total Time exchange requests spent on the wire")
+        metrics_lines.append(f"# TYPE api_wire_seconds_total counter")
+        metrics_lines.append(f"api_wire_seconds_total {trading.get('api_wire_seconds', 0.0)}")
         
         # Метрики нейронной сети
         neural = self.metrics.get('neural_metrics', {})
@@ -4,6 +4,10 @@
 Централизованное получение и обработка рыночных данных
 """
 
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
 import pandas as pd
 from typing import Dict, Optional, Any
 from bot.core.secure_logger import get_secure_logger
@@ -14,8 +18,13 @@ class MarketDataService:
     📊 Сервис для работы с рыночными данными
     """
     
-    def __init__(self):
-        """Инициализация сервиса рыночных данных"""
+    def __init__(self, fetch_timeout: float = 10.0):
+        """
+        Инициализация сервиса рыночных данных
+        
+        Args:
+            fetch_timeout: Дедлайн загрузки всех таймфреймов (сек)
+        """
         self.logger = get_secure_logger('market_data_service')
         self.timeframes = {
             '1m': "1",
@@ -23,39 +32,113 @@ class MarketDataService:
             '15m': "15",
             '1h': "60"
         }
+        self.fetch_timeout = fetch_timeout
+        
+        # Пул для параллельной загрузки таймфреймов (создается при первом запросе)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Незавершенные запросы прошлых циклов: (id api, таймфрейм) -> Future
+        self._inflight: Dict[tuple, Future] = {}
+        self._last_fetch_stats: Dict[str, Any] = {}
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=len(self.timeframes),
+                    thread_name_prefix='market_data'
+                )
+            return self._executor
     
-    def get_all_timeframes_data(self, api) -> Dict[str, pd.DataFrame]:
+    def get_all_timeframes_data(self, api, limit: int = 200,
+                                timeout: Optional[float] = None) -> Dict[str, pd.DataFrame]:
         """
         Получение данных по всем таймфреймам
         
+        Запросы выполняются параллельно, поэтому задержка близка к одному
+        HTTP запросу, а не к их сумме. Таймфреймы, не успевшие до дедлайна,
+        в результат не попадают (частичный результат); их запрос продолжает
+        выполняться и будет переиспользован в следующем цикле.
+        
         Args:
             api: API экземпляр для получения данных
+            limit: Количество свечей
+            timeout: Дедлайн в секундах (по умолчанию fetch_timeout)
             
         Returns:
             Dict: Словарь с данными по каждому таймфрейму
         """
-        all_market_data = {}
+        timeout = self.fetch_timeout if timeout is None else timeout
+        started = time.monotonic()
+        executor = self._get_executor()
+        
+        futures: Dict[Future, str] = {}
+        with self._executor_lock:
+            for tf_name, tf_value in self.timeframes.items():
+                key = (id(api), tf_name)
+                future = self._inflight.get(key)
+                if future is None or future.done():
+                    future = executor.submit(self._fetch_timeframe, api, tf_value, limit)
+                    self._inflight[key] = future
+                futures[future] = tf_name
         
-        for tf_name, tf_value in self.timeframes.items():
+        done, not_done = wait(futures, timeout=timeout)
+        
+        all_market_data = {}
+        failed = []
+        for future in done:
+            tf_name = futures[future]
             try:
-                df = api.get_ohlcv(interval=tf_value, limit=200)
+                df = future.result()
                 if df is not None and not df.empty:
                     all_market_data[tf_name] = df
                     self.logger.debug(f"📊 Получены данные {tf_name}: {len(df)} свечей")
                 else:
+                    failed.append(tf_name)
                     self.logger.warning(f"⚠️ Нет данных для {tf_name}")
-                    
             except Exception as e:
+                failed.append(tf_name)
                 self.logger.error(f"❌ Ошибка получения данных {tf_name}: {e}")
-                continue
+        
+        timed_out = sorted(futures[future] for future in not_done)
+        if timed_out:
+            self.logger.warning(f"⏱️ Дедлайн {timeout:.1f}с истек, нет данных для: {', '.join(timed_out)}")
+        
+        # Сохраняем порядок таймфреймов как при последовательной загрузке
+        all_market_data = {tf: all_market_data[tf] for tf in self.timeframes if tf in all_market_data}
+        
+        self._last_fetch_stats = {
+            'latency_ms': (time.monotonic() - started) * 1000,
+            'received': list(all_market_data),
+            'failed': sorted(failed),
+            'timed_out': timed_out,
+        }
         
         if all_market_data:
-            self.logger.info(f"✅ Загружены данные по {len(all_market_data)} таймфреймам")
+            self.logger.info(f"✅ Загружены данные по {len(all_market_data)} таймфреймам "
+                             f"за {self._last_fetch_stats['latency_ms']:.0f} мс")
         else:
             self.logger.error("❌ Не удалось получить рыночные данные")
         
         return all_market_data
     
+    @staticmethod
+    def _fetch_timeframe(api, interval: str, limit: int) -> Optional[pd.DataFrame]:
+        """Загрузка одного таймфрейма (выполняется в пуле)"""
+        return api.get_ohlcv(interval=interval, limit=limit)
+    
+    def get_fetch_stats(self) -> Dict[str, Any]:
+        """Статистика последней загрузки таймфреймов"""
+        return dict(self._last_fetch_stats)
+    
+    def shutdown(self) -> None:
+        """Остановка пула загрузки"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self._inflight.clear()
+    
     def get_current_price(self, api, symbol: str = "BTCUSDT") -> Optional[float]:
         """
         Получение текущей цены инструмента
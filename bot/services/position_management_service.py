@@ -87,8 +87,9 @@ class PositionManagementService:
                 state.take_profit = take_profit
                 state.position_size = trade_amount
                 
-                # Устанавливаем стопы отдельно
-                self._set_stops_if_needed(api, stop_loss, take_profit)
+                # Устанавливаем стопы отдельно, если они не ушли вместе с ордером (пакетный запрос)
+                if not order_response.get('stops_attached'):
+                    self._set_stops_if_needed(api, stop_loss, take_profit)
                 
                 self.logger.info(f"✅ Позиция {strategy_name} открыта успешно")
                 return order_response
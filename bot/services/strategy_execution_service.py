@@ -8,6 +8,7 @@ import importlib
 from typing import Dict, List, Any, Optional
 from bot.core.secure_logger import get_secure_logger
 from config import get_strategy_config
+from bot.strategy.utils.market_snapshot import MarketSnapshot, use_snapshot
 
 
 class StrategyExecutionService:
@@ -180,30 +181,35 @@ class StrategyExecutionService:
         """
         strategy_signals = {}
         
-        for strategy_name in active_strategies:
-            try:
-                if strategy_name not in strategy_states:
-                    self.logger.warning(f"⚠️ Нет состояния для стратегии {strategy_name}")
-                    continue
+        # Индикаторы считаются один раз за цикл и разделяются между стратегиями
+        snapshot = MarketSnapshot(all_market_data)
+        with use_snapshot(snapshot):
+            for strategy_name in active_strategies:
+                try:
+                    if strategy_name not in strategy_states:
+                        self.logger.warning(f"⚠️ Нет состояния для стратегии {strategy_name}")
+                        continue
                 
-                state = strategy_states[strategy_name]
+                    state = strategy_states[strategy_name]
                 
-                # Получаем текущий баланс для стратегии
-                current_balance = get_balance_func(strategy_name)
+                    # Получаем текущий баланс для стратегии
+                    current_balance = get_balance_func(strategy_name)
                 
-                # Выполняем стратегию
-                signal = self.execute_strategy(
-                    strategy_name, all_market_data, current_balance, state
-                )
+                    # Выполняем стратегию
+                    signal = self.execute_strategy(
+                        strategy_name, all_market_data, current_balance, state
+                    )
                 
-                if signal:
-                    strategy_signals[strategy_name] = signal
-                    self.logger.debug(f"📊 Сигнал {strategy_name}: {signal['signal_type']}")
+                    if signal:
+                        strategy_signals[strategy_name] = signal
+                        self.logger.debug(f"📊 Сигнал {strategy_name}: {signal['signal_type']}")
                 
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка выполнения стратегии {strategy_name}: {e}")
-                continue
-        
+                except Exception as e:
+                    self.logger.error(f"❌ Ошибка выполнения стратегии {strategy_name}: {e}")
+                    continue
+
+        self.logger.debug(f"📦 Снимок индикаторов: {snapshot.get_stats()}")
+
         if strategy_signals:
             self.logger.info(f"🎯 Получено сигналов: {len(strategy_signals)}")
         
@@ -8,7 +8,6 @@ from telegram.ext import (
     ContextTypes,
 )
 from bot.exchange.api_adapter import create_trading_bot_adapter
-from bot.exchange.bybit_api_v5 import BybitAPIV5
 from bot.cli import load_active_strategy, save_active_strategy
 from config import (
     TELEGRAM_TOKEN,
@@ -45,6 +44,17 @@ logging.getLogger("telegram.ext").setLevel(logging.WARNING)
 
 print("[DEBUG] telegram_bot.py загружен")
 
+# Колонки журнала, которые читает _profit_details (все поля, используемые обработчиком)
+PROFIT_DETAILS_COLUMNS = ['timestamp', 'strategy', 'signal', 'entry_price', 'tf', 'comment']
+
+# Колонки журнала, которые читают _charts и _analytics; разбивки считаются за последние
+# JOURNAL_STATS_DAYS дней, общее число сделок берется из манифеста хранилища
+ANALYTICS_COLUMNS = ['timestamp', 'strategy', 'signal', 'tf']
+CHARTS_COLUMNS = ANALYTICS_COLUMNS + ['entry_price', 'stop_loss', 'take_profit']
+JOURNAL_STATS_DAYS = 7
+# Имена колонок журнала -> имена, с которыми работают обработчики
+JOURNAL_STATS_RENAME = {'signal': 'side', 'tf': 'timeframe', 'stop_loss': 'sl_price', 'take_profit': 'tp_price'}
+
 class TelegramBot:
     def __init__(self, token):
         self.token = token
@@ -55,6 +65,14 @@ class TelegramBot:
         self._loop = None
         self._admin_id = ADMIN_CHAT_ID
         self.trader = None  # Ссылка на trader для доступа к API
+        self._async_api = None  # Асинхронный клиент Bybit (создается в event loop бота)
+
+    def _get_async_api(self):
+        """Асинхронный клиент Bybit для обработчиков: не блокирует event loop бота"""
+        if self._async_api is None:
+            from bot.exchange.bybit_async_api import AsyncBybitAPIV5
+            self._async_api = AsyncBybitAPIV5(BYBIT_API_KEY, BYBIT_API_SECRET, testnet=USE_TESTNET)
+        return self._async_api
 
     def _is_authorized(self, update: Update) -> bool:
         if self._admin_id is None:
@@ -202,9 +220,8 @@ class TelegramBot:
             return
         """Показать баланс аккаунта"""
         try:
-            # Получаем API credentials для Telegram bot
-            api = BybitAPIV5(BYBIT_API_KEY, BYBIT_API_SECRET, testnet=USE_TESTNET)
-            balance_data = api.get_wallet_balance_v5()
+            api = self._get_async_api()
+            balance_data = await api.get_wallet_balance_v5()
             
             if balance_data and balance_data.get('retCode') == 0:
                 balance_text = api.format_balance_v5(balance_data)
@@ -244,9 +261,9 @@ class TelegramBot:
             return
         """Показать текущие позиции"""
         try:
-            # Используем API v5 для получения позиций
-            api = BybitAPIV5(BYBIT_API_KEY, BYBIT_API_SECRET, testnet=USE_TESTNET)
-            positions = api.get_positions("BTCUSDT")
+            # Используем асинхронный API v5 для получения позиций
+            api = self._get_async_api()
+            positions = await api.get_positions("BTCUSDT")
             
             if positions and positions.get('result') and positions['result'].get('list'):
                 pos_list = positions['result']['list']
@@ -1047,8 +1064,8 @@ class TelegramBot:
             balance_text = "💰 *БАЛАНС АККАУНТА*\n\n"
             
             try:
-                api = BybitAPIV5(BYBIT_API_KEY, BYBIT_API_SECRET, testnet=USE_TESTNET)
-                balance_data = api.get_wallet_balance_v5()
+                api = self._get_async_api()
+                balance_data = await api.get_wallet_balance_v5()
                 if balance_data and balance_data.get('retCode') == 0:
                     result = balance_data['result']['list'][0]
                     total_equity = float(result['totalEquity'])
@@ -1070,7 +1087,7 @@ class TelegramBot:
             # Получаем позиции
             positions_text = "\n📋 *ОТКРЫТЫЕ ПОЗИЦИИ*\n\n"
             try:
-                positions_data = api.get_positions("BTCUSDT")
+                positions_data = await api.get_positions("BTCUSDT")
                 if positions_data and positions_data.get('retCode') == 0:
                     positions_list = positions_data['result']['list']
                     open_positions = 0
@@ -1148,36 +1165,21 @@ class TelegramBot:
         """Показать аналитику торговых результатов"""
         try:
             import pandas as pd
-            from datetime import datetime, timedelta
-            
-            journal_file = "data/trade_journal.csv"
-            if not os.path.exists(journal_file):
-                keyboard = [[InlineKeyboardButton("🔙 НАЗАД", callback_data="menu_back")]]
-                error_text = self._escape_markdown("📭 Файл журнала сделок не найден")
-                await self._edit_message_with_keyboard(
-                    update, context,
-                    error_text,
-                    keyboard
-                )
-                return
+            from datetime import datetime, timedelta, timezone
             
-            # Читаем данные с правильными параметрами для CSV и обработкой ошибок
-            import csv
+            from bot.core.trade_journal import journal_row_count, load_trade_journal
+
+            # Из колоночного хранилища читаются только нужные колонки за последнюю неделю
+            week_ago = datetime.now(timezone.utc) - timedelta(days=JOURNAL_STATS_DAYS)
             try:
-                df = pd.read_csv(journal_file, quoting=csv.QUOTE_ALL)  # Правильная обработка кавычек
-            except pd.errors.ParserError as e:
-                # Если CSV поврежден (несовпадение колонок), пропускаем плохие строки
-                try:
-                    df = pd.read_csv(journal_file, quoting=csv.QUOTE_ALL, on_bad_lines='skip')
-                except:
-                    # Если все еще ошибка, используем базовый парсер
-                    try:
-                        df = pd.read_csv(journal_file, on_bad_lines='skip', engine='python')
-                    except Exception as parse_error:
-                        # Последняя попытка - создаем пустой DataFrame и логируем
-                        import logging
-                        logging.getLogger(__name__).error(f"CSV parsing error: {parse_error}")
-                        df = pd.DataFrame()
+                df = load_trade_journal(start=week_ago, columns=CHARTS_COLUMNS)
+                df = df.rename(columns=JOURNAL_STATS_RENAME)
+                total_trades = journal_row_count() or len(df)
+            except Exception as load_error:
+                import logging
+                logging.getLogger(__name__).error(f"Journal load error: {load_error}")
+                df = pd.DataFrame()
+                total_trades = 0
             if df.empty:
                 keyboard = [[InlineKeyboardButton("🔙 НАЗАД", callback_data="menu_back")]]
                 error_text = self._escape_markdown("📭 Нет данных для анализа")
@@ -1197,14 +1199,8 @@ class TelegramBot:
                 # Если не удалось конвертировать, используем текущее время
                 df['datetime'] = datetime.now()
             
-            # Фильтруем данные за последние 7 дней
-            from datetime import timezone
-            week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-            df_recent = df[df['datetime'] >= week_ago]
-            
-            # Основная статистика
-            total_trades = len(df)
-            recent_trades = len(df_recent)
+            # Основная статистика (df - уже только последние 7 дней)
+            recent_trades = len(df)
             
             # Статистика по сигналам
             buy_signals = len(df[df['side'] == 'BUY'])
@@ -1235,7 +1231,7 @@ class TelegramBot:
             charts_text += f"   🔴 Продажи: {sell_signals}\n\n"
             
             # Статистика по стратегиям
-            charts_text += "🎯 *По стратегиям:*\n"
+            charts_text += "🎯 *По стратегиям за неделю:*\n"
             for strategy, count in strategy_stats.head(5).items():
                 strategy_buy = len(df[(df['strategy'] == strategy) & (df['side'] == 'BUY')])
                 strategy_sell = len(df[(df['strategy'] == strategy) & (df['side'] == 'SELL')])
@@ -1243,7 +1239,7 @@ class TelegramBot:
                 charts_text += f"      🟢 {strategy_buy} | 🔴 {strategy_sell}\n"
             
             # Статистика по таймфреймам
-            charts_text += "\n⏰ *По таймфреймам:*\n"
+            charts_text += "\n⏰ *По таймфреймам за неделю:*\n"
             try:
                 for tf, count in tf_stats.head(5).items():
                     tf_buy = len(df[(df['timeframe'] == tf) & (df['side'] == 'BUY')])
@@ -1666,98 +1662,90 @@ class TelegramBot:
             import pandas as pd
             from datetime import datetime, timedelta, timezone
 
-            # Проверяем журнал сделок
-            journal_file = "data/trade_journal.csv"
-            if not os.path.exists(journal_file):
+            from bot.core.trade_journal import load_trade_journal
+
+            # Читаем из хранилища журнала только нужные колонки
+            df = load_trade_journal(columns=PROFIT_DETAILS_COLUMNS)
+            if df.empty:
                 details_text = "📈 *ДЕТАЛЬНАЯ СТАТИСТИКА*\n\n"
                 details_text += "❌ Нет данных для анализа\n"
-                details_text += "📊 Файл trade_journal.csv не найден"
+                details_text += "📊 Журнал пуст"
             else:
-                # Читаем данные с обработкой ошибок
-                try:
-                    df = pd.read_csv(journal_file, quoting=1)
-                except pd.errors.ParserError:
-                    df = pd.read_csv(journal_file, on_bad_lines='skip', engine='python')
+                # Конвертируем timestamp
+                df['datetime'] = pd.to_datetime(df['timestamp'], errors='coerce')
+                df = df[df['datetime'].notna()]
 
-                if df.empty:
-                    details_text = "📈 *ДЕТАЛЬНАЯ СТАТИСТИКА*\n\n"
-                    details_text += "❌ Нет данных для анализа\n"
-                    details_text += "📊 Файл пуст"
-                else:
-                    # Конвертируем timestamp
-                    df['datetime'] = pd.to_datetime(df['timestamp'], errors='coerce')
-                    df = df[df['datetime'].notna()]
+                # Фильтруем данные за периоды
+                now = datetime.now(timezone.utc)
+                day_ago = now - timedelta(days=1)
+                week_ago = now - timedelta(days=7)
+                month_ago = now - timedelta(days=30)
 
-                    # Фильтруем данные за периоды
-                    now = datetime.now(timezone.utc)
-                    day_ago = now - timedelta(days=1)
-                    week_ago = now - timedelta(days=7)
-                    month_ago = now - timedelta(days=30)
+                df_24h = df[df['datetime'] >= day_ago]
+                df_7d = df[df['datetime'] >= week_ago]
+                df_30d = df[df['datetime'] >= month_ago]
 
-                    df_24h = df[df['datetime'] >= day_ago]
-                    df_7d = df[df['datetime'] >= week_ago]
-                    df_30d = df[df['datetime'] >= month_ago]
-
-                    details_text = "📈 *ДЕТАЛЬНАЯ СТАТИСТИКА*\n\n"
-
-                    # Общая статистика по периодам
-                    details_text += "📊 *Сигналы по периодам:*\n"
-                    details_text += f"   📅 За 24 часа: {len(df_24h)}\n"
-                    details_text += f"   📅 За 7 дней: {len(df_7d)}\n"
-                    details_text += f"   📅 За 30 дней: {len(df_30d)}\n"
-                    details_text += f"   📅 Всего: {len(df)}\n\n"
-
-                    # Детальная статистика по стратегиям
-                    details_text += "🎯 *Анализ по стратегиям:*\n"
-                    strategy_stats = df.groupby('strategy').agg({
-                        'signal': ['count'],
-                        'entry_price': ['mean']
-                    }).round(2)
-
-                    strategy_signals = df['strategy'].value_counts()
-                    for strategy, count in strategy_signals.head(10).items():
-                        buy_count = len(df[(df['strategy'] == strategy) & (df['signal'] == 'BUY')])
-                        sell_count = len(df[(df['strategy'] == strategy) & (df['signal'] == 'SELL')])
-
-                        # Последние сигналы этой стратегии
-                        recent_strategy = df[df['strategy'] == strategy].tail(5)
-                        if not recent_strategy.empty:
-                            avg_price = recent_strategy['entry_price'].mean()
-                            last_signal = recent_strategy.iloc[-1]['signal']
-                            last_time = recent_strategy.iloc[-1]['datetime'].strftime('%m-%d %H:%M')
-                        else:
-                            avg_price = 0
-                            last_signal = "N/A"
-                            last_time = "N/A"
-
-                        details_text += f"\n📊 *{strategy}*:\n"
-                        details_text += f"   📈 Всего: {count} ({buy_count} BUY / {sell_count} SELL)\n"
-                        details_text += f"   💰 Средняя цена: ${avg_price:.2f}\n"
-                        details_text += f"   🕐 Последний: {last_signal} ({last_time})\n"
-
-                    # Статистика по таймфреймам
-                    details_text += "\n⏰ *По таймфреймам:*\n"
-                    tf_stats = df['tf'].value_counts()
-                    for tf, count in tf_stats.items():
-                        tf_buy = len(df[(df['tf'] == tf) & (df['signal'] == 'BUY')])
-                        tf_sell = len(df[(df['tf'] == tf) & (df['signal'] == 'SELL')])
-                        details_text += f"   {tf}: {count} ({tf_buy} BUY / {tf_sell} SELL)\n"
-
-                    # Активность по часам (последние 24 часа)
-                    if not df_24h.empty:
-                        details_text += "\n🕐 *Активность за 24 часа:*\n"
-                        hourly_activity = df_24h.groupby(df_24h['datetime'].dt.hour).size()
-                        for hour in sorted(hourly_activity.index):
-                            count = hourly_activity[hour]
-                            details_text += f"   {hour:02d}:00 - {count} сигналов\n"
-
-                    # Топ комментарии/причины
-                    details_text += "\n💬 *Топ причины сигналов:*\n"
-                    comment_stats = df['comment'].value_counts()
-                    for comment, count in comment_stats.head(5).items():
-                        if len(comment) > 30:
-                            comment = comment[:27] + "..."
-                        details_text += f"   • {comment}: {count}\n"
+                details_text = "📈 *ДЕТАЛЬНАЯ СТАТИСТИКА*\n\n"
+
+                # Общая статистика по периодам
+                details_text += "📊 *Сигналы по периодам:*\n"
+                details_text += f"   📅 За 24 часа: {len(df_24h)}\n"
+                details_text += f"   📅 За 7 дней: {len(df_7d)}\n"
+                details_text += f"   📅 За 30 дней: {len(df_30d)}\n"
+                details_text += f"   📅 Всего: {len(df)}\n\n"
+
+                # Детальная статистика по стратегиям
+                details_text += "🎯 *Анализ по стратегиям:*\n"
+                strategy_stats = df.groupby('strategy').agg({
+                    'signal': ['count'],
+                    'entry_price': ['mean']
+                }).round(2)
+
+                strategy_signals = df['strategy'].value_counts()
+                for strategy, count in strategy_signals.head(10).items():
+                    buy_count = len(df[(df['strategy'] == strategy) & (df['signal'] == 'BUY')])
+                    sell_count = len(df[(df['strategy'] == strategy) & (df['signal'] == 'SELL')])
+
+                    # Последние сигналы этой стратегии
+                    recent_strategy = df[df['strategy'] == strategy].tail(5)
+                    if not recent_strategy.empty:
+                        avg_price = recent_strategy['entry_price'].mean()
+                        last_signal = recent_strategy.iloc[-1]['signal']
+                        last_time = recent_strategy.iloc[-1]['datetime'].strftime('%m-%d %H:%M')
+                    else:
+                        avg_price = 0
+                        last_signal = "N/A"
+                        last_time = "N/A"
+
+                    details_text += f"\n📊 *{strategy}*:\n"
+                    details_text += f"   📈 Всего: {count} ({buy_count} BUY / {sell_count} SELL)\n"
+                    details_text += f"   💰 Средняя цена: ${avg_price:.2f}\n"
+                    details_text += f"   🕐 Последний: {last_signal} ({last_time})\n"
+
+                # Статистика по таймфреймам
+                details_text += "\n⏰ *По таймфреймам:*\n"
+                tf_stats = df['tf'].value_counts()
+                for tf, count in tf_stats.items():
+                    tf_buy = len(df[(df['tf'] == tf) & (df['signal'] == 'BUY')])
+                    tf_sell = len(df[(df['tf'] == tf) & (df['signal'] == 'SELL')])
+                    details_text += f"   {tf}: {count} ({tf_buy} BUY / {tf_sell} SELL)\n"
+
+                # Активность по часам (последние 24 часа)
+                if not df_24h.empty:
+                    details_text += "\n🕐 *Активность за 24 часа:*\n"
+                    hourly_activity = df_24h.groupby(df_24h['datetime'].dt.hour).size()
+                    for hour in sorted(hourly_activity.index):
+                        count = hourly_activity[hour]
+                        details_text += f"   {hour:02d}:00 - {count} сигналов\n"
+
+                # Топ комментарии/причины
+                details_text += "\n💬 *Топ причины сигналов:*\n"
+                comments = df['comment'].dropna().astype(str)
+                comment_stats = comments[comments != ''].value_counts()
+                for comment, count in comment_stats.head(5).items():
+                    if len(comment) > 30:
+                        comment = comment[:27] + "..."
+                    details_text += f"   • {comment}: {count}\n"
 
             keyboard = [
                 [
@@ -1888,12 +1876,15 @@ class TelegramBot:
             import pandas as pd
             from datetime import datetime, timedelta, timezone
 
-            # Читаем журнал сделок
-            import csv
+            # Из колоночного хранилища читаются только нужные колонки за последнюю неделю
+            from bot.core.trade_journal import journal_row_count, load_trade_journal
+            week_ago = datetime.now(timezone.utc) - timedelta(days=JOURNAL_STATS_DAYS)
             try:
-                df = pd.read_csv('data/trade_journal.csv', quoting=csv.QUOTE_ALL)
+                df = load_trade_journal(start=week_ago, columns=ANALYTICS_COLUMNS)
+                df = df.rename(columns=JOURNAL_STATS_RENAME)
+                total_trades = journal_row_count() or len(df)
                 if df.empty:
-                    raise ValueError("Журнал сделок пуст")
+                    raise ValueError("Нет сделок за последние 7 дней")
 
                 # Конвертируем timestamp в datetime если нужно
                 if 'timestamp' in df.columns:
@@ -1906,12 +1897,8 @@ class TelegramBot:
             except Exception as e:
                 raise ValueError(f"Ошибка чтения данных: {e}")
 
-            # Анализируем последние 7 дней
-            week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-            df_recent = df[df['datetime'] >= week_ago]
-
-            # Основная статистика
-            total_trades = len(df)
+            # Основная статистика (df - уже только последние 7 дней)
+            df_recent = df.copy()
             recent_trades = len(df_recent)
             buy_signals = len(df[df['side'] == 'BUY'])
             sell_signals = len(df[df['side'] == 'SELL'])
@@ -1939,21 +1926,21 @@ class TelegramBot:
             analytics_text += f"   📈 Всего сигналов: {total_trades:,}\n"
             analytics_text += f"   📅 За неделю: {recent_trades:,}\n"
             analytics_text += f"   ⏰ За 24 часа: {today_trades}\n"
-            analytics_text += f"   🟢 Покупки: {buy_signals:,} ({buy_signals/total_trades*100:.1f}%)\n"
-            analytics_text += f"   🔴 Продажи: {sell_signals:,} ({sell_signals/total_trades*100:.1f}%)\n\n"
+            analytics_text += f"   🟢 Покупки: {buy_signals:,} ({buy_signals/recent_trades*100:.1f}%)\n"
+            analytics_text += f"   🔴 Продажи: {sell_signals:,} ({sell_signals/recent_trades*100:.1f}%)\n\n"
 
             # Топ стратегий
-            analytics_text += "🎯 *Топ-5 стратегий:*\n"
+            analytics_text += "🎯 *Топ-5 стратегий за неделю:*\n"
             for i, (strategy, count) in enumerate(strategy_stats.items(), 1):
                 strategy_name = strategy.replace('_', '\\_')
-                percentage = count/total_trades*100
+                percentage = count/recent_trades*100
                 analytics_text += f"   {i}\\. {strategy_name}\n"
                 analytics_text += f"      📊 {count:,} сигналов ({percentage:.1f}%)\n"
 
             # Временные фреймы
-            analytics_text += "\n⏰ *Популярные таймфреймы:*\n"
+            analytics_text += "\n⏰ *Популярные таймфреймы за неделю:*\n"
             for tf, count in tf_stats.items():
-                percentage = count/total_trades*100
+                percentage = count/recent_trades*100
                 analytics_text += f"   📊 {tf}: {count:,} ({percentage:.1f}%)\n"
 
             # Активность по времени
@@ -2020,9 +2007,10 @@ class TelegramBot:
             trade_journal_size = 0
             trade_journal_lines = 0
             if os.path.exists('data/trade_journal.csv'):
+                from bot.core.trade_journal import journal_row_count
                 trade_journal_size = os.path.getsize('data/trade_journal.csv')
-                with open('data/trade_journal.csv', 'r') as f:
-                    trade_journal_lines = sum(1 for _ in f) - 1  # Исключаем заголовок
+                # Число строк берется из манифеста хранилища, без чтения файла
+                trade_journal_lines = journal_row_count()
 
             log_files_size = 0
             if os.path.exists('trading_bot.log'):
@@ -2437,6 +2425,10 @@ class TelegramBot:
             finally:
                 # Безопасное закрытие loop
                 try:
+                    if self._async_api is not None and self._loop and not self._loop.is_running():
+                        # Сессия aiohttp привязана к этому loop - закрываем ее вместе с ним
+                        self._loop.run_until_complete(self._async_api.close())
+                        self._async_api = None
                     if self._loop and not self._loop.is_closed():
                         # Не закрываем running loop принудительно
                         if not self._loop.is_running():
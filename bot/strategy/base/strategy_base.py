@@ -21,6 +21,7 @@ from .mixins import (
     LoggingMixin
 )
 from ..utils.indicators import TechnicalIndicators
+from ..utils.market_snapshot import get_active_snapshot, snapshot_memoize
 from ..utils.validators import DataValidator, ValidationLevel
 from ..utils.levels import LevelsFinder
 from ..utils.market_analysis import MarketRegimeAnalyzer
@@ -38,6 +39,12 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
     - Статистику и мониторинг
     - Адаптацию под рыночные условия
     """
+
+    # Таймфреймы, закрытие бара на которых запускает стратегию (None - из конфигурации)
+    required_timeframes: Optional[Tuple[str, ...]] = None
+
+    # Основной таймфрейм: его читают execute и should_exit_position (get_primary_dataframe)
+    primary_timeframe: str = '5m'
     
     def __init__(self, config: BaseStrategyConfig, strategy_name: str):
         """
@@ -211,8 +218,8 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
             if isinstance(market_data, pd.DataFrame):
                 return market_data
             elif isinstance(market_data, dict):
-                # Ищем основной таймфрейм (5m, 1h, или первый доступный)
-                priority_tfs = ['5m', '1h', '15m', '1m']
+                # Ищем основной таймфрейм (primary_timeframe, 5m, 1h, или первый доступный)
+                priority_tfs = list(dict.fromkeys([self.primary_timeframe, '5m', '1h', '15m', '1m']))
                 
                 for tf in priority_tfs:
                     if tf in market_data and market_data[tf] is not None:
@@ -229,6 +236,30 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
             self.logger.error(f"Ошибка получения основного DataFrame: {e}")
             return None
 
+    def get_required_timeframes(self) -> Optional[List[str]]:
+        """
+        Таймфреймы, от которых зависит стратегия
+
+        Планировщик торгового цикла выполняет стратегию только на закрытии бара
+        одного из этих таймфреймов. По умолчанию берутся атрибут класса
+        required_timeframes или fast_tf/slow_tf/timeframe из конфигурации вместе
+        с основным таймфреймом (primary_timeframe): входы и выходы считаются по
+        основному таймфрейму и не должны ждать закрытия старших баров.
+
+        Returns:
+            Список таймфреймов или None (стратегия зависит от всех таймфреймов)
+        """
+        timeframes = getattr(self, 'required_timeframes', None)
+        if not timeframes:
+            timeframes = [
+                getattr(self.config, attr) for attr in ('fast_tf', 'slow_tf', 'timeframe')
+                if getattr(self.config, attr, None)
+            ]
+            if not timeframes:
+                return None
+            timeframes = [self.primary_timeframe] + timeframes
+        return list(dict.fromkeys(getattr(tf, 'value', tf) for tf in timeframes))
+
     def calculate_atr_safe(self, df: pd.DataFrame, period: int = 14):
         """
         Обратная совместимость: делегирует вызов TechnicalIndicators.calculate_atr_safe
@@ -247,6 +278,15 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
             Dict с базовыми индикаторами
         """
         try:
+            # Внутри торгового цикла базовые индикаторы общие для всех стратегий
+            snapshot = get_active_snapshot()
+            if snapshot is not None and snapshot.timeframe_of(df) is not None:
+                shared = snapshot_memoize(
+                    df, ('base_indicators', self.config.atr_period),
+                    lambda: self._compute_base_indicators(df)
+                )
+                return dict(shared)
+            
             # Проверяем кэш
             cache_key = f"base_indicators_{len(df)}"
             current_time = datetime.now()
@@ -256,31 +296,7 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
                 (current_time - self._cache_timestamp).seconds < 60):  # Кэш на 1 минуту
                 return self._indicator_cache[cache_key]
             
-            indicators = {}
-            
-            # ATR - всегда нужен для SL/TP
-            atr_result = TechnicalIndicators.calculate_atr_safe(df, self.config.atr_period)
-            if atr_result.is_valid:
-                indicators['atr'] = atr_result.value
-            
-            # RSI - для фильтрации перекупленности/перепроданности
-            rsi_result = TechnicalIndicators.calculate_rsi(df, 14)
-            if rsi_result.is_valid:
-                indicators['rsi'] = rsi_result.value
-            
-            # Bollinger Bands - для определения волатильности
-            bb_result = TechnicalIndicators.calculate_bollinger_bands(df, 20)
-            if bb_result.is_valid:
-                indicators['bb'] = bb_result.value
-            
-            # Volume SMA если есть объемы
-            if 'volume' in df.columns:
-                indicators['volume_sma'] = df['volume'].rolling(20, min_periods=1).mean()
-                indicators['volume_ratio'] = df['volume'] / indicators['volume_sma']
-            
-            # Базовые SMA для трендового анализа
-            indicators['sma_20'] = TechnicalIndicators.calculate_sma(df, 20).value
-            indicators['sma_50'] = TechnicalIndicators.calculate_sma(df, 50).value
+            indicators = self._compute_base_indicators(df)
             
             # Кэшируем результат
             self._indicator_cache[cache_key] = indicators
@@ -292,6 +308,36 @@ class BaseStrategy(ABC, PositionManagerMixin, StatisticsMixin, PriceUtilsMixin,
             self.logger.error(f"Ошибка расчета базовых индикаторов: {e}")
             return {}
     
+    def _compute_base_indicators(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Расчет базовых индикаторов без кэширования"""
+        indicators = {}
+        
+        # ATR - всегда нужен для SL/TP
+        atr_result = TechnicalIndicators.calculate_atr_safe(df, self.config.atr_period)
+        if atr_result.is_valid:
+            indicators['atr'] = atr_result.value
+        
+        # RSI - для фильтрации перекупленности/перепроданности
+        rsi_result = TechnicalIndicators.calculate_rsi(df, 14)
+        if rsi_result.is_valid:
+            indicators['rsi'] = rsi_result.value
+        
+        # Bollinger Bands - для определения волатильности
+        bb_result = TechnicalIndicators.calculate_bollinger_bands(df, 20)
+        if bb_result.is_valid:
+            indicators['bb'] = bb_result.value
+        
+        # Volume SMA если есть объемы
+        if 'volume' in df.columns:
+            indicators['volume_sma'] = df['volume'].rolling(20, min_periods=1).mean()
+            indicators['volume_ratio'] = df['volume'] / indicators['volume_sma']
+        
+        # Базовые SMA для трендового анализа
+        indicators['sma_20'] = TechnicalIndicators.calculate_sma(df, 20).value
+        indicators['sma_50'] = TechnicalIndicators.calculate_sma(df, 50).value
+        
+        return indicators
+    
     def calculate_dynamic_levels(self, df: pd.DataFrame, entry_price: float, side: str) -> Tuple[float, float]:
         """
         Расчет динамических уровней SL/TP с адаптацией под рыночный режим
@@ -6,12 +6,18 @@
 
 """
 from .indicators import TechnicalIndicators
+from .streaming_indicators import StreamingIndicators, get_streaming_indicators
+from .market_snapshot import MarketSnapshot, use_snapshot
 from .validators import DataValidator, MultiTimeframeValidator
 from .levels import LevelsFinder
 from .market_analysis import MarketRegimeAnalyzer
 
 __all__ = [
     "TechnicalIndicators",
+    "StreamingIndicators",
+    "get_streaming_indicators",
+    "MarketSnapshot",
+    "use_snapshot",
     "DataValidator", 
     "MultiTimeframeValidator",
     "LevelsFinder",
@@ -14,63 +14,83 @@ from enum import Enum
 import time
 import hashlib
 from functools import lru_cache
-from threading import Lock
+
+try:
+    import xxhash
+except ImportError:  # xxhash - опциональное ускорение, иначе используется blake2b
+    xxhash = None
+
+from .market_snapshot import call_key, get_active_snapshot
+from .ttl_cache import TTLCache
+from .volume_at_price import TOUCH, profile_arrays, volume_at_price
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
 # КРИТИЧЕСКАЯ ОПТИМИЗАЦИЯ: TTL Cache для индикаторов
-class TTLCache:
-    """Time-To-Live cache для критических индикаторов"""
-    def __init__(self, maxsize: int = 100, ttl: int = 60):
-        self.maxsize = maxsize
-        self.ttl = ttl
-        self._cache = {}
-        self._timestamps = {}
-        self._lock = Lock()
-
-    def get(self, key):
-        with self._lock:
-            if key in self._cache:
-                if time.time() - self._timestamps[key] < self.ttl:
-                    return self._cache[key]
-                else:
-                    # Устаревший кэш - удаляем
-                    del self._cache[key]
-                    del self._timestamps[key]
-        return None
-
-    def put(self, key, value):
-        with self._lock:
-            # Очищаем старые записи если кэш переполнен
-            if len(self._cache) >= self.maxsize:
-                oldest_key = min(self._timestamps.keys(), key=lambda k: self._timestamps[k])
-                del self._cache[oldest_key]
-                del self._timestamps[oldest_key]
-
-            self._cache[key] = value
-            self._timestamps[key] = time.time()
-
-    def clear(self):
-        with self._lock:
-            self._cache.clear()
-            self._timestamps.clear()
-
 # Глобальные кэши для критических индикаторов
 _VWAP_CACHE = TTLCache(maxsize=50, ttl=30)    # VWAP - 30 сек
 _RSI_CACHE = TTLCache(maxsize=100, ttl=60)     # RSI - 60 сек
 _ATR_CACHE = TTLCache(maxsize=100, ttl=60)     # ATR - 60 сек
 _SMA_CACHE = TTLCache(maxsize=200, ttl=120)    # SMA - 2 мин
 
-def _create_data_hash(df: pd.DataFrame, params: str = "") -> str:
-    """Создание хэша для кэширования данных"""
+def _new_hasher():
+    """Быстрый некриптографический хэшер (xxh3, если установлен xxhash)"""
+    if xxhash is not None:
+        return xxhash.xxh3_64()
+    return hashlib.blake2b(digest_size=8)
+
+
+def _frame_timestamps(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Метки времени баров как int64 (колонка timestamp или DatetimeIndex)"""
+    if 'timestamp' in df.columns:
+        values = df['timestamp'].to_numpy()
+    elif isinstance(df.index, pd.DatetimeIndex):
+        values = df.index.to_numpy()
+    else:
+        return None
+    if values.dtype.kind == 'M':
+        return values.view('int64')
+    return values if values.dtype.kind in 'iuf' else None
+
+
+def data_fingerprint(df: pd.DataFrame) -> Tuple:
+    """
+    Дешевый отпечаток содержимого DataFrame для ключей кэша
+
+    (длина, первая и последняя метка времени, хэш сырых буферов всех числовых
+    колонок). Хэшируются байты массивов без форматирования в строку, поэтому
+    отпечаток меняется при изменении любой строки, а не только последних.
+    """
+    hasher = _new_hasher()
+    for column, series in df.items():
+        values = series.to_numpy()
+        kind = values.dtype.kind
+        if kind == 'M':
+            values = values.view('int64')
+        elif kind not in 'fiub':
+            continue
+        hasher.update(str(column).encode())
+        hasher.update(np.ascontiguousarray(values))
+
+    if isinstance(df.index, pd.DatetimeIndex):
+        hasher.update(np.ascontiguousarray(df.index.asi8))
+
+    timestamps = _frame_timestamps(df)
+    if timestamps is not None and len(timestamps):
+        first_ts, last_ts = timestamps[0].item(), timestamps[-1].item()
+    else:
+        first_ts = last_ts = None
+
+    return (len(df), first_ts, last_ts, hasher.hexdigest())
+
+
+def _create_data_hash(df: pd.DataFrame, params: str = "") -> Tuple:
+    """Создание ключа кэша для данных и параметров индикатора"""
     try:
-        # Используем последние 10 строк + параметры для хэша
-        last_data = df.tail(10)
-        data_str = f"{last_data.to_string()}{params}"
-        return hashlib.md5(data_str.encode()).hexdigest()[:16]
-    except:
-        return f"fallback_{time.time()}"
+        return (params,) + data_fingerprint(df)
+    except Exception:
+        return ("fallback", params, time.time())
 
 
 class IndicatorError(Exception):
@@ -135,6 +155,21 @@ class TechnicalIndicators:
     def _safe_calculation(func):
         """Декоратор для безопасного выполнения расчетов индикаторов"""
         def wrapper(*args, **kwargs):
+            # Внутри торгового цикла результат разделяется между стратегиями
+            snapshot = get_active_snapshot()
+            if snapshot is not None and args:
+                timeframe = snapshot.timeframe_of(args[0])
+                key = call_key(func, args, kwargs) if timeframe is not None else None
+                if key is not None:
+                    # Индикатор с инкрементальной версией обновляет поток (symbol, timeframe)
+                    stream = snapshot.indicator_stream(timeframe)
+                    method = getattr(stream, func.__name__, None) if stream is not None else None
+                    if method is not None:
+                        return snapshot.get_or_compute(timeframe, key, lambda: method(*args, **kwargs))
+                    return snapshot.get_or_compute(timeframe, key, lambda: calculate(*args, **kwargs))
+            return calculate(*args, **kwargs)
+
+        def calculate(*args, **kwargs):
             try:
                 import time
                 start_time = time.time()
@@ -199,6 +234,11 @@ class TechnicalIndicators:
         Returns:
             IndicatorResult с последним значением ATR
         """
+        cache_key = _create_data_hash(df, f"atr_safe_{period}")
+        cached_atr = _ATR_CACHE.get(cache_key)
+        if cached_atr is not None:
+            return cached_atr
+
         required_cols = ['high', 'low', 'close']
         TechnicalIndicators._validate_dataframe(df, required_cols, period)
         
@@ -231,12 +271,18 @@ class TechnicalIndicators:
             logger.warning(f"ATR fallback: {fallback_atr}")
             return fallback_atr
         
+        _ATR_CACHE.put(cache_key, float(last_atr))
         return float(last_atr)
     
     @staticmethod
     @_safe_calculation
     def calculate_atr_series(df: pd.DataFrame, period: int = 14) -> pd.Series:
         """ATR как Series для графиков и дальнейшего анализа"""
+        cache_key = _create_data_hash(df, f"atr_series_{period}")
+        cached_atr = _ATR_CACHE.get(cache_key)
+        if cached_atr is not None:
+            return cached_atr
+
         required_cols = ['high', 'low', 'close']
         TechnicalIndicators._validate_dataframe(df, required_cols, period)
         
@@ -251,7 +297,9 @@ class TechnicalIndicators:
         tr_df = pd.DataFrame({'tr1': tr1, 'tr2': tr2, 'tr3': tr3})
         tr = tr_df.max(axis=1)
         
-        return tr.rolling(window=period, min_periods=1).mean()
+        atr = tr.rolling(window=period, min_periods=1).mean()
+        _ATR_CACHE.put(cache_key, atr)
+        return atr
     
     # =========================================================================
     # ОСЦИЛЛЯТОРЫ
@@ -617,26 +665,9 @@ class TechnicalIndicators:
         max_price = df['high'].max()
         price_bins = np.linspace(min_price, max_price, price_levels + 1)
         
-        # Создаем профиль объема
-        volume_profile = np.zeros(price_levels)
-        
-        for i, row in df.iterrows():
-            # Распределяем объем по ценовым уровням внутри свечи
-            low_idx = np.digitize(row['low'], price_bins) - 1
-            high_idx = np.digitize(row['high'], price_bins) - 1
-            
-            # Ограничиваем индексы
-            low_idx = max(0, min(low_idx, price_levels - 1))
-            high_idx = max(0, min(high_idx, price_levels - 1))
-            
-            # Распределяем объем равномерно по затронутым уровням
-            if low_idx == high_idx:
-                volume_profile[low_idx] += row['volume']
-            else:
-                levels_count = high_idx - low_idx + 1
-                volume_per_level = row['volume'] / levels_count
-                for level in range(low_idx, high_idx + 1):
-                    volume_profile[level] += volume_per_level
+        # Создаем профиль объема (векторизованное ядро вместо построчного цикла)
+        lows, highs, volumes = profile_arrays(df)
+        volume_profile = volume_at_price(lows, highs, volumes, price_bins, method=TOUCH)
         
         # Находим уровень максимального объема (POC - Point of Control)
         poc_idx = np.argmax(volume_profile)
@@ -12,6 +12,9 @@ from enum import Enum
 import logging
 from datetime import datetime, timedelta
 
+from .indicators import TTLCache, data_fingerprint
+from .volume_at_price import TOUCH, profile_arrays, volume_at_price
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
@@ -127,42 +130,56 @@ class LevelsFinder:
     @staticmethod
     def _find_swing_highs(df: pd.DataFrame, lookback: int) -> List[Tuple[int, float, datetime]]:
         """Поиск swing high точек"""
-        swing_highs = []
-        
-        for i in range(lookback, len(df) - lookback):
-            current_high = df['high'].iloc[i]
-            
-            # Проверяем, является ли текущая точка локальным максимумом
-            left_side = df['high'].iloc[i-lookback:i]
-            right_side = df['high'].iloc[i+1:i+lookback+1]
-            
-            if (current_high >= left_side.max() and 
-                current_high >= right_side.max()):
-                
-                timestamp = df.index[i] if hasattr(df.index[i], 'to_pydatetime') else datetime.now()
-                swing_highs.append((i, current_high, timestamp))
-        
-        return swing_highs
+        return LevelsFinder._find_swing_points(df, 'high', lookback, is_high=True)
     
     @staticmethod
     def _find_swing_lows(df: pd.DataFrame, lookback: int) -> List[Tuple[int, float, datetime]]:
         """Поиск swing low точек"""
-        swing_lows = []
+        return LevelsFinder._find_swing_points(df, 'low', lookback, is_high=False)
+    
+    @staticmethod
+    def _find_swing_points(df: pd.DataFrame, column: str, lookback: int,
+                           is_high: bool) -> List[Tuple[int, float, datetime]]:
+        """
+        Векторизованный поиск локальных экстремумов за O(n)
         
-        for i in range(lookback, len(df) - lookback):
-            current_low = df['low'].iloc[i]
-            
-            # Проверяем, является ли текущая точка локальным минимумом
-            left_side = df['low'].iloc[i-lookback:i]
-            right_side = df['low'].iloc[i+1:i+lookback+1]
-            
-            if (current_low <= left_side.min() and 
-                current_low <= right_side.min()):
-                
-                timestamp = df.index[i] if hasattr(df.index[i], 'to_pydatetime') else datetime.now()
-                swing_lows.append((i, current_low, timestamp))
+        Точка i - swing high, если high[i] >= max(high[i-lookback:i]) и
+        high[i] >= max(high[i+1:i+lookback+1]) (для swing low - аналогично с min).
+        Максимумы всех окон длины lookback считаются одним проходом по
+        strided-представлению массива вместо двух срезов pandas на каждый бар.
+        """
+        if lookback < 1 or len(df) < 2 * lookback + 1:
+            return []
+        
+        values = df[column].to_numpy(dtype=float)
+        
+        # pandas max/min пропускают NaN - заменяем их нейтральным значением
+        neutral = -np.inf if is_high else np.inf
+        filled = np.where(np.isnan(values), neutral, values)
+        
+        windows = np.lib.stride_tricks.sliding_window_view(filled, lookback)
+        extremes = windows.max(axis=1) if is_high else windows.min(axis=1)
+        
+        # extremes[j] - экстремум окна [j, j + lookback)
+        candidates = values[lookback:len(values) - lookback]
+        left = extremes[:len(candidates)]
+        right = extremes[lookback + 1:lookback + 1 + len(candidates)]
+        
+        if is_high:
+            mask = (candidates >= left) & (candidates >= right)
+        else:
+            mask = (candidates <= left) & (candidates <= right)
         
-        return swing_lows
+        positions = np.flatnonzero(mask) + lookback
+        if len(positions) == 0:
+            return []
+        
+        if isinstance(df.index, pd.DatetimeIndex):
+            timestamps = [df.index[i] for i in positions]
+        else:
+            timestamps = [datetime.now()] * len(positions)
+        
+        return [(int(i), values[i], ts) for i, ts in zip(positions, timestamps)]
     
     @staticmethod
     def _group_levels(swing_points: List[Tuple[int, float, datetime]], 
@@ -334,25 +351,9 @@ class LevelsFinder:
             max_price = df['high'].max()
             price_bins = np.linspace(min_price, max_price, price_levels + 1)
             
-            # Распределяем объем по ценовым уровням
-            volume_profile = np.zeros(price_levels)
-            
-            for i, row in df.iterrows():
-                # Находим диапазон цен для текущего бара
-                low_idx = np.digitize(row['low'], price_bins) - 1
-                high_idx = np.digitize(row['high'], price_bins) - 1
-                
-                # Ограничиваем индексы
-                low_idx = max(0, min(low_idx, price_levels - 1))
-                high_idx = max(0, min(high_idx, price_levels - 1))
-                
-                # Распределяем объем
-                if low_idx == high_idx:
-                    volume_profile[low_idx] += row['volume']
-                else:
-                    volume_per_level = row['volume'] / (high_idx - low_idx + 1)
-                    for level_idx in range(low_idx, high_idx + 1):
-                        volume_profile[level_idx] += volume_per_level
+            # Распределяем объем по ценовым уровням (векторизованное ядро)
+            lows, highs, volumes = profile_arrays(df)
+            volume_profile = volume_at_price(lows, highs, volumes, price_bins, method=TOUCH)
             
             # Находим значимые уровни
             total_volume = volume_profile.sum()
@@ -767,6 +768,10 @@ class LevelsAnalyzer:
 # УТИЛИТНЫЕ ФУНКЦИИ
 # =========================================================================
 
+# Кэш результатов find_all_levels (ключ - отпечаток данных, см. _levels_cache_key)
+_LEVELS_CACHE = TTLCache(maxsize=32, ttl=300)
+
+
 def find_all_levels(df: pd.DataFrame, 
                    current_price: Optional[float] = None,
                    include_psychological: bool = True,
@@ -788,6 +793,29 @@ def find_all_levels(df: pd.DataFrame,
     if current_price is None:
         current_price = df['close'].iloc[-1]
     
+    # Уровни пересчитываются только при изменении данных (новый бар или обновление текущего)
+    cache_key = _levels_cache_key(df, current_price, include_psychological,
+                                  include_fibonacci, include_volume)
+    if cache_key is not None:
+        cached = _LEVELS_CACHE.get(cache_key)
+        if cached is not None:
+            return list(cached)
+    
+    unique_levels = _find_all_levels_uncached(df, current_price, include_psychological,
+                                              include_fibonacci, include_volume)
+    
+    if cache_key is not None:
+        _LEVELS_CACHE.put(cache_key, list(unique_levels))
+    
+    return unique_levels
+
+
+def _find_all_levels_uncached(df: pd.DataFrame,
+                              current_price: float,
+                              include_psychological: bool,
+                              include_fibonacci: bool,
+                              include_volume: bool) -> List[PriceLevel]:
+    """Полный расчет всех типов уровней без кэширования"""
     all_levels = []
     
     # Swing уровни (всегда включены)
@@ -833,6 +861,18 @@ def find_all_levels(df: pd.DataFrame,
     return unique_levels
 
 
+def _levels_cache_key(df: pd.DataFrame, current_price: float, *flags: bool) -> Optional[tuple]:
+    """Ключ кэша уровней: отпечаток содержимого данных, текущая цена и флаги"""
+    if len(df) == 0:
+        return None
+    return data_fingerprint(df) + (float(current_price),) + flags
+
+
+def clear_levels_cache():
+    """Сброс кэша find_all_levels"""
+    _LEVELS_CACHE.clear()
+
+
 def get_trading_levels(df: pd.DataFrame, 
                       current_price: Optional[float] = None,
                       max_levels: int = 10) -> Dict[str, List[PriceLevel]]:
@@ -0,0 +1,189 @@
+# bot/strategy/utils/market_snapshot.py
+"""
+Снимок рынка на один торговый цикл
+
+Все стратегии цикла получают один и тот же словарь all_market_data, поэтому
+любая комбинация (индикатор, параметры, таймфрейм) считается один раз и
+разделяется между стратегиями и MarketContextEngine. Стоимость цикла растет
+с числом различных индикаторов, а не с числом стратегий.
+
+Использование:
+    snapshot = MarketSnapshot(all_market_data)
+    with use_snapshot(snapshot):
+        for strategy in strategies:
+            strategy.execute(all_market_data)
+    logger.debug(snapshot.get_stats())
+
+Пока снимок активен, методы TechnicalIndicators, вызванные с DataFrame из
+снимка, мемоизируются автоматически. Результаты разделяются между
+потребителями и должны считаться неизменяемыми.
+
+Снимок с символом (MarketSnapshot(all_market_data, symbol=SYMBOL)) считает
+индикаторы, у которых есть инкрементальная версия (SMA, EMA, RSI, ATR, VWAP,
+Bollinger), потоками streaming_indicators по паре (symbol, таймфрейм): между
+циклами обрабатываются только новые и изменившиеся бары.
+"""
+
+import inspect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from threading import RLock
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Активный снимок текущего торгового цикла
+_ACTIVE_SNAPSHOT: ContextVar[Optional['MarketSnapshot']] = ContextVar('market_snapshot', default=None)
+
+
+class MarketSnapshot:
+    """
+    Ленивый мемоизирующий кэш значений, рассчитанных по данным одного цикла
+
+    Таймфрейм определяется по идентичности DataFrame: копии и срезы данных
+    в снимок не входят и считаются как обычно.
+    """
+
+    def __init__(self, market_data: Dict[str, Any], symbol: Optional[str] = None):
+        """
+        Args:
+            market_data: Таймфрейм -> DataFrame цикла
+            symbol: Инструмент данных (включает инкрементальные индикаторы)
+        """
+        self.symbol = symbol
+        self._frames: Dict[str, pd.DataFrame] = {
+            timeframe: df for timeframe, df in (market_data or {}).items()
+            if isinstance(df, pd.DataFrame)
+        }
+        self._timeframes: Dict[int, str] = {id(df): timeframe for timeframe, df in self._frames.items()}
+        self._values: Dict[tuple, Any] = {}
+        # RLock: расчет одного значения может запрашивать другие значения снимка
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeframes(self) -> list:
+        return list(self._frames)
+
+    def frame(self, timeframe: str) -> Optional[pd.DataFrame]:
+        """DataFrame таймфрейма из снимка"""
+        return self._frames.get(timeframe)
+
+    def timeframe_of(self, df: Any) -> Optional[str]:
+        """Таймфрейм, которому принадлежит DataFrame, или None если его нет в снимке"""
+        timeframe = self._timeframes.get(id(df))
+        if timeframe is not None and self._frames[timeframe] is df:
+            return timeframe
+        return None
+
+    def indicator_stream(self, timeframe: str) -> Optional[Any]:
+        """Поток инкрементальных индикаторов таймфрейма (None - снимок без символа)"""
+        if self.symbol is None:
+            return None
+        from .streaming_indicators import get_streaming_indicators
+        return get_streaming_indicators().stream(self.symbol, timeframe)
+
+    def get_or_compute(self, timeframe: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Значение по ключу (timeframe, key); при промахе вызывается compute()
+
+        Исключения compute() не кэшируются и пробрасываются вызывающему.
+        """
+        cache_key = (timeframe, key)
+        with self._lock:
+            value = self._values.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            value = compute()
+            self._values[cache_key] = value
+            return value
+
+    def indicator(self, timeframe: str, name: str, *args, **kwargs) -> Any:
+        """
+        Расчет метода TechnicalIndicators по таймфрейму снимка
+
+        Example:
+            >>> rsi = snapshot.indicator('5m', 'calculate_rsi', 14)
+        """
+        from .indicators import TechnicalIndicators
+
+        df = self._frames.get(timeframe)
+        if df is None:
+            raise KeyError(f"Таймфрейм {timeframe} отсутствует в снимке")
+
+        with use_snapshot(self):
+            return getattr(TechnicalIndicators, name)(df, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика попаданий в кэш снимка"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._values),
+                'hit_rate': self.hits / total if total else 0.0,
+                'timeframes': self.timeframes,
+            }
+
+
+@contextmanager
+def use_snapshot(snapshot: Optional[MarketSnapshot]) -> Iterator[Optional[MarketSnapshot]]:
+    """Активация снимка на время выполнения блока (вложенные вызовы допустимы)"""
+    token = _ACTIVE_SNAPSHOT.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _ACTIVE_SNAPSHOT.reset(token)
+
+
+def get_active_snapshot() -> Optional[MarketSnapshot]:
+    """Снимок текущего торгового цикла или None"""
+    return _ACTIVE_SNAPSHOT.get()
+
+
+def snapshot_memoize(df: Any, key: Hashable, compute: Callable[[], Any]) -> Any:
+    """
+    Мемоизация значения в активном снимке, если df принадлежит ему
+
+    Без активного снимка или для DataFrame вне снимка просто вызывает compute().
+    """
+    snapshot = _ACTIVE_SNAPSHOT.get()
+    if snapshot is not None:
+        timeframe = snapshot.timeframe_of(df)
+        if timeframe is not None:
+            return snapshot.get_or_compute(timeframe, key, compute)
+    return compute()
+
+
+@lru_cache(maxsize=None)
+def _signature(func: Callable) -> inspect.Signature:
+    return inspect.signature(func)
+
+
+def call_key(func: Callable, args: tuple, kwargs: dict) -> Optional[tuple]:
+    """
+    Ключ вызова индикатора без первого аргумента (DataFrame)
+
+    Параметры по умолчанию подставляются явно, поэтому calculate_rsi(df) и
+    calculate_rsi(df, 14) дают один ключ. None - если параметры нехэшируемы.
+    """
+    try:
+        bound = _signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = tuple(bound.arguments.items())[1:]
+        key = (func.__name__,) + params
+        hash(key)
+        return key
+    except TypeError:
+        return None
@@ -0,0 +1,748 @@
+# bot/strategy/utils/streaming_indicators.py
+"""
+Инкрементальный (потоковый) движок технических индикаторов
+Хранит состояние индикаторов для каждой пары (symbol, timeframe) и обновляет
+его только по новым или изменённым барам за O(1) на бар вместо пересчёта всей истории.
+
+Интерфейс методов совпадает с TechnicalIndicators (calculate_sma, calculate_rsi, ...),
+результаты возвращаются в виде IndicatorResult и считаются только по барам переданного
+DataFrame (как в TechnicalIndicators), поэтому поток можно подставить вместо
+TechnicalIndicators без изменения кода пайплайнов и их значений:
+
+    stream = get_streaming_indicators().stream('BTCUSDT', '5m')
+    vwap_result = stream.calculate_vwap(df)
+"""
+
+import math
+import logging
+from collections import deque
+from threading import Lock, RLock
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .indicators import TechnicalIndicators, IndicatorError
+
+logger = logging.getLogger(__name__)
+
+_safe_calculation = TechnicalIndicators._safe_calculation
+
+# Периодическая пересборка скользящих сумм из окна для защиты от накопления ошибки float
+_RESYNC_EVERY = 1024
+
+_OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+# =========================================================================
+# ПРИМИТИВЫ СКОЛЬЗЯЩИХ ОКОН
+# =========================================================================
+
+class _RollingWindow:
+    """Скользящая сумма фиксированного окна с O(1) добавлением и заменой последнего значения"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._total = 0.0
+        self._pushes = 0
+
+    def push(self, value: float) -> None:
+        if len(self._values) == self.window:
+            self._total -= self._values[0]
+        self._values.append(value)
+        self._total += value
+        self._pushes += 1
+        if self._pushes % _RESYNC_EVERY == 0:
+            self._total = math.fsum(self._values)
+
+    def revise(self, value: float) -> None:
+        self._total += value - self._values[-1]
+        self._values[-1] = value
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    def mean(self) -> float:
+        return self._total / len(self._values) if self._values else float('nan')
+
+
+class _RollingMoments:
+    """Скользящие среднее и дисперсия окна (Welford с удалением элементов)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._pushes = 0
+
+    def _add(self, value: float) -> None:
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+    def _remove(self, value: float, remaining: int) -> None:
+        if remaining == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / remaining
+        self._m2 -= delta * (value - self._mean)
+
+    def _rebuild(self) -> None:
+        values = np.fromiter(self._values, dtype=float, count=len(self._values))
+        self._mean = float(values.mean())
+        self._m2 = float(((values - self._mean) ** 2).sum())
+
+    def push(self, value: float) -> None:
+        if len(self._values) == self.window:
+            evicted = self._values.popleft()
+            self._remove(evicted, len(self._values))
+        self._values.append(value)
+        self._add(value)
+        self._pushes += 1
+        if self._pushes % _RESYNC_EVERY == 0:
+            self._rebuild()
+
+    def revise(self, value: float) -> None:
+        old = self._values.pop()
+        self._remove(old, len(self._values))
+        self._values.append(value)
+        self._add(value)
+
+    def mean(self) -> float:
+        return self._mean if self._values else float('nan')
+
+    def std(self) -> float:
+        """Выборочное стандартное отклонение (ddof=1, как pandas rolling.std)"""
+        n = len(self._values)
+        if n < 2:
+            return float('nan')
+        return math.sqrt(max(self._m2, 0.0) / (n - 1))
+
+
+class _HistoryBuffer:
+    """Растущий numpy буфер значений с ограничением глубины истории (амортизированно O(1))"""
+
+    def __init__(self, max_history: int, width: int = 1, dtype=float):
+        self.max_history = max_history
+        self.width = width
+        self._data = np.empty((max_history * 2, width), dtype=dtype)
+        self._size = 0
+        self.compacted = False  # начало истории отброшено
+
+    def append(self, row) -> None:
+        if self._size == len(self._data):
+            keep = self.max_history
+            self._data[:keep] = self._data[self._size - keep:self._size]
+            self._size = keep
+            self.compacted = True
+        self._data[self._size] = row
+        self._size += 1
+
+    def set_last(self, row) -> None:
+        self._data[self._size - 1] = row
+
+    def clear(self) -> None:
+        self._size = 0
+        self.compacted = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def tail(self, count: int, end: Optional[int] = None) -> np.ndarray:
+        """Последние count строк, заканчивающиеся на позиции end (по умолчанию конец буфера)"""
+        end = self._size if end is None else end
+        start = max(0, end - count)
+        return self._data[start:end]
+
+
+# =========================================================================
+# ИНКРЕМЕНТАЛЬНЫЕ ИНДИКАТОРЫ
+# =========================================================================
+
+class _IncrementalIndicator:
+    """
+    Базовый класс потокового индикатора
+
+    push(bar) обрабатывает новый бар, revise(bar) пересчитывает последний бар
+    (формирующаяся свеча изменилась). Оба метода возвращают строку состояния бара
+    (outputs значений), которая хранится в истории потока.
+
+    window(rows, before, columns) превращает строки состояния баров DataFrame в значения
+    индикатора, посчитанные только по этим барам; before - строка состояния бара перед
+    первым баром DataFrame (None, если состояние начинается с первого бара).
+    Скользящим индикаторам достаточно заново посчитать первые warmup баров окна.
+    """
+
+    columns: Tuple[str, ...] = ()
+    outputs: int = 1
+    warmup: int = 0
+
+    def push(self, bar: Dict[str, float]) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+    def revise(self, bar: Dict[str, float]) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+    def window(self, rows: np.ndarray, before: Optional[np.ndarray],
+               columns: Dict[str, np.ndarray]) -> np.ndarray:
+        return rows
+
+
+class _SMAState(_IncrementalIndicator):
+    def __init__(self, period: int, column: str):
+        self.columns = (column,)
+        self.warmup = period
+        self._column = column
+        self._window = _RollingWindow(period)
+
+    def push(self, bar):
+        self._window.push(bar[self._column])
+        return (self._window.mean(),)
+
+    def revise(self, bar):
+        self._window.revise(bar[self._column])
+        return (self._window.mean(),)
+
+
+class _EMAState(_IncrementalIndicator):
+    """
+    EMA с adjust=True (как pandas ewm(span=period)) через рекуррентные числитель/знаменатель
+
+    Состояние бара - (числитель, знаменатель) с начала истории; вклад баров до окна
+    вычитается с весом decay ** (расстояние до бара перед окном).
+    """
+
+    outputs = 2
+
+    def __init__(self, period: int, column: str):
+        self.columns = (column,)
+        self._column = column
+        self._decay = 1.0 - 2.0 / (period + 1.0)
+        self._num = 0.0
+        self._den = 0.0
+        self._prev = (0.0, 0.0)
+
+    def push(self, bar):
+        self._prev = (self._num, self._den)
+        return self._apply(bar[self._column])
+
+    def revise(self, bar):
+        self._num, self._den = self._prev
+        return self._apply(bar[self._column])
+
+    def _apply(self, value: float):
+        self._num = value + self._decay * self._num
+        self._den = 1.0 + self._decay * self._den
+        return (self._num, self._den)
+
+    def window(self, rows, before, columns):
+        num, den = rows[:, 0], rows[:, 1]
+        if before is not None:
+            weights = self._decay ** np.arange(1, len(rows) + 1)
+            num = num - weights * before[0]
+            den = den - weights * before[1]
+        return (num / den)[:, None]
+
+
+class _RSIState(_IncrementalIndicator):
+    """
+    RSI со сглаживанием Уайлдера, повторяющий TechnicalIndicators.calculate_rsi
+
+    Состояние бара - экспоненциальные суммы gain/loss с весом (1 - 1/period) и счетчики
+    ненулевых gain/loss с начала истории. Стартовое среднее берется из первых period
+    баров окна, дальше сглаживание Уайлдера выражается через разность сумм.
+    """
+
+    outputs = 4
+
+    def __init__(self, period: int, column: str):
+        self.columns = (column,)
+        self._column = column
+        self._period = period
+        self._alpha = 1.0 / period
+        self._state = (None, 0.0, 0.0, 0.0, 0.0)  # prev_price, exp_gain, exp_loss, gains, losses
+        self._prev_state = self._state
+
+    def push(self, bar):
+        self._prev_state = self._state
+        return self._apply(bar[self._column])
+
+    def revise(self, bar):
+        self._state = self._prev_state
+        return self._apply(bar[self._column])
+
+    def _apply(self, price: float):
+        prev_price, exp_gain, exp_loss, gains, losses = self._state
+        delta = 0.0 if prev_price is None else price - prev_price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        keep = 1.0 - self._alpha
+        self._state = (price, keep * exp_gain + gain, keep * exp_loss + loss,
+                       gains + (gain > 0), losses + (loss > 0))
+        return self._state[1:]
+
+    def window(self, rows, before, columns):
+        period = self._period
+        rsi = np.full(len(rows), 50.0)
+        if len(rows) <= period:
+            return rsi[:, None]
+
+        deltas = np.diff(columns[self._column][:period + 1])
+        seed = np.array([np.mean(np.where(deltas > 0, deltas, 0)),
+                         np.mean(np.where(deltas < 0, -deltas, 0))])
+
+        decay = ((1.0 - self._alpha) ** np.arange(len(rows) - period))[:, None]
+        averages = self._alpha * (rows[period:, :2] - decay * rows[period, :2]) + decay * seed
+        # Без ненулевых gain/loss в окне среднее ровно 0 (разность сумм дала бы шум float)
+        empty = (rows[period:, 2:] == rows[period, 2:]) & (seed == 0)
+        averages = np.where(empty, 0.0, np.maximum(averages, 0.0))
+
+        avg_gain, avg_loss = averages[:, 0], averages[:, 1]
+        rs = np.divide(avg_gain, avg_loss, out=np.full_like(avg_gain, np.inf), where=avg_loss != 0)
+        rsi[period:] = 100 - (100 / (1 + rs))
+        return rsi[:, None]
+
+
+class _ATRState(_IncrementalIndicator):
+    columns = ('high', 'low', 'close')
+
+    def __init__(self, period: int):
+        self.warmup = period
+        self._window = _RollingWindow(period)
+        self._prev_close = None
+        self._close_before_last = None
+
+    def push(self, bar):
+        self._close_before_last = self._prev_close
+        self._window.push(self._true_range(bar, self._prev_close))
+        self._prev_close = bar['close']
+        return (self._window.mean(),)
+
+    def revise(self, bar):
+        self._window.revise(self._true_range(bar, self._close_before_last))
+        self._prev_close = bar['close']
+        return (self._window.mean(),)
+
+    @staticmethod
+    def _true_range(bar, prev_close: Optional[float]) -> float:
+        high_low = bar['high'] - bar['low']
+        if prev_close is None:
+            return high_low
+        return max(high_low, abs(bar['high'] - prev_close), abs(bar['low'] - prev_close))
+
+
+class _VWAPState(_IncrementalIndicator):
+    columns = ('high', 'low', 'close', 'volume')
+
+    def __init__(self, period: Optional[int]):
+        self._period = period
+        if period is None:
+            # Состояние бара - накопленные (typical_price * volume, volume) с начала истории
+            self.outputs = 2
+            self._cum = (0.0, 0.0)
+            self._prev_cum = self._cum
+        else:
+            self.warmup = period
+            self._tp_volume = _RollingWindow(period)
+            self._volume = _RollingWindow(period)
+
+    def push(self, bar):
+        typical_volume, volume = self._components(bar)
+        if self._period is None:
+            self._prev_cum = self._cum
+            self._cum = (self._cum[0] + typical_volume, self._cum[1] + volume)
+            return self._cum
+        self._tp_volume.push(typical_volume)
+        self._volume.push(volume)
+        return self._rolling_value()
+
+    def revise(self, bar):
+        typical_volume, volume = self._components(bar)
+        if self._period is None:
+            self._cum = (self._prev_cum[0] + typical_volume, self._prev_cum[1] + volume)
+            return self._cum
+        self._tp_volume.revise(typical_volume)
+        self._volume.revise(volume)
+        return self._rolling_value()
+
+    def window(self, rows, before, columns):
+        if self._period is not None:
+            return rows
+        tp_volume, volume = rows[:, 0], rows[:, 1]
+        if before is not None:
+            tp_volume = tp_volume - before[0]
+            volume = volume - before[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (tp_volume / volume)[:, None]
+
+    def _rolling_value(self):
+        if self._volume.count < self._period or not self._volume.total:
+            return (float('nan'),)
+        return (self._tp_volume.total / self._volume.total,)
+
+    @staticmethod
+    def _components(bar) -> Tuple[float, float]:
+        typical_price = (bar['high'] + bar['low'] + bar['close']) / 3
+        return typical_price * bar['volume'], bar['volume']
+
+
+class _BollingerState(_IncrementalIndicator):
+    outputs = 2
+
+    def __init__(self, period: int, column: str):
+        self.columns = (column,)
+        self.warmup = period
+        self._column = column
+        self._moments = _RollingMoments(period)
+
+    def push(self, bar):
+        self._moments.push(bar[self._column])
+        return (self._moments.mean(), self._moments.std())
+
+    def revise(self, bar):
+        self._moments.revise(bar[self._column])
+        return (self._moments.mean(), self._moments.std())
+
+
+# =========================================================================
+# ПОТОК ИНДИКАТОРОВ ДЛЯ (SYMBOL, TIMEFRAME)
+# =========================================================================
+
+def _bar_keys(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Идентификаторы баров (int64 наносекунды) из колонки timestamp или DatetimeIndex"""
+    if 'timestamp' in df.columns:
+        values = df['timestamp'].to_numpy()
+    else:
+        values = df.index.to_numpy()
+
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').view('int64')
+    if np.issubdtype(values.dtype, np.integer) and 'timestamp' in df.columns:
+        return values.astype('int64')
+    return None
+
+
+class IndicatorStream:
+    """
+    Состояние индикаторов для одной пары (symbol, timeframe)
+
+    При каждом вызове сверяет пришедший DataFrame с уже обработанными барами:
+    - новые бары подаются в индикаторы по одному (O(1) на бар)
+    - изменившийся последний бар (формирующаяся свеча) пересчитывается через revise
+    - если история не стыкуется (разрыв, откат), состояние пересобирается из DataFrame
+
+    Значения при этом считаются только по барам пришедшего DataFrame: бары истории
+    перед его началом в результат не попадают.
+    """
+
+    def __init__(self, symbol: str, timeframe: str, max_history: int = 2000):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.max_history = max_history
+        self._lock = RLock()
+        self._indicators: Dict[Tuple, _IncrementalIndicator] = {}
+        self._outputs: Dict[Tuple, _HistoryBuffer] = {}
+        self._keys = _HistoryBuffer(max_history, dtype=np.int64)
+        self._last_bar: Optional[Tuple[float, ...]] = None
+        self._stats = {'bars_pushed': 0, 'bars_revised': 0, 'resets': 0, 'noop_syncs': 0}
+
+    # ------------------------------------------------------------------
+    # Синхронизация с DataFrame
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row(columns: Dict[str, np.ndarray], position: int) -> Dict[str, float]:
+        return {name: float(values[position]) for name, values in columns.items()}
+
+    def _columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        return {col: df[col].to_numpy(dtype=float) for col in _OHLCV_COLUMNS if col in df.columns}
+
+    def _push_all(self, bar: Dict[str, float]) -> None:
+        for key, indicator in self._indicators.items():
+            self._outputs[key].append(indicator.push(bar))
+
+    def _revise_all(self, bar: Dict[str, float]) -> None:
+        for key, indicator in self._indicators.items():
+            self._outputs[key].set_last(indicator.revise(bar))
+
+    def _reset(self, keys: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        """Полная пересборка: все индикаторы заново прогоняются по DataFrame"""
+        self._stats['resets'] += 1
+        specs = list(self._indicators.keys())
+        self._indicators.clear()
+        self._outputs.clear()
+        self._keys.clear()
+        self._last_bar = None
+        for spec in specs:
+            self._register(spec)
+        for position in range(len(keys)):
+            bar = self._row(columns, position)
+            self._push_all(bar)
+            self._keys.append(keys[position])
+            self._last_bar = tuple(bar.values())
+
+    def _sync(self, df: pd.DataFrame) -> Tuple[Optional[np.ndarray], Dict[str, np.ndarray], int]:
+        """
+        Приводит состояние в соответствие с df
+
+        Returns:
+            (keys, columns, end) где end - позиция в истории, соответствующая последнему бару df
+        """
+        columns = self._columns(df)
+        keys = _bar_keys(df)
+
+        if keys is None:
+            # Без временных меток бары нельзя сопоставить - честный пересчёт по всему окну
+            self._reset(np.arange(len(df), dtype=np.int64), columns)
+            return None, columns, len(self._keys)
+
+        if len(self._keys) == 0:
+            self._reset(keys, columns)
+            return keys, columns, len(self._keys)
+
+        last_key = self._keys.tail(1)[0, 0]
+        position = int(np.searchsorted(keys, last_key))
+
+        if position < len(keys) and keys[position] == last_key:
+            # Последний известный бар присутствует в df: он мог измениться, дальше идут новые
+            bar = self._row(columns, position)
+            bar_values = tuple(bar.values())
+            if bar_values != self._last_bar:
+                self._revise_all(bar)
+                self._last_bar = bar_values
+                self._stats['bars_revised'] += 1
+            new_bars = len(keys) - position - 1
+            if new_bars == 0:
+                self._stats['noop_syncs'] += 1
+            for offset in range(position + 1, len(keys)):
+                bar = self._row(columns, offset)
+                self._push_all(bar)
+                self._keys.append(keys[offset])
+                self._last_bar = tuple(bar.values())
+                self._stats['bars_pushed'] += 1
+            return keys, columns, len(self._keys)
+
+        if position >= len(keys) and len(keys):
+            # df заканчивается раньше нашей истории (например, срез df.iloc[:-1]) - отдаём историю
+            history = self._keys.tail(len(self._keys))[:, 0]
+            end = int(np.searchsorted(history, keys[-1]))
+            if end < len(history) and history[end] == keys[-1]:
+                return keys, columns, end + 1
+
+        self._reset(keys, columns)
+        return keys, columns, len(self._keys)
+
+    def _register(self, spec: Tuple) -> Tuple[_IncrementalIndicator, _HistoryBuffer]:
+        indicator = _build_indicator(spec)
+        buffer = _HistoryBuffer(self.max_history, width=indicator.outputs)
+        self._indicators[spec] = indicator
+        self._outputs[spec] = buffer
+        return indicator, buffer
+
+    def _values(self, df: pd.DataFrame, spec: Tuple, required_columns, min_length: int) -> np.ndarray:
+        """Синхронизирует поток и возвращает значения индикатора, выровненные по df"""
+        if df is None or df.empty:
+            raise IndicatorError("DataFrame пуст или None")
+        for col in required_columns:
+            if col not in df.columns:
+                raise IndicatorError(f"Отсутствует необходимая колонка: {col}")
+        if len(df) < min_length:
+            raise IndicatorError(f"Недостаточно данных: {len(df)} < {min_length}")
+        if any(np.isnan(df[col].to_numpy(dtype=float)).any() for col in required_columns):
+            raise IndicatorError("Обнаружены NaN значения в данных")
+
+        with self._lock:
+            keys, columns, end = self._sync(df)
+
+            if spec not in self._indicators:
+                if end != len(self._keys):
+                    # df короче истории потока - считаем разово, не регистрируя индикатор
+                    return self._replay(spec, columns, len(df), finalize=True)
+                # Новый индикатор догоняет уже синхронизированную историю по данным df
+                indicator, buffer = self._register(spec)
+                for position in range(len(df)):
+                    buffer.append(indicator.push(self._row(columns, position)))
+
+            indicator = self._indicators[spec]
+            buffer = self._outputs[spec]
+            stop = end - (len(self._keys) - len(buffer))
+            start = stop - len(df)
+            if start < 0 or (start == 0 and buffer.compacted):
+                # История индикатора не покрывает df - считаем разово по df
+                return self._replay(spec, columns, len(df), finalize=True)
+
+            rows = buffer.tail(len(df), stop).copy()
+            before = buffer.tail(1, start)[0].copy() if start > 0 else None
+
+        values = indicator.window(rows, before, columns)
+        if before is not None and indicator.warmup:
+            # Первые бары скользящего окна не должны видеть историю до начала df
+            head = min(indicator.warmup, len(df))
+            values[:head] = self._replay(spec, columns, head)
+        return values
+
+    def _replay(self, spec: Tuple, columns: Dict[str, np.ndarray], count: int,
+                finalize: bool = False) -> np.ndarray:
+        """Разовый расчет индикатора по первым count барам df без сохранения состояния"""
+        indicator = _build_indicator(spec)
+        rows = np.array([indicator.push(self._row(columns, position))
+                         for position in range(count)], dtype=float)
+        return indicator.window(rows, None, columns) if finalize else rows
+
+    # ------------------------------------------------------------------
+    # Интерфейс, совместимый с TechnicalIndicators
+    # ------------------------------------------------------------------
+
+    @_safe_calculation
+    def calculate_sma(self, df: pd.DataFrame, period: int, column: str = 'close') -> pd.Series:
+        """Simple Moving Average с инкрементальным обновлением"""
+        values = self._values(df, ('sma', period, column), [column], period)
+        return pd.Series(values[:, 0], index=df.index)
+
+    @_safe_calculation
+    def calculate_ema(self, df: pd.DataFrame, period: int, column: str = 'close') -> pd.Series:
+        """Exponential Moving Average с инкрементальным обновлением"""
+        values = self._values(df, ('ema', period, column), [column], period)
+        return pd.Series(values[:, 0], index=df.index)
+
+    @_safe_calculation
+    def calculate_rsi(self, df: pd.DataFrame, period: int = 14, column: str = 'close') -> pd.Series:
+        """RSI (Wilder) с инкрементальным обновлением"""
+        values = self._values(df, ('rsi', period, column), [column], period + 1)
+        return pd.Series(values[:, 0], index=df.index, name=f'rsi_{period}')
+
+    @_safe_calculation
+    def calculate_atr_series(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
+        """ATR как Series с инкрементальным обновлением"""
+        values = self._values(df, ('atr', period), ['high', 'low', 'close'], period)
+        return pd.Series(values[:, 0], index=df.index)
+
+    @_safe_calculation
+    def calculate_atr_safe(self, df: pd.DataFrame, period: int = 14) -> float:
+        """Последнее значение ATR с тем же fallback, что и в TechnicalIndicators"""
+        values = self._values(df, ('atr', period), ['high', 'low', 'close'], period)
+        last_atr = values[-1, 0]
+        if np.isnan(last_atr) or last_atr <= 0:
+            fallback_atr = float(df['high'].iloc[-1] - df['low'].iloc[-1])
+            logger.warning(f"ATR fallback: {fallback_atr}")
+            return fallback_atr
+        return float(last_atr)
+
+    def calculate_atr(self, df: pd.DataFrame, period: int = 14):
+        """Алиас для calculate_atr_safe для обратной совместимости"""
+        return self.calculate_atr_safe(df, period)
+
+    @_safe_calculation
+    def calculate_vwap(self, df: pd.DataFrame, period: Optional[int] = None) -> pd.Series:
+        """VWAP (кумулятивный или скользящий) с инкрементальным обновлением"""
+        values = self._values(df, ('vwap', period), ['high', 'low', 'close', 'volume'], period or 1)
+        return pd.Series(values[:, 0], index=df.index, name='vwap')
+
+    @_safe_calculation
+    def calculate_bollinger_bands(self, df: pd.DataFrame, period: int = 20, std_dev: float = 2.0,
+                                  column: str = 'close') -> Dict[str, pd.Series]:
+        """Bollinger Bands на скользящих моментах Welford"""
+        values = self._values(df, ('bb', period, column), [column], period)
+        sma = pd.Series(values[:, 0], index=df.index)
+        std = pd.Series(values[:, 1], index=df.index)
+
+        upper = sma + (std * std_dev)
+        lower = sma - (std * std_dev)
+        position = ((df[column] - lower) / (upper - lower)).fillna(0.5)
+        width = (upper - lower) / sma
+
+        return {
+            'upper': upper,
+            'lower': lower,
+            'middle': sma,
+            'position': position,
+            'width': width.fillna(0)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика обновлений потока"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'symbol': self.symbol,
+                'timeframe': self.timeframe,
+                'bars': len(self._keys),
+                'indicators': len(self._indicators),
+            })
+            return stats
+
+
+def _build_indicator(spec: Tuple) -> _IncrementalIndicator:
+    """Создание состояния индикатора по ключу (name, *params)"""
+    name, *params = spec
+    if name == 'sma':
+        return _SMAState(*params)
+    if name == 'ema':
+        return _EMAState(*params)
+    if name == 'rsi':
+        return _RSIState(*params)
+    if name == 'atr':
+        return _ATRState(*params)
+    if name == 'vwap':
+        return _VWAPState(*params)
+    if name == 'bb':
+        return _BollingerState(*params)
+    raise IndicatorError(f"Неизвестный инкрементальный индикатор: {name}")
+
+
+class StreamingIndicators:
+    """Реестр потоков индикаторов по ключу (symbol, timeframe)"""
+
+    def __init__(self, max_history: int = 2000):
+        self.max_history = max_history
+        self._streams: Dict[Tuple[str, str], IndicatorStream] = {}
+        self._lock = Lock()
+
+    def stream(self, symbol: str, timeframe: str) -> IndicatorStream:
+        """Получение (или создание) потока для пары symbol/timeframe"""
+        key = (symbol, timeframe)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = IndicatorStream(symbol, timeframe, self.max_history)
+                self._streams[key] = stream
+            return stream
+
+    def drop(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Удаление состояния для символа (или конкретного таймфрейма)"""
+        with self._lock:
+            for key in list(self._streams.keys()):
+                if key[0] == symbol and (timeframe is None or key[1] == timeframe):
+                    del self._streams[key]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            streams = list(self._streams.items())
+        return {f"{symbol}:{tf}": stream.get_stats() for (symbol, tf), stream in streams}
+
+
+_streaming_indicators = None
+_streaming_indicators_lock = Lock()
+
+
+def get_streaming_indicators() -> StreamingIndicators:
+    """Получение глобального реестра инкрементальных индикаторов"""
+    global _streaming_indicators
+
+    if _streaming_indicators is None:
+        with _streaming_indicators_lock:
+            if _streaming_indicators is None:
+                _streaming_indicators = StreamingIndicators()
+
+    return _streaming_indicators
@@ -0,0 +1,177 @@
+# bot/strategy/utils/ttl_cache.py
+"""
+LRU + TTL кэш с O(1) операциями
+
+Замена прежнего TTLCache, который при переполнении искал самую старую запись
+перебором всех ключей под глобальной блокировкой:
+- порядок LRU хранится в OrderedDict (get/put - O(1));
+- TTL одинаков для всех записей кэша, поэтому порядок истечения совпадает
+  с порядком вставки и хранится в deque (очистка - O(1) амортизированно);
+- истечение ленивое: устаревшие записи удаляются при обращении и при вставке;
+- опциональное ограничение по объему (max_bytes) с оценкой размера значений;
+- счетчики попаданий, промахов, вытеснений и истечений.
+"""
+
+import sys
+import time
+from collections import OrderedDict, deque
+from dataclasses import is_dataclass
+from itertools import count
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(value: Any) -> int:
+    """Приблизительный размер значения в байтах"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """Time-To-Live кэш с вытеснением давно неиспользуемых записей (LRU)"""
+
+    def __init__(self, maxsize: int = 100, ttl: float = 60,
+                 max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = estimate_size,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            maxsize: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+            max_bytes: Ограничение суммарного размера значений (None - без ограничения)
+            sizeof: Функция оценки размера значения в байтах
+            timer: Источник монотонного времени
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._timer = timer
+
+        # key -> (value, expires_at, size, version); порядок - от давно использованных к недавним
+        self._cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # (expires_at, key, version) в порядке вставки; элементы перезаписанных записей пропускаются
+        self._expiry: deque = deque()
+        self._versions = count()
+        self._bytes = 0
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[1] <= self._timer():
+                # Устаревший кэш - удаляем
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            now = self._timer()
+            self._purge_expired(now)
+
+            if key in self._cache:
+                self._remove(key)
+
+            size = self._sizeof(value) if self.max_bytes is not None else 0
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Значение больше всего кэша - не кэшируем
+                return
+
+            expires_at = now + self.ttl
+            version = next(self._versions)
+            self._cache[key] = (value, expires_at, size, version)
+            self._expiry.append((expires_at, key, version))
+            self._bytes += size
+
+            while len(self._cache) > self.maxsize or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._cache))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+            # Очередь истечения не должна разрастаться из-за перезаписей одних и тех же ключей
+            if len(self._expiry) > 2 * max(self.maxsize, 1):
+                self._expiry = deque(item for item in self._expiry if self._is_current(item))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and entry[1] > self._timer()
+
+    @property
+    def size_bytes(self) -> int:
+        """Суммарный оценочный размер значений (учитывается только при max_bytes)"""
+        return self._bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._cache),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def _remove(self, key) -> None:
+        _, _, size, _ = self._cache.pop(key)
+        self._bytes -= size
+
+    def _purge_expired(self, now: float) -> None:
+        """Удаление истекших записей с начала очереди истечения"""
+        while self._expiry and self._expiry[0][0] <= now:
+            item = self._expiry.popleft()
+            if self._is_current(item):
+                self._remove(item[1])
+                self.expirations += 1
+
+    def _is_current(self, item: tuple) -> bool:
+        """Элемент очереди истечения относится к актуальной записи"""
+        _, key, version = item
+        entry = self._cache.get(key)
+        return entry is not None and entry[3] == version
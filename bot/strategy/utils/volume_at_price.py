@@ -0,0 +1,109 @@
+# bot/strategy/utils/volume_at_price.py
+"""
+Векторизованное ядро распределения объема по ценовым уровням (volume-at-price)
+Используется VolumeProfileAnalyzer, LevelsFinder и TechnicalIndicators вместо
+построчных циклов df.iterrows(): O((bars + bins) · log bars) вместо O(bars × bins) в Python
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Способы распределения объема бара по ценовым корзинам
+OVERLAP = 'overlap'  # пропорционально пересечению диапазона бара [low, high] с корзиной
+TOUCH = 'touch'      # поровну между всеми корзинами, которых касается бар (по np.digitize)
+
+# Относительный порог, ниже которого накопленная ошибка округления считается нулем
+_ZERO_TOLERANCE = 1e-12
+
+
+def volume_at_price(lows: np.ndarray, highs: np.ndarray, volumes: np.ndarray,
+                    price_bins: np.ndarray, method: str = OVERLAP) -> np.ndarray:
+    """
+    Распределение объема баров по ценовым корзинам
+
+    Args:
+        lows, highs, volumes: Массивы значений баров одинаковой длины
+        price_bins: Границы корзин (num_bins + 1 значений, по возрастанию)
+        method: OVERLAP или TOUCH
+
+    Returns:
+        Массив объема в каждой корзине (длина num_bins)
+    """
+    lows = np.asarray(lows, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    price_bins = np.asarray(price_bins, dtype=float)
+
+    if method == OVERLAP:
+        return _overlap_profile(lows, highs, volumes, price_bins)
+    if method == TOUCH:
+        return _touch_profile(lows, highs, volumes, price_bins)
+    raise ValueError(f"Неизвестный метод распределения объема: {method}")
+
+
+def _overlap_profile(lows: np.ndarray, highs: np.ndarray, volumes: np.ndarray,
+                     price_bins: np.ndarray) -> np.ndarray:
+    """
+    Пропорциональное распределение через кумулятивную функцию объема
+
+    Каждый бар вносит линейную "рампу" плотностью v / (high - low) на [low, high].
+    Суммарный объем ниже цены x равен
+        G(x) = Σ s·(relu(x - low) - relu(x - high)),  s = v / (high - low)
+    и вычисляется для всех границ сразу через сортировку и префиксные суммы.
+    Объем корзины = G(правая граница) - G(левая граница).
+    """
+    # Бары нулевой ширины растягиваем так же, как это делал построчный алгоритм
+    degenerate = lows >= highs
+    if degenerate.any():
+        highs = np.where(degenerate, lows * 1.0001, highs)
+
+    slopes = volumes / (highs - lows)
+
+    # Сдвигаем цены к началу диапазона, чтобы уменьшить потерю точности при вычитании
+    origin = price_bins[0]
+    points = price_bins - origin
+    cumulative = _ramp_sum(lows - origin, slopes, points) - _ramp_sum(highs - origin, slopes, points)
+    profile = np.diff(cumulative)
+
+    # Пустые корзины должны остаться точными нулями (важно для поиска LVN и value area)
+    profile[np.abs(profile) <= _ZERO_TOLERANCE * max(float(volumes.sum()), 1.0)] = 0.0
+    return profile
+
+
+def _ramp_sum(starts: np.ndarray, slopes: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Σ slope·max(point - start, 0) для каждой точки за O((n + m) · log n)"""
+    order = np.argsort(starts, kind='stable')
+    sorted_starts = starts[order]
+    sorted_slopes = slopes[order]
+
+    slope_prefix = np.concatenate(([0.0], np.cumsum(sorted_slopes)))
+    weighted_prefix = np.concatenate(([0.0], np.cumsum(sorted_slopes * sorted_starts)))
+
+    # Учитываем только рампы, начавшиеся строго левее точки
+    counts = np.searchsorted(sorted_starts, points, side='left')
+    return points * slope_prefix[counts] - weighted_prefix[counts]
+
+
+def _touch_profile(lows: np.ndarray, highs: np.ndarray, volumes: np.ndarray,
+                   price_bins: np.ndarray) -> np.ndarray:
+    """Равномерное распределение по затронутым корзинам через разностный массив"""
+    num_bins = len(price_bins) - 1
+    low_idx = np.clip(np.digitize(lows, price_bins) - 1, 0, num_bins - 1)
+    high_idx = np.clip(np.digitize(highs, price_bins) - 1, 0, num_bins - 1)
+
+    # При low > high построчный алгоритм не распределял объем бара вовсе
+    inverted = low_idx > high_idx
+    high_idx = np.where(inverted, low_idx, high_idx)
+
+    shares = np.where(inverted, 0.0, volumes / (high_idx - low_idx + 1))
+    diff = (np.bincount(low_idx, weights=shares, minlength=num_bins + 1)
+            - np.bincount(high_idx + 1, weights=shares, minlength=num_bins + 1))
+    return np.cumsum(diff[:-1])
+
+
+def profile_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Извлечение low/high/volume из DataFrame в виде float массивов"""
+    return (df['low'].to_numpy(dtype=float),
+            df['high'].to_numpy(dtype=float),
+            df['volume'].to_numpy(dtype=float))
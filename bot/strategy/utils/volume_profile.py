@@ -16,6 +16,8 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+from .volume_at_price import OVERLAP, profile_arrays, volume_at_price as distribute_volume
+
 
 @dataclass
 class VolumeProfileLevel:
@@ -85,33 +87,9 @@ class VolumeProfileAnalyzer:
             price_bins = np.linspace(price_min, price_max, self.num_bins + 1)
             bin_centers = (price_bins[:-1] + price_bins[1:]) / 2
 
-            # 3. Распределяем объем по ценам
-            volume_at_price = np.zeros(self.num_bins)
-
-            for idx, row in df.iterrows():
-                # Для каждого бара распределяем volume по ценовому диапазону
-                bar_low = row['low']
-                bar_high = row['high']
-                bar_volume = row['volume']
-
-                if bar_low >= bar_high:
-                    bar_high = bar_low * 1.0001  # Tiny spread
-
-                # Находим bins которые пересекаются с баром
-                overlapping_bins = []
-                for i, (bin_low, bin_high) in enumerate(zip(price_bins[:-1], price_bins[1:])):
-                    # Пересечение диапазонов
-                    overlap_low = max(bar_low, bin_low)
-                    overlap_high = min(bar_high, bin_high)
-
-                    if overlap_low < overlap_high:
-                        # Пропорциональное распределение объема
-                        overlap_pct = (overlap_high - overlap_low) / (bar_high - bar_low)
-                        overlapping_bins.append((i, overlap_pct))
-
-                # Распределяем объем
-                for bin_idx, overlap_pct in overlapping_bins:
-                    volume_at_price[bin_idx] += bar_volume * overlap_pct
+            # 3. Распределяем объем по ценам (векторизованное ядро)
+            lows, highs, volumes = profile_arrays(df)
+            volume_at_price = distribute_volume(lows, highs, volumes, price_bins, method=OVERLAP)
 
             total_volume = volume_at_price.sum()
             if total_volume == 0:
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК КОНКУРЕНЦИИ ЗА СОСТОЯНИЕ БОТА
+
+Читатели (Telegram, экспорт метрик) вызывают get_position, emergency_stop,
+trading_enabled и get_global_stats, писатели (торговый цикл, синхронизация
+с биржей) - set_position и update_position_pnl по своим символам.
+
+Сравниваются прежняя схема (одна RLock на все геттеры и сеттеры, логирование
+под блокировкой) и ThreadSafeBotState со снимками copy-on-write и полосами
+блокировок. Второй сценарий - медленный обработчик логов (файл, сеть):
+в прежней схеме читатели ждут, пока писатель логирует под блокировкой.
+
+Запуск:
+    python scripts/benchmark_bot_state.py
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.core.thread_safe_state import PositionSide, ThreadSafeBotState
+
+READERS = 8
+WRITERS = 4
+DURATION = 2.0
+SLOW_LOG_SECONDS = 0.0005
+
+
+class _LegacyPosition:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.side = None
+        self.size = 0.0
+        self.entry_price = 0.0
+        self.unrealized_pnl = 0.0
+
+    @property
+    def is_active(self) -> bool:
+        return self.size > 0.0
+
+
+class LegacyBotState:
+    """Прежняя схема: одна RLock, позиции изменяются на месте"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._positions = {}
+        self._global_stats = {'total_trades': 0, 'winning_trades': 0, 'total_pnl': 0.0}
+        self._emergency_stop = False
+        self._trading_enabled = True
+        self.logger = logging.getLogger('bot_state')
+
+    def get_position(self, symbol):
+        with self._lock:
+            return self._positions.get(symbol)
+
+    def set_position(self, symbol, side, size, entry_price=0.0, **kwargs):
+        with self._lock:
+            pos = self._positions.setdefault(symbol, _LegacyPosition(symbol))
+            pos.side = PositionSide(side) if side else None
+            pos.size = size
+            pos.entry_price = entry_price
+            self.logger.debug(f"📊 Позиция обновлена {symbol}: {side} {size} @ {entry_price}")
+
+    def update_position_pnl(self, symbol, current_price):
+        with self._lock:
+            pos = self._positions.get(symbol)
+            if pos and pos.is_active:
+                pos.unrealized_pnl = (current_price - pos.entry_price) * pos.size
+
+    @property
+    def emergency_stop(self):
+        with self._lock:
+            return self._emergency_stop
+
+    @property
+    def trading_enabled(self):
+        with self._lock:
+            return self._trading_enabled and not self._emergency_stop
+
+    def get_global_stats(self):
+        with self._lock:
+            stats = self._global_stats.copy()
+            stats['unrealized_pnl'] = sum(
+                pos.unrealized_pnl for pos in self._positions.values() if pos.is_active
+            )
+            return stats
+
+
+class SlowHandler(logging.Handler):
+    """Обработчик логов с задержкой записи"""
+
+    def emit(self, record):
+        time.sleep(SLOW_LOG_SECONDS)
+
+
+def run(state, duration: float = DURATION):
+    stop_at = time.perf_counter() + duration
+    read_latencies = [[] for _ in range(READERS)]
+    writes = [0] * WRITERS
+    barrier = threading.Barrier(READERS + WRITERS)
+
+    def reader(index):
+        samples = read_latencies[index]
+        barrier.wait()
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            state.get_position(f"SYM{index % WRITERS}")
+            state.emergency_stop
+            state.trading_enabled
+            state.get_global_stats()
+            samples.append(time.perf_counter() - started)
+            # Отдаем GIL, как UI/экспорт метрик между запросами
+            time.sleep(0)
+
+    def writer(index):
+        symbol = f"SYM{index}"
+        barrier.wait()
+        price = 100.0
+        while time.perf_counter() < stop_at:
+            state.set_position(symbol, "Buy", 1.0, entry_price=price)
+            state.update_position_pnl(symbol, price + 1.0)
+            writes[index] += 2
+            price += 0.01
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(READERS)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(sample for thread_samples in read_latencies for sample in thread_samples)
+    total = len(samples)
+    return {
+        'reads_per_sec': total / duration,
+        'read_p50_us': samples[total // 2] * 1e6 if total else 0.0,
+        'read_p99_us': samples[int(total * 0.99)] * 1e6 if total else 0.0,
+        'writes_per_sec': sum(writes) / duration,
+    }
+
+
+def report(title: str, configure_logger) -> None:
+    print(title)
+    header = f"{'state':<22} {'reads/s':>12} {'read p50':>10} {'read p99':>11} {'writes/s':>11}"
+    print(header)
+    print('-' * len(header))
+    for name, factory in (("legacy (one RLock)", LegacyBotState), ("snapshot + stripes", ThreadSafeBotState)):
+        logger = logging.getLogger('bot_state')
+        logger.handlers.clear()
+        logger.propagate = False
+        configure_logger(logger)
+        result = run(factory())
+        print(f"{name:<22} {result['reads_per_sec']:>12,.0f} {result['read_p50_us']:>8.1f}µs "
+              f"{result['read_p99_us']:>9.1f}µs {result['writes_per_sec']:>11,.0f}")
+    print()
+
+
+def main():
+    def quiet(logger):
+        logger.setLevel(logging.CRITICAL)
+
+    def slow(logger):
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(SlowHandler())
+
+    print(f"{READERS} читателей, {WRITERS} писателей, {DURATION:.0f} сек, {datetime.now():%H:%M:%S}\n")
+    report("Логирование отключено", quiet)
+    report(f"Медленный обработчик логов ({SLOW_LOG_SECONDS * 1e3:.1f} мс на запись)", slow)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК КЛЮЧЕЙ КЭША ИНДИКАТОРОВ
+
+Сравнивает стоимость прежнего ключа (MD5 от df.tail(10).to_string()) с
+отпечатком data_fingerprint (сырые буферы колонок) на 200, 2 000 и 20 000
+барах, а также со стоимостью самих индикаторов, которые этот ключ защищает.
+
+Запуск:
+    python scripts/benchmark_cache_keys.py
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.strategy.utils.indicators import data_fingerprint, xxhash
+
+BAR_COUNTS = (200, 2_000, 20_000)
+REPEATS = 200
+
+
+def make_ohlcv(bars: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 20, bars))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=bars, freq='5min'),
+        'open': close + rng.normal(0, 5, bars),
+        'high': close + rng.uniform(1, 40, bars),
+        'low': close - rng.uniform(1, 40, bars),
+        'close': close,
+        'volume': rng.uniform(10, 500, bars),
+    })
+
+
+def legacy_key(df: pd.DataFrame, params: str = "") -> str:
+    """Прежний _create_data_hash"""
+    data_str = f"{df.tail(10).to_string()}{params}"
+    return hashlib.md5(data_str.encode()).hexdigest()[:16]
+
+
+def measure(func, repeats: int = REPEATS) -> float:
+    """Среднее время вызова в микросекундах"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print(f"Хэшер: {'xxh3_64' if xxhash is not None else 'blake2b (xxhash не установлен)'}")
+    header = f"{'bars':>8} {'md5 tail(10)':>14} {'fingerprint':>13} {'speedup':>8} {'sma(20)':>10} {'rsi-style ewm':>14}"
+    print(header)
+    print('-' * len(header))
+
+    for bars in BAR_COUNTS:
+        df = make_ohlcv(bars)
+        old_us = measure(lambda: legacy_key(df, "rsi_14_close"))
+        new_us = measure(lambda: data_fingerprint(df))
+        sma_us = measure(lambda: df['close'].rolling(20, min_periods=1).mean())
+        ewm_us = measure(lambda: df['close'].diff().ewm(alpha=1 / 14).mean())
+        print(f"{bars:>8} {old_us:>12.1f}µs {new_us:>11.1f}µs {old_us / new_us:>7.1f}x "
+              f"{sma_us:>8.1f}µs {ewm_us:>12.1f}µs")
+
+    # Корректность: прежний ключ не видит изменений вне последних 10 строк
+    df = make_ohlcv(200)
+    changed = df.copy()
+    changed.loc[5, 'close'] += 1.0
+    print()
+    print(f"Изменение строки 5: legacy ключ изменился = {legacy_key(df) != legacy_key(changed)}, "
+          f"fingerprint изменился = {data_fingerprint(df) != data_fingerprint(changed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+⏱️ СТРЕСС-БЕНЧМАРК RATE LIMITER
+
+1. Стоимость проверки прежнего _check_global_limits (перебор всех сохраненных
+   меток времени) и корзинных счетчиков при разном объеме накопленного трафика.
+2. 32 потока одновременно вызывают acquire() на разных клиентах и символах:
+   пропускная способность и задержки допуска (p50/p99).
+3. 32 потока штурмуют один ключ с реальными лимитами: количество допущенных
+   запросов не должно превышать лимиты в секунду, за 10 секунд и в минуту.
+
+Запуск:
+    python scripts/benchmark_rate_limiter.py
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.core.exceptions import RateLimitError
+from bot.core.rate_limiter import AggressiveRateLimiter, RateLimitConfig, SlidingWindowCounter
+
+THREADS = 32
+CALLS_PER_THREAD = 2_000
+TRAFFIC_LEVELS = (100, 1_000, 10_000)
+
+
+def legacy_global_check(request_timestamps) -> tuple:
+    """Прежний _check_global_limits: перебор всех меток всех клиентов"""
+    now = datetime.now()
+    minute_ago = now - timedelta(minutes=1)
+    second_ago = now - timedelta(seconds=1)
+    total_minute = total_second = 0
+    for client_data in request_timestamps.values():
+        for symbol_data in client_data.values():
+            for request_time in symbol_data:
+                if request_time > minute_ago:
+                    total_minute += 1
+                if request_time > second_ago:
+                    total_second += 1
+    return total_minute, total_second
+
+
+def measure(func, repeats: int = 200) -> float:
+    """Среднее время вызова в микросекундах"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def bench_admission_cost():
+    print("Стоимость глобальной проверки при накопленном трафике")
+    header = f"{'requests':>9} {'legacy scan':>13} {'counters':>10}"
+    print(header)
+    print('-' * len(header))
+
+    for level in TRAFFIC_LEVELS:
+        stored = defaultdict(lambda: defaultdict(deque))
+        now = datetime.now()
+        minute = SlidingWindowCounter(60.0, 60)
+        second = SlidingWindowCounter(1.0, 10)
+        clock = time.monotonic()
+        for i in range(level):
+            stored[f"client{i % 8}:SYM{i % 16}"]['market_data'].append(now - timedelta(milliseconds=i))
+            minute.add(clock)
+            second.add(clock)
+
+        legacy_us = measure(lambda: legacy_global_check(stored))
+        new_us = measure(lambda: (minute.count(time.monotonic()), second.count(time.monotonic())))
+        print(f"{level:>9} {legacy_us:>11.1f}µs {new_us:>8.2f}µs")
+
+
+def make_unlimited_limiter() -> AggressiveRateLimiter:
+    limiter = AggressiveRateLimiter()
+    limiter.logger.disabled = True
+    limiter._global_requests_per_minute = 10 ** 9
+    limiter._global_requests_per_second = 10 ** 9
+    limiter._limits['market_data'] = RateLimitConfig(
+        requests_per_minute=10 ** 9, requests_per_second=10 ** 9, burst_limit=10 ** 9
+    )
+    return limiter
+
+
+def run_threads(worker) -> float:
+    barrier = threading.Barrier(THREADS)
+    threads = [threading.Thread(target=worker, args=(index, barrier)) for index in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_throughput():
+    limiter = make_unlimited_limiter()
+    latencies = [[] for _ in range(THREADS)]
+
+    def worker(index, barrier):
+        barrier.wait()
+        samples = latencies[index]
+        for call in range(CALLS_PER_THREAD):
+            started = time.perf_counter()
+            limiter.acquire('market_data', client_id=f"client{index % 8}", symbol=f"SYM{call % 16}")
+            samples.append(time.perf_counter() - started)
+
+    elapsed = run_threads(worker)
+    samples = sorted(sample for thread_samples in latencies for sample in thread_samples)
+    total = len(samples)
+    print()
+    print(f"{THREADS} потоков x {CALLS_PER_THREAD} acquire(): {total / elapsed:,.0f} запросов/сек, "
+          f"p50 {samples[total // 2] * 1e6:.1f}µs, p99 {samples[int(total * 0.99)] * 1e6:.1f}µs")
+
+
+def bench_limits_hold():
+    limiter = AggressiveRateLimiter()
+    limiter.logger.disabled = True
+    # Проверяем лимиты ключа, а не глобальные
+    limiter._global_requests_per_minute = 10 ** 9
+    limiter._global_requests_per_second = 10 ** 9
+    config = limiter._limits['market_data']
+    admitted = []
+    admitted_lock = threading.Lock()
+    stop_at = time.monotonic() + 1.5
+
+    def worker(index, barrier):
+        barrier.wait()
+        while time.monotonic() < stop_at:
+            try:
+                limiter.acquire('market_data', client_id='shared')
+            except RateLimitError:
+                continue
+            with admitted_lock:
+                admitted.append(time.monotonic())
+
+    run_threads(worker)
+    max_per_second = max(sum(1 for other in admitted if 0 <= other - ts < 1.0) for ts in admitted)
+    print()
+    print(f"Один ключ, {THREADS} потока 1.5 сек: допущено {len(admitted)} "
+          f"(burst лимит {config.burst_limit}), максимум за секунду {max_per_second} "
+          f"(лимит {config.requests_per_second})")
+
+
+def main():
+    bench_admission_cost()
+    bench_throughput()
+    bench_limits_hold()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК VOLUME PROFILE
+
+Сравнивает прежние построчные алгоритмы (df.iterrows) с векторизованным ядром
+bot/strategy/utils/volume_at_price.py на 200, 2 000 и 20 000 барах и проверяет,
+что результаты совпадают.
+
+Запуск:
+    python scripts/benchmark_volume_profile.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.strategy.utils.volume_at_price import OVERLAP, TOUCH, profile_arrays, volume_at_price
+
+BAR_COUNTS = (200, 2_000, 20_000)
+NUM_BINS = 50
+
+
+def make_ohlcv(bars: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 20, bars))
+    return pd.DataFrame({
+        'high': close + rng.uniform(1, 40, bars),
+        'low': close - rng.uniform(1, 40, bars),
+        'close': close,
+        'volume': rng.uniform(10, 500, bars),
+    })
+
+
+def legacy_overlap(df: pd.DataFrame, price_bins: np.ndarray) -> np.ndarray:
+    """Прежний алгоритм VolumeProfileAnalyzer.calculate_profile"""
+    volume_at = np.zeros(len(price_bins) - 1)
+    for _, row in df.iterrows():
+        bar_low, bar_high, bar_volume = row['low'], row['high'], row['volume']
+        if bar_low >= bar_high:
+            bar_high = bar_low * 1.0001
+        for i, (bin_low, bin_high) in enumerate(zip(price_bins[:-1], price_bins[1:])):
+            overlap_low = max(bar_low, bin_low)
+            overlap_high = min(bar_high, bin_high)
+            if overlap_low < overlap_high:
+                volume_at[i] += bar_volume * (overlap_high - overlap_low) / (bar_high - bar_low)
+    return volume_at
+
+
+def legacy_touch(df: pd.DataFrame, price_bins: np.ndarray) -> np.ndarray:
+    """Прежний алгоритм LevelsFinder.find_volume_levels"""
+    levels = len(price_bins) - 1
+    volume_at = np.zeros(levels)
+    for _, row in df.iterrows():
+        low_idx = max(0, min(np.digitize(row['low'], price_bins) - 1, levels - 1))
+        high_idx = max(0, min(np.digitize(row['high'], price_bins) - 1, levels - 1))
+        if low_idx == high_idx:
+            volume_at[low_idx] += row['volume']
+        else:
+            for level_idx in range(low_idx, high_idx + 1):
+                volume_at[level_idx] += row['volume'] / (high_idx - low_idx + 1)
+    return volume_at
+
+
+def timed(func, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    print(f"{'bars':>8} {'method':>8} {'legacy, ms':>12} {'vector, ms':>12} {'speed-up':>10} {'max diff':>10}")
+    for bars in BAR_COUNTS:
+        df = make_ohlcv(bars)
+        price_bins = np.linspace(df['low'].min(), df['high'].max(), NUM_BINS + 1)
+        legacy_repeats = 3 if bars <= 2_000 else 1
+
+        for method, legacy in ((OVERLAP, legacy_overlap), (TOUCH, legacy_touch)):
+            vector = lambda: volume_at_price(*profile_arrays(df), price_bins, method=method)
+            expected = legacy(df, price_bins)
+            max_diff = float(np.max(np.abs(vector() - expected)))
+
+            legacy_time = timed(lambda: legacy(df, price_bins), legacy_repeats)
+            vector_time = timed(vector, 50)
+            print(f"{bars:>8} {method:>8} {legacy_time * 1000:>12.2f} {vector_time * 1000:>12.3f} "
+                  f"{legacy_time / vector_time:>9.0f}x {max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
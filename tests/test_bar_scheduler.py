@@ -0,0 +1,110 @@
+import threading
+import unittest
+
+from bot.core.bar_scheduler import BarCloseScheduler, SimulatedClock, get_strategy_timeframes
+
+# Начало часа: граница баров всех таймфреймов
+T0 = 1_700_002_800
+
+
+class TestBarCloseScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock(T0 + 10)
+        self.scheduler = BarCloseScheduler(['1m', '5m', '15m', '1h'], close_delay=2.0,
+                                           clock=self.clock.time, waiter=self.clock.wait)
+        self.scheduler.register('fast', ['1m'])
+        self.scheduler.register('swing', ['15m', '1h'])
+        self.scheduler.register('any')
+
+    def test_first_poll_runs_every_timeframe(self):
+        self.assertEqual(self.scheduler.poll(), {'1m', '5m', '15m', '1h'})
+        self.assertEqual(self.scheduler.poll(), set())
+
+    def test_wakes_exactly_after_bar_close(self):
+        self.scheduler.poll()
+
+        closed = self.scheduler.wait_for_bars()
+
+        self.assertEqual(closed, {'1m'})
+        self.assertEqual(self.clock.now, T0 + 60 + 2.0)
+        self.assertEqual(self.scheduler.due_strategies(closed), ['fast', 'any'])
+
+    def test_unchanged_timeframes_skip_evaluation(self):
+        self.scheduler.poll()
+        runs = {'fast': 0, 'swing': 0, 'any': 0}
+
+        # Один час симулированного времени
+        while self.clock.now < T0 + 3600 + 2.0:
+            for name in self.scheduler.due_strategies(self.scheduler.wait_for_bars()):
+                runs[name] += 1
+
+        self.assertEqual(runs, {'fast': 60, 'swing': 4, 'any': 60})
+        self.assertEqual(self.scheduler.get_stats()['skipped'], 56)
+
+    def test_stream_notification_wakes_early_without_duplicate(self):
+        self.scheduler.poll()
+        self.clock.now = T0 + 60.05
+
+        self.scheduler.notify_bar_close('1', bar_start_ms=T0 * 1000)
+        self.assertEqual(self.scheduler.wait_for_bars(), {'1m'})
+        self.assertEqual(self.clock.now, T0 + 60.05)
+
+        # Закрытие того же бара по часам уже обработано
+        self.assertEqual(self.scheduler.wait_for_bars(), {'1m'})
+        self.assertEqual(self.clock.now, T0 + 120 + 2.0)
+
+    def test_max_wait_returns_empty_set(self):
+        self.scheduler.poll()
+        self.assertEqual(self.scheduler.wait_for_bars(max_wait=15), set())
+        self.assertEqual(self.clock.now, T0 + 25)
+
+    def test_shutdown_stops_waiting(self):
+        self.scheduler.poll()
+        shutdown = threading.Event()
+        shutdown.set()
+        self.assertEqual(self.scheduler.wait_for_bars(shutdown), set())
+
+
+class TestStrategyTimeframes(unittest.TestCase):
+    def test_declarations(self):
+        class Declared:
+            required_timeframes = ('5m', '1h')
+
+        class FromMethod:
+            def get_required_timeframes(self):
+                return ['15m']
+
+        self.assertEqual(get_strategy_timeframes(Declared()), ['5m', '1h'])
+        self.assertEqual(get_strategy_timeframes(FromMethod()), ['15m'])
+        self.assertEqual(get_strategy_timeframes({'timeframes': ['1m']}), ['1m'])
+        self.assertIsNone(get_strategy_timeframes(object()))
+
+    def test_primary_timeframe_close_triggers_strategy(self):
+        # Импорт здесь: стратегия тянет за собой весь пакет bot.strategy
+        from bot.strategy.implementations.fibonacci_rsi_strategy_v3 import (
+            FibonacciRSIConfigV3, FibonacciRSIStrategyV3,
+        )
+        strategy = FibonacciRSIStrategyV3.__new__(FibonacciRSIStrategyV3)
+        strategy.config = FibonacciRSIConfigV3()
+
+        timeframes = get_strategy_timeframes(strategy)
+        self.assertEqual(timeframes[0], '5m')
+        self.assertTrue({'15m', '1h'} <= set(timeframes))
+
+        clock = SimulatedClock(T0 + 10)
+        scheduler = BarCloseScheduler(['1m', '5m', '15m', '1h'], close_delay=2.0,
+                                      clock=clock.time, waiter=clock.wait)
+        scheduler.register('fibonacci', timeframes)
+        scheduler.poll()
+
+        # Закрытия 1m не запускают стратегию, закрытие 5m запускает
+        for _ in range(4):
+            self.assertEqual(scheduler.due_strategies(scheduler.wait_for_bars()), [])
+        closed = scheduler.wait_for_bars()
+        self.assertEqual(closed, {'1m', '5m'})
+        self.assertEqual(clock.now, T0 + 300 + 2.0)
+        self.assertEqual(scheduler.due_strategies(closed), ['fibonacci'])
+
+
+if __name__ == "__main__":
+    unittest.main()
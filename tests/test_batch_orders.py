@@ -0,0 +1,191 @@
+import threading
+import time
+import unittest
+
+from bot.core.exceptions import OrderRejectionError
+from bot.core.order_manager import OrderRequest, ThreadSafeOrderManager
+
+
+class BatchAPI:
+    """API с create_batch_orders: ордер с qty 0.5 отклоняется биржей"""
+
+    def __init__(self, echo_stops: bool = True):
+        self.batches = []
+        self.single_orders = 0
+        self.echo_stops = echo_stops
+
+    def get_positions(self, symbol):
+        return {"retCode": 0, "result": {"list": []}}
+
+    def create_order(self, **kwargs):
+        self.single_orders += 1
+        return {"retCode": 0, "result": {"orderId": "single"}}
+
+    def create_batch_orders(self, orders):
+        self.batches.append(orders)
+        return [
+            {"retCode": 10001, "retMsg": "qty invalid", "result": {}} if order['qty'] == 0.5
+            else {"retCode": 0, "retMsg": "OK", "result": self._result(order)}
+            for order in orders
+        ]
+
+    def _result(self, order):
+        result = {"orderId": f"id-{order['symbol']}"}
+        if self.echo_stops:
+            for key, field in (('stop_loss', 'stopLoss'), ('take_profit', 'takeProfit')):
+                if order.get(key):
+                    result[field] = str(order[key])
+        return result
+
+
+class StrategyAdapter:
+    """Отдельный адаптер стратегии поверх общего клиента аккаунта (как APIAdapter.api)"""
+
+    def __init__(self, account):
+        self.api = account
+
+    def get_positions(self, symbol):
+        return self.api.get_positions(symbol)
+
+    def create_order(self, **kwargs):
+        return self.api.create_order(**kwargs)
+
+    def create_batch_orders(self, orders):
+        return self.api.create_batch_orders(orders)
+
+
+def account(client_id):
+    api = BatchAPI()
+    api._rate_limit_client = client_id
+    api.base_url = "https://api-testnet.bybit.com"
+    return api
+
+
+class TestBatchOrders(unittest.TestCase):
+    def setUp(self):
+        self.manager = ThreadSafeOrderManager(worker_count=1, batch_window_seconds=0.2)
+        self.manager.logger.disabled = True
+        self.api = BatchAPI()
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def submit_all(self, requests):
+        results = {}
+
+        def submit(request):
+            try:
+                results[request.symbol] = self.manager.create_order_safe(self.api, request)
+            except OrderRejectionError as exc:
+                results[request.symbol] = exc
+
+        threads = [threading.Thread(target=submit, args=(request,)) for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_simultaneous_orders_share_one_request(self):
+        results = self.submit_all([
+            OrderRequest("BTCUSDT", "Buy", "Market", 0.01, stop_loss=29000.0, take_profit=31000.0),
+            OrderRequest("ETHUSDT", "Sell", "Limit", 0.1, price=2000.0),
+            OrderRequest("SOLUSDT", "Buy", "Market", 0.5),
+        ])
+
+        self.assertEqual(len(self.api.batches), 1)
+        self.assertEqual(self.api.single_orders, 0)
+        sent = {order['symbol']: order for order in self.api.batches[0]}
+        self.assertEqual((sent['BTCUSDT']['stop_loss'], sent['BTCUSDT']['take_profit']), (29000.0, 31000.0))
+
+        # Каждый future разрешается своим результатом
+        self.assertEqual(results['BTCUSDT']['result']['orderId'], 'id-BTCUSDT')
+        self.assertTrue(results['BTCUSDT']['stops_attached'])
+        self.assertFalse(results['ETHUSDT']['stops_attached'])
+        self.assertIsInstance(results['SOLUSDT'], OrderRejectionError)
+        stats = self.manager.get_stats()
+        self.assertEqual((stats['batches_sent'], stats['batched_orders'], stats['total_orders']), (1, 3, 2))
+
+    def test_unconfirmed_stops_are_not_marked_attached(self):
+        # Ответ биржи без stopLoss/takeProfit - стопы ставятся через set_trading_stop
+        self.api.echo_stops = False
+        results = self.submit_all([
+            OrderRequest("BTCUSDT", "Buy", "Market", 0.01, stop_loss=29000.0, take_profit=31000.0),
+            OrderRequest("ETHUSDT", "Sell", "Market", 0.1, stop_loss=2100.0),
+        ])
+
+        self.assertFalse(results['BTCUSDT']['stops_attached'])
+        self.assertFalse(results['ETHUSDT']['stops_attached'])
+        self.assertIsNot(results['BTCUSDT'], results['ETHUSDT'])
+
+    def test_disabled_window_sends_orders_one_by_one(self):
+        self.manager.shutdown()
+        self.manager = ThreadSafeOrderManager(worker_count=1, batch_window_seconds=0.0)
+        self.manager.logger.disabled = True
+
+        results = self.submit_all([OrderRequest("BTCUSDT", "Buy", "Market", 0.01)])
+
+        self.assertEqual(results['BTCUSDT']['result']['orderId'], 'single')
+        self.assertEqual((len(self.api.batches), self.api.single_orders), (0, 1))
+
+    def test_cycle_orders_are_grouped_by_account(self):
+        first, second = account("bybit_first"), account("bybit_second")
+        orders = [
+            (StrategyAdapter(first), OrderRequest("BTCUSDT", "Buy", "Market", 0.01, strategy_name="alpha")),
+            (StrategyAdapter(second), OrderRequest("BTCUSDT", "Sell", "Market", 0.02, strategy_name="beta")),
+            (StrategyAdapter(first), OrderRequest("BTCUSDT", "Buy", "Limit", 0.03, price=30000.0, strategy_name="gamma")),
+        ]
+
+        results = self.manager.create_orders_safe(orders)
+
+        self.assertTrue(all(result['retCode'] == 0 for result in results))
+        self.assertEqual([[order['qty'] for order in batch] for batch in first.batches], [[0.01, 0.03]])
+        self.assertEqual([[order['qty'] for order in batch] for batch in second.batches], [[0.02]])
+        self.assertEqual(self.manager.get_stats()['total_orders'], 3)
+
+
+class TestTraderCycleOrders(unittest.TestCase):
+    def setUp(self):
+        # Окно больше времени теста: ордера цикла не должны его ждать
+        self.manager = ThreadSafeOrderManager(worker_count=2, batch_window_seconds=1.0)
+        self.manager.logger.disabled = True
+        self.account = account("bybit_shared")
+        self.apis = {'alpha': StrategyAdapter(self.account), 'beta': StrategyAdapter(self.account)}
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def submit(self, orders):
+        # Импорт здесь: trader тянет конфигурацию бота
+        from bot.core.trader import submit_cycle_orders
+
+        started = time.monotonic()
+        results = submit_cycle_orders(self.manager, orders, self.apis)
+        return results, time.monotonic() - started
+
+    def test_strategies_of_one_account_share_one_request(self):
+        orders = [
+            {'strategy_name': 'alpha', 'request': OrderRequest("BTCUSDT", "Buy", "Market", 0.01, strategy_name='alpha')},
+            {'strategy_name': 'beta', 'request': OrderRequest("BTCUSDT", "Buy", "Limit", 0.02, price=30000.0,
+                                                              strategy_name='beta')},
+        ]
+
+        results, elapsed = self.submit(orders)
+
+        self.assertEqual(len(self.account.batches), 1)
+        self.assertEqual([order['qty'] for order in self.account.batches[0]], [0.01, 0.02])
+        self.assertEqual([order for order, _ in results], orders)
+        self.assertTrue(all(response['retCode'] == 0 for _, response in results))
+        self.assertLess(elapsed, 0.5)
+
+    def test_single_order_skips_batch_window(self):
+        order = {'strategy_name': 'alpha', 'request': OrderRequest("BTCUSDT", "Buy", "Market", 0.01, strategy_name='alpha')}
+
+        results, elapsed = self.submit([order])
+
+        self.assertEqual(results[0][1]['result']['orderId'], 'id-BTCUSDT')
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp import web
+
+from bot.core.rate_limiter import AggressiveRateLimiter
+from bot.exchange.bybit_async_api import AsyncBybitAPIV5, sign_request
+
+API_KEY = "test-key"
+API_SECRET = "test-secret"
+
+
+class BybitStub:
+    """Локальный aiohttp сервер с маршрутами Bybit v5 и проверкой подписи"""
+
+    def __init__(self):
+        self.requests = []
+        self.peers = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        app = web.Application()
+        app.router.add_get('/v5/market/kline', self.kline)
+        app.router.add_get('/v5/account/wallet-balance', self.signed)
+        app.router.add_get('/v5/position/list', self.signed)
+        app.router.add_post('/v5/order/create', self.signed)
+        app.router.add_post('/v5/position/trading-stop', self.signed)
+        app.router.add_post('/v5/order/cancel-all', self.signed)
+        self.runner = web.AppRunner(app)
+
+    async def start(self) -> str:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def reply(self, result):
+        return web.json_response(
+            {"retCode": 0, "retMsg": "OK", "result": result},
+            headers={'X-Bapi-Limit': '10', 'X-Bapi-Limit-Status': '9',
+                     'X-Bapi-Limit-Reset-Timestamp': '0'},
+        )
+
+    async def kline(self, request):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        rows = [[str(1_700_000_000_000 + i * 60_000), "1", "2", "0.5", str(i), "10", "100"] for i in (2, 1, 0)]
+        return self.reply({"symbol": request.query['symbol'], "list": rows})
+
+    async def signed(self, request):
+        payload = request.query_string if request.method == 'GET' else await request.text()
+        headers = request.headers
+        expected = sign_request(headers.get('X-BAPI-API-KEY', ''), API_SECRET,
+                                int(headers.get('X-BAPI-TIMESTAMP', 0)),
+                                int(headers.get('X-BAPI-RECV-WINDOW', 0)), payload)
+        if headers.get('X-BAPI-SIGN') != expected:
+            return web.json_response({"retCode": 10004, "retMsg": "error sign!", "result": {}})
+        self.requests.append((request.method, request.path, payload))
+        return self.reply({"echo": payload})
+
+
+class TestAsyncBybitAPIV5(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.stub = BybitStub()
+        url = self.loop.run_until_complete(self.stub.start())
+        limiter = AggressiveRateLimiter()
+        limiter.logger.disabled = True
+        self.api = AsyncBybitAPIV5(API_KEY, API_SECRET, base_url=url, connector_limit=4,
+                                   rate_limiter=limiter)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.api.close())
+        self.loop.run_until_complete(self.stub.stop())
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_signed_requests_are_accepted(self):
+        balance = self.run_async(self.api.get_wallet_balance_v5())
+        positions = self.run_async(self.api.get_positions("BTCUSDT"))
+        order = self.run_async(self.api.create_order("BTCUSDT", "Buy", "Limit", 0.001, price=30000))
+        stops = self.run_async(self.api.set_trading_stop("BTCUSDT", stop_loss=29000, take_profit=31000))
+        cancel = self.run_async(self.api.cancel_all_orders("BTCUSDT"))
+
+        for response in (balance, positions, order, stops, cancel):
+            self.assertEqual(response['retCode'], 0)
+        self.assertEqual(positions['result']['echo'], "category=linear&symbol=BTCUSDT")
+        body = json.loads(order['result']['echo'])
+        self.assertEqual((body['side'], body['qty'], body['price']), ("Buy", "0.001", "30000"))
+        self.assertIn(('POST', '/v5/order/cancel-all', '{"category":"linear","symbol":"BTCUSDT"}'),
+                      self.stub.requests)
+
+    def test_wrong_secret_is_rejected_by_stub(self):
+        api = AsyncBybitAPIV5(API_KEY, "other-secret", base_url=self.api.base_url,
+                              rate_limiter=self.api.rate_limiter)
+        try:
+            response = self.run_async(api.get_wallet_balance_v5())
+        finally:
+            self.run_async(api.close())
+        self.assertEqual(response['retCode'], 10004)
+
+    def test_ohlcv_and_quota_headers(self):
+        df = self.run_async(self.api.get_ohlcv("BTCUSDT", "1", limit=3))
+
+        self.assertEqual(list(df.columns), ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'])
+        self.assertEqual(df['close'].tolist(), [0.0, 1.0, 2.0])
+        quota = self.api.rate_limiter.get_server_quota('get_kline', client_id=self.api._rate_limit_client)
+        self.assertEqual(quota['limit'], 10)
+
+    def test_pooled_keep_alive_connections(self):
+        async def burst():
+            return await asyncio.gather(*(self.api.get_ohlcv("BTCUSDT", "1", limit=3) for _ in range(8)))
+
+        self.api.rate_limiter._limits['market_data'].requests_per_second = 100
+        self.api.rate_limiter._limits['market_data'].burst_limit = 100
+        frames = self.run_async(burst())
+        self.run_async(self.api.get_ohlcv("BTCUSDT", "1", limit=3))
+
+        self.assertTrue(all(frame is not None for frame in frames))
+        # Не больше connector_limit соединений, и они переиспользуются
+        self.assertLessEqual(self.stub.max_in_flight, 4)
+        self.assertLessEqual(len(self.stub.peers), 4)
+
+    def test_balance_is_formatted_by_shared_function(self):
+        balance = {"retCode": 0, "result": {"list": [{
+            "totalEquity": "100.5", "totalAvailableBalance": "40", "coin": [
+                {"coin": "USDT", "walletBalance": "100.5", "usdValue": "100.5"}]}]}}
+
+        self.assertEqual(self.api.format_balance_v5(balance),
+                         "Общий баланс: $100.50\nДоступно: $40.00\nМонеты:\nUSDT: 100.5000 ($100.50)")
+        self.assertEqual(self.api.format_balance_v5({"retCode": 10001}), "Ошибка получения баланса")
+        self.api.logger.disabled = True
+        self.assertEqual(self.api.format_balance_v5({"retCode": 0, "result": {}}), "Ошибка форматирования баланса")
+
+    def test_network_error_is_returned_as_response(self):
+        api = AsyncBybitAPIV5(API_KEY, API_SECRET, base_url="http://127.0.0.1:9",
+                              rate_limiter=self.api.rate_limiter)
+        try:
+            response = self.run_async(api.get_server_time())
+        finally:
+            self.run_async(api.close())
+        self.assertEqual(response['retCode'], -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
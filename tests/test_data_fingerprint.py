@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bot.strategy.utils.indicators import TechnicalIndicators, data_fingerprint
+
+
+def _make_ohlcv(bars: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 25, bars))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=bars, freq='5min'),
+        'open': close + rng.normal(0, 5, bars),
+        'high': close + rng.uniform(1, 30, bars),
+        'low': close - rng.uniform(1, 30, bars),
+        'close': close,
+        'volume': rng.uniform(10, 100, bars),
+    })
+
+
+class TestDataFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.df = _make_ohlcv(200)
+
+    def test_equal_content_gives_equal_fingerprint(self):
+        self.assertEqual(data_fingerprint(self.df), data_fingerprint(self.df.copy()))
+
+    def test_change_anywhere_in_frame_changes_fingerprint(self):
+        changed = self.df.copy()
+        changed.loc[3, 'close'] += 0.5
+        self.assertNotEqual(data_fingerprint(self.df), data_fingerprint(changed))
+
+    def test_fingerprint_contains_length_and_bar_range(self):
+        length, first_ts, last_ts, _ = data_fingerprint(self.df)
+        self.assertEqual(length, 200)
+        stamps = self.df['timestamp'].to_numpy().view('int64')
+        self.assertEqual((first_ts, last_ts), (stamps[0], stamps[-1]))
+
+    def test_cached_rsi_is_invalidated_by_earlier_change(self):
+        first = TechnicalIndicators.calculate_rsi(self.df, 14).value
+        changed = self.df.copy()
+        changed.loc[20, 'close'] += 200.0
+        second = TechnicalIndicators.calculate_rsi(changed, 14).value
+        self.assertFalse(np.allclose(first.to_numpy(), second.to_numpy()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bot.ai.feature_store import FeatureStore
+from bot.ai.neural_trader import FEATURE_STORE_PATH, NeuralTrader
+
+
+def market_data(bars=60, seed=5):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for tf, freq in (('1m', '1min'), ('5m', '5min'), ('15m', '15min'), ('1h', '1h')):
+        close = 100 + rng.standard_normal(bars).cumsum()
+        data[tf] = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=bars, freq=freq),
+            'open': close + rng.random(bars) - 0.5, 'high': close + 1, 'low': close - 1,
+            'close': close, 'volume': rng.random(bars) * 10,
+        })
+    return data
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_ring_buffer_evicts_oldest_and_survives_reload(self):
+        path = os.path.join(self.tmp, 'features.npz')
+        store = FeatureStore(3, capacity=4, path=path)
+        for ts in range(6):
+            store.put(ts * 60_000, 'BTCUSDT', [ts, ts, ts])
+        store.put(300_000, 'BTCUSDT', [9, 9, 9])
+
+        self.assertIsNone(store.get(0, 'BTCUSDT'))
+        self.assertEqual(store.get(300_000, 'BTCUSDT').tolist(), [9.0, 9.0, 9.0])
+        self.assertEqual(store.get_stats()['evicted'], 2)
+        self.assertTrue(store.save())
+        self.assertFalse(store.save())
+
+        reopened = FeatureStore(3, capacity=4, path=path)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.get(120_000, 'BTCUSDT').dtype, np.float32)
+        # Порядок записи сохраняется: следующей вытесняется самая старая строка
+        reopened.put(360_000, 'BTCUSDT', [6, 6, 6])
+        self.assertIsNone(reopened.get(120_000, 'BTCUSDT'))
+        self.assertIsNotNone(reopened.get(180_000, 'BTCUSDT'))
+        self.assertEqual(FeatureStore(5, path=path).get_stats()['rows'], 0)
+
+        with self.assertRaises(ValueError):
+            store.put(0, 'BTCUSDT', [1.0])
+
+
+class TestNeuralTraderFeatures(unittest.TestCase):
+    def setUp(self):
+        # Модель и хранилище признаков читаются из data/ai текущего каталога
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        self.trader = NeuralTrader()
+        self.trader.logger.disabled = True
+        self.trader.confidence_threshold = 0.0
+        self.trader.min_confidence = 0.1
+        self.calls = []
+        original = self.trader._market_features
+        self.trader._market_features = lambda *args: self.calls.append(1) or original(*args)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_market_features_are_computed_once_per_bar(self):
+        data = market_data()
+        signals = {'strategy_02': {'signal': 'SELL', 'entry_price': 100.0}}
+        first = self.trader.prepare_input_safe(data, signals, 'BTCUSDT')
+        self.trader.predict_strategy_performance(data, {}, 'BTCUSDT')
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first.shape, (1, self.trader.input_size))
+
+        # Формирующийся бар изменился - строка с тем же ключом пересчитывается
+        data['1m'].loc[59, 'close'] += 1.0
+        self.trader.prepare_input_safe(data, signals, 'BTCUSDT')
+        # Другой символ - другой ключ
+        self.trader.prepare_input_safe(data, signals, 'ETHUSDT')
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.trader.feature_store.get_stats()['refreshed'], 1)
+
+        # Временные признаки берутся по времени бара, а не по часам
+        stamp = data['1h']['timestamp'].iloc[-1]
+        expected = self.trader._extract_temporal_features(stamp.to_pydatetime())
+        np.testing.assert_allclose(first[0, -len(expected) - 24:-24], expected, atol=1e-6)
+
+    def test_training_replays_the_input_seen_by_make_bet(self):
+        data = market_data()
+        signals = {'strategy_04': {'signal': 'BUY', 'entry_price': 99.0, 'signal_strength': 0.8}}
+        bet = self.trader.make_bet(data, signals, symbol='BTCUSDT')
+        self.assertIsNotNone(bet)
+        self.assertEqual(bet['feature_key']['symbol'], 'BTCUSDT')
+
+        # Ставка переживает перезапуск: строка читается из файла хранилища,
+        # который пишет поток обучения, а не update_performance
+        self.trader.update_performance(bet, {'success': True, 'profit': 1.0})
+        self.assertFalse(os.path.exists(FEATURE_STORE_PATH))
+        self.trader._training_loop()
+        restarted = NeuralTrader()
+        restarted.logger.disabled = True
+        replayed = restarted._experience_features(bet)
+        np.testing.assert_array_equal(replayed, self.trader.prepare_input_safe(data, signals, 'BTCUSDT')[0])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_fingerprint_is_stable_across_processes(self):
+        # Таймфрейм отсутствует: встроенный hash(None) зависел бы от адреса объекта в процессе
+        script = (
+            "from tests.test_feature_store import market_data\n"
+            "from bot.ai.neural_trader import NeuralTrader\n"
+            "data = market_data(); del data['15m']\n"
+            "print(NeuralTrader._feature_key(NeuralTrader.__new__(NeuralTrader), data, 'BTCUSDT'))\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        runs = {
+            subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True,
+                           check=True, env=dict(os.environ, PYTHONHASHSEED=seed)).stdout.strip()
+            for seed in ('1', '2')
+        }
+
+        data = market_data()
+        del data['15m']
+        key = self.trader._feature_key(data, 'BTCUSDT')
+        self.assertEqual(runs, {str(key)})
+        self.assertIsInstance(key[2], int)
+        self.assertTrue(-2 ** 63 <= key[2] < 2 ** 63)
+
+
+if __name__ == "__main__":
+    unittest.main()
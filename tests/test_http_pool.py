@@ -0,0 +1,97 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pybit.unified_trading import HTTP
+
+from bot.core import enhanced_api_connection
+from bot.core.enhanced_api_connection import setup_enhanced_connection_manager
+from bot.exchange.http_pool import attach_shared_transport, get_http_pool_stats
+
+
+class KeepAliveStub:
+    """Локальный HTTP/1.1 сервер: считает TCP соединения и проверяет ключ в заголовках"""
+
+    def __init__(self):
+        self.connections = set()
+        self.keys = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.connections.add(self.client_address)
+                stub.keys.append(self.headers.get('X-BAPI-API-KEY'))
+                body = json.dumps({"retCode": 0, "retMsg": "OK", "result": {"list": []}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestSharedTransport(unittest.TestCase):
+    def setUp(self):
+        self.stub = KeepAliveStub()
+
+    def tearDown(self):
+        self.stub.stop()
+        for manager in enhanced_api_connection._connection_managers.values():
+            manager.heartbeat_running = False
+        enhanced_api_connection._connection_managers.clear()
+
+    def make_client(self, index):
+        session = HTTP(testnet=True, api_key=f"key{index}", api_secret=f"secret{index}",
+                       return_response_headers=True)
+        session.endpoint = self.stub.url
+        attach_shared_transport(session, self.stub.url, testnet=True)
+        return session
+
+    def test_clients_share_keep_alive_pool(self):
+        clients = [self.make_client(index) for index in range(4)]
+        for _ in range(5):
+            for client in clients:
+                client.get_positions(category='linear', symbol='BTCUSDT')
+
+        # Подпись - своими ключами, соединение - одно общее
+        self.assertEqual(set(self.stub.keys), {f"key{index}" for index in range(4)})
+        self.assertEqual(len(self.stub.connections), 1)
+        self.assertIs(clients[0].client, clients[3].client)
+        stats = get_http_pool_stats()[f"{self.stub.url} (testnet)"]
+        self.assertEqual(stats['connections'], 1)
+        self.assertGreaterEqual(stats['reuse_ratio'], 0.95)
+
+    def test_one_manager_with_per_client_health(self):
+        first, second = self.make_client(1), self.make_client(2)
+        manager = setup_enhanced_connection_manager(first, base_url=self.stub.url, client_id='a')
+        self.assertIs(setup_enhanced_connection_manager(second, base_url=self.stub.url, client_id='b'), manager)
+
+        manager.execute_with_fallback(lambda: first.get_wallet_balance(accountType='UNIFIED'),
+                                      'balance', cache_key='wallet_balance', client_id='a')
+        with self.assertRaises(ValueError):
+            manager.execute_with_fallback(lambda: (_ for _ in ()).throw(ValueError('bad')),
+                                          'balance', cache_key='wallet_balance', client_id='b')
+
+        clients = manager.get_connection_health()['clients']
+        self.assertEqual((clients['a']['total_requests'], clients['a']['failed_requests']), (1, 0))
+        self.assertEqual((clients['b']['total_requests'], clients['b']['failed_requests']), (1, 1))
+        # Кэш клиента a не отдается клиенту b
+        self.assertEqual(set(manager.cached_data), {'a:wallet_balance'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from bot.core.journal_store import JournalStore
+from bot.core.trade_journal import TRADE_JOURNAL_SCHEMA, TradeJournalWriter, load_trade_journal
+
+
+def rows(start, count, step_minutes=60, strategies=('alpha', 'beta')):
+    times = pd.date_range(start, periods=count, freq=f"{step_minutes}min", tz='UTC')
+    return [
+        {'timestamp': stamp.isoformat(), 'signal_id': f"sig_{index}", 'strategy': strategies[index % len(strategies)],
+         'signal': 'BUY', 'entry_price': 100.0 + index, 'tf': '5m', 'comment': ''}
+        for index, stamp in enumerate(times)
+    ]
+
+
+class TestJournalStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, 'trade_journal')
+        self.store = JournalStore(self.root, TRADE_JOURNAL_SCHEMA, segment_rows=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_segments_roll_by_size_and_day(self):
+        # 30 часовых строк: 24 в первый день, 6 во второй
+        self.store.append(rows('2024-01-01', 30))
+        self.store.append(rows('2024-01-02 06:00', 2, strategies=('gamma',)))
+
+        segments = self.store.segments()
+        # Дозапись не переписывает сегмент 6 строк второго дня, а пишет новый
+        self.assertEqual([(s['partition'], s['rows']) for s in segments],
+                         [('2024-01-01', 10), ('2024-01-01', 10), ('2024-01-01', 4),
+                          ('2024-01-02', 6), ('2024-01-02', 2)])
+        self.assertEqual(segments[-1]['strategies'], ['gamma'])
+        self.assertEqual(self.store.row_count(), 32)
+
+        # Манифест читается новым экземпляром (другой процесс)
+        reopened = JournalStore(self.root, TRADE_JOURNAL_SCHEMA, segment_rows=10)
+        self.assertEqual(reopened.segments(), segments)
+
+    def test_appends_write_small_segments_and_compact_later(self):
+        store = JournalStore(self.root, TRADE_JOURNAL_SCHEMA, segment_rows=10, compact_fanout=3)
+        reads = []
+        original = store._read_segment
+        store._read_segment = lambda name, columns: reads.append(name) or original(name, columns)
+
+        for index, row in enumerate(rows('2024-01-01', 9, step_minutes=1)):
+            store.append([row])
+            if index == 0:
+                # Дозапись не читает существующие сегменты
+                self.assertEqual(reads, [])
+        # 9 дозаписей по строке: 3 + 3 + 3 -> три сегмента уровня 1 -> один уровня 2
+        self.assertEqual([(s['rows'], s['level']) for s in store.segments()], [(9, 2)])
+        self.assertEqual(len(reads), 9 + 3)
+
+        store.append(rows('2024-01-01 12:00', 3, step_minutes=1))
+        store.append(rows('2024-01-02', 1))
+        # Новый день: небольшие сегменты прошедшего дня слиты по segment_rows строк
+        self.assertEqual([(s['partition'], s['rows']) for s in store.segments()],
+                         [('2024-01-01', 10), ('2024-01-01', 2), ('2024-01-02', 1)])
+        files = sorted(os.path.relpath(os.path.join(path, name), self.root)
+                       for path, _, names in os.walk(self.root) for name in names if name.endswith('.npz'))
+        self.assertEqual(files, sorted(s['file'] for s in store.segments()))
+
+        journal = store.query(columns=['signal_id'])
+        self.assertEqual(journal['signal_id'].tolist(),
+                         [f"sig_{index}" for index in range(9)] + ['sig_0', 'sig_1', 'sig_2', 'sig_0'])
+
+    def test_queries_read_only_matching_segments(self):
+        self.store.append(rows('2024-01-01', 30))
+        self.store.append(rows('2024-01-03', 5, strategies=('gamma',)))
+        reads = []
+        original = self.store._read_segment
+        self.store._read_segment = lambda name, columns: reads.append((name, list(columns))) or original(name, columns)
+
+        gamma = self.store.by_strategy('gamma', columns=['timestamp', 'entry_price'])
+        self.assertEqual(list(gamma.columns), ['timestamp', 'entry_price'])
+        self.assertEqual(gamma['entry_price'].tolist(), [100.0, 101.0, 102.0, 103.0, 104.0])
+        self.assertEqual([name for name, _ in reads], ['2024-01-03/seg-000000.npz'])
+
+        reads.clear()
+        window = self.store.by_time_range('2024-01-01 05:00', '2024-01-01 07:00', columns=['signal_id'])
+        self.assertEqual(window['signal_id'].tolist(), ['sig_5', 'sig_6', 'sig_7'])
+        self.assertEqual(len(reads), 1)
+
+        reads.clear()
+        last = self.store.last_rows(3)
+        self.assertEqual(last['signal_id'].tolist(), ['sig_2', 'sig_3', 'sig_4'])
+        self.assertEqual(str(last['timestamp'].dt.tz), 'UTC')
+        self.assertEqual(len(reads), 1)
+
+    def test_writer_imports_existing_csv_and_appends(self):
+        journal = os.path.join(self.tmp, 'trade_journal.csv')
+        pd.DataFrame(rows('2024-01-01', 3)).reindex(columns=list(TRADE_JOURNAL_SCHEMA)).to_csv(journal, index=False)
+        store_dir = os.path.join(self.tmp, 'store')
+
+        # До запуска писателя журнал читается из CSV
+        self.assertEqual(len(load_trade_journal(store_dir=store_dir, csv_path=journal)), 3)
+
+        writer = TradeJournalWriter(journal, os.path.join(self.tmp, 'signals.csv'), None, store_dir=store_dir)
+        writer.logger.disabled = True
+        frame = pd.DataFrame({'open': [1.0], 'high': [1.0], 'low': [1.0], 'close': [1.0], 'volume': [1.0]})
+        writer.record_signal('delta', {'signal': 'SELL'}, {'1h': frame})
+        writer.stop()
+
+        stored = load_trade_journal(store_dir=store_dir, csv_path=os.devnull)
+        self.assertEqual(stored['strategy'].tolist(), ['alpha', 'beta', 'alpha', 'delta'])
+        self.assertEqual(writer.get_stats()['imported_rows'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+
+import numpy as np
+
+from bot.exchange.kline_store import KlineStore, merge_forming_bar
+
+MINUTE_MS = 60_000
+T0 = 1_700_000_040_000 - 1_700_000_040_000 % MINUTE_MS
+
+
+class FakeExchange:
+    """Биржа-заглушка: отдает свечи в формате Bybit v5 (новые первыми, строки)"""
+
+    def __init__(self, bars: int):
+        self.bars = [self._bar(i) for i in range(bars)]
+        self.requests = []
+        self.available = True
+
+    @staticmethod
+    def _bar(i: int, close: float = None):
+        close = 100.0 + i if close is None else close
+        return [T0 + i * MINUTE_MS, close - 0.5, close + 1.0, close - 1.0, close, 10.0 + i, 1000.0]
+
+    def fetch(self, start, limit):
+        self.requests.append((start, limit))
+        if not self.available:
+            return None
+        bars = [bar for bar in self.bars if start is None or bar[0] >= start]
+        return [[str(value) for value in bar] for bar in reversed(bars[-limit:])]
+
+    def now(self):
+        return (self.bars[-1][0] + 30_000) / 1000
+
+
+class TestKlineStore(unittest.TestCase):
+    def setUp(self):
+        self.exchange = FakeExchange(300)
+        self.store = KlineStore(capacity=250, clock=self.exchange.now)
+
+    def get(self, limit=200):
+        return self.store.get('BTCUSDT', '1', limit, self.exchange.fetch)
+
+    def test_first_call_loads_full_history(self):
+        df = self.get()
+
+        self.assertEqual(len(df), 200)
+        self.assertEqual(list(df.columns), ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'])
+        self.assertEqual(df['close'].iloc[-1], 399.0)
+        self.assertTrue(df['timestamp'].is_monotonic_increasing)
+        self.assertEqual(self.exchange.requests, [(None, 200)])
+
+    def test_refresh_requests_only_new_bars_and_patches_forming_bar(self):
+        first = self.get()
+        self.exchange.bars[-1] = FakeExchange._bar(299, close=500.0)
+        self.exchange.bars.append(FakeExchange._bar(300))
+
+        df = self.get()
+
+        start, limit = self.exchange.requests[-1]
+        self.assertEqual(start, T0 + 299 * MINUTE_MS)
+        self.assertLessEqual(limit, 3)
+        self.assertEqual(df['close'].iloc[-2], 500.0)
+        self.assertEqual(df['close'].iloc[-1], 400.0)
+        self.assertEqual(len(df), 200)
+        # Ранее выданный кадр не изменился
+        self.assertEqual(first['close'].iloc[-1], 399.0)
+
+    def test_unchanged_data_returns_same_frame(self):
+        self.get()
+        self.assertIs(self.get(), self.get())
+
+    def test_long_run_wraps_buffer_and_matches_exchange(self):
+        self.get()
+        for i in range(300, 900):
+            self.exchange.bars.append(FakeExchange._bar(i))
+            df = self.get()
+
+        expected = np.array([bar[4] for bar in self.exchange.bars[-200:]])
+        np.testing.assert_array_equal(df['close'].to_numpy(), expected)
+        self.assertEqual(self.store.get_stats()['full_fetches'], 1)
+
+    def test_gap_triggers_full_reload(self):
+        self.get()
+        for i in range(300, 600):
+            self.exchange.bars.append(FakeExchange._bar(i))
+
+        df = self.get()
+
+        self.assertEqual(df['close'].iloc[-1], 699.0)
+        self.assertEqual(self.exchange.requests[-1], (None, 200))
+
+    def test_every_exchange_request_goes_through_fetcher(self):
+        # Разрешение rate limiter берется в fetcher - каждый запрос должен пройти через него
+        self.get()
+        self.exchange.bars.append(FakeExchange._bar(300))
+        self.exchange.bars.append(FakeExchange._bar(301))
+        calls = []
+
+        def fetch(start, limit):
+            calls.append(start)
+            # Ответ с разрывом: только самый новый бар
+            return [[str(value) for value in self.exchange.bars[-1]]] if start is not None \
+                else self.exchange.fetch(start, limit)
+
+        df = self.store.get('BTCUSDT', '1', 200, fetch)
+
+        self.assertEqual(calls, [T0 + 299 * MINUTE_MS, None])
+        self.assertEqual(df['close'].iloc[-1], 401.0)
+
+    def test_stale_history_served_when_exchange_unavailable(self):
+        self.get()
+        self.exchange.available = False
+
+        df = self.get()
+
+        self.assertEqual(len(df), 200)
+        self.assertEqual(self.store.get_stats()['stale_served'], 1)
+
+    def test_silent_stream_falls_back_to_rest(self):
+        self.get()
+        self.store.set_live('BTCUSDT', '1', True)
+        requests = len(self.exchange.requests)
+        self.get()
+        self.assertEqual(len(self.exchange.requests), requests)
+
+        # Поток молчит дольше live_ttl: новый бар есть только на бирже
+        self.exchange.bars.append(FakeExchange._bar(300))
+        self.assertFalse(self.store.is_live('BTCUSDT', '1'))
+
+        df = self.get()
+
+        self.assertEqual(self.exchange.requests[requests:], [(T0 + 299 * MINUTE_MS, 3)])
+        self.assertEqual(df['close'].iloc[-1], 400.0)
+        self.assertEqual(self.store.get_stats()['stream_stale'], 1)
+
+        # Сообщение потока снова делает пару актуальной
+        self.store.touch_live('BTCUSDT', '1')
+        self.assertTrue(self.store.is_live('BTCUSDT', '1'))
+        self.get()
+        self.assertEqual(len(self.exchange.requests), requests + 1)
+
+    def test_live_tail_never_fetches(self):
+        self.assertIsNone(self.store.live_tail('BTCUSDT', '1', 200))
+        self.get()
+        self.store.set_live('BTCUSDT', '1', True)
+        requests = len(self.exchange.requests)
+
+        self.assertEqual(self.store.live_tail('BTCUSDT', '1', 200)['close'].iloc[-1], 399.0)
+        # Истории меньше запрошенного или поток замолчал - только None, без запроса к бирже
+        self.assertIsNone(self.store.live_tail('BTCUSDT', '1', 250))
+        self.exchange.bars.append(FakeExchange._bar(300))
+        self.assertIsNone(self.store.live_tail('BTCUSDT', '1', 200))
+        self.assertEqual(len(self.exchange.requests), requests)
+
+
+class TestMergeFormingBar(unittest.TestCase):
+    def test_forming_bar_replaces_or_extends_cached_history(self):
+        history = [[str(T0 + i * MINUTE_MS), str(100 + i)] for i in (2, 1, 0)]
+
+        # Тот же бар - заменяется свежей версией
+        merged = merge_forming_bar(history, [[str(T0 + 2 * MINUTE_MS), '150']], 3)
+        self.assertEqual([row[1] for row in merged], ['150', '101', '100'])
+        # Новый бар после закрытия - добавляется, limit сохраняется
+        merged = merge_forming_bar(history, [[str(T0 + 3 * MINUTE_MS), '103']], 3)
+        self.assertEqual([row[1] for row in merged], ['103', '102', '101'])
+        # Устаревший ответ и пустой ответ не меняют историю
+        self.assertEqual(merge_forming_bar(history, [[str(T0 + MINUTE_MS), '1']], 3), history)
+        self.assertEqual(merge_forming_bar(history, [], 3), history)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from bot.strategy.utils import levels
+from bot.strategy.utils.levels import LevelsFinder, find_all_levels, get_trading_levels
+
+
+def _make_ohlcv(bars: int, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 40, bars))
+    # Округление создает равные экстремумы, на которых важна семантика >= / <=
+    high = np.round(close + rng.uniform(1, 30, bars), -1)
+    low = np.round(close - rng.uniform(1, 30, bars), -1)
+    return pd.DataFrame({
+        'open': close + rng.normal(0, 5, bars),
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': rng.uniform(10, 100, bars),
+    }, index=pd.date_range('2024-01-01', periods=bars, freq='5min'))
+
+
+def _reference_swings(df: pd.DataFrame, column: str, lookback: int, is_high: bool):
+    points = []
+    for i in range(lookback, len(df) - lookback):
+        current = df[column].iloc[i]
+        left = df[column].iloc[i - lookback:i]
+        right = df[column].iloc[i + 1:i + lookback + 1]
+        if is_high:
+            matched = current >= left.max() and current >= right.max()
+        else:
+            matched = current <= left.min() and current <= right.min()
+        if matched:
+            points.append((i, current, df.index[i]))
+    return points
+
+
+class TestSwingDetection(unittest.TestCase):
+    def test_matches_reference_loop(self):
+        df = _make_ohlcv(600)
+        for lookback in (1, 5, 20):
+            self.assertEqual(LevelsFinder._find_swing_highs(df, lookback),
+                             _reference_swings(df, 'high', lookback, is_high=True))
+            self.assertEqual(LevelsFinder._find_swing_lows(df, lookback),
+                             _reference_swings(df, 'low', lookback, is_high=False))
+
+    def test_short_data_returns_no_points(self):
+        df = _make_ohlcv(10)
+        self.assertEqual(LevelsFinder._find_swing_highs(df, 5), [])
+        self.assertEqual(LevelsFinder._find_swing_lows(df, 20), [])
+
+
+class TestFindAllLevelsCache(unittest.TestCase):
+    def setUp(self):
+        levels.clear_levels_cache()
+        self.df = _make_ohlcv(300)
+
+    def test_repeated_call_is_served_from_cache(self):
+        first = find_all_levels(self.df)
+        with mock.patch.object(levels, '_find_all_levels_uncached') as uncached:
+            second = find_all_levels(self.df)
+            get_trading_levels(self.df)
+        uncached.assert_not_called()
+        self.assertEqual([lvl.price for lvl in first], [lvl.price for lvl in second])
+        self.assertIsNot(first, second)
+
+    def test_forming_bar_update_invalidates_cache(self):
+        find_all_levels(self.df)
+        revised = self.df.copy()
+        revised.iloc[-1, revised.columns.get_loc('close')] += 25.0
+        with mock.patch.object(levels, '_find_all_levels_uncached', return_value=[]) as uncached:
+            find_all_levels(revised)
+        uncached.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from bot.services.market_data_service import MarketDataService
+
+
+class SlowApi:
+    """API-заглушка с задержкой ответа по интервалу"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_ohlcv(self, symbol="BTCUSDT", interval="1", limit=100):
+        with self._lock:
+            self.calls.append(interval)
+        time.sleep(self.delays.get(interval, 0.0))
+        if interval == "15":
+            raise RuntimeError("boom")
+        return pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=limit, freq='1min'),
+            'close': range(limit),
+        })
+
+
+class TestParallelTimeframeFetch(unittest.TestCase):
+    def setUp(self):
+        self.service = MarketDataService(fetch_timeout=2.0)
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_timeframes_are_fetched_concurrently(self):
+        api = SlowApi({"1": 0.2, "5": 0.2, "15": 0.2, "60": 0.2})
+        started = time.monotonic()
+        data = self.service.get_all_timeframes_data(api, limit=10)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(list(data), ['1m', '5m', '1h'])
+        self.assertEqual(self.service.get_fetch_stats()['failed'], ['15m'])
+
+    def test_deadline_returns_partial_result(self):
+        api = SlowApi({"60": 0.5})
+        data = self.service.get_all_timeframes_data(api, limit=10, timeout=0.1)
+
+        self.assertEqual(list(data), ['1m', '5m'])
+        self.assertEqual(self.service.get_fetch_stats()['timed_out'], ['1h'])
+
+    def test_pending_request_is_reused_by_next_cycle(self):
+        api = SlowApi({"60": 0.3})
+        self.service.get_all_timeframes_data(api, limit=10, timeout=0.05)
+        data = self.service.get_all_timeframes_data(api, limit=10, timeout=1.0)
+
+        self.assertIn('1h', data)
+        self.assertEqual(api.calls.count("60"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
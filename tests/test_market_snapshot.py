@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from bot.market_context.engine import MarketContextEngine
+from bot.strategy.utils.indicators import TechnicalIndicators
+from bot.strategy.utils.market_snapshot import MarketSnapshot, snapshot_memoize, use_snapshot
+from bot.strategy.utils.streaming_indicators import get_streaming_indicators
+
+
+def _make_ohlcv(bars: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 25, bars))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=bars, freq='5min'),
+        'open': close + rng.normal(0, 5, bars),
+        'high': close + rng.uniform(1, 30, bars),
+        'low': close - rng.uniform(1, 30, bars),
+        'close': close,
+        'volume': rng.uniform(10, 100, bars),
+    })
+
+
+class TestMarketSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.market_data = {'5m': _make_ohlcv(200), '1h': _make_ohlcv(200, seed=4)}
+        self.snapshot = MarketSnapshot(self.market_data)
+
+    def test_indicator_is_computed_once_per_params_and_timeframe(self):
+        df = self.market_data['5m']
+        with use_snapshot(self.snapshot):
+            first = TechnicalIndicators.calculate_rsi(df)
+            second = TechnicalIndicators.calculate_rsi(df, 14)
+            other_period = TechnicalIndicators.calculate_rsi(df, 21)
+            other_timeframe = TechnicalIndicators.calculate_rsi(self.market_data['1h'], 14)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_period)
+        self.assertIsNot(first, other_timeframe)
+        stats = self.snapshot.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 3))
+
+    def test_memoized_result_matches_direct_calculation(self):
+        df = self.market_data['5m']
+        cached = self.snapshot.indicator('5m', 'calculate_bollinger_bands', 20)
+        direct = TechnicalIndicators.calculate_bollinger_bands(df, 20)
+        pd.testing.assert_series_equal(cached.value['upper'], direct.value['upper'])
+
+    def test_snapshot_with_symbol_updates_indicator_streams(self):
+        history = _make_ohlcv(201)
+        self.addCleanup(get_streaming_indicators().drop, 'SNAPSHOTUSDT')
+        for end in (200, 201):
+            df = history.iloc[end - 200:end].reset_index(drop=True)
+            with use_snapshot(MarketSnapshot({'5m': df}, symbol='SNAPSHOTUSDT')):
+                streamed = TechnicalIndicators.calculate_rsi(df, 14)
+                atr = TechnicalIndicators.calculate_atr(df, 14)
+            direct = TechnicalIndicators.calculate_rsi(df, 14)
+            np.testing.assert_allclose(streamed.value.to_numpy(), direct.value.to_numpy(), equal_nan=True)
+            self.assertAlmostEqual(atr.value, TechnicalIndicators.calculate_atr(df, 14).value)
+
+        # Второй цикл подал в поток только новый бар
+        stats = get_streaming_indicators().stream('SNAPSHOTUSDT', '5m').get_stats()
+        self.assertEqual(stats['bars_pushed'], 1)
+
+    def test_frames_outside_snapshot_are_not_memoized(self):
+        copy = self.market_data['5m'].copy()
+        with use_snapshot(self.snapshot):
+            TechnicalIndicators.calculate_sma(copy, 20)
+            TechnicalIndicators.calculate_sma(copy, 20)
+        self.assertEqual(self.snapshot.get_stats()['misses'], 0)
+
+    def test_snapshot_memoize_without_active_snapshot_computes(self):
+        compute = mock.Mock(return_value=42)
+        self.assertEqual(snapshot_memoize(self.market_data['5m'], 'key', compute), 42)
+        self.assertEqual(snapshot_memoize(self.market_data['5m'], 'key', compute), 42)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_market_context_analysis_is_shared_between_engines(self):
+        df = self.market_data['5m']
+        price = float(df['close'].iloc[-1])
+        first_engine, second_engine = MarketContextEngine(), MarketContextEngine()
+
+        with use_snapshot(self.snapshot):
+            first_engine.get_context(df, price)
+            with mock.patch.object(second_engine.liquidity_analyzer, 'analyze') as analyze:
+                second_engine.get_context(df, price)
+
+        analyze.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
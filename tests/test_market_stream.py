@@ -0,0 +1,227 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from bot.exchange.kline_store import KlineStore
+from bot.exchange.market_stream import MarketDataStream, websockets
+
+MINUTE_MS = 60_000
+T0 = 1_700_000_040_000 - 1_700_000_040_000 % MINUTE_MS
+
+
+def _bar(i: int, close: float = None):
+    close = 100.0 + i if close is None else close
+    return [T0 + i * MINUTE_MS, close - 0.5, close + 1.0, close - 1.0, close, 10.0 + i, 1000.0]
+
+
+def _kline_message(i: int, close: float, confirm: bool) -> str:
+    start, open_, high, low, close, volume, turnover = _bar(i, close)
+    return json.dumps({
+        "topic": "kline.1.BTCUSDT",
+        "type": "snapshot",
+        "ts": start + MINUTE_MS - 1,
+        "data": [{
+            "start": start, "end": start + MINUTE_MS - 1, "interval": "1",
+            "open": str(open_), "high": str(high), "low": str(low), "close": str(close),
+            "volume": str(volume), "turnover": str(turnover), "confirm": confirm,
+            "timestamp": start + MINUTE_MS - 1,
+        }],
+    })
+
+
+# Запись потока Bybit: обновление формирующегося бара, его закрытие, новый бар и тикер
+RECORDED = [
+    json.dumps({"success": True, "ret_msg": "", "op": "subscribe", "conn_id": "test"}),
+    json.dumps({"topic": "tickers.BTCUSDT", "type": "snapshot", "ts": T0,
+                "data": {"symbol": "BTCUSDT", "lastPrice": "199.5", "bid1Price": "199.4"}}),
+    _kline_message(99, 199.5, confirm=False),
+    _kline_message(99, 200.5, confirm=True),
+    _kline_message(100, 201.0, confirm=False),
+    json.dumps({"topic": "tickers.BTCUSDT", "type": "delta", "ts": T0 + 1,
+                "data": {"symbol": "BTCUSDT", "lastPrice": "201.0"}}),
+]
+
+
+class FakeRest:
+    """REST-заглушка: 100 закрытых баров в формате Bybit v5"""
+
+    def __init__(self, bars: int = 100):
+        self.bars = [_bar(i) for i in range(bars)]
+        self.requests = []
+
+    def fetch(self, start, limit):
+        self.requests.append((start, limit))
+        bars = [bar for bar in self.bars if start is None or bar[0] >= start]
+        return [[str(value) for value in bar] for bar in reversed(bars[-limit:])]
+
+    def now(self):
+        return (self.bars[-1][0] + 30_000) / 1000
+
+
+class ReplayServer:
+    """Локальный WebSocket сервер, воспроизводящий записанные сообщения"""
+
+    def __init__(self, messages, chatter=None, pong=False):
+        self.messages = messages
+        # Сообщение, повторяемое каждые 20 мс, и ответ pong на ping клиента
+        self.chatter = chatter
+        self.pong = pong
+        self.pings = 0
+        self.subscriptions = []
+        self._connections = set()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._main, daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def _main(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, '127.0.0.1', 0) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _handler(self, connection):
+        self._connections.add(connection)
+        try:
+            self.subscriptions.append(json.loads(await connection.recv()))
+            for message in self.messages:
+                await connection.send(message)
+            chatter = asyncio.ensure_future(self._chatter(connection)) if self.chatter else None
+            try:
+                async for raw in connection:
+                    if json.loads(raw).get('op') == 'ping':
+                        self.pings += 1
+                        if self.pong:
+                            await connection.send(json.dumps(
+                                {"success": True, "ret_msg": "pong", "conn_id": "test", "op": "ping"}))
+            except websockets.ConnectionClosed:
+                pass
+            finally:
+                if chatter is not None:
+                    chatter.cancel()
+        finally:
+            self._connections.discard(connection)
+
+    async def _chatter(self, connection):
+        while True:
+            await connection.send(self.chatter)
+            await asyncio.sleep(0.02)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def disconnect_all(self):
+        async def close():
+            for connection in list(self._connections):
+                await connection.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(5)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@unittest.skipIf(websockets is None, "websockets не установлен")
+class TestMarketDataStream(unittest.TestCase):
+    def setUp(self):
+        self.rest = FakeRest()
+        self.store = KlineStore(capacity=250, clock=self.rest.now)
+        self.closed_bars = []
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.stop()
+
+    def start(self, messages=RECORDED, reconnect_delay=0.05, server=None, **stream_options):
+        self.server = server or ReplayServer(messages)
+        self.stream = MarketDataStream(
+            self.store, 'BTCUSDT', ['1'], url=self.server.url,
+            seed=lambda symbol, interval: self.get(),
+            on_bar_close=lambda symbol, interval, ts: self.closed_bars.append((symbol, interval, ts)),
+            reconnect_delay=reconnect_delay, **stream_options
+        )
+        self.stream.start()
+        self.assertTrue(self.stream.wait_connected(5))
+
+    def get(self, limit=50):
+        return self.store.get('BTCUSDT', '1', limit, self.rest.fetch)
+
+    def test_replayed_bars_update_store_and_signal_bar_close(self):
+        self.start()
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['messages'] == len(RECORDED)))
+
+        self.assertEqual(self.server.subscriptions[0],
+                         {"op": "subscribe", "args": ["kline.1.BTCUSDT", "tickers.BTCUSDT"]})
+        self.assertEqual(self.closed_bars, [('BTCUSDT', '1', T0 + 99 * MINUTE_MS)])
+        self.assertTrue(self.store.is_live('BTCUSDT', '1'))
+
+        requests = len(self.rest.requests)
+        df = self.get()
+        self.assertEqual(len(self.rest.requests), requests)
+        self.assertEqual(df['close'].iloc[-2], 200.5)
+        self.assertEqual(df['close'].iloc[-1], 201.0)
+        self.assertEqual(self.stream.get_last_price(), 201.0)
+        self.assertEqual(self.stream.get_ticker()['bid1Price'], '199.4')
+
+    def test_gap_in_stream_resyncs_history_through_rest(self):
+        messages = RECORDED[:1] + [_kline_message(105, 205.0, confirm=False)]
+        self.start(messages)
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['gaps'] == 1))
+
+        self.assertEqual(self.closed_bars, [])
+        self.assertTrue(wait_until(lambda: len(self.rest.requests) >= 2))
+
+    def test_disconnect_falls_back_to_rest(self):
+        self.start(reconnect_delay=30.0)
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['messages'] == len(RECORDED)))
+
+        self.server.disconnect_all()
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['disconnects'] == 1))
+
+        self.assertFalse(self.store.is_live('BTCUSDT', '1'))
+        self.rest.bars.append(_bar(100, 201.0))
+        requests = len(self.rest.requests)
+        self.get()
+        self.assertEqual(self.rest.requests[requests:], [(T0 + 100 * MINUTE_MS, 2)])
+
+    def test_pings_are_sent_while_messages_flow(self):
+        ticker = json.dumps({"topic": "tickers.BTCUSDT", "type": "delta", "ts": T0,
+                             "data": {"symbol": "BTCUSDT", "lastPrice": "200.0"}})
+        self.start(server=ReplayServer(RECORDED[:1], chatter=ticker, pong=True),
+                   ping_interval=0.1, liveness_timeout=0.5)
+
+        # Трафик не прерывается, но ping уходят по расписанию и получают pong
+        self.assertTrue(wait_until(lambda: self.server.pings >= 3))
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['pongs'] >= 3))
+        self.assertEqual(self.stream.get_stats()['liveness_timeouts'], 0)
+        self.assertEqual(self.stream.get_stats()['connects'], 1)
+
+    def test_silent_connection_is_reopened(self):
+        # Сервер принимает подписку и больше ничего не присылает, pong не отвечает
+        self.start(server=ReplayServer(RECORDED[:1]), ping_interval=0.1, liveness_timeout=0.3)
+
+        self.assertTrue(wait_until(lambda: self.stream.get_stats()['connects'] >= 2))
+        stats = self.stream.get_stats()
+        self.assertGreaterEqual(stats['liveness_timeouts'], 1)
+        self.assertGreaterEqual(self.server.pings, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
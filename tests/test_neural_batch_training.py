@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from bot.ai.neural_trader import NeuralTrader
+
+
+def bet(index):
+    strategy = f"strategy_{index % 10 + 1:02d}"
+    candle = {'open': 100.0 + index, 'high': 101.0 + index, 'low': 99.0 + index, 'close': 100.5 + index, 'volume': 10.0}
+    return {'strategy': strategy, 'confidence': 0.7, 'bet_amount': 10.0, 'market_data': {'5m': candle}}
+
+
+class TestNeuralBatchTraining(unittest.TestCase):
+    def setUp(self):
+        # Модель читает и пишет data/ai относительно текущего каталога
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        np.random.seed(3)
+        self.trader = NeuralTrader(memory_size=40)
+        self.trader.logger.disabled = True
+
+    def tearDown(self):
+        self.trader.wait_for_training(timeout=10)
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_features_are_cached_once_per_experience(self):
+        calls = []
+        original = self.trader._market_features
+        self.trader._market_features = lambda *args: calls.append(1) or original(*args)
+
+        for index in range(50):
+            self.trader._remember({'bet': bet(index), 'reward': 1.0 if index % 3 else -1.0})
+        self.trader.train_with_validation()
+        self.trader.train_with_validation()
+
+        # Признаки считаются при добавлении опыта, обучение их не пересчитывает
+        self.assertEqual(len(calls), 50)
+        features, targets = self.trader._training_data()
+        self.assertEqual(features.shape, (40, self.trader.input_size))
+        self.assertEqual(features.dtype, np.float32)
+        self.assertEqual(len(self.trader.memory), 40)
+
+        # Кольцевой буфер хранит признаки ровно тех опытов, что остались в памяти
+        expected = np.stack([self.trader._experience_features(e['bet']) for e in self.trader.memory])
+        np.testing.assert_allclose(np.sort(features, axis=0), np.sort(expected, axis=0), atol=1e-6)
+        self.assertTrue(np.all((targets == 0.1) | (targets == 0.9)))
+
+    def test_batch_backprop_matches_numeric_gradient(self):
+        trader = self.trader
+        trader.dropout_rate = 0.0
+        trader.l2_lambda = 0.0
+        trader.learning_rate = 1.0
+        x = np.random.randn(8, trader.input_size)
+        target = np.random.dirichlet(np.ones(trader.output_size), size=8)
+        params = {name: value.astype(np.float64).copy() for name, value in trader._snapshot_params().items()}
+
+        def loss(weights1):
+            local = dict(params, weights1=weights1, running_mean1=params['running_mean1'].copy(),
+                         running_var1=params['running_var1'].copy(), running_mean2=params['running_mean2'].copy(),
+                         running_var2=params['running_var2'].copy())
+            out, _ = trader._forward(x, local, training=True)
+            return -np.sum(target * np.log(out)) / len(x)
+
+        i, j = 3, 5
+        shifted = params['weights1'].copy()
+        shifted[i, j] += 1e-5
+        numeric = (loss(shifted) - loss(params['weights1'])) / 1e-5
+
+        updated = {name: value.copy() for name, value in params.items()}
+        _, activations = trader._forward(x, updated, training=True)
+        before = updated['weights1'][i, j]
+        trader._backpropagate_batch(target, activations, updated)
+        self.assertAlmostEqual(before - updated['weights1'][i, j], numeric, delta=abs(numeric) * 0.05 + 1e-6)
+
+    def test_update_performance_trains_in_background(self):
+        for index in range(25):
+            self.trader.update_performance(bet(index), {'success': index % 2 == 0, 'profit': 1.0})
+        self.assertTrue(self.trader.wait_for_training(timeout=10))
+
+        stats = self.trader._training_stats
+        self.assertGreaterEqual(stats['runs'], 1)
+        self.assertEqual(stats['last_samples'], 25)
+        self.assertTrue(os.path.exists(os.path.join('data', 'ai', 'neural_trader_model.json')))
+
+    def test_reset_discards_in_flight_training(self):
+        for index in range(30):
+            self.trader._remember({'bet': bet(index), 'reward': 1.0})
+        original = self.trader._train_batch
+
+        def slow_train(*args, **kwargs):
+            # Сброс модели посреди обучения
+            self.trader.reset_model()
+            return original(*args, **kwargs)
+
+        self.trader._train_batch = slow_train
+        weights = self.trader.weights1
+        self.trader.train_with_validation()
+        self.assertIsNot(self.trader.weights1, weights)
+        self.assertEqual(self.trader._training_stats['runs'], 0)
+        self.assertEqual(self.trader._training_data()[0].shape[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
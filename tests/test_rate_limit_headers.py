@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pybit.unified_trading import HTTP
+
+from bot.core.enhanced_api_connection import EnhancedAPIConnectionManager, unwrap_response
+from bot.core.rate_limiter import AggressiveRateLimiter
+
+
+class QuotaStub:
+    """Локальный HTTP сервер с квотой в стиле Bybit v5: limit запросов в секунду на эндпоинт"""
+
+    def __init__(self, limit: int = 5):
+        self.limit = limit
+        self.served = 0
+        self.rejected = 0
+        self._windows = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handle(self, request):
+        path = request.path.split('?')[0]
+        now = time.time()
+        window = int(now)
+        with self._lock:
+            start, used = self._windows.get(path, (window, 0))
+            if start != window:
+                used = 0
+            used += 1
+            self._windows[path] = (window, used)
+            allowed = used <= self.limit
+            if path == '/v5/market/kline':
+                if allowed:
+                    self.served += 1
+                else:
+                    self.rejected += 1
+
+        body = {"retCode": 0, "retMsg": "OK", "result": {"list": []}, "time": int(now * 1000)}
+        if not allowed:
+            body = {"retCode": 10006, "retMsg": "Too many visits!", "result": {}}
+        payload = json.dumps(body).encode()
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('X-Bapi-Limit', str(self.limit))
+        request.send_header('X-Bapi-Limit-Status', str(max(self.limit - used, 0)))
+        request.send_header('X-Bapi-Limit-Reset-Timestamp', str((window + 1) * 1000))
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestExchangeHeaderQuota(unittest.TestCase):
+    def setUp(self):
+        self.stub = QuotaStub(limit=5)
+        self.session = HTTP(testnet=False, return_response_headers=True, max_retries=1, retry_delay=0)
+        self.manager = EnhancedAPIConnectionManager(self.session, base_url=self.stub.url)
+        self.manager.heartbeat_running = False
+        self.limiter = AggressiveRateLimiter()
+        self.limiter.logger.disabled = True
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def call_kline(self):
+        self.limiter.acquire('order_create', client_id='uid', endpoint='get_kline', timeout=5)
+        return self.manager.execute_with_fallback(
+            operation=lambda: self.session.get_kline(category='linear', symbol='BTCUSDT', interval='1'),
+            operation_name='get_kline',
+            cache_key='kline',
+            max_attempts=1,
+            on_response_headers=lambda headers: self.limiter.update_from_headers(
+                'get_kline', headers, client_id='uid'),
+        )
+
+    def test_uses_exchange_allowance_without_10006(self):
+        started = time.monotonic()
+        responses = [self.call_kline() for _ in range(12)]
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(response['retCode'] == 0 for response in responses))
+        self.assertEqual(self.stub.rejected, 0)
+        self.assertEqual(self.stub.served, 12)
+        # Статические лимиты order_create (1/сек, 3 за 10 сек) заняли бы больше 30 секунд
+        self.assertLess(elapsed, 6.0)
+        self.assertGreater(self.limiter.get_stats()['quota_updates'], 0)
+
+    def test_manager_unwraps_response_headers(self):
+        response = self.call_kline()
+
+        self.assertEqual(response['retCode'], 0)
+        self.assertEqual(self.manager.cached_data['kline']['value'], response)
+        quota = self.limiter.get_server_quota('get_kline', client_id='uid')
+        self.assertEqual(quota['limit'], 5)
+        self.assertLessEqual(quota['remaining'], 4)
+        self.assertEqual(unwrap_response(({'retCode': 0}, 0.1)), ({'retCode': 0}, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
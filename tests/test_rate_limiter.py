@@ -0,0 +1,362 @@
+import logging
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from bot.core.exceptions import ClientBannedError, EmergencyStopError, RateLimitError
+from bot.core.rate_limiter import AggressiveRateLimiter, RateLimitConfig, SlidingWindowCounter, acquire_protective
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SkippingClock:
+    """Реальное монотонное время, которое sleep() проматывает вперед без ожидания"""
+
+    def __init__(self, now: float = 1000.0):
+        self.offset = now - time.monotonic()
+
+    def __call__(self) -> float:
+        return time.monotonic() + self.offset
+
+    def skip(self, seconds: float) -> None:
+        self.offset += seconds
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    def test_events_expire_after_window(self):
+        counter = SlidingWindowCounter(1.0, 10)
+        counter.add(10.0)
+        counter.add(10.55)
+
+        self.assertEqual(counter.count(10.99), 2)
+        self.assertEqual(counter.count(11.05), 2)  # не раньше чем через window
+        self.assertEqual(counter.count(11.15), 1)
+        self.assertEqual(counter.count(11.7), 0)
+
+    def test_long_idle_resets_counter(self):
+        counter = SlidingWindowCounter(60.0, 60)
+        for second in range(30):
+            counter.add(float(second))
+        self.assertEqual(counter.count(29.5), 30)
+        self.assertEqual(counter.count(1000.0), 0)
+
+    def test_time_until_below_is_exact(self):
+        counter = SlidingWindowCounter(1.0, 10)
+        counter.add(10.0)
+        counter.add(10.35)
+        self.assertEqual(counter.time_until_below(3, 10.4), 0.0)
+        self.assertAlmostEqual(counter.time_until_below(2, 10.4), 0.7)
+        self.assertAlmostEqual(counter.time_until_below(1, 10.4), 1.0)
+
+
+class TestAggressiveRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AggressiveRateLimiter(clock=self.clock)
+        self.limiter.logger.disabled = True
+
+    def test_per_second_limit(self):
+        self.limiter.acquire('order_create')
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create')
+
+        self.clock.now += 1.2
+        self.assertTrue(self.limiter.acquire('order_create'))
+
+    def test_burst_limit_over_ten_seconds(self):
+        for _ in range(3):
+            self.limiter.acquire('order_create')
+            self.clock.now += 1.2
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create')
+
+        self.clock.now += 10
+        self.assertTrue(self.limiter.acquire('order_create'))
+
+    def test_symbols_and_clients_are_limited_separately(self):
+        self.limiter.acquire('order_create', symbol='BTCUSDT')
+        self.assertTrue(self.limiter.acquire('order_create', symbol='ETHUSDT'))
+        self.assertTrue(self.limiter.acquire('order_create', client_id='other', symbol='BTCUSDT'))
+
+    def test_per_minute_violation_activates_emergency_stop(self):
+        self.limiter._limits['market_data'] = RateLimitConfig(
+            requests_per_minute=5, requests_per_second=100, burst_limit=100
+        )
+        for _ in range(5):
+            self.limiter.acquire('market_data')
+
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('market_data')
+        with self.assertRaises(EmergencyStopError):
+            self.limiter.acquire('market_data')
+        self.assertFalse(self.limiter.can_make_request('market_data'))
+        self.assertEqual(self.limiter.get_stats()['violations'], 1)
+
+    def test_global_per_second_limit_across_clients(self):
+        self.limiter._global_requests_per_second = 3
+        for index in range(3):
+            self.limiter.acquire('market_data', client_id=f"client{index}")
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('market_data', client_id='client9')
+        self.assertFalse(self.limiter.can_make_request('market_data', client_id='client9'))
+
+    def test_can_make_request_does_not_register(self):
+        for _ in range(50):
+            self.assertTrue(self.limiter.can_make_request('order_create'))
+        self.assertTrue(self.limiter.acquire('order_create'))
+        self.assertFalse(self.limiter.can_make_request('order_create'))
+        self.assertEqual(self.limiter.get_client_status('default')['current_requests']['order_create']['current'], 1)
+
+    def test_concurrent_acquire_never_exceeds_limits(self):
+        admitted = []
+
+        def worker():
+            for _ in range(50):
+                try:
+                    self.limiter.acquire('market_data', client_id='shared')
+                    admitted.append(1)
+                except RateLimitError:
+                    pass
+
+        threads = [threading.Thread(target=worker) for _ in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Время не идет: допускается ровно лимит запросов в секунду
+        self.assertEqual(len(admitted), self.limiter._limits['market_data'].requests_per_second)
+        self.assertEqual(self.limiter.get_stats()['total_requests'], 32 * 50)
+
+
+    def test_protective_stops_have_their_own_budget(self):
+        # Вход исчерпал бюджет order_create - стоп позиции проходит сразу
+        self.limiter.acquire('order_create', client_id='uid')
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create', client_id='uid')
+        for _ in range(5):
+            self.assertTrue(self.limiter.acquire('trading_stop', client_id='uid', timeout=0.1))
+
+
+class FlakyLimiter:
+    """Rate limiter, отказывающий заданной последовательностью исключений"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def acquire(self, request_type, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return True
+
+
+class TestAcquireProtective(unittest.TestCase):
+    def test_timeout_does_not_drop_stop(self):
+        limiter = FlakyLimiter(RateLimitError("timeout"), RateLimitError("timeout"))
+        log = logging.getLogger('test_protective')
+        log.disabled = True
+        self.assertTrue(acquire_protective(limiter, 'trading_stop', 'uid', step=0.01, log=log))
+        self.assertEqual(limiter.calls, 3)
+
+    def test_local_emergency_stop_does_not_block_stop(self):
+        limiter = FlakyLimiter(EmergencyStopError("stop"))
+        log = logging.getLogger('test_protective')
+        log.disabled = True
+        self.assertTrue(acquire_protective(limiter, 'trading_stop', 'uid', log=log))
+        self.assertEqual(limiter.calls, 1)
+
+    def _counting_limiter(self, clock):
+        limiter = AggressiveRateLimiter(clock=clock)
+        limiter.logger.disabled = True
+        calls = []
+        acquire = limiter.acquire
+
+        def counting_acquire(*args, **kwargs):
+            calls.append(clock())
+            return acquire(*args, **kwargs)
+
+        limiter.acquire = counting_acquire
+        return limiter, calls
+
+    def test_full_global_window_sleeps_between_attempts(self):
+        clock = SkippingClock()
+        limiter, calls = self._counting_limiter(clock)
+        limiter._global_requests_per_minute = 3
+        for index in range(3):
+            limiter.acquire('market_data', client_id=f"client{index}")
+        del calls[:]
+        log = logging.getLogger('test_protective')
+        log.disabled = True
+
+        self.assertTrue(acquire_protective(limiter, 'trading_stop', 'uid', step=5.0, log=log,
+                                           clock=clock, sleep=clock.skip))
+        # Окно освобождается через 60 сек: не больше попытки на каждый step
+        self.assertLessEqual(len(calls), 60 / 5.0 + 2)
+        self.assertGreaterEqual(clock() - calls[0], 60.0)
+
+    def test_banned_client_waits_out_the_ban(self):
+        clock = FakeClock()
+        limiter, calls = self._counting_limiter(clock)
+        limiter._banned_clients['uid'] = datetime.now() + timedelta(seconds=120)
+        log = logging.getLogger('test_protective')
+        log.disabled = True
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            limiter._banned_clients.pop('uid', None)
+
+        with self.assertRaises(ClientBannedError):
+            limiter.acquire('trading_stop', client_id='uid', timeout=5.0)
+        del calls[:]
+        self.assertTrue(acquire_protective(limiter, 'trading_stop', 'uid', log=log,
+                                           clock=clock, sleep=sleep))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(slept), 1)
+        self.assertGreater(slept[0], 100)
+
+
+class TestServerQuota(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.wall = FakeClock(1_700_000_000.0)
+        self.limiter = AggressiveRateLimiter(clock=self.clock, wall_clock=self.wall)
+        self.limiter.logger.disabled = True
+
+    def headers(self, remaining, limit=10, reset_in=0.0):
+        return {
+            'X-Bapi-Limit': str(limit),
+            'X-Bapi-Limit-Status': str(remaining),
+            'X-Bapi-Limit-Reset-Timestamp': str(int((self.wall.now + reset_in) * 1000)),
+        }
+
+    def test_server_quota_replaces_static_per_second_limit(self):
+        self.limiter.acquire('order_create', endpoint='create_order')
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create', endpoint='create_order')
+
+        self.limiter.update_from_headers('create_order', self.headers(remaining=9))
+        for _ in range(8):
+            self.assertTrue(self.limiter.acquire('order_create', endpoint='create_order'))
+        # Последний запрос квоты оставлен в запасе
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create', endpoint='create_order')
+        self.assertEqual(self.limiter.get_stats()['violations'], 0)
+
+    def test_exhausted_quota_waits_until_reset(self):
+        self.limiter.update_from_headers('get_kline', {
+            'x-bapi-limit-status': '1',
+            'x-bapi-limit-reset-timestamp': str(int((self.wall.now + 0.6) * 1000)),
+        })
+        quota = self.limiter.get_server_quota('get_kline')
+        self.assertAlmostEqual(quota['delay'], 0.6, places=2)
+        self.assertFalse(self.limiter.can_make_request('market_data', endpoint='get_kline'))
+        self.assertTrue(self.limiter.can_make_request('market_data', endpoint='get_positions'))
+
+        self.clock.now += 0.6
+        self.assertTrue(self.limiter.acquire('market_data', endpoint='get_kline'))
+
+    def test_late_response_does_not_raise_local_remaining(self):
+        self.limiter.update_from_headers('get_kline', self.headers(remaining=5))
+        for _ in range(3):
+            self.limiter.acquire('market_data', endpoint='get_kline')
+        # Ответ на первый запрос пришел после допуска остальных
+        self.limiter.update_from_headers('get_kline', self.headers(remaining=4))
+        self.assertEqual(self.limiter.get_server_quota('get_kline')['remaining'], 2)
+
+    def test_stale_quota_falls_back_to_static_limits(self):
+        self.limiter.update_from_headers('create_order', self.headers(remaining=9))
+        self.clock.now += 120
+        self.assertIsNone(self.limiter.get_server_quota('create_order'))
+        self.limiter.acquire('order_create', endpoint='create_order')
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create', endpoint='create_order')
+
+    def test_headers_without_limit_status_are_ignored(self):
+        self.assertIsNone(self.limiter.update_from_headers('get_kline', {'Content-Type': 'application/json'}))
+        self.assertIsNone(self.limiter.update_from_headers('get_kline', None))
+        self.assertEqual(self.limiter.get_stats()['server_quotas'], 0)
+
+
+class TestWaitForPermit(unittest.TestCase):
+    def setUp(self):
+        self.limiter = AggressiveRateLimiter()
+        self.limiter.logger.disabled = True
+
+    def test_waits_for_next_permit_instead_of_raising(self):
+        self.limiter.acquire('order_create')
+        started = time.monotonic()
+        self.assertTrue(self.limiter.acquire('order_create', timeout=3))
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.85)
+        self.assertEqual(self.limiter.get_stats()['violations'], 0)
+        self.assertEqual(self.limiter.get_queue_stats()['waited'], 1)
+
+    def test_fails_fast_when_permit_is_beyond_timeout(self):
+        self.limiter.acquire('order_create')
+        started = time.monotonic()
+        with self.assertRaises(RateLimitError):
+            self.limiter.acquire('order_create', timeout=0.2)
+
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(self.limiter.get_queue_stats()['timeouts'], 1)
+
+    def test_orders_are_served_before_market_data(self):
+        self.limiter._global_requests_per_second = 1
+        self.limiter.acquire('market_data', client_id='warmup')
+        served = []
+
+        def worker(request_type, client_id):
+            self.limiter.acquire(request_type, client_id=client_id, timeout=5)
+            served.append(request_type)
+
+        market = [threading.Thread(target=worker, args=('market_data', f"md{i}")) for i in range(2)]
+        for thread in market:
+            thread.start()
+        while self.limiter.get_queue_stats()['queued'] < 2:
+            time.sleep(0.005)
+        order = threading.Thread(target=worker, args=('order_create', 'trader'))
+        order.start()
+        for thread in market + [order]:
+            thread.join()
+
+        self.assertEqual(served[0], 'order_create')
+        stats = self.limiter.get_queue_stats()
+        self.assertEqual(stats['max_depth'], 3)
+        self.assertEqual(stats['queued'], 0)
+        self.assertGreater(stats['max_wait'], 0.5)
+
+    def test_fifo_within_lane(self):
+        self.limiter._limits['market_data'] = RateLimitConfig(
+            requests_per_minute=100, requests_per_second=1, burst_limit=100
+        )
+        self.limiter.acquire('market_data')
+        served = []
+
+        def worker(index):
+            self.limiter.acquire('market_data', timeout=5)
+            served.append(index)
+
+        threads = []
+        for index in range(3):
+            threads.append(threading.Thread(target=worker, args=(index,)))
+            threads[-1].start()
+            while self.limiter.get_queue_stats()['queued'] < index + 1:
+                time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(served, [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import threading
+import time
+import unittest
+
+from bot.core.enhanced_api_connection import (
+    CachePolicy, EnhancedAPIConnectionManager, bar_close_policy, forming_bar_policy
+)
+
+
+class FakeSession:
+    endpoint = "https://api.test"
+
+    def get_server_time(self):
+        return {"retCode": 0, "result": {}}
+
+
+class CountingOperation:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            return {"retCode": 0, "result": {"version": self.calls}}
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.manager = EnhancedAPIConnectionManager(FakeSession())
+        self.manager.logger.disabled = True
+
+    def tearDown(self):
+        self.manager.heartbeat_running = False
+        self.manager.stop()
+
+    def call(self, operation, policy, **kwargs):
+        return self.manager.execute_with_fallback(
+            operation, 'get_positions', cache_key='positions_ALL', cache_policy=policy, **kwargs
+        )
+
+    def test_fresh_response_is_served_without_request(self):
+        operation = CountingOperation()
+        policy = CachePolicy(fresh_for=10.0)
+
+        first = self.call(operation, policy)
+        second = self.call(operation, policy)
+
+        self.assertEqual(operation.calls, 1)
+        self.assertIs(second, first)
+        self.assertEqual(self.manager.connection_stats['cache_fresh_hits'], 1)
+
+    def test_stale_response_is_served_while_refreshing(self):
+        operation = CountingOperation()
+        policy = CachePolicy(fresh_for=0.05, stale_for=10.0)
+        self.call(operation, policy)
+        time.sleep(0.1)
+
+        stale = self.call(operation, policy)
+        self.assertEqual(stale['result']['version'], 1)
+        deadline = time.monotonic() + 5
+        while self.manager.cached_data['positions_ALL']['value']['result']['version'] == 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        self.assertEqual(self.call(operation, policy)['result']['version'], 2)
+        self.assertEqual(operation.calls, 2)
+        stats = self.manager.connection_stats
+        self.assertEqual((stats['cache_stale_hits'], stats['cache_revalidations']), (1, 1))
+
+    def test_permit_is_requested_only_for_network_calls(self):
+        operation = CountingOperation()
+        permits = []
+        policy = CachePolicy(fresh_for=10.0)
+
+        for _ in range(3):
+            self.call(operation, policy, acquire_permit=lambda: permits.append(1) or True)
+        self.assertEqual(len(permits), 1)
+
+        denied = self.manager.execute_with_fallback(
+            operation, 'get_open_orders', cache_key='orders', acquire_permit=lambda: False
+        )
+        self.assertEqual(denied['retCode'], -1001)
+        self.assertEqual(operation.calls, 1)
+
+    def test_error_responses_are_not_cached(self):
+        policy = CachePolicy(fresh_for=10.0)
+        failed = self.call(lambda: {"retCode": 10001, "retMsg": "params error"}, policy)
+
+        self.assertEqual(failed['retCode'], 10001)
+        self.assertNotIn('positions_ALL', self.manager.cached_data)
+
+    def test_expiry_is_indexed(self):
+        for index in range(50):
+            self.manager._store_cache(f"long_{index}", {"retCode": 0}, CachePolicy(fallback_for=60.0))
+        self.manager._store_cache("short", {"retCode": 0}, CachePolicy(fallback_for=0.01))
+        # Перезаписанная запись получает новый срок - старый в куче игнорируется
+        self.manager._store_cache("long_0", {"retCode": 0}, CachePolicy(fallback_for=0.01))
+        self.manager._store_cache("long_0", {"retCode": 0}, CachePolicy(fallback_for=60.0))
+        time.sleep(0.05)
+
+        self.manager.cleanup_expired_cache()
+
+        self.assertNotIn("short", self.manager.cached_data)
+        self.assertEqual(len(self.manager.cached_data), 50)
+        self.assertEqual(len(self.manager._cache_expiry), 51)
+
+    def test_invalidate_by_client_prefix(self):
+        self.manager._store_cache("a:positions_ALL", {"retCode": 0})
+        self.manager._store_cache("a:instruments_linear_ALL", {"retCode": 0})
+        self.manager._store_cache("b:positions_ALL", {"retCode": 0})
+
+        self.assertEqual(self.manager.invalidate_cache("a:positions_"), 1)
+        self.assertEqual(set(self.manager.cached_data), {"a:instruments_linear_ALL", "b:positions_ALL"})
+
+    def test_revalidation_started_before_invalidation_is_dropped(self):
+        policy = CachePolicy(fresh_for=0.05, stale_for=10.0)
+        self.call(CountingOperation(), policy)
+        time.sleep(0.1)
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow_operation():
+            started.set()
+            release.wait(5)
+            return {"retCode": 0, "result": {"version": "before_order"}}
+
+        self.call(slow_operation, policy)
+        self.assertTrue(started.wait(5))
+        # Ордер изменил позиции, пока фоновое обновление ждет ответа
+        self.assertEqual(self.manager.invalidate_cache("positions_"), 1)
+        release.set()
+        deadline = time.monotonic() + 5
+        while self.manager._revalidating:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        self.assertNotIn('positions_ALL', self.manager.cached_data)
+        self.assertEqual(self.manager.connection_stats['cache_stale_writes_dropped'], 1)
+        # Запрос после сброса снова кэшируется
+        self.assertEqual(self.call(CountingOperation(), policy)['result']['version'], 1)
+        self.assertIn('positions_ALL', self.manager.cached_data)
+
+    def test_bar_close_policy(self):
+        policy = bar_close_policy(300, close_delay=1.0)
+        # 12:03:20 -> свежесть до 12:05:01
+        now = 1_700_000_000 - 1_700_000_000 % 300 + 200
+        self.assertAlmostEqual(policy.fresh_seconds(now), 101.0)
+
+        weekly = bar_close_policy(604800, close_delay=0.0, offset_seconds=4 * 86400)
+        monday = 4 * 86400 + 604800 * 2800
+        self.assertAlmostEqual(weekly.fresh_seconds(monday + 10), 604790.0)
+
+    def test_forming_bar_policy_is_short(self):
+        # Формирующийся бар не ждет закрытия: свежесть секунды даже у часового бара
+        now = 1_700_000_000 - 1_700_000_000 % 3600 + 60
+        self.assertEqual(forming_bar_policy(3600).fresh_seconds(now), 2.0)
+        self.assertEqual(forming_bar_policy(3600).fallback_for, 3600.0)
+        self.assertEqual(forming_bar_policy(1).fresh_seconds(now), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
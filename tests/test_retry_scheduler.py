@@ -0,0 +1,139 @@
+import threading
+import time
+import unittest
+
+from bot.core.enhanced_api_connection import EnhancedAPIConnectionManager
+from bot.core.exceptions import OrderRejectionError
+from bot.core.order_manager import OrderRequest, ThreadSafeOrderManager
+from bot.core.retry_scheduler import RetryScheduler, retries_scheduled, scheduled_retries
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyAPI:
+    """create_order отвечает -1001 первые failures[symbol] раз"""
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_positions(self, symbol):
+        return {"retCode": 0, "result": {"list": []}}
+
+    def create_order(self, symbol, **kwargs):
+        with self.lock:
+            self.calls.append((symbol, time.monotonic(), retries_scheduled()))
+            if self.failures.get(symbol, 0) > 0:
+                self.failures[symbol] -= 1
+                return {"retCode": -1001, "retMsg": "Rate limit"}
+        return {"retCode": 0, "result": {"orderId": f"id-{symbol}"}}
+
+
+class TestRetryScheduler(unittest.TestCase):
+    def test_fires_due_tasks_and_drops_expired(self):
+        clock = FakeClock()
+        scheduler = RetryScheduler(clock, autostart=False)
+        fired, expired = [], []
+
+        self.assertTrue(scheduler.schedule(1.0, lambda: fired.append('a')))
+        self.assertTrue(scheduler.schedule(1.2, lambda: fired.append('b'), deadline=101.5,
+                                           on_expired=lambda: expired.append('b')))
+        # Повтор позже срока не планируется
+        self.assertFalse(scheduler.schedule(5.0, lambda: fired.append('c'), deadline=103.0,
+                                            on_expired=lambda: expired.append('c')))
+
+        clock.now += 1.0
+        self.assertEqual(scheduler.run_pending(), 1)
+        # Таймер опоздал: к моменту обработки срок повтора b истек
+        clock.now += 1.0
+        scheduler.run_pending()
+
+        self.assertEqual((fired, expired), (['a'], ['c', 'b']))
+        stats = scheduler.get_stats()
+        self.assertEqual((stats['fired'], stats['expired'], stats['pending']), (1, 2, 0))
+        self.assertAlmostEqual(stats['backoff_seconds'], 3.0)
+
+    def test_timer_thread_runs_callbacks(self):
+        scheduler = RetryScheduler()
+        done = threading.Event()
+        scheduler.schedule(0.05, done.set)
+        self.assertTrue(done.wait(2))
+        scheduler.stop()
+
+    def test_scheduled_retries_limit_api_client_to_one_attempt(self):
+        class Session:
+            endpoint = "https://api.test"
+
+            def get_server_time(self):
+                return {"retCode": 0}
+
+        manager = EnhancedAPIConnectionManager(Session())
+        manager.logger.disabled = True
+        attempts = []
+        try:
+            with scheduled_retries():
+                response = manager.execute_with_fallback(
+                    lambda: attempts.append(1) or {"retCode": -1001, "retMsg": "busy"}, 'create_order'
+                )
+        finally:
+            manager.heartbeat_running = False
+        self.assertEqual((response['retCode'], len(attempts)), (-1001, 1))
+        self.assertFalse(retries_scheduled())
+
+
+class TestOrderRetries(unittest.TestCase):
+    def setUp(self):
+        self.manager = ThreadSafeOrderManager(worker_count=1, order_timeout_seconds=5.0)
+        self.manager.logger.disabled = True
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def submit(self, api, symbol, results, **kwargs):
+        request = OrderRequest(symbol=symbol, side="Buy", order_type="Market", qty=0.01, **kwargs)
+        try:
+            results[symbol] = self.manager.create_order_safe(api, request)
+        except OrderRejectionError as exc:
+            results[symbol] = exc
+
+    def test_backoff_does_not_hold_the_worker(self):
+        api = FlakyAPI({"BTCUSDT": 1})
+        results = {}
+        first = threading.Thread(target=self.submit, args=(api, "BTCUSDT", results))
+        first.start()
+        while not api.calls:
+            time.sleep(0.005)
+
+        started = time.monotonic()
+        self.submit(api, "ETHUSDT", results)
+        # Единственный воркер свободен, пока BTCUSDT ждет повтора (0.5 с)
+        self.assertLess(time.monotonic() - started, 0.4)
+        first.join(5)
+
+        self.assertEqual(results["BTCUSDT"]['retCode'], 0)
+        self.assertEqual([call[0] for call in api.calls], ["BTCUSDT", "ETHUSDT", "BTCUSDT"])
+        self.assertTrue(all(call[2] for call in api.calls))
+        stats = self.manager.get_stats()
+        self.assertEqual(stats['retries_scheduled'], 1)
+        self.assertGreater(stats['backoff_seconds'], 0.4)
+
+    def test_order_past_deadline_is_dropped(self):
+        api = FlakyAPI({"BTCUSDT": 5})
+        results = {}
+        self.submit(api, "BTCUSDT", results, deadline_seconds=0.3)
+
+        self.assertIsInstance(results["BTCUSDT"], OrderRejectionError)
+        # Повтор через 0.5 с не укладывается в срок - второй отправки нет
+        self.assertEqual(len(api.calls), 1)
+        self.assertEqual(self.manager.get_stats()['expired_orders'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
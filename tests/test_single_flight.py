@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+
+from bot.core.single_flight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_identical_calls_share_one_execution(self):
+        group = SingleFlight()
+        release = threading.Event()
+        executions = []
+        results = []
+
+        def fetch():
+            executions.append(1)
+            release.wait(5)
+            return {'retCode': 0, 'result': {'list': [1]}}
+
+        def worker():
+            results.append(group.do(('get_positions', ()), fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while group.get_stats()['coalesced'] < 7:
+            time.sleep(0.005)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(len(results), 8)
+        # Каждый получает свою копию ответа
+        results[0]['result']['list'].append(2)
+        self.assertEqual(results[1]['result']['list'], [1])
+        stats = group.get_stats()
+        self.assertEqual((stats['executed'], stats['coalesced'], stats['in_flight']), (1, 7, 0))
+
+    def test_freshness_window_and_invalidate(self):
+        clock = FakeClock()
+        group = SingleFlight(ttl=1.0, clock=clock)
+        calls = []
+
+        def fetch():
+            calls.append(clock.now)
+            return {'retCode': 0}
+
+        group.do('balance', fetch)
+        clock.now += 0.5
+        group.do('balance', fetch)
+        self.assertEqual(len(calls), 1)
+
+        clock.now += 0.6
+        group.do('balance', fetch)
+        self.assertEqual(len(calls), 2)
+
+        group.invalidate()
+        group.do('balance', fetch)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(group.get_stats()['fresh_hits'], 1)
+
+    def test_errors_and_uncacheable_results_are_not_kept(self):
+        group = SingleFlight(ttl=10.0)
+        with self.assertRaises(ValueError):
+            group.do('kline', lambda: (_ for _ in ()).throw(ValueError('boom')))
+
+        failed = {'retCode': 10006}
+        ok = lambda response: response['retCode'] == 0
+        self.assertEqual(group.do('kline', lambda: failed, cacheable=ok), failed)
+        self.assertEqual(group.do('kline', lambda: {'retCode': 0}, cacheable=ok), {'retCode': 0})
+        self.assertEqual(group.get_stats()['executed'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bot.core.snapshot_archive import SnapshotArchive
+from bot.core.trade_journal import TradeJournalWriter, load_signal_snapshots
+
+
+def candles(count, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=count, freq='5min'),
+        'open': rng.random(count), 'high': rng.random(count), 'low': rng.random(count),
+        'close': rng.random(count), 'volume': rng.random(count), 'turnover': rng.random(count),
+    })
+
+
+class TestSnapshotArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.archive = SnapshotArchive(self.tmp, chunk_rows=64)
+        self.history = candles(300)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def window(self, end, size=100):
+        return self.history.iloc[end - size:end].reset_index(drop=True).copy()
+
+    def test_overlapping_windows_store_each_bar_once(self):
+        references = [(self.archive.store_frame('BTCUSDT', '5m', self.window(end)), end) for end in range(100, 140)]
+        stats = self.archive.get_stats()
+        self.assertEqual((stats['bars_seen'], stats['bars_written']), (4000, 139))
+
+        # Новый экземпляр читает чанки с диска
+        reopened = SnapshotArchive(self.tmp, chunk_rows=64)
+        for reference, end in references:
+            pd.testing.assert_frame_equal(reopened.load_frame(reference), self.window(end))
+
+    def test_changed_bars_are_versioned(self):
+        first = self.window(100)
+        forming = self.window(100)
+        forming.loc[99, 'close'] += 1.0
+        with_indicator = self.window(100)
+        with_indicator['rsi'] = np.linspace(0, 100, 100)
+        indexed = self.window(100).set_index('timestamp').tz_localize('UTC')
+
+        frames = [first, forming, forming, with_indicator, indexed]
+        references = [self.archive.store_frame('BTCUSDT', '5m', frame) for frame in frames]
+
+        self.assertEqual(references[1]['versions'], references[2]['versions'])
+        self.assertEqual(len(references[1]['versions']), 1)
+        self.assertEqual(self.archive.get_stats()['versions_written'], 101)
+        for reference, frame in zip(references, frames):
+            pd.testing.assert_frame_equal(self.archive.load_frame(reference), frame)
+
+    def test_bars_stored_later_inside_a_gap_do_not_change_the_frame(self):
+        # Кадр с пропуском баров 40..59: позже эти бары сохраняет другой кадр
+        gapped = pd.concat([self.history.iloc[:40], self.history.iloc[60:100]]).reset_index(drop=True)
+        reference = self.archive.store_frame('BTCUSDT', '5m', gapped)
+        self.archive.store_frame('BTCUSDT', '5m', self.window(100))
+
+        pd.testing.assert_frame_equal(self.archive.load_frame(reference), gapped)
+        reopened = SnapshotArchive(self.tmp, chunk_rows=64)
+        pd.testing.assert_frame_equal(reopened.load_frame(reference), gapped)
+
+    def test_text_columns_are_kept_and_other_types_rejected(self):
+        labelled = self.window(100)
+        labelled['trend'] = np.where(labelled['close'] > 0.5, 'up', 'down')
+        labelled.loc[3, 'trend'] = None
+        relabelled = self.window(100)
+        relabelled['trend'] = 'flat'
+        references = [self.archive.store_frame('BTCUSDT', '5m', frame) for frame in (labelled, relabelled)]
+
+        reopened = SnapshotArchive(self.tmp, chunk_rows=64)
+        for reference, frame in zip(references, (labelled, relabelled)):
+            pd.testing.assert_frame_equal(reopened.load_frame(reference), frame)
+
+        with_dates = self.window(100)
+        with_dates['signal_time'] = with_dates['timestamp']
+        with self.assertRaises(ValueError):
+            self.archive.store_frame('BTCUSDT', '5m', with_dates)
+
+    def test_signal_snapshots_are_restored_by_signal_id(self):
+        writer = TradeJournalWriter(os.path.join(self.tmp, 'journal.csv'), os.path.join(self.tmp, 'signals.csv'),
+                                    os.path.join(self.tmp, 'snapshots'), store_dir=os.path.join(self.tmp, 'store'))
+        writer.logger.disabled = True
+        data = {'5m': self.window(120), '1h': self.window(150, 40)}
+        signals = [{'signal': 'BUY'} for _ in range(3)]
+        for signal in signals:
+            writer.record_signal('strategy', signal, data, symbol='BTCUSDT')
+        writer.stop()
+
+        restored = load_signal_snapshots(signals[1]['signal_id'], store_dir=os.path.join(self.tmp, 'store'),
+                                         snapshots_dir=os.path.join(self.tmp, 'snapshots'))
+        self.assertEqual(set(restored), {'5m', '1h'})
+        pd.testing.assert_frame_equal(restored['5m'], data['5m'])
+        pd.testing.assert_frame_equal(restored['1h'], data['1h'])
+        self.assertEqual(writer.snapshot_archive.get_stats()['bars_written'], 140)
+
+
+if __name__ == "__main__":
+    unittest.main()
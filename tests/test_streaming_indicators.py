@@ -0,0 +1,136 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bot.strategy.utils.indicators import TechnicalIndicators
+from bot.strategy.utils.streaming_indicators import StreamingIndicators
+
+
+def _make_ohlcv(bars: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 25, bars))
+    high = close + rng.uniform(1, 30, bars)
+    low = close - rng.uniform(1, 30, bars)
+    open_ = close + rng.normal(0, 5, bars)
+    volume = rng.uniform(10, 100, bars)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=bars, freq='5min'),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    def setUp(self):
+        self.full = _make_ohlcv(260)
+        self.engine = StreamingIndicators()
+        self.stream = self.engine.stream('BTCUSDT', '5m')
+
+    def assertSeriesClose(self, left, right):
+        np.testing.assert_allclose(left.to_numpy(dtype=float), right.to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_first_call_matches_batch_indicators(self):
+        df = self.full.iloc[:200]
+
+        self.assertSeriesClose(self.stream.calculate_sma(df, 20).value,
+                               TechnicalIndicators.calculate_sma(df, 20).value)
+        self.assertSeriesClose(self.stream.calculate_ema(df, 20).value,
+                               TechnicalIndicators.calculate_ema(df, 20).value)
+        self.assertSeriesClose(self.stream.calculate_rsi(df, 14).value,
+                               TechnicalIndicators.calculate_rsi(df, 14).value)
+        self.assertSeriesClose(self.stream.calculate_atr_series(df, 14).value,
+                               TechnicalIndicators.calculate_atr_series(df, 14).value)
+        self.assertSeriesClose(self.stream.calculate_vwap(df).value,
+                               TechnicalIndicators.calculate_vwap(df).value)
+        self.assertAlmostEqual(self.stream.calculate_atr_safe(df, 14).value,
+                               TechnicalIndicators.calculate_atr_safe(df, 14).value)
+
+        stream_bb = self.stream.calculate_bollinger_bands(df, 20).value
+        batch_bb = TechnicalIndicators.calculate_bollinger_bands(df, 20).value
+        for key in ('upper', 'lower', 'middle', 'position', 'width'):
+            self.assertSeriesClose(stream_bb[key], batch_bb[key])
+
+    def test_new_bars_are_appended_incrementally(self):
+        self.stream.calculate_ema(self.full.iloc[:200], 20)
+        self.stream.calculate_rsi(self.full.iloc[:200], 14)
+
+        # Скользящее окно из 200 баров сдвинулось на 5 баров вперёд
+        window = self.full.iloc[5:205]
+
+        ema = self.stream.calculate_ema(window, 20).value
+        rsi = self.stream.calculate_rsi(window, 14).value
+
+        self.assertSeriesClose(ema, TechnicalIndicators.calculate_ema(window, 20).value)
+        self.assertSeriesClose(rsi, TechnicalIndicators.calculate_rsi(window, 14).value)
+
+        stats = self.stream.get_stats()
+        self.assertEqual(stats['bars_pushed'], 5)
+        self.assertEqual(stats['resets'], 1)
+
+    def test_rolling_window_matches_batch_on_same_frame(self):
+        # Бары, ушедшие из окна, не должны влиять на результат
+        for start in range(0, 60, 7):
+            window = self.full.iloc[start:start + 200]
+
+            self.assertSeriesClose(self.stream.calculate_vwap(window).value,
+                                   TechnicalIndicators.calculate_vwap(window).value)
+            self.assertSeriesClose(self.stream.calculate_vwap(window, 20).value,
+                                   TechnicalIndicators.calculate_vwap(window, 20).value)
+            self.assertSeriesClose(self.stream.calculate_ema(window, 50).value,
+                                   TechnicalIndicators.calculate_ema(window, 50).value)
+            self.assertSeriesClose(self.stream.calculate_rsi(window, 14).value,
+                                   TechnicalIndicators.calculate_rsi(window, 14).value)
+            self.assertSeriesClose(self.stream.calculate_sma(window, 20).value,
+                                   TechnicalIndicators.calculate_sma(window, 20).value)
+            self.assertSeriesClose(self.stream.calculate_atr_series(window, 14).value,
+                                   TechnicalIndicators.calculate_atr_series(window, 14).value)
+            stream_bb = self.stream.calculate_bollinger_bands(window, 20).value
+            batch_bb = TechnicalIndicators.calculate_bollinger_bands(window, 20).value
+            for key in ('upper', 'lower', 'middle', 'position', 'width'):
+                self.assertSeriesClose(stream_bb[key], batch_bb[key])
+
+        self.assertEqual(self.stream.get_stats()['resets'], 1)
+
+    def test_revised_forming_bar_is_recomputed(self):
+        df = self.full.iloc[:200].copy()
+        self.stream.calculate_sma(df, 10)
+        self.stream.calculate_bollinger_bands(df, 20)
+
+        revised = df.copy()
+        revised.loc[revised.index[-1], 'close'] += 50.0
+
+        sma = self.stream.calculate_sma(revised, 10).value
+        bb = self.stream.calculate_bollinger_bands(revised, 20).value
+
+        self.assertSeriesClose(sma, TechnicalIndicators.calculate_sma(revised, 10).value)
+        self.assertSeriesClose(bb['upper'], TechnicalIndicators.calculate_bollinger_bands(revised, 20).value['upper'])
+        self.assertEqual(self.stream.get_stats()['bars_revised'], 1)
+
+    def test_gap_in_history_triggers_rebuild(self):
+        self.stream.calculate_sma(self.full.iloc[:50], 10)
+        later = self.full.iloc[100:200]
+
+        sma = self.stream.calculate_sma(later, 10).value
+
+        self.assertSeriesClose(sma, TechnicalIndicators.calculate_sma(later, 10).value)
+        self.assertEqual(self.stream.get_stats()['resets'], 2)
+
+    def test_invalid_data_returns_invalid_result(self):
+        result = self.stream.calculate_rsi(self.full.iloc[:5], 14)
+
+        self.assertFalse(result.is_valid)
+        self.assertIsNotNone(result.error_message)
+
+    def test_streams_are_isolated_per_symbol_and_timeframe(self):
+        self.assertIs(self.engine.stream('BTCUSDT', '5m'), self.stream)
+        self.assertIsNot(self.engine.stream('BTCUSDT', '1h'), self.stream)
+        self.assertIsNot(self.engine.stream('ETHUSDT', '5m'), self.stream)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from bot.core.trade_journal import TRADE_JOURNAL_SCHEMA, get_journal_store
+from bot.services.telegram_bot import CHARTS_COLUMNS, PROFIT_DETAILS_COLUMNS, TelegramBot
+
+
+class TestProfitDetails(unittest.TestCase):
+    def setUp(self):
+        # Журнал читается из data/journal относительно текущего каталога
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {'timestamp': (now - timedelta(hours=index)).isoformat(), 'signal_id': f"sig_{index}",
+             'strategy': ('alpha', 'beta')[index % 2], 'signal': ('BUY', 'SELL')[index % 2],
+             'entry_price': 100.0 + index, 'tf': '5m', 'comment': 'breakout' if index % 3 else ''}
+            for index in range(6)
+        ]
+        get_journal_store('trade_journal').append(rows)
+
+        self.bot = TelegramBot.__new__(TelegramBot)
+        self.sent = []
+
+        async def authorized(update, context):
+            return True
+
+        async def edit(update, context, text, keyboard=None, parse_mode='MarkdownV2'):
+            self.sent.append(text)
+
+        self.bot._ensure_authorized = authorized
+        self.bot._edit_message_with_keyboard = edit
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_handler_reads_columnar_store(self):
+        self.assertTrue(set(PROFIT_DETAILS_COLUMNS) <= set(TRADE_JOURNAL_SCHEMA))
+        asyncio.run(self.bot._profit_details(None, None))
+
+        text = self.sent[-1]
+        self.assertNotIn('Ошибка', text)
+        self.assertIn('Всего: 6', text)
+        self.assertIn('alpha', text)
+        self.assertIn('breakout: 4', text)
+
+
+    def test_stats_handlers_read_only_the_last_week(self):
+        self.assertTrue(set(CHARTS_COLUMNS) <= set(TRADE_JOURNAL_SCHEMA))
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        get_journal_store('trade_journal').append([
+            {'timestamp': old.isoformat(), 'signal_id': 'sig_old', 'strategy': 'gamma',
+             'signal': 'BUY', 'entry_price': 90.0, 'tf': '1h', 'comment': ''}
+        ])
+
+        asyncio.run(self.bot._charts(None, None))
+        charts = self.sent[-1]
+        asyncio.run(self.bot._analytics(None, None))
+        analytics = self.sent[-1]
+
+        # Всего - по манифесту хранилища, разбивки - только за неделю
+        self.assertIn('Всего сделок: 7', charts)
+        self.assertIn('За неделю: 6', charts)
+        self.assertIn('Покупки: 3', charts)
+        self.assertNotIn('gamma', charts)
+        self.assertIn('Всего сигналов: 7', analytics)
+        self.assertIn('Покупки: 3 (50.0%)', analytics)
+        self.assertNotIn('1h', analytics)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import unittest
+from dataclasses import FrozenInstanceError
+
+from bot.core.thread_safe_state import ThreadSafeBotState
+
+
+class TestThreadSafeBotState(unittest.TestCase):
+    def setUp(self):
+        self.state = ThreadSafeBotState(lock_stripes=4)
+        self.state.logger.disabled = True
+
+    def test_snapshot_is_not_changed_by_later_writes(self):
+        self.state.set_position("BTCUSDT", "Buy", 1.0, entry_price=100.0)
+        snapshot = self.state.get_snapshot()
+
+        self.state.update_position_pnl("BTCUSDT", 110.0)
+        self.state.emergency_stop = True
+
+        self.assertEqual(snapshot.positions["BTCUSDT"].unrealized_pnl, 0.0)
+        self.assertFalse(snapshot.emergency_stop)
+        self.assertEqual(self.state.get_position("BTCUSDT").unrealized_pnl, 10.0)
+        self.assertGreater(self.state.get_snapshot().version, snapshot.version)
+        with self.assertRaises(FrozenInstanceError):
+            snapshot.positions["BTCUSDT"].size = 2.0
+        with self.assertRaises(TypeError):
+            snapshot.positions["ETHUSDT"] = None
+
+    def test_close_position_publishes_position_and_stats_together(self):
+        self.state.set_position("BTCUSDT", "Sell", 2.0, entry_price=100.0)
+        closed = self.state.close_position("BTCUSDT", 95.0)
+
+        self.assertEqual(closed.realized_pnl, 10.0)
+        snapshot = self.state.get_snapshot()
+        self.assertFalse(snapshot.positions["BTCUSDT"].is_active)
+        self.assertEqual((snapshot.global_stats['total_trades'], snapshot.global_stats['total_pnl']), (1, 10.0))
+        self.assertEqual(self.state.validate_state_consistency(), [])
+
+    def test_reads_do_not_wait_for_locked_writer(self):
+        self.state.set_position("BTCUSDT", "Buy", 1.0, entry_price=100.0)
+        lock = self.state._symbol_lock("BTCUSDT")
+        read = threading.Event()
+
+        with lock:
+            reader = threading.Thread(target=lambda: (
+                self.state.get_position("BTCUSDT"), self.state.get_global_stats(), read.set()
+            ))
+            reader.start()
+            self.assertTrue(read.wait(1))
+        reader.join()
+
+    def test_concurrent_writers_keep_all_updates(self):
+        symbols = [f"SYM{index}" for index in range(8)]
+
+        def trade(symbol):
+            for step in range(200):
+                self.state.set_position(symbol, "Buy", 1.0, entry_price=100.0)
+                self.state.update_position_pnl(symbol, 100.0 + step)
+            self.state.close_position(symbol, 101.0)
+            self.state.update_strategy_stats("test", 1.0, signal_strength=0.5)
+
+        threads = [threading.Thread(target=trade, args=(symbol,)) for symbol in symbols]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.state.get_global_stats()
+        self.assertEqual((stats['total_trades'], stats['total_pnl']), (8, 8.0))
+        self.assertEqual(set(self.state.get_all_positions()), set(symbols))
+        self.assertEqual(self.state.get_active_positions(), {})
+        strategy = self.state.get_strategy_stats("test")
+        self.assertEqual((strategy['total_trades'], strategy['signal_strengths']), (8, [0.5] * 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from bot.core.trade_journal import TRADE_JOURNAL_FIELDS, TradeJournalWriter
+
+
+def market_data():
+    frame = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=2, freq='5min'),
+        'open': [1.0, 2.0], 'high': [1.5, 2.5], 'low': [0.5, 1.5], 'close': [1.2, 2.2], 'volume': [10, 20]
+    })
+    return {'5m': frame, '1h': frame, '4h': None}
+
+
+class TestTradeJournalWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.journal = os.path.join(self.tmp, 'trade_journal.csv')
+        self.signals = os.path.join(self.tmp, 'signals_log.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def writer(self, **kwargs):
+        writer = TradeJournalWriter(self.journal, self.signals, os.path.join(self.tmp, 'snapshots'),
+                                    store_dir=os.path.join(self.tmp, 'journal'), **kwargs)
+        writer.logger.disabled = True
+        return writer
+
+    def read(self, path):
+        with open(path, newline='', encoding='utf-8') as handle:
+            return list(csv.DictReader(handle))
+
+    def test_rows_are_written_in_background_and_flushed_on_stop(self):
+        writer = self.writer()
+        signal = {'signal': 'BUY', 'entry_price': 2.2}
+        threads = [
+            threading.Thread(target=writer.record_signal, args=(f"strategy_{i}", dict(signal), market_data()))
+            for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.stop()
+
+        rows = self.read(self.journal)
+        self.assertEqual(len(rows), 40)
+        self.assertEqual({row['tf'] for row in rows}, {'5m', '1h'})
+        self.assertEqual(rows[0]['close'], '2.2')
+        self.assertEqual(len(self.read(self.signals)), 20)
+        stats = writer.get_stats()
+        self.assertEqual((stats['signals_written'], stats['snapshots'], stats['pending']), (20, 40, 0))
+        self.assertFalse(writer.record_signal("late", dict(signal), market_data()))
+        # Одинаковые свечи 20 сигналов сохранены в архиве один раз
+        self.assertEqual(writer.snapshot_archive.get_stats()['bars_written'], 4)
+
+    def test_signal_id_is_assigned_on_caller_thread(self):
+        writer = self.writer()
+        signal = {'signal': 'SELL'}
+        writer.record_signal("s", signal, market_data())
+        self.assertTrue(signal['signal_id'].startswith('sig_'))
+        self.assertTrue(writer.flush())
+        self.assertEqual(self.read(self.journal)[0]['signal_id'], signal['signal_id'])
+        writer.stop()
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = self.writer(max_queue=1)
+        writer.start = lambda: None  # фоновый поток не запущен: очередь не разбирается
+        self.assertTrue(writer.record_signal("s", {'signal': 'BUY'}, {}))
+        self.assertFalse(writer.record_signal("s", {'signal': 'BUY'}, {}))
+        self.assertEqual(writer.get_stats()['dropped'], 1)
+
+    def test_legacy_schema_is_migrated_once_at_start(self):
+        with open(self.journal, 'w', newline='', encoding='utf-8') as handle:
+            handle.write("timestamp,strategy,signal\n2024-01-01,old,BUY\n")
+
+        writer = self.writer()
+        writer.record_signal("new", {'signal': 'SELL'}, market_data())
+        writer.stop()
+
+        with open(self.journal, newline='', encoding='utf-8') as handle:
+            self.assertEqual(next(csv.reader(handle)), TRADE_JOURNAL_FIELDS)
+        rows = self.read(self.journal)
+        self.assertEqual([row['strategy'] for row in rows], ['old', 'new', 'new'])
+        self.assertTrue(rows[0]['signal_id'].startswith('legacy_'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from bot.strategy.utils.ttl_cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60, timer=self.timer)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_entries_expire_lazily(self):
+        cache = TTLCache(maxsize=10, ttl=30, timer=self.timer)
+        cache.put('a', 1)
+        self.timer.now += 29
+        self.assertEqual(cache.get('a'), 1)
+
+        self.timer.now += 2
+        self.assertIsNone(cache.get('a'))
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 1, 1))
+
+    def test_put_purges_expired_entries_first(self):
+        cache = TTLCache(maxsize=2, ttl=30, timer=self.timer)
+        cache.put('old', 1)
+        self.timer.now += 20
+        cache.put('fresh', 2)
+        self.timer.now += 15
+        cache.put('new', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('fresh'), 2)
+        self.assertEqual(cache.get_stats()['evictions'], 0)
+
+    def test_overwrite_refreshes_ttl(self):
+        cache = TTLCache(maxsize=2, ttl=30, timer=self.timer)
+        cache.put('a', 1)
+        self.timer.now += 20
+        cache.put('a', 2)
+        self.timer.now += 20
+        cache.put('b', 3)
+
+        self.assertEqual(cache.get('a'), 2)
+
+    def test_size_in_bytes_bound(self):
+        cache = TTLCache(maxsize=100, ttl=60, max_bytes=20_000, timer=self.timer)
+        for key in range(5):
+            cache.put(key, np.zeros(1000))  # 8 000 байт
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size_bytes, 20_000)
+        self.assertIsNone(cache.get(0))
+
+        cache.put('huge', np.zeros(10_000))
+        self.assertIsNone(cache.get('huge'))
+
+    def test_expiry_queue_stays_bounded_under_rewrites(self):
+        cache = TTLCache(maxsize=4, ttl=60, timer=self.timer)
+        for i in range(1000):
+            cache.put(i % 3, i)
+        self.assertLessEqual(len(cache._expiry), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bot.strategy.utils.volume_at_price import OVERLAP, TOUCH, profile_arrays, volume_at_price
+from bot.strategy.utils.volume_profile import VolumeProfileAnalyzer
+
+
+def _make_ohlcv(bars: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 20, bars))
+    df = pd.DataFrame({
+        'high': close + rng.uniform(1, 40, bars),
+        'low': close - rng.uniform(1, 40, bars),
+        'close': close,
+        'volume': rng.uniform(10, 500, bars),
+    })
+    # Свеча нулевой ширины - отдельная ветка в прежнем алгоритме
+    df.loc[10, 'high'] = df.loc[10, 'low']
+    return df
+
+
+def _reference_overlap(df, price_bins):
+    result = np.zeros(len(price_bins) - 1)
+    for _, row in df.iterrows():
+        low, high = row['low'], row['high']
+        if low >= high:
+            high = low * 1.0001
+        for i in range(len(price_bins) - 1):
+            overlap = min(high, price_bins[i + 1]) - max(low, price_bins[i])
+            if overlap > 0:
+                result[i] += row['volume'] * overlap / (high - low)
+    return result
+
+
+def _reference_touch(df, price_bins):
+    levels = len(price_bins) - 1
+    result = np.zeros(levels)
+    for _, row in df.iterrows():
+        low_idx = max(0, min(np.digitize(row['low'], price_bins) - 1, levels - 1))
+        high_idx = max(0, min(np.digitize(row['high'], price_bins) - 1, levels - 1))
+        for idx in range(low_idx, high_idx + 1):
+            result[idx] += row['volume'] / (high_idx - low_idx + 1)
+    return result
+
+
+class TestVolumeAtPrice(unittest.TestCase):
+    def setUp(self):
+        self.df = _make_ohlcv(300)
+        self.price_bins = np.linspace(self.df['low'].min(), self.df['high'].max(), 51)
+
+    def test_overlap_matches_row_by_row_distribution(self):
+        result = volume_at_price(*profile_arrays(self.df), self.price_bins, method=OVERLAP)
+
+        np.testing.assert_allclose(result, _reference_overlap(self.df, self.price_bins), rtol=1e-9, atol=1e-7)
+
+    def test_touch_matches_row_by_row_distribution(self):
+        result = volume_at_price(*profile_arrays(self.df), self.price_bins, method=TOUCH)
+
+        np.testing.assert_allclose(result, _reference_touch(self.df, self.price_bins), rtol=1e-12, atol=1e-9)
+
+    def test_total_volume_is_preserved(self):
+        result = volume_at_price(*profile_arrays(self.df), self.price_bins, method=TOUCH)
+
+        self.assertAlmostEqual(result.sum(), self.df['volume'].sum(), places=6)
+
+    def test_empty_bins_stay_exact_zero(self):
+        df = pd.DataFrame({
+            'high': [101.0, 102.0, 201.0, 202.0],
+            'low': [100.0, 100.5, 200.0, 200.5],
+            'close': [100.5, 101.0, 200.5, 201.0],
+            'volume': [10.0, 20.0, 30.0, 40.0],
+        })
+        price_bins = np.linspace(100.0, 202.0, 21)
+
+        result = volume_at_price(*profile_arrays(df), price_bins, method=OVERLAP)
+
+        self.assertTrue((result[3:18] == 0.0).all())
+
+    def test_analyzer_profile_uses_kernel(self):
+        profile = VolumeProfileAnalyzer(num_bins=50).calculate_profile(self.df)
+        expected = _reference_overlap(self.df, self.price_bins)
+        centers = (self.price_bins[:-1] + self.price_bins[1:]) / 2
+
+        self.assertAlmostEqual(profile.poc, centers[np.argmax(expected)])
+        self.assertAlmostEqual(profile.total_volume, expected.sum(), places=4)
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            volume_at_price(*profile_arrays(self.df), self.price_bins, method='unknown')
+
+
+if __name__ == "__main__":
+    unittest.main()
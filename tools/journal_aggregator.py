@@ -4,16 +4,29 @@
 from __future__ import annotations
 
 import argparse
+import os
+import sys
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.core.trade_journal import get_journal_store, read_journal_csv
+
 
 def load_csv(path: Path) -> pd.DataFrame:
-    if not path.exists():
-        return pd.DataFrame()
-    return pd.read_csv(path)
+    return read_journal_csv(str(path))
+
+
+def load_table(path: Path, table: str, store_dir: Optional[Path]) -> pd.DataFrame:
+    """Таблица журнала из колоночного хранилища; CSV - если хранилище пусто"""
+    if store_dir is not None:
+        store = get_journal_store(table, str(store_dir))
+        if store.segments():
+            return store.query()
+    return load_csv(path)
 
 
 def _prepare_output_dir(directory: Path) -> None:
@@ -24,9 +37,10 @@ def build_datasets(
     journal_path: Path,
     signals_path: Path,
     output_dir: Path,
+    store_dir: Optional[Path] = None,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    journal_df = load_csv(journal_path)
-    signals_df = load_csv(signals_path)
+    journal_df = load_table(journal_path, 'trade_journal', store_dir)
+    signals_df = load_table(signals_path, 'signals', store_dir)
 
     if journal_df.empty and signals_df.empty:
         raise RuntimeError("Нет данных для агрегации: отсутствуют trade_journal.csv и signals_log.csv")
@@ -95,6 +109,7 @@ def main() -> None:
     parser.add_argument('--journal', default='data/trade_journal.csv', help='Путь к trade_journal.csv')
     parser.add_argument('--signals', default='data/signals_log.csv', help='Путь к signals_log.csv')
     parser.add_argument('--output', default='data/derived', help='Каталог для агрегированных данных')
+    parser.add_argument('--store', default='data/journal', help='Каталог колоночного хранилища журнала')
 
     args = parser.parse_args()
 
@@ -103,7 +118,7 @@ def main() -> None:
     output_dir = Path(args.output)
 
     try:
-        build_datasets(journal_path, signals_path, output_dir)
+        build_datasets(journal_path, signals_path, output_dir, Path(args.store))
         print(f"✓ Файлы с агрегированными данными сохранены в {output_dir}")
     except RuntimeError as err:
         print(f"⚠️ {err}")